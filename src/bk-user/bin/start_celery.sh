@@ -1,4 +1,11 @@
 #!/bin/bash
 
+# 启用 worker 指标暴露服务时，prefork 子进程的指标需要通过 prometheus_client 多进程模式汇总
+if [ "${CELERY_WORKER_METRICS_PORT:-0}" != "0" ]; then
+    export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/bkuser_prometheus_multiproc}"
+    rm -rf "${PROMETHEUS_MULTIPROC_DIR}"
+    mkdir -p "${PROMETHEUS_MULTIPROC_DIR}"
+fi
+
 command="celery -A bkuser.celery worker -l ${CELERY_LOG_LEVEL:-INFO} --concurrency ${CELERY_WORKER_CONCURRENCY:-8}"
 exec bash -c "$command"
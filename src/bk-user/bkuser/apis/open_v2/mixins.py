@@ -25,6 +25,7 @@ from bkuser.apis.open_v2.renderers import BkLegacyApiJSONRenderer
 from bkuser.apps.data_source.constants import DataSourceTypeEnum
 from bkuser.apps.data_source.models import DataSource
 from bkuser.apps.tenant.constants import CollaborationStrategyStatus
+from bkuser.apps.tenant.data_version import TenantDataVersion
 from bkuser.apps.tenant.models import CollaborationStrategy, Tenant, TenantUserIDGenerateConfig
 from bkuser.common.cache import cachedmethod
 
@@ -38,7 +39,7 @@ class LegacyOpenApiCommonMixin:
 class DefaultTenantMixin:
     """默认租户 Mixin"""
 
-    @cachedmethod(timeout=60 * 60)
+    @cachedmethod(timeout=60 * 60, single_flight=True)
     def _get_default_tenant(self) -> Tenant:
         return Tenant.objects.filter(is_default=True).first()
 
@@ -46,7 +47,11 @@ class DefaultTenantMixin:
     def default_tenant(self) -> Tenant:
         return self._get_default_tenant()
 
-    @cachedmethod(timeout=60 * 60)
+    def get_data_version(self) -> str:
+        """默认租户数据版本（用于生成缓存 Key & ETag）"""
+        return f"{self.default_tenant.id}:{TenantDataVersion.get(self.default_tenant.id)}"
+
+    @cachedmethod(timeout=60 * 60, single_flight=True)
     def get_real_data_source_ids(self) -> List[int]:
         """获取默认租户真实用户数据源（含自己的 + 协同过来的），兼容 V2 的 OpenAPI 专用"""
         # 接受方确认过的数据源，就是认为是有数据的
@@ -62,7 +67,7 @@ class DefaultTenantMixin:
             )
         )
 
-    @cachedmethod(timeout=60 * 60)
+    @cachedmethod(timeout=60 * 60, single_flight=True)
     def get_data_source_ids(self) -> List[int]:
         """获取默认租户所有用户数据源（含自己的 + 协同过来的），兼容 V2 的 OpenAPI 专用"""
         # 接受方确认过的数据源，就是认为是有数据的
@@ -84,7 +89,7 @@ class DefaultTenantMixin:
             ).values_list("id", flat=True)
         )
 
-    @cachedmethod(timeout=60 * 60)
+    @cachedmethod(timeout=60 * 60, single_flight=True)
     def get_collaboration_field_mapping(self) -> Dict[Tuple[str, str], str]:
         """
         默认租户的所有协同租户字段映射
@@ -99,7 +104,7 @@ class DefaultTenantMixin:
             for mp in strategy.target_config["field_mapping"]
         }
 
-    @cachedmethod(timeout=60 * 60)
+    @cachedmethod(timeout=60 * 60, single_flight=True)
     def data_source_id_to_tenant_id_map(self) -> Dict[int, str]:
         return {ds.id: ds.owner_tenant_id for ds in DataSource.objects.all().only("id", "owner_tenant_id")}
 
@@ -107,7 +112,7 @@ class DefaultTenantMixin:
 class DataSourceDomainMixin:
     """数据源 Domain Mixin"""
 
-    @cachedmethod(timeout=60 * 60)
+    @cachedmethod(timeout=60 * 60, single_flight=True)
     def data_source_to_domain_map(self) -> Dict[Tuple[int, str], str]:
         return {
             (cfg.data_source_id, cfg.target_tenant.id): cfg.domain for cfg in TenantUserIDGenerateConfig.objects.all()
@@ -22,11 +22,13 @@ from bkuser.apis.open_v2.pagination import LegacyOpenApiPagination
 from bkuser.apis.open_v2.serializers.categories import CategoriesListInputSLZ, CategoriesListOutputSLZ
 from bkuser.apps.data_source.models import DataSource
 from bkuser.apps.tenant.models import Tenant, TenantUserIDGenerateConfig
+from bkuser.common.views import etag_by_data_version
 
 
 class CategoriesListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin, generics.ListAPIView):
     pagination_class = LegacyOpenApiPagination
 
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         slz = CategoriesListInputSLZ(data=request.query_params)
         slz.is_valid(raise_exception=True)
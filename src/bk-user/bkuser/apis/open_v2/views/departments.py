@@ -31,6 +31,7 @@ from bkuser.apis.open_v2.serializers.departments import (
     DepartmentRetrieveInputSLZ,
     ProfileDepartmentListInputSLZ,
 )
+from bkuser.apps.data_source.cache import DataSourceOrgTreeSnapshot, DataSourceOrgTreeSnapshotCache
 from bkuser.apps.data_source.constants import DataSourceTypeEnum
 from bkuser.apps.data_source.models import (
     DataSourceDepartment,
@@ -39,7 +40,7 @@ from bkuser.apps.data_source.models import (
 )
 from bkuser.apps.tenant.models import TenantDepartment, TenantUser
 from bkuser.common.error_codes import error_codes
-from bkuser.utils.tree import Tree
+from bkuser.common.views import etag_by_data_version
 
 
 class DepartmentListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin, generics.ListAPIView):
@@ -47,6 +48,7 @@ class DepartmentListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin, generics.L
 
     pagination_class = LegacyOpenApiPagination
 
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         slz = DepartmentListInputSLZ(data=request.query_params)
         slz.is_valid(raise_exception=True)
@@ -73,9 +75,10 @@ class DepartmentListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin, generics.L
                 "data_source_department_id", "tenant_id", "id"
             )
         }
-        # {数据源部门 ID: 数据源部门名称}
-        dept_id_name_map = dict(DataSourceDepartment.objects.values_list("id", "name"))
-        rel_tree = Tree(DataSourceDepartmentRelation.objects.values_list("department_id", "parent_id"))
+        # {数据源 ID: 组织树快照}，用于计算部门 full_name & 祖先 & 孩子部门
+        snapshots = DataSourceOrgTreeSnapshotCache().batch_get(
+            dept.data_source_department.data_source_id for dept in tenant_depts
+        )
 
         resp_data = []
         for dept in tenant_depts:
@@ -98,34 +101,30 @@ class DepartmentListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin, generics.L
                 continue
 
             # 没有指定 fields 的时候，额外返回 full_name & children 字段
-            dept_full_name = "/".join(
-                [
-                    dept_id_name_map[x]
-                    for x in rel_tree.get_ancestors(dept.data_source_department_id, include_self=True)
-                ]
-            )
+            snapshot = snapshots[dept.data_source_department.data_source_id]
+            dept_full_name = snapshot.get_org_path(dept.data_source_department_id)
             dept_info["full_name"] = dept_full_name
-            dept_info["has_children"] = bool(rel_tree.get_children(dept.data_source_department_id))
+            dept_info["has_children"] = bool(snapshot.get_children(dept.data_source_department_id))
 
             # 若指定 with_ancestors == True，则额外返回祖先 & 孩子部门信息（为什么需要孩子信息？总之老的逻辑是这样的）
             if with_ancestors:
                 dept_info["ancestors"] = [
-                    {"id": tenant_dept_id_map[(id, dept.tenant_id)], "name": dept_id_name_map.get(id, "--")}
-                    for id in rel_tree.get_ancestors(dept.data_source_department_id)
+                    {"id": tenant_dept_id_map[(id, dept.tenant_id)], "name": snapshot.name_map.get(id, "--")}
+                    for id in snapshot.get_ancestors(dept.data_source_department_id)
                     if (id, dept.tenant_id) in tenant_dept_id_map
                 ]
                 children = []
-                for child_dept_id in rel_tree.get_children(dept.data_source_department_id):
+                for child_dept_id in snapshot.get_children(dept.data_source_department_id):
                     if (child_dept_id, dept.tenant_id) not in tenant_dept_id_map:
                         continue
 
-                    child_dept_name = dept_id_name_map.get(child_dept_id, "--")
+                    child_dept_name = snapshot.name_map.get(child_dept_id, "--")
                     children.append(
                         {
                             "id": tenant_dept_id_map[(child_dept_id, dept.tenant_id)],
                             "name": child_dept_name,
                             "full_name": f"{dept_full_name}/{child_dept_name}",
-                            "has_children": bool(rel_tree.get_children(child_dept_id)),
+                            "has_children": bool(snapshot.get_children(child_dept_id)),
                         }
                     )
 
@@ -228,35 +227,33 @@ class DepartmentRetrieveApi(LegacyOpenApiCommonMixin, DefaultTenantMixin, generi
         resp_data["parent"] = self._get_dept_parent_id(tenant_dept, dept_relation)
         resp_data["level"] = self._get_dept_tree_level(dept_relation)
 
-        tenant_dept_full_name = self._get_dept_full_name(tenant_dept, dept_relation)
-        children = self._get_dept_children(tenant_dept, tenant_dept_full_name)
+        snapshot = DataSourceOrgTreeSnapshotCache().get(tenant_dept.data_source_department.data_source_id)
+        tenant_dept_full_name = self._get_dept_full_name(tenant_dept, snapshot)
+        children = self._get_dept_children(tenant_dept, tenant_dept_full_name, snapshot)
         resp_data["full_name"] = tenant_dept_full_name
         resp_data["has_children"] = bool(children)
         resp_data["children"] = children
 
         if params.get("with_ancestors"):
-            resp_data["ancestors"] = self._get_dept_ancestors(tenant_dept, dept_relation)
+            resp_data["ancestors"] = self._get_dept_ancestors(tenant_dept, snapshot)
 
         return Response(resp_data)
 
     @staticmethod
-    def _get_dept_full_name(tenant_dept: TenantDepartment, dept_relation: DataSourceDepartmentRelation) -> str:
+    def _get_dept_full_name(tenant_dept: TenantDepartment, snapshot: DataSourceOrgTreeSnapshot) -> str:
         """获取部门组织路径信息"""
         # TODO 协同后续支持指定组织范围的话，不能直接吐出到根部门的路径
-        if not dept_relation:
+        if tenant_dept.data_source_department_id not in snapshot:
             return tenant_dept.data_source_department.name
 
-        return "/".join(dept_relation.get_ancestors(include_self=True).values_list("department__name", flat=True))
+        return snapshot.get_org_path(tenant_dept.data_source_department_id)
 
     @staticmethod
-    def _get_dept_ancestors(tenant_dept: TenantDepartment, dept_relation: DataSourceDepartmentRelation) -> List[Dict]:
+    def _get_dept_ancestors(tenant_dept: TenantDepartment, snapshot: DataSourceOrgTreeSnapshot) -> List[Dict]:
         """获取租户部门的所有祖先部门信息"""
-        if not dept_relation:
-            return []
-
         ancestors = [
-            {"id": rel.department.id, "name": rel.department.name}
-            for rel in dept_relation.get_ancestors(include_self=False).select_related("department")
+            {"id": dept_id, "name": snapshot.get_name(dept_id)}
+            for dept_id in snapshot.get_ancestors(tenant_dept.data_source_department_id)
         ]
         dept_id_map = dict(
             TenantDepartment.objects.filter(
@@ -269,34 +266,29 @@ class DepartmentRetrieveApi(LegacyOpenApiCommonMixin, DefaultTenantMixin, generi
         ]
 
     @staticmethod
-    def _get_dept_children(tenant_dept: TenantDepartment, dept_full_name: str) -> List[Dict]:
+    def _get_dept_children(
+        tenant_dept: TenantDepartment, dept_full_name: str, snapshot: DataSourceOrgTreeSnapshot
+    ) -> List[Dict]:
         """获取租户部门子部门信息"""
-        child_dept_relations = DataSourceDepartmentRelation.objects.filter(
-            parent_id=tenant_dept.data_source_department_id,
-        ).select_related("department")
-
-        if not child_dept_relations.exists():
+        child_dept_ids = snapshot.get_children(tenant_dept.data_source_department_id)
+        if not child_dept_ids:
             return []
 
-        grandchild_dept_relations = DataSourceDepartmentRelation.objects.filter(
-            parent_id__in=[rel.department_id for rel in child_dept_relations],
-        )
-        has_grand_child_map = {rel.parent_id: True for rel in grandchild_dept_relations}
         dept_id_map = dict(
             TenantDepartment.objects.filter(
-                data_source_department_id__in=[rel.department_id for rel in child_dept_relations],
+                data_source_department_id__in=child_dept_ids,
                 tenant_id=tenant_dept.tenant_id,
             ).values_list("data_source_department_id", "id")
         )
         return [
             {
-                "id": dept_id_map[rel.department_id],
-                "name": rel.department.name,
-                "full_name": f"{dept_full_name}/{rel.department.name}",
-                "has_children": has_grand_child_map.get(rel.department_id, False),
+                "id": dept_id_map[dept_id],
+                "name": snapshot.get_name(dept_id),
+                "full_name": f"{dept_full_name}/{snapshot.get_name(dept_id)}",
+                "has_children": bool(snapshot.get_children(dept_id)),
             }
-            for rel in child_dept_relations
-            if rel.department_id in dept_id_map
+            for dept_id in child_dept_ids
+            if dept_id in dept_id_map
         ]
 
     @staticmethod
@@ -329,6 +321,7 @@ class DepartmentChildrenListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin, ge
 
     pagination_class = LegacyOpenApiPagination
 
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         # 注：兼容 v2 的 OpenAPI 只提供默认租户的数据（包括默认租户本身数据源的数据 & 其他租户协同过来的数据）
         tenant_dept = TenantDepartment.objects.filter(
@@ -361,6 +354,7 @@ class ProfileDepartmentListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin, gen
 
     pagination_class = LegacyOpenApiPagination
 
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         slz = ProfileDepartmentListInputSLZ(data=request.query_params)
         slz.is_valid(raise_exception=True)
@@ -397,11 +391,13 @@ class ProfileDepartmentListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin, gen
             rel.department
             for rel in DataSourceDepartmentUserRelation.objects.filter(
                 user=tenant_user.data_source_user,
-            )
+            ).select_related("department")
         ]
         if not departments:
             return []
 
+        snapshot = DataSourceOrgTreeSnapshotCache().get(tenant_user.data_source_user.data_source_id)
+
         dept_id_map = dict(
             TenantDepartment.objects.filter(
                 data_source_department__in=departments, tenant_id=tenant_user.tenant_id
@@ -415,47 +411,49 @@ class ProfileDepartmentListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin, gen
             dept_info = {
                 "id": dept_id_map[dept.id],
                 "name": dept.name,
-                "full_name": self._get_dept_full_name(dept),
+                "full_name": self._get_dept_full_name(dept, snapshot),
                 "order": idx,
             }
             if with_ancestors:
-                dept_info["family"] = self._get_dept_ancestors(dept, dept_info["full_name"], tenant_user.tenant_id)
+                dept_info["family"] = self._get_dept_ancestors(
+                    dept, dept_info["full_name"], tenant_user.tenant_id, snapshot
+                )
 
             user_dept_infos.append(dept_info)
 
         return user_dept_infos
 
     @staticmethod
-    def _get_dept_ancestors(dept: DataSourceDepartment, dept_full_name: str, tenant_id: str) -> List[Dict]:
+    def _get_dept_ancestors(
+        dept: DataSourceDepartment, dept_full_name: str, tenant_id: str, snapshot: DataSourceOrgTreeSnapshot
+    ) -> List[Dict]:
         """获取某个部门祖先信息"""
-        dept_relation = DataSourceDepartmentRelation.objects.filter(department=dept).first()
-        if not dept_relation:
+        ancestor_ids = snapshot.get_ancestors(dept.id)
+        if not ancestor_ids:
             return []
 
-        ancestors = dept_relation.get_ancestors().select_related("department")
         dept_id_map = dict(
             TenantDepartment.objects.filter(
-                data_source_department_id__in=[rel.department_id for rel in ancestors], tenant_id=tenant_id
+                data_source_department_id__in=ancestor_ids, tenant_id=tenant_id
             ).values_list("data_source_department_id", "id")
         )
-        ancestor_count = ancestors.count()
+        ancestor_count = len(ancestor_ids)
         return [
             {
-                "id": dept_id_map[dept.department_id],
-                "name": dept.department.name,
+                "id": dept_id_map[dept_id],
+                "name": snapshot.get_name(dept_id),
                 "full_name": dept_full_name.rsplit("/", ancestor_count - idx + 1)[0],
                 "order": idx,
             }
-            for idx, dept in enumerate(ancestors, start=1)
-            if dept.department_id in dept_id_map
+            for idx, dept_id in enumerate(ancestor_ids, start=1)
+            if dept_id in dept_id_map
         ]
 
     @staticmethod
-    def _get_dept_full_name(dept: DataSourceDepartment) -> str:
+    def _get_dept_full_name(dept: DataSourceDepartment, snapshot: DataSourceOrgTreeSnapshot) -> str:
         """获取部门组织路径信息"""
-        dept_relation = DataSourceDepartmentRelation.objects.filter(department=dept).first()
-        if not dept_relation:
+        if dept.id not in snapshot:
             return dept.name
 
         # TODO 协同后续支持指定组织范围的话，不能直接吐出到根部门的路径
-        return "/".join(dept_relation.get_ancestors(include_self=True).values_list("department__name", flat=True))
+        return snapshot.get_org_path(dept.id)
@@ -31,6 +31,7 @@ from bkuser.apis.open_v2.serializers.edges import (
 from bkuser.apps.data_source.models import DataSourceDepartmentUserRelation, DataSourceUserLeaderRelation
 from bkuser.apps.tenant.models import TenantDepartment
 from bkuser.common.cache import Cache, CacheEnum, CacheKeyPrefixEnum
+from bkuser.common.views import etag_by_data_version
 
 
 class DepartmentProfileRelationListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin, generics.ListAPIView):
@@ -48,6 +49,7 @@ class DepartmentProfileRelationListApi(LegacyOpenApiCommonMixin, DefaultTenantMi
             .order_by("id")
         )
 
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         slz = DepartmentProfileRelationListInputSLZ(data=request.query_params)
         slz.is_valid(raise_exception=True)
@@ -69,8 +71,9 @@ class DepartmentProfileRelationListApi(LegacyOpenApiCommonMixin, DefaultTenantMi
     def _get_with_no_page(self):
         """支持不分页的数据拉取，需要支持 Redis 缓存结果，出于性能考虑，不使用 OutputSLZ"""
         cache = Cache(CacheEnum.REDIS, CacheKeyPrefixEnum.V2_API)
-        # 如果缓存中存在，则直接返回
-        if relations := cache.get(self.cache_key):
+        # 缓存 Key 包含默认租户的数据版本号，数据变更后缓存自动失效；如果缓存中存在，则直接返回
+        cache_key = f"{self.cache_key}:{self.get_data_version()}"
+        if (relations := cache.get(cache_key)) is not None:
             return Response(relations)
 
         relations = self._convert(
@@ -79,7 +82,7 @@ class DepartmentProfileRelationListApi(LegacyOpenApiCommonMixin, DefaultTenantMi
                 for rel in self.get_queryset()
             ]
         )
-        cache.set(self.cache_key, relations, timeout=self.cache_timeout)
+        cache.set(cache_key, relations, timeout=self.cache_timeout)
         return Response(relations)
 
     def _convert(self, data_source_dept_user_relations: List[Dict]) -> List[Dict]:
@@ -111,6 +114,7 @@ class ProfileLeaderRelationListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin,
             .order_by("id")
         )
 
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         slz = ProfileLeaderRelationListInputSLZ(data=request.query_params)
         slz.is_valid(raise_exception=True)
@@ -131,13 +135,14 @@ class ProfileLeaderRelationListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin,
     def _get_with_no_page(self):
         """支持不分页的数据拉取，需要支持 Redis 缓存结果，出于性能考虑，不使用 OutputSLZ"""
         cache = Cache(CacheEnum.REDIS, CacheKeyPrefixEnum.V2_API)
-        # 如果缓存中存在，则直接返回
-        if relations := cache.get(self.cache_key):
+        # 缓存 Key 包含默认租户的数据版本号，数据变更后缓存自动失效；如果缓存中存在，则直接返回
+        cache_key = f"{self.cache_key}:{self.get_data_version()}"
+        if (relations := cache.get(cache_key)) is not None:
             return Response(relations)
 
         relations = [
             {"id": rel.id, "from_profile_id": rel.user_id, "to_profile_id": rel.leader_id}
             for rel in self.get_queryset()
         ]
-        cache.set(self.cache_key, relations, timeout=self.cache_timeout)
+        cache.set(cache_key, relations, timeout=self.cache_timeout)
         return Response(relations)
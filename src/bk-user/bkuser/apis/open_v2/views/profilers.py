@@ -16,6 +16,7 @@
 # to the current version of the project delivered to anyone in the future.
 
 import datetime
+import hashlib
 import operator
 from collections import defaultdict
 from functools import reduce
@@ -26,8 +27,6 @@ from blue_krill.data_types.enum import EnumField, StructuredEnum
 from django.conf import settings
 from django.db.models import Q, QuerySet
 from django.http import Http404
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from rest_framework import generics
 from rest_framework.response import Response
 
@@ -39,6 +38,7 @@ from bkuser.apis.open_v2.serializers.profilers import (
     ProfileListInputSLZ,
     ProfileRetrieveInputSLZ,
 )
+from bkuser.apps.data_source.cache import DataSourceOrgTreeSnapshotCache
 from bkuser.apps.data_source.constants import DataSourceTypeEnum
 from bkuser.apps.data_source.models import (
     DataSourceDepartmentRelation,
@@ -46,12 +46,11 @@ from bkuser.apps.data_source.models import (
     DataSourceUserLeaderRelation,
 )
 from bkuser.apps.tenant.constants import TenantUserStatus
-from bkuser.apps.tenant.models import DataSourceDepartment, TenantDepartment, TenantUser
+from bkuser.apps.tenant.models import TenantDepartment, TenantUser
 from bkuser.biz.tenant import TenantUserHandler
-from bkuser.common.cache import CacheEnum
+from bkuser.common.cache import Cache, CacheEnum, CacheKeyPrefixEnum
 from bkuser.common.error_codes import error_codes
-from bkuser.common.views import ExcludePatchAPIViewMixin
-from bkuser.utils.tree import Tree
+from bkuser.common.views import ExcludePatchAPIViewMixin, etag_by_data_version
 
 
 class ProfileStatusEnum(str, StructuredEnum):
@@ -349,10 +348,10 @@ class TenantUserListToUserInfosMixin(DefaultTenantMixin, DataSourceDomainMixin):
         for i in tenant_departments:
             tenant_dept_map[i.data_source_department_id].append(i)
 
-        # dept_id_name_map 和 rel_tree 用于计算部门 full_name
-        # {数据源部门 ID: 数据源部门名称}
-        dept_id_name_map = dict(DataSourceDepartment.objects.values_list("id", "name"))
-        rel_tree = Tree(DataSourceDepartmentRelation.objects.values_list("department_id", "parent_id"))
+        # {数据源 ID: 组织树快照}，用于计算部门 full_name
+        snapshots = DataSourceOrgTreeSnapshotCache().batch_get(
+            dept.data_source_department.data_source_id for dept in tenant_departments
+        )
 
         # 基于 部门 必须与用户同一个租户才是有效的，这里以 (tenant_id, data_source_user_id) 作为 key
         dept_map: Dict[Tuple[str, int], List[Dict]] = defaultdict(list)
@@ -364,13 +363,8 @@ class TenantUserListToUserInfosMixin(DefaultTenantMixin, DataSourceDomainMixin):
                         "id": tenant_dept.id,
                         "name": tenant_dept.data_source_department.name,
                         # TODO: 协同支持指定范围后，是以“伪根”开始，并不是原始数据源的根，需要调整
-                        "full_name": "/".join(
-                            [
-                                dept_id_name_map[i]
-                                for i in rel_tree.get_ancestors(
-                                    tenant_dept.data_source_department.id, include_self=True
-                                )
-                            ]
+                        "full_name": snapshots[tenant_dept.data_source_department.data_source_id].get_org_path(
+                            tenant_dept.data_source_department.id
                         ),
                         "order": idx + 1,
                     }
@@ -384,8 +378,23 @@ class ProfileListApi(LegacyOpenApiCommonMixin, TenantUserListToUserInfosMixin, g
 
     pagination_class = LegacyOpenApiPagination
 
-    @method_decorator(cache_page(cache=CacheEnum.REDIS.value, timeout=settings.OPEN_API_V2_LIST_USER_CACHE_TIMEOUT))
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
+        # 缓存 Key 包含默认租户的数据版本号，数据变更（同步，页面编辑，协同变更等）后缓存自动失效
+        cache = Cache(CacheEnum.REDIS, CacheKeyPrefixEnum.V2_API)
+        cache_key = self._make_cache_key(request)
+        if (data := cache.get(cache_key)) is not None:
+            return Response(data)
+
+        response = self._list(request)
+        cache.set(cache_key, response.data, timeout=settings.OPEN_API_V2_LIST_USER_CACHE_TIMEOUT)
+        return response
+
+    def _make_cache_key(self, request) -> str:
+        full_path_hash = hashlib.md5(request.get_full_path().encode(), usedforsecurity=False).hexdigest()
+        return f"list_profiles:{self.get_data_version()}:{full_path_hash}"
+
+    def _list(self, request) -> Response:
         slz = ProfileListInputSLZ(data=request.query_params)
         slz.is_valid(raise_exception=True)
         params = slz.validated_data
@@ -680,7 +689,7 @@ class ProfileRetrieveApi(
         ).select_related("data_source_department")
 
         # 部门的 full_name
-        full_name_map = self._get_department_full_name_map(department_ids)
+        full_name_map = self._get_department_full_name_map(tenant_user.data_source_user.data_source_id, department_ids)
 
         return [
             {
@@ -693,16 +702,11 @@ class ProfileRetrieveApi(
         ]
 
     @staticmethod
-    def _get_department_full_name_map(department_ids: List[int]) -> Dict[int, str]:
+    def _get_department_full_name_map(data_source_id: int, department_ids: List[int]) -> Dict[int, str]:
         """获取部门的 full name"""
-        # 查询每个数据源部门的 MPTT 关系，用于获取祖先，进而便于后面获取部门的 full_name
-        dept_relations = DataSourceDepartmentRelation.objects.filter(department_id__in=department_ids)
-        return {
-            rel.department_id: "/".join(
-                rel.get_ancestors(include_self=True).values_list("department__name", flat=True)
-            )
-            for rel in dept_relations
-        }
+        # 用户与其所属部门必定属于同一数据源，直接从该数据源的组织树快照中获取即可
+        snapshot = DataSourceOrgTreeSnapshotCache().get(data_source_id)
+        return {dept_id: snapshot.get_org_path(dept_id) for dept_id in department_ids if dept_id in snapshot}
 
     def _build_user_info(self, tenant_user: TenantUser, fields: List[str]) -> Dict[str, Any]:
         """生成用户信息"""
@@ -773,6 +777,7 @@ class DepartmentProfileListApi(LegacyOpenApiCommonMixin, TenantUserListToUserInf
 
     pagination_class = LegacyOpenApiPagination
 
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         slz = DepartmentProfileListInputSLZ(data=request.query_params)
         slz.is_valid(raise_exception=True)
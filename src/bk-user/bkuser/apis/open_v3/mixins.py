@@ -24,6 +24,7 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.request import Request
 
 from bkuser.apps.data_source.cache import DataSourceCache
+from bkuser.apps.tenant.data_version import TenantDataVersion
 
 from .permissions import ApiGatewayAppVerifiedPermission
 
@@ -45,6 +46,10 @@ class OpenApiCommonMixin:
 
         return tenant_id
 
+    def get_data_version(self) -> str:
+        """租户数据版本（用于生成缓存 Key & ETag）"""
+        return f"{self.tenant_id}:{TenantDataVersion.get(self.tenant_id)}"
+
     @cached_property
     def real_data_source_ids(self) -> List[int]:
         """本租户拥有的 REAL 数据源 ID，基于全局缓存避免 DB 查询"""
@@ -36,6 +36,7 @@ from bkuser.apps.data_source.models import DataSourceDepartmentRelation, DataSou
 from bkuser.apps.tenant.models import TenantDepartment, TenantUser
 from bkuser.biz.organization import DataSourceDepartmentHandler, TenantDepartmentHandler, TenantOrgPathHandler
 from bkuser.biz.tenant import TenantUserDisplayNameHandler, TenantUserHandler
+from bkuser.common.views import etag_by_data_version
 
 
 class TenantDepartmentRetrieveApi(OpenApiCommonMixin, generics.RetrieveAPIView):
@@ -90,6 +91,7 @@ class TenantDepartmentListApi(OpenApiCommonMixin, generics.ListAPIView):
         operation_description="查询部门列表",
         responses={status.HTTP_200_OK: TenantDepartmentListOutputSLZ(many=True)},
     )
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         depts = TenantDepartment.objects.select_related("data_source_department").filter(
             tenant_id=self.tenant_id, data_source_id__in=self.real_data_source_ids
@@ -118,6 +120,7 @@ class TenantDepartmentDescendantListApi(OpenApiCommonMixin, generics.ListAPIView
         query_serializer=TenantDepartmentDescendantListInputSLZ(),
         responses={status.HTTP_200_OK: TenantDepartmentDescendantListOutputSLZ(many=True)},
     )
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         slz = TenantDepartmentDescendantListInputSLZ(data=self.request.query_params)
         slz.is_valid(raise_exception=True)
@@ -194,6 +197,7 @@ class TenantDepartmentUserListApi(OpenApiCommonMixin, generics.ListAPIView):
         operation_description="查询部门的用户列表",
         responses={status.HTTP_200_OK: TenantDepartmentUserListOutputSLZ(many=True)},
     )
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         tenant_users = self.paginate_queryset(self.get_queryset())
 
@@ -223,6 +227,7 @@ class TenantDepartmentLookupListApi(OpenApiCommonMixin, generics.ListAPIView):
         query_serializer=TenantDepartmentLookupInputSLZ(),
         responses={status.HTTP_200_OK: TenantDepartmentLookupOutputSLZ(many=True)},
     )
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         slz = TenantDepartmentLookupInputSLZ(data=self.request.query_params)
         slz.is_valid(raise_exception=True)
@@ -29,6 +29,7 @@ from bkuser.apps.data_source.models import (
     DataSourceUserLeaderRelation,
 )
 from bkuser.apps.tenant.models import TenantDepartment, TenantUser
+from bkuser.common.views import etag_by_data_version
 
 
 class TenantDepartmentUserRelationListApi(OpenApiCommonMixin, generics.ListAPIView):
@@ -42,6 +43,7 @@ class TenantDepartmentUserRelationListApi(OpenApiCommonMixin, generics.ListAPIVi
         operation_description="查询部门用户关系",
         responses={status.HTTP_200_OK: TenantDepartmentUserRelationListOutputSLZ(many=True)},
     )
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         # 获取数据源用户与部门间关系并分页
         relations = DataSourceDepartmentUserRelation.objects.filter(
@@ -94,6 +96,7 @@ class TenantDepartmentRelationListApi(OpenApiCommonMixin, generics.ListAPIView):
         operation_description="查询部门间关系",
         responses={status.HTTP_200_OK: TenantDepartmentRelationListOutputSLZ(many=True)},
     )
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         # 获取数据源部门间的关系并分页
         # Note: 这里为什么没有使用 order_by 保证分页稳定？
@@ -131,6 +134,7 @@ class TenantUserLeaderRelationListApi(OpenApiCommonMixin, generics.ListAPIView):
         operation_description="查询用户与 Leader 间关系",
         responses={status.HTTP_200_OK: TenantUserLeaderRelationListOutputSLZ(many=True)},
     )
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         # 获取数据源用户与 Leader 间关系并分页
         relations = DataSourceUserLeaderRelation.objects.filter(data_source_id__in=self.real_data_source_ids).order_by(
@@ -28,6 +28,7 @@ from bkuser.apis.open_v3.serializers.tenant import (
 )
 from bkuser.apps.tenant.constants import UserFieldDataType
 from bkuser.apps.tenant.models import Tenant, TenantCommonVariable, TenantUserCustomField
+from bkuser.common.views import etag_by_data_version
 
 logger = logging.getLogger(__name__)
 
@@ -88,5 +89,6 @@ class TenantUserCustomEnumFieldListApi(OpenApiCommonMixin, generics.ListAPIView)
         operation_description="查询租户用户自定义枚举字段信息",
         responses={status.HTTP_200_OK: TenantUserCustomEnumFieldListOutputSLZ(many=True)},
     )
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
@@ -52,6 +52,7 @@ from bkuser.apps.tenant.constants import UserLookupFieldEnum
 from bkuser.apps.tenant.models import TenantDepartment, TenantUser
 from bkuser.biz.organization import DataSourceDepartmentHandler
 from bkuser.biz.tenant import TenantUserDisplayNameHandler, TenantUserHandler
+from bkuser.common.views import etag_by_data_version
 
 logger = logging.getLogger(__name__)
 
@@ -85,6 +86,7 @@ class TenantUserDisplayInfoListApi(OpenApiCommonMixin, generics.ListAPIView):
         query_serializer=TenantUserDisplayInfoListInputSLZ(),
         responses={status.HTTP_200_OK: TenantUserDisplayInfoListOutputSLZ(many=True)},
     )
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         tenant_users = self.get_queryset()
         display_name_map = TenantUserDisplayNameHandler.batch_generate_tenant_user_display_name(tenant_users)
@@ -133,6 +135,7 @@ class TenantUserDepartmentListApi(OpenApiCommonMixin, generics.ListAPIView):
         query_serializer=TenantUserDepartmentListInputSLZ(),
         responses={status.HTTP_200_OK: TenantUserDepartmentListOutputSLZ(many=True)},
     )
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         slz = TenantUserDepartmentListInputSLZ(data=self.request.query_params)
         slz.is_valid(raise_exception=True)
@@ -235,6 +238,7 @@ class TenantUserLeaderListApi(OpenApiCommonMixin, generics.ListAPIView):
         operation_description="查询用户 Leader 列表",
         responses={status.HTTP_200_OK: TenantUserLeaderListOutputSLZ(many=True)},
     )
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         tenant_users = self.get_queryset()
 
@@ -274,6 +278,7 @@ class TenantUserListApi(OpenApiCommonMixin, generics.ListAPIView):
         operation_description="查询用户列表",
         responses={status.HTTP_200_OK: TenantUserListOutputSLZ(many=True)},
     )
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         tenant_users = self.paginate_queryset(self.get_queryset())
 
@@ -317,6 +322,7 @@ class TenantUserSensitiveInfoListApi(OpenApiCommonMixin, generics.ListAPIView):
         query_serializer=TenantUserSensitiveInfoListInputSLZ(),
         responses={status.HTTP_200_OK: TenantUserSensitiveInfoListOutputSLZ(many=True)},
     )
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
 
@@ -348,6 +354,7 @@ class TenantUserContactProfileListApi(OpenApiCommonMixin, generics.ListAPIView):
         query_serializer=TenantUserContactProfileListInputSLZ(),
         responses={status.HTTP_200_OK: TenantUserContactProfileListOutputSLZ(many=True)},
     )
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
 
@@ -385,6 +392,7 @@ class TenantUserLookupApi(OpenApiCommonMixin, generics.ListAPIView):
         query_serializer=TenantUserLookupInputSLZ(),
         responses={status.HTTP_200_OK: TenantUserLookupOutputSLZ(many=True)},
     )
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         tenant_users = self.get_queryset()
 
@@ -435,6 +443,7 @@ class VirtualUserLookupApi(OpenApiCommonMixin, generics.ListAPIView):
         query_serializer=VirtualUserLookupInputSLZ(),
         responses={status.HTTP_200_OK: VirtualUserLookupOutputSLZ(many=True)},
     )
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         tenant_users = self.get_queryset()
         display_name_map = TenantUserDisplayNameHandler.batch_generate_tenant_user_display_name(tenant_users)
@@ -464,6 +473,7 @@ class VirtualUserListApi(OpenApiCommonMixin, generics.ListAPIView):
         operation_description="查询虚拟用户列表",
         responses={status.HTTP_200_OK: VirtualUserListOutputSLZ(many=True)},
     )
+    @etag_by_data_version
     def get(self, request, *args, **kwargs):
         tenant_users = self.paginate_queryset(self.get_queryset())
         slz = VirtualUserListOutputSLZ(
@@ -278,16 +278,24 @@ class CollaborationObjectsSLZ(serializers.Serializer):
     department_names = serializers.ListField(help_text="部门列表", child=serializers.CharField())
 
 
+class CollaborationSyncRecordRetrieveInputSLZ(serializers.Serializer):
+    log_page = serializers.IntegerField(help_text="同步日志页码", min_value=1, default=1)
+
+
 class CollaborationSyncRecordRetrieveOutputSLZ(serializers.Serializer):
     id = serializers.IntegerField(help_text="同步记录 ID")
     status = serializers.ChoiceField(help_text="同步状态", choices=SyncTaskStatus.get_choices())
     has_warning = serializers.BooleanField(help_text="是否有警告")
     start_at = serializers.DateTimeField(help_text="创建时间")
     duration = serializers.DurationField(help_text="持续时间")
-    logs = serializers.CharField(help_text="同步日志")
+    logs = serializers.SerializerMethodField(help_text="同步日志（指定页）")
+    log_page_count = serializers.IntegerField(help_text="同步日志总页数")
     created_objs = serializers.SerializerMethodField(help_text="创建的对象")
     deleted_objs = serializers.SerializerMethodField(help_text="删除的对象")
 
+    def get_logs(self, obj: TenantSyncTask) -> str:
+        return obj.get_logs(self.context["log_page"])
+
     @swagger_serializer_method(serializer_or_field=CollaborationObjectsSLZ())
     def get_created_objs(self, obj: TenantSyncTask) -> Dict[str, Any]:
         return CollaborationObjectsSLZ(get_collaboration_objects_info(obj, SyncOperation.CREATE)).data
@@ -32,6 +32,7 @@ from bkuser.apis.web.collaboration.serializers import (
     CollaborationSourceTenantCustomFieldListOutputSLZ,
     CollaborationSyncRecordListInputSLZ,
     CollaborationSyncRecordListOutputSLZ,
+    CollaborationSyncRecordRetrieveInputSLZ,
     CollaborationSyncRecordRetrieveOutputSLZ,
     CollaborationTargetTenantListInputSLZ,
     CollaborationTargetTenantListOutputSLZ,
@@ -460,8 +461,6 @@ class CollaborationSyncRecordRetrieveApi(CurrentUserTenantMixin, generics.Retrie
 
     lookup_url_kwarg = "id"
 
-    serializer_class = CollaborationSyncRecordRetrieveOutputSLZ
-
     def get_queryset(self) -> QuerySet[TenantSyncTask]:
         cur_tenant_id = self.get_current_tenant_id()
         return TenantSyncTask.objects.filter(tenant_id=cur_tenant_id).exclude(
@@ -471,7 +470,12 @@ class CollaborationSyncRecordRetrieveApi(CurrentUserTenantMixin, generics.Retrie
     @swagger_auto_schema(
         tags=["collaboration"],
         operation_description="协同策略同步记录详情",
+        query_serializer=CollaborationSyncRecordRetrieveInputSLZ(),
         responses={status.HTTP_200_OK: CollaborationSyncRecordRetrieveOutputSLZ()},
     )
     def get(self, request, *args, **kwargs):
-        return self.retrieve(request, *args, **kwargs)
+        slz = CollaborationSyncRecordRetrieveInputSLZ(data=request.query_params)
+        slz.is_valid(raise_exception=True)
+
+        context = {"log_page": slz.validated_data["log_page"]}
+        return Response(CollaborationSyncRecordRetrieveOutputSLZ(instance=self.get_object(), context=context).data)
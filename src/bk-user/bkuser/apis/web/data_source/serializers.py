@@ -48,6 +48,7 @@ from bkuser.plugins.base import get_default_plugin_cfg, get_plugin_cfg_cls, is_p
 from bkuser.plugins.constants import DataSourcePluginEnum
 from bkuser.plugins.general.constants import AuthMethod
 from bkuser.plugins.general.models import GeneralDataSourcePluginConfig
+from bkuser.plugins.local.constants import LocalDataSourceImportFileFormat
 from bkuser.plugins.local.models import PasswordRuleConfig
 from bkuser.plugins.models import BasePluginConfig
 from bkuser.utils import dictx
@@ -424,13 +425,13 @@ class DataSourceRandomPasswordOutputSLZ(serializers.Serializer):
 class LocalDataSourceImportInputSLZ(serializers.Serializer):
     """本地数据源导入"""
 
-    file = serializers.FileField(help_text="数据源用户信息文件（Excel 格式）")
+    file = serializers.FileField(help_text="数据源用户信息文件（Excel / UTF-8 编码的 CSV / JSON Lines 格式）")
     overwrite = serializers.BooleanField(help_text="允许对同名用户覆盖更新", default=False)
     incremental = serializers.BooleanField(help_text="是否使用增量同步", default=True)
 
     def validate_file(self, file: UploadedFile) -> UploadedFile:
-        if not file.name.endswith(".xlsx"):
-            raise ValidationError(_("待导入文件必须为 Excel 格式"))
+        if not file.name.endswith(tuple(f".{fmt.value}" for fmt in LocalDataSourceImportFileFormat)):
+            raise ValidationError(_("待导入文件必须为 Excel，CSV 或 JSON Lines 格式"))
 
         if file.size > settings.MAX_USER_DATA_FILE_SIZE * 1024 * 1024:
             raise ValidationError(_("待导入文件大小不得超过 {} M").format(settings.MAX_USER_DATA_FILE_SIZE))
@@ -443,6 +444,11 @@ class LocalDataSourceImportInputSLZ(serializers.Serializer):
 
         return incremental
 
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        # 文件格式由文件扩展名决定
+        attrs["file_format"] = LocalDataSourceImportFileFormat(attrs["file"].name.rpartition(".")[-1])
+        return attrs
+
 
 class DataSourceImportOrSyncOutputSLZ(serializers.Serializer):
     """数据源导入/同步结果"""
@@ -486,13 +492,18 @@ class DataSourceSyncRecordListOutputSLZ(serializers.Serializer):
         return duration_string(duration)
 
 
+class DataSourceSyncRecordRetrieveInputSLZ(serializers.Serializer):
+    log_page = serializers.IntegerField(help_text="同步日志页码", min_value=1, default=1)
+
+
 class DataSourceSyncRecordRetrieveOutputSLZ(serializers.Serializer):
     id = serializers.IntegerField(help_text="同步记录 ID")
     status = serializers.SerializerMethodField(help_text="数据源同步状态")
     has_warning = serializers.BooleanField(help_text="是否有警告")
     start_at = serializers.DateTimeField(help_text="开始时间")
     duration = serializers.SerializerMethodField(help_text="持续时间")
-    logs = serializers.CharField(help_text="同步日志")
+    logs = serializers.SerializerMethodField(help_text="同步日志（指定页）")
+    log_page_count = serializers.IntegerField(help_text="同步日志总页数")
 
     # 由于数据源同步分为两个阶段同步任务（数据源同步任务 & 租户同步任务），因此同步状态与持续时间需要做兼容
     def get_status(self, obj: DataSourceSyncTask) -> str:
@@ -506,6 +517,9 @@ class DataSourceSyncRecordRetrieveOutputSLZ(serializers.Serializer):
         duration = task.duration + task.start_at - obj.start_at if task else obj.duration
         return duration_string(duration)
 
+    def get_logs(self, obj: DataSourceSyncTask) -> str:
+        return obj.get_logs(self.context["log_page"])
+
 
 class DataSourceDestroyInputSLZ(serializers.Serializer):
     is_delete_idp = serializers.BooleanField(help_text="重置数据源时是否同时删除 Idp 相关配置", default=False)
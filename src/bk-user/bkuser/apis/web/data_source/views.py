@@ -17,7 +17,7 @@
 
 import logging
 from collections import defaultdict
-from typing import Dict, List, Set
+from typing import Any, Dict, List, Set
 
 import openpyxl
 from django.conf import settings
@@ -45,6 +45,7 @@ from bkuser.apis.web.data_source.serializers import (
     DataSourceRelatedResourceStatsOutputSLZ,
     DataSourceRetrieveOutputSLZ,
     DataSourceSyncRecordListOutputSLZ,
+    DataSourceSyncRecordRetrieveInputSLZ,
     DataSourceSyncRecordRetrieveOutputSLZ,
     DataSourceSyncRecordSearchInputSLZ,
     DataSourceTestConnectionInputSLZ,
@@ -81,6 +82,7 @@ from bkuser.common.response import convert_workbook_to_response
 from bkuser.common.views import ExcludePatchAPIViewMixin
 from bkuser.plugins.base import get_default_plugin_cfg, get_plugin_cfg_schema_map, get_plugin_cls
 from bkuser.plugins.constants import DataSourcePluginEnum
+from bkuser.plugins.local.constants import LocalDataSourceImportFileFormat
 
 from .schema import get_data_source_plugin_cfg_json_schema
 
@@ -550,12 +552,19 @@ class DataSourceImportApi(CurrentUserTenantDataSourceMixin, generics.CreateAPIVi
         if not (data_source.is_local and data_source.is_real_type):
             raise error_codes.DATA_SOURCE_OPERATION_UNSUPPORTED.f(_("仅实体类型的本地数据源支持导入功能"))
 
-        # Request file 转换成 openpyxl.workbook
-        try:
-            workbook = openpyxl.load_workbook(data["file"])
-        except Exception:  # pylint: disable=broad-except
-            logger.exception("本地数据源 %s 导入失败", data_source.id)
-            raise error_codes.DATA_SOURCE_IMPORT_FAILED.f(_("文件格式异常"))
+        file_format = data["file_format"]
+        if file_format == LocalDataSourceImportFileFormat.XLSX:
+            # Request file 转换成 openpyxl.workbook
+            try:
+                workbook = openpyxl.load_workbook(data["file"])
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("本地数据源 %s 导入失败", data_source.id)
+                raise error_codes.DATA_SOURCE_IMPORT_FAILED.f(_("文件格式异常"))
+
+            plugin_init_extra_kwargs: Dict[str, Any] = {"workbook": workbook}
+        else:
+            # CSV / JSON Lines 为文本格式，直接使用原始文件内容，由插件以流式的方式解析
+            plugin_init_extra_kwargs = {"raw_data": data["file"].read(), "file_format": file_format}
 
         options = DataSourceSyncOptions(
             operator=request.user.username,
@@ -566,7 +575,6 @@ class DataSourceImportApi(CurrentUserTenantDataSourceMixin, generics.CreateAPIVi
         )
 
         try:
-            plugin_init_extra_kwargs = {"workbook": workbook}
             task = DataSourceSyncManager(data_source, options).execute(plugin_init_extra_kwargs)
         except Exception as e:  # pylint: disable=broad-except
             # Q: 为什么不包装一层 DataSourceSyncError 而是捕获 Exception？
@@ -691,12 +699,16 @@ class DataSourceSyncRecordRetrieveApi(CurrentUserTenantMixin, generics.RetrieveA
     @swagger_auto_schema(
         tags=["data_source"],
         operation_description="数据源更新日志",
+        query_serializer=DataSourceSyncRecordRetrieveInputSLZ(),
         responses={status.HTTP_200_OK: DataSourceSyncRecordRetrieveOutputSLZ()},
     )
     def get(self, request, *args, **kwargs):
+        slz = DataSourceSyncRecordRetrieveInputSLZ(data=request.query_params)
+        slz.is_valid(raise_exception=True)
+
         data_source_sync_task = self.get_object()
         tenant_sync_task = TenantSyncTask.objects.filter(data_source_sync_task_id=data_source_sync_task.id).first()
-        context = {"tenant_sync_task": tenant_sync_task}
+        context = {"tenant_sync_task": tenant_sync_task, "log_page": slz.validated_data["log_page"]}
         return Response(DataSourceSyncRecordRetrieveOutputSLZ(instance=data_source_sync_task, context=context).data)
 
 
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from rest_framework import status
+
+from bkuser.apps.tenant.data_version import TenantDataVersion
+
+# 会变更租户数据（用户，部门及其关系，协同，自定义字段，展示名配置等）的 Web API 分组（即 url name 的前缀）
+TENANT_DATA_MUTABLE_WEB_API_GROUPS = {
+    "organization",
+    "virtual_user",
+    "data_source",
+    "collaboration",
+    "personal_center",
+    "tenant_info",
+    "tenant_setting_custom_fields",
+    "tenant_user_display_name_expression_config",
+}
+
+
+class TenantDataVersionMiddleware:
+    """租户数据版本中间件：Web API 变更租户数据成功后，递增租户（及其协同租户）的数据版本号"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if request.method in ("GET", "HEAD", "OPTIONS") or not status.is_success(response.status_code):
+            return response
+
+        if not (request.resolver_match and request.resolver_match.url_name):
+            return response
+
+        if request.resolver_match.url_name.split(".")[0] not in TENANT_DATA_MUTABLE_WEB_API_GROUPS:
+            return response
+
+        if tenant_id := request.user.get_property("tenant_id"):
+            TenantDataVersion.bump(tenant_id, with_collaboration=True)
+
+        return response
@@ -268,6 +268,8 @@ class TenantDepartmentListCreateApi(CurrentUserTenantMixin, generics.ListCreateA
             # 【审计】将审计记录保存至数据库
             auditor.record_create(data_after_tenant_depts)
 
+        TenantOrgPathHandler.invalidate_org_tree_snapshot(data_source.id)
+
         return Response(TenantDepartmentCreateOutputSLZ(tenant_dept).data, status=status.HTTP_201_CREATED)
 
 
@@ -313,6 +315,8 @@ class TenantDepartmentUpdateDestroyApi(
             # 更新部门 code 值
             TenantDepartmentHandler.update_department_code(tenant_dept.data_source_department)
 
+        TenantOrgPathHandler.invalidate_org_tree_snapshot(tenant_dept.data_source_id)
+
         # 【审计】将审计记录保存至数据库
         auditor.record_update(tenant_dept)
 
@@ -357,6 +361,8 @@ class TenantDepartmentUpdateDestroyApi(
             DataSourceDepartmentRelation.objects.filter(department_id__in=data_source_dept_ids).delete()
             DataSourceDepartmentRelation.objects.partial_rebuild(dept_relation.tree_id)
 
+        TenantOrgPathHandler.invalidate_org_tree_snapshot(tenant_dept.data_source_id)
+
         # 【审计】将审计记录保存至数据库
         auditor.record_delete()
 
@@ -516,7 +522,7 @@ class TenantDepartmentParentUpdateApi(CurrentUserTenantMixin, ExcludePatchAPIVie
             # 更新部门 code 值
             TenantDepartmentHandler.update_department_code(data_source_dept)
 
-        TenantOrgPathHandler.clear_department_descendants_ancestor_cache(tenant_dept.data_source_department_id)
+        TenantOrgPathHandler.invalidate_org_tree_snapshot(tenant_dept.data_source_id)
 
         # 【审计】记录变更后的数据
         auditor.record_update_parent_department(tenant_dept)
@@ -818,6 +818,10 @@ class TenantUserBatchCreateApi(CurrentUserTenantDataSourceMixin, generics.Create
                 )
                 for info in data["user_infos"]
             ]
+            # bulk_create 不会调用 save，需要手动计算内容指纹
+            for u in data_source_users:
+                u.refresh_content_hash()
+
             DataSourceUser.objects.bulk_create(data_source_users, batch_size=self.bulk_create_batch_size)
 
             # 重新从 DB 查询以获取带 ID 的数据源用户
@@ -867,9 +871,10 @@ class TenantUserBatchCreateApi(CurrentUserTenantDataSourceMixin, generics.Create
 
         # 新建租户用户，需要计算账号有效期
         generator = TenantUserIDGenerator(cur_tenant_id, data_source, prepare_batch=True)
+        tenant_user_id_map = generator.gen_batch(data_source_users)
         tenant_users = [
             TenantUser(
-                id=generator.gen(user),
+                id=tenant_user_id_map[user.code],
                 tenant_id=tenant_dept.tenant_id,
                 data_source=data_source,
                 data_source_user=user,
@@ -887,9 +892,10 @@ class TenantUserBatchCreateApi(CurrentUserTenantDataSourceMixin, generics.Create
             target_status=CollaborationStrategyStatus.ENABLED,
         ):
             generator = TenantUserIDGenerator(strategy.target_tenant_id, data_source, prepare_batch=True)
+            tenant_user_id_map = generator.gen_batch(data_source_users)
             collaboration_tenant_users += [
                 TenantUser(
-                    id=generator.gen(user),
+                    id=tenant_user_id_map[user.code],
                     tenant_id=strategy.target_tenant_id,
                     data_source=data_source,
                     data_source_user=user,
@@ -1256,8 +1262,9 @@ class TenantUserCustomFieldBatchUpdateApi(
         now = timezone.now()
         for data_source_user in data_source_users:
             data_source_user.extras[field_name] = data["value"][field_name]
+            data_source_user.refresh_content_hash()
             data_source_user.updated_at = now
 
-        DataSourceUser.objects.bulk_update(data_source_users, fields=["extras", "updated_at"])
+        DataSourceUser.objects.bulk_update(data_source_users, fields=["extras", "content_hash", "updated_at"])
 
         return Response(status=status.HTTP_204_NO_CONTENT)
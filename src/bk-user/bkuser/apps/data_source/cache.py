@@ -15,7 +15,11 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-from typing import Dict, List, Set, Tuple
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.db import transaction
 
 from bkuser.apps.data_source.constants import DataSourceTypeEnum
 from bkuser.apps.data_source.models import DataSource, DataSourceDepartmentRelation
@@ -26,11 +30,16 @@ class DataSourceCache:
     """数据源基础信息缓存（单一底层缓存 + 多快捷方法）"""
 
     @staticmethod
-    @cached(timeout=60)
+    @cached(cache_name=CacheEnum.TWO_TIER, timeout=60 * 10, soft_timeout=60, single_flight=True)
     def _get_infos() -> List[Tuple[int, str, str]]:
         """底层缓存：[(id, type, owner_tenant_id), ...]"""
         return list(DataSource.objects.values_list("id", "type", "owner_tenant_id"))
 
+    @classmethod
+    def invalidate(cls):
+        """数据源新增 / 变更 / 删除后，删除缓存（所有进程的本地缓存都会失效）"""
+        cls._get_infos.invalidate()
+
     # ---------- 映射 ----------
 
     @classmethod
@@ -93,39 +102,168 @@ class DataSourceCache:
         return 0
 
 
-class DepartmentAncestorCache:
-    """部门祖先缓存"""
+class DataSourceOrgTreeSnapshot:
+    """数据源组织树快照
+
+    包含数据源下所有部门的 父部门，子部门，名称，祖先 & 完整组织路径，所有层级查询均为字典访问，无需再查询 DB
+    """
+
+    def __init__(self, relations: List[Tuple[int, int | None, str]]):
+        """
+        :param relations: [(部门 ID, 父部门 ID, 部门名称), ...]，需保证父部门在子部门之前
+        """
+        self.relations = relations
+        self.parent_map: Dict[int, int | None] = {}
+        self.name_map: Dict[int, str] = {}
+        self.children_map: Dict[int, List[int]] = defaultdict(list)
+        # 祖先 ID 列表（自根部门开始，不包含自身）
+        self.ancestors_map: Dict[int, List[int]] = {}
+        # 完整组织路径（包含自身），如：公司/部门A/中心AA
+        self.org_path_map: Dict[int, str] = {}
+
+        for dept_id, parent_id, name in relations:
+            self.parent_map[dept_id] = parent_id
+            self.name_map[dept_id] = name
+
+            if parent_id is None or parent_id not in self.ancestors_map:
+                self.ancestors_map[dept_id] = []
+                self.org_path_map[dept_id] = name
+                continue
+
+            self.children_map[parent_id].append(dept_id)
+            self.ancestors_map[dept_id] = [*self.ancestors_map[parent_id], parent_id]
+            self.org_path_map[dept_id] = f"{self.org_path_map[parent_id]}/{name}"
+
+    def __contains__(self, dept_id: int) -> bool:
+        return dept_id in self.parent_map
+
+    @classmethod
+    def build(cls, data_source_id: int) -> "DataSourceOrgTreeSnapshot":
+        """从 DB 构建快照（按 MPTT 先序遍历排序，保证父部门在子部门之前）"""
+        relations = (
+            DataSourceDepartmentRelation.objects.filter(data_source_id=data_source_id)
+            .order_by("tree_id", "lft")
+            .values_list("department_id", "parent_id", "department__name")
+        )
+        return cls(list(relations))
+
+    def get_name(self, dept_id: int) -> str:
+        return self.name_map.get(dept_id, "")
+
+    def get_parent(self, dept_id: int) -> int | None:
+        return self.parent_map.get(dept_id)
+
+    def get_children(self, dept_id: int) -> List[int]:
+        return self.children_map.get(dept_id, [])
+
+    def get_ancestors(self, dept_id: int, include_self: bool = False) -> List[int]:
+        ancestors = self.ancestors_map.get(dept_id, [])
+        return [*ancestors, dept_id] if include_self else ancestors
+
+    def get_org_path(self, dept_id: int, include_self: bool = True) -> str:
+        if include_self:
+            return self.org_path_map.get(dept_id, "")
+
+        parent_id = self.parent_map.get(dept_id)
+        return self.org_path_map[parent_id] if parent_id is not None else ""
+
+
+class DataSourceOrgTreeSnapshotCache:
+    """数据源组织树快照缓存
+
+    快照以 数据源 ID + 版本号 作为 Key 存储在 Redis 中，同时在进程内缓存（每个数据源只保留当前版本的快照），
+    因此只要版本号不变，读取快照只需要一次 Redis 查询（获取版本号）
+
+    数据源同步后会直接构建新版本的快照（refresh）；页面上变更部门时只更新版本号（invalidate），
+    快照在下次读取时再按需构建，避免每次变更部门都同步构建整个组织树
+
+    Q：为什么 Redis 中只存储部门关系，而不是整个快照？
+    A：祖先 & 组织路径可由部门关系在内存中线性计算得到，只存储部门关系可以大幅减少 Redis 存储 & 网络传输的数据量
+    """
+
+    timeout = 7 * 24 * 60 * 60
 
     def __init__(self):
-        self.cache = Cache(CacheEnum.REDIS, CacheKeyPrefixEnum.DEPARTMENT_ANCESTOR)
-        self.cache_timeout = 60 * 60 * 24 * 30
+        self.cache = Cache(CacheEnum.REDIS, CacheKeyPrefixEnum.ORG_TREE_SNAPSHOT)
+
+    def get(self, data_source_id: int) -> DataSourceOrgTreeSnapshot:
+        """获取指定数据源的组织树快照"""
+        return self.batch_get([data_source_id])[data_source_id]
+
+    def batch_get(self, data_source_ids: Iterable[int]) -> Dict[int, DataSourceOrgTreeSnapshot]:
+        """批量获取数据源的组织树快照"""
+        data_source_ids = set(data_source_ids)
+        if not data_source_ids:
+            return {}
+
+        versions = self.cache.get_many([self._make_version_key(ds_id) for ds_id in data_source_ids])
+
+        snapshots = {}
+        for ds_id in data_source_ids:
+            version = versions.get(self._make_version_key(ds_id))
+            if version is None:
+                snapshots[ds_id] = self.refresh(ds_id)
+                continue
+
+            snapshots[ds_id] = self._load(ds_id, version)
 
-    def batch_get(self, dept_ids: List[int]) -> Dict[int, List[int]]:
-        """批量获取部门的祖先 ID 列表"""
-        # 1. 批量获取已缓存的部门祖先 ID 列表
-        hit_data = self.cache.get_many(dept_ids)
+        return snapshots
 
-        # 2. 全部都命中缓存
-        miss_dept_ids = list(set(dept_ids) - set(hit_data.keys()))
-        if not miss_dept_ids:
-            return hit_data
+    def refresh(self, data_source_id: int) -> DataSourceOrgTreeSnapshot:
+        """重新构建指定数据源的组织树快照，并生成新的版本号（旧版本的快照会自动失效）"""
+        snapshot = DataSourceOrgTreeSnapshot.build(data_source_id)
 
-        # 3. 未命中缓存的部门 ID，需 DB 查询并添加到缓存里
-        miss_data = self._fetch_dept_ancestors_map(miss_dept_ids)
-        self._batch_set(miss_data)
+        version = time.time_ns()
+        # 需要先写入快照，再更新版本号，避免其他进程读取到新版本号时，快照还不存在
+        self.cache.set(self._make_snapshot_key(data_source_id, version), snapshot.relations, timeout=self.timeout)
+        self.cache.set(self._make_version_key(data_source_id), version, timeout=None)
+        _local_snapshots[data_source_id] = (version, snapshot)
+        return snapshot
 
-        return hit_data | miss_data
+    def invalidate(self, data_source_id: int) -> None:
+        """使指定数据源的组织树快照失效：只生成新的版本号，快照在下次读取时再构建
 
-    def _batch_set(self, dept_ancestor_map: Dict[int, List[int]]) -> None:
-        """批量缓存部门的祖先 ID 列表"""
-        self.cache.set_many(dept_ancestor_map, timeout=self.cache_timeout)
+        注：在事务提交后才更新版本号，避免其他进程在事务提交前读取到新版本号，并根据旧数据构建快照
+        """
+        transaction.on_commit(
+            lambda: self.cache.set(self._make_version_key(data_source_id), time.time_ns(), timeout=None)
+        )
 
-    def batch_delete(self, dept_ids: List[int]) -> None:
-        """批量删除指定部门的祖先 ID 缓存"""
-        self.cache.delete_many(dept_ids)
+    def delete(self, data_source_id: int) -> None:
+        """删除指定数据源的组织树快照（版本号），用于数据源被删除 / 重置的场景"""
+
+        def _delete():
+            self.cache.delete(self._make_version_key(data_source_id))
+            _local_snapshots.pop(data_source_id, None)
+
+        transaction.on_commit(_delete)
+
+    def _load(self, data_source_id: int, version: int) -> DataSourceOrgTreeSnapshot:
+        """加载指定版本的组织树快照，优先使用进程内缓存"""
+        local = _local_snapshots.get(data_source_id)
+        if local and local[0] == version:
+            return local[1]
+
+        relations = self.cache.get(self._make_snapshot_key(data_source_id, version))
+        if relations is not None:
+            snapshot = DataSourceOrgTreeSnapshot(relations)
+        else:
+            # 快照未构建（版本号被 invalidate 更新），或已过期（被 Redis 淘汰），根据当前部门数据构建并回写即可
+            snapshot = DataSourceOrgTreeSnapshot.build(data_source_id)
+            self.cache.set(self._make_snapshot_key(data_source_id, version), snapshot.relations, timeout=self.timeout)
+
+        # 只保留当前版本的快照，旧版本的快照直接被替换，进程内缓存的内存占用不会随版本变更而增长
+        _local_snapshots[data_source_id] = (version, snapshot)
+        return snapshot
+
+    @staticmethod
+    def _make_version_key(data_source_id: int) -> str:
+        return f"ver:{data_source_id}"
+
+    @staticmethod
+    def _make_snapshot_key(data_source_id: int, version: int) -> str:
+        return f"{data_source_id}:{version}"
 
-    def _fetch_dept_ancestors_map(self, dept_ids: List[int]) -> Dict[int, List[int]]:
-        """批量查询部门与其祖先 ID 列表之间的映射"""
-        rels = DataSourceDepartmentRelation.objects.filter(department_id__in=dept_ids)
 
-        return {r.department_id: list(r.get_ancestors().values_list("department_id", flat=True)) for r in rels}
+# 进程内的组织树快照缓存 {数据源 ID: (版本号, 快照)}
+_local_snapshots: Dict[int, Tuple[int, DataSourceOrgTreeSnapshot]] = {}
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from bkuser.apps.data_source.cache import DataSourceCache
+from bkuser.apps.data_source.models import DataSource
+
+
+@receiver(post_save, sender=DataSource)
+@receiver(post_delete, sender=DataSource)
+def invalidate_data_source_cache(sender, instance: DataSource, **kwargs):
+    """数据源变更后，删除数据源基础信息缓存"""
+    # 事务提交前，其他请求仍可能读取到旧数据并写入缓存，因此在事务提交后需要再删除一次
+    DataSourceCache.invalidate()
+    transaction.on_commit(DataSourceCache.invalidate)
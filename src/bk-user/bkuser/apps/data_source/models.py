@@ -14,9 +14,14 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
+import hashlib
+import json
+from typing import Any, ClassVar, List
 
 from blue_krill.models.fields import EncryptField
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models, transaction
 from mptt.models import MPTTModel, TreeForeignKey
 
@@ -133,7 +138,45 @@ class DataSource(AuditedModel):
         self.save(update_fields=["plugin_config", "updated_at"])
 
 
-class DataSourceUser(TimestampedModel):
+def gen_content_hash(*values: Any) -> str:
+    """根据字段值生成内容指纹（sha256），同步时只需对比指纹即可判断数据是否有变更"""
+    content = json.dumps(values, ensure_ascii=False, sort_keys=True, separators=(",", ":"), cls=DjangoJSONEncoder)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class ContentHashMixin(models.Model):
+    """内容指纹，save 时自动刷新；注意 bulk_create / bulk_update 不会调用 save，需要手动调用 refresh_content_hash"""
+
+    # 为空表示指纹尚未计算（如存量数据），同步时会退化为逐字段对比
+    content_hash = models.CharField("内容指纹", max_length=64, blank=True, default="")
+
+    # 参与计算内容指纹的字段（有序），子类必须声明；注意：调整字段或顺序会导致存量数据的指纹全部失效
+    content_hash_fields: ClassVar[List[str]] = []
+
+    class Meta:
+        abstract = True
+
+    def calc_content_hash(self) -> str:
+        if not self.content_hash_fields:
+            raise ImproperlyConfigured(f"{type(self).__name__}.content_hash_fields is required")
+
+        return gen_content_hash(*[getattr(self, field) for field in self.content_hash_fields])
+
+    def refresh_content_hash(self) -> str:
+        self.content_hash = self.calc_content_hash()
+        return self.content_hash
+
+    def save(self, *args, **kwargs):
+        self.refresh_content_hash()
+        # 指定 update_fields 时，需要把指纹字段一并更新，否则指纹会与实际数据不一致
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "content_hash" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "content_hash"]
+
+        super().save(*args, **kwargs)
+
+
+class DataSourceUser(ContentHashMixin, TimestampedModel):
     data_source = models.ForeignKey(DataSource, on_delete=models.PROTECT, db_constraint=False)
     code = models.CharField("用户标识", max_length=128, default=generate_uuid)
 
@@ -153,6 +196,8 @@ class DataSourceUser(TimestampedModel):
     # ----------------------- 状态相关 -----------------------
     # TODO: (1) 用户管理里涉及的功能状态（2）企业本身的员工状态
 
+    content_hash_fields = ["username", "full_name", "email", "phone", "phone_country_code", "extras"]
+
     class Meta:
         ordering = ["id"]
         unique_together = [
@@ -192,7 +237,7 @@ class DataSourceUserDeprecatedPasswordRecord(TimestampedModel):
     operator = models.CharField("操作人", max_length=128)
 
 
-class DataSourceDepartment(TimestampedModel):
+class DataSourceDepartment(ContentHashMixin, TimestampedModel):
     """
     数据源部门
     """
@@ -204,6 +249,8 @@ class DataSourceDepartment(TimestampedModel):
     # 额外信息
     extras = models.JSONField("自定义字段", default=dict)
 
+    content_hash_fields = ["name", "extras"]
+
     class Meta:
         ordering = ["id"]
         unique_together = [("code", "data_source")]
@@ -17,8 +17,11 @@
 import logging
 from typing import Dict
 
+from django.db import transaction
+
 from bkuser.apps.data_source.constants import USER_EXTRAS_UPDATE_BATCH_SIZE
 from bkuser.apps.data_source.models import DataSource, DataSourceUser
+from bkuser.apps.data_source.signals import post_batch_update_data_source_user
 from bkuser.celery import app
 from bkuser.common.task import BaseTask
 from bkuser.plugins.constants import DataSourcePluginEnum
@@ -45,10 +48,12 @@ def remove_dropped_field_in_user_extras(tenant_id: str, field_name: str):
     )
     for u in users:
         u.extras.pop(field_name)
+        u.refresh_content_hash()
 
     DataSourceUser.objects.bulk_update(
-        users, fields=["extras", "updated_at"], batch_size=USER_EXTRAS_UPDATE_BATCH_SIZE
+        users, fields=["extras", "content_hash", "updated_at"], batch_size=USER_EXTRAS_UPDATE_BATCH_SIZE
     )
+    _send_post_batch_update_signal(tenant_id)
 
 
 @app.task(base=BaseTask, ignore_result=True)
@@ -75,6 +80,16 @@ def migrate_user_extras_with_mapping(tenant_id: str, field_name: str, mapping: D
         elif isinstance(value, str):
             u.extras[field_name] = mapping.get(value, value)
 
+        u.refresh_content_hash()
+
     DataSourceUser.objects.bulk_update(
-        users, fields=["extras", "updated_at"], batch_size=USER_EXTRAS_UPDATE_BATCH_SIZE
+        users, fields=["extras", "content_hash", "updated_at"], batch_size=USER_EXTRAS_UPDATE_BATCH_SIZE
+    )
+    _send_post_batch_update_signal(tenant_id)
+
+
+def _send_post_batch_update_signal(tenant_id: str):
+    """批量更新数据源用户后，在事务提交后发送信号（如递增租户数据版本号，使开放 API 的缓存 & ETag 失效）"""
+    transaction.on_commit(
+        lambda: post_batch_update_data_source_user.send(sender=DataSourceUser, owner_tenant_id=tenant_id)
     )
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import functools
+import platform
+from contextlib import ExitStack, contextmanager
+from typing import Callable, ContextManager, Iterator
+from unittest import mock
+
+from django.db import connection
+from django.utils import timezone
+
+from bkuser.apps.data_source.constants import DataSourceTypeEnum
+from bkuser.apps.data_source.models import DataSource
+from bkuser.apps.sync.bench.constants import BenchSource
+from bkuser.apps.sync.bench.data_models import BenchmarkResult
+from bkuser.apps.sync.bench.orgs import SyntheticOrg
+from bkuser.apps.sync.bench.profilers import PhaseProfiler
+from bkuser.apps.sync.bench.stubs import GeneralHTTPStubServer, LDAPStandIn
+from bkuser.apps.sync.constants import SyncTaskStatus, SyncTaskTrigger
+from bkuser.apps.sync.data_models import DataSourceSyncOptions, TenantSyncOptions
+from bkuser.apps.sync.managers import DataSourceSyncManager, TenantSyncManager
+from bkuser.apps.sync.runners import DataSourceSyncTaskRunner, TenantSyncTaskRunner
+from bkuser.apps.sync.signals import post_sync_data_source, post_sync_tenant
+from bkuser.apps.tenant.models import Tenant
+from bkuser.plugins.constants import DataSourcePluginEnum
+from bkuser.plugins.general.constants import AuthMethod, PageSizeEnum
+from bkuser.plugins.general.models import AuthConfig, GeneralDataSourcePluginConfig
+from bkuser.plugins.general.models import ServerConfig as GeneralServerConfig
+from bkuser.plugins.ldap.constants import PageSizeEnum as LDAPPageSizeEnum
+from bkuser.plugins.ldap.models import DataConfig, LDAPDataSourcePluginConfig, LeaderConfig, UserGroupConfig
+from bkuser.plugins.ldap.models import ServerConfig as LDAPServerConfig
+from bkuser.plugins.models import BasePluginConfig
+
+# 需要采集性能指标的同步子阶段：(执行器, 方法名, 阶段名称)
+PROFILED_RUNNER_STEPS = [
+    (DataSourceSyncTaskRunner, "_sync_departments", "departments"),
+    (DataSourceSyncTaskRunner, "_sync_users", "users"),
+    (DataSourceSyncTaskRunner, "_validate_unique_fields", "validate_unique_fields"),
+    (TenantSyncTaskRunner, "_sync_departments", "departments"),
+    (TenantSyncTaskRunner, "_sync_users", "users"),
+]
+
+
+class SyncBenchmark:
+    """数据同步基准测试
+
+    在指定租户下创建临时的数据源，由进程内的桩服务 / 替身提供合成的组织架构数据，按轮次端到端执行
+    数据源同步 & 租户同步（首轮为全新导入，后续轮次为无变更的重复同步），并采集各阶段的性能指标
+    """
+
+    def __init__(
+        self,
+        tenant: Tenant,
+        source: BenchSource,
+        org: SyntheticOrg,
+        rounds: int = 2,
+        page_size: int = 1000,
+        max_concurrency: int = 1,
+    ):
+        self.tenant = tenant
+        self.source = source
+        self.org = org
+        self.rounds = rounds
+        self.page_size = page_size
+        self.max_concurrency = max_concurrency
+        self.data_source: DataSource | None = None
+
+    def run(self) -> BenchmarkResult:
+        started_at = timezone.now()
+
+        with ExitStack() as stack:
+            # 注：桩服务 / 替身的数据准备不计入同步耗时
+            plugin_id, plugin_cfg, field_mapping = self._setup_source(stack)
+            self.data_source = DataSource.objects.create(
+                owner_tenant_id=self.tenant.id,
+                type=DataSourceTypeEnum.REAL,
+                plugin_id=plugin_id,
+                plugin_config=plugin_cfg,
+                field_mapping=field_mapping,
+            )
+
+            profiler = stack.enter_context(PhaseProfiler())
+            stack.enter_context(self._profile_runner_steps(profiler))
+            stack.enter_context(self._mute_post_sync_signals())
+
+            for round_no in range(1, self.rounds + 1):
+                with profiler.phase(f"round_{round_no}"):
+                    with profiler.phase("data_source"):
+                        self._sync_data_source(self.data_source)
+                    with profiler.phase("tenant"):
+                        self._sync_tenant(self.data_source)
+
+        return BenchmarkResult(
+            source=self.source.value,
+            user_count=self.org.user_count,
+            dept_count=self.org.dept_count,
+            dept_depth=self.org.dept_depth,
+            dept_breadth=self.org.dept_breadth,
+            rounds=self.rounds,
+            started_at=started_at,
+            environment={
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "db_vendor": connection.vendor,
+                "page_size": str(self.page_size),
+                "max_concurrency": str(self.max_concurrency),
+            },
+            phases=profiler.phases,
+        )
+
+    def _setup_source(self, stack: ExitStack) -> tuple[str, BasePluginConfig, list[dict]]:
+        """启动桩服务 / 替身，返回数据源的插件 ID，插件配置，字段映射
+
+        注：桩服务 / 替身提供的用户字段名称与内置字段一致，因此无需配置字段映射
+        """
+        if self.source == BenchSource.GENERAL:
+            server = stack.enter_context(GeneralHTTPStubServer(self.org))
+            general_cfg = GeneralDataSourcePluginConfig(
+                server_config=GeneralServerConfig(
+                    server_base_url=server.base_url,
+                    user_api_path=server.user_api_path,
+                    department_api_path=server.department_api_path,
+                    page_size=PageSizeEnum(self.page_size),
+                    max_concurrency=self.max_concurrency,
+                ),
+                auth_config=AuthConfig(method=AuthMethod.BEARER_TOKEN, bearer_token="bench-token"),
+            )
+            return DataSourcePluginEnum.GENERAL, general_cfg, []
+
+        stand_in = stack.enter_context(LDAPStandIn(self.org))
+        ldap_cfg = LDAPDataSourcePluginConfig(
+            server_config=LDAPServerConfig(
+                server_url=stand_in.server_url,
+                bind_dn=stand_in.bind_dn,
+                bind_password=stand_in.bind_password,
+                base_dn=stand_in.base_dn,
+                page_size=LDAPPageSizeEnum(self.page_size),
+                max_concurrency=self.max_concurrency,
+            ),
+            data_config=DataConfig(
+                user_object_class=stand_in.user_object_class,
+                user_search_base_dns=[stand_in.base_dn],
+                dept_object_class=stand_in.dept_object_class,
+                dept_search_base_dns=[stand_in.base_dn],
+            ),
+            user_group_config=UserGroupConfig(enabled=False),
+            leader_config=LeaderConfig(enabled=True, leader_field=stand_in.leader_field),
+        )
+        return DataSourcePluginEnum.LDAP, ldap_cfg, []
+
+    @staticmethod
+    def _sync_data_source(data_source: DataSource):
+        options = DataSourceSyncOptions(overwrite=True, async_run=False, trigger=SyncTaskTrigger.MANUAL)
+        task = DataSourceSyncManager(data_source, options).execute()
+        task.refresh_from_db()
+        if task.status != SyncTaskStatus.SUCCESS:
+            raise RuntimeError(f"data source sync task {task.id} status is {task.status}, check task logs")
+
+    def _sync_tenant(self, data_source: DataSource):
+        options = TenantSyncOptions(async_run=False, trigger=SyncTaskTrigger.MANUAL)
+        task = TenantSyncManager(data_source, self.tenant.id, options).execute()
+        task.refresh_from_db()
+        if task.status != SyncTaskStatus.SUCCESS:
+            raise RuntimeError(f"tenant sync task {task.id} status is {task.status}, check task logs")
+
+    @staticmethod
+    def _profile_runner_steps(profiler: PhaseProfiler) -> ContextManager:
+        """替换执行器的各个同步步骤，使其在执行时采集性能指标（作为当前阶段的子阶段）"""
+
+        def profiled(name: str, func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with profiler.phase(name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        stack = ExitStack()
+        for runner_cls, method, name in PROFILED_RUNNER_STEPS:
+            stack.enter_context(mock.patch.object(runner_cls, method, new=profiled(name, getattr(runner_cls, method))))
+        return stack
+
+    @staticmethod
+    @contextmanager
+    def _mute_post_sync_signals() -> Iterator[None]:
+        """屏蔽同步完成信号：数据源同步完成后，由基准测试按顺序同步执行租户同步，而非触发异步任务"""
+        with (
+            mock.patch.object(post_sync_data_source, "receivers", []),
+            mock.patch.object(post_sync_tenant, "receivers", []),
+        ):
+            yield
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+from blue_krill.data_types.enum import EnumField, StrStructuredEnum
+
+
+class BenchSource(StrStructuredEnum):
+    """基准测试数据源类型"""
+
+    GENERAL = EnumField("general", label="通用 HTTP 数据源（进程内 API 桩服务）")
+    LDAP = EnumField("ldap", label="LDAP 数据源（进程内 LDAP 替身）")
+
+
+class BenchScale(StrStructuredEnum):
+    """基准测试数据规模（用户数量）"""
+
+    SMALL = EnumField("10k", label="1 万用户")
+    MEDIUM = EnumField("100k", label="10 万用户")
+    LARGE = EnumField("500k", label="50 万用户")
+
+
+class OrgShape(StrStructuredEnum):
+    """组织架构形态"""
+
+    WIDE = EnumField("wide", label="扁平（层级少，每层部门多）")
+    DEEP = EnumField("deep", label="深层（层级多，每层部门少）")
+    BALANCED = EnumField("balanced", label="均衡")
+
+
+# 各数据规模对应的用户数量
+BENCH_SCALE_USER_COUNT_MAP = {
+    BenchScale.SMALL: 10 * 1000,
+    BenchScale.MEDIUM: 100 * 1000,
+    BenchScale.LARGE: 500 * 1000,
+}
+
+# 各组织架构形态对应的部门树（层级数，每个部门的子部门数量）
+ORG_SHAPE_DEPT_TREE_MAP = {
+    # 1 + 50 + 2500 = 2551 个部门
+    OrgShape.WIDE: (3, 50),
+    # 2 ** 12 - 1 = 4095 个部门
+    OrgShape.DEEP: (12, 2),
+    # 1 + 8 + 64 + 512 + 4096 = 4681 个部门
+    OrgShape.BALANCED: (5, 8),
+}
+
+# 用户 leader 链长度（每条链上，除链首外的用户，其 leader 都是前一个用户）
+DEFAULT_LEADER_CHAIN_LENGTH = 10
+
+# 每多少个用户中，有一个用户同时属于两个部门
+MULTI_DEPT_USER_INTERVAL = 10
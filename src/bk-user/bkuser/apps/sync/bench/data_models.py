@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import datetime
+from typing import Dict, List
+
+from pydantic import BaseModel
+
+
+class PhaseMetrics(BaseModel):
+    """同步阶段的性能指标"""
+
+    # 阶段名称，嵌套的阶段以 . 分隔，如 round_1.data_source.users
+    name: str
+    # 耗时（秒）
+    wall_time: float
+    # 阶段执行期间的进程常驻内存峰值（MB）
+    peak_rss_mb: float
+    # SQL 查询数量
+    queries: int
+    # 写入行数
+    rows_inserted: int
+    rows_updated: int
+    rows_deleted: int
+
+
+class BenchmarkResult(BaseModel):
+    """同步基准测试结果"""
+
+    source: str
+    # 合成的组织架构规模（用户数量，部门数量，部门树层级数，每个部门的子部门数量）
+    user_count: int
+    dept_count: int
+    dept_depth: int
+    dept_breadth: int
+    # 同步轮数（第一轮为全新导入，后续为无变更的重复同步）
+    rounds: int
+    started_at: datetime.datetime
+    # 运行环境信息，如 Python 版本，数据库类型等
+    environment: Dict[str, str]
+    phases: List[PhaseMetrics]
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import uuid
+from typing import Any, Dict, Iterator, List
+
+from bkuser.apps.sync.bench.constants import DEFAULT_LEADER_CHAIN_LENGTH, MULTI_DEPT_USER_INTERVAL
+
+
+class SyntheticOrg:
+    """合成的组织架构数据
+
+    部门：按层序编号的完全 N 叉树（部门 i 的上级部门为 (i - 1) // N）
+    用户：按序号依次分配到各个部门，每 MULTI_DEPT_USER_INTERVAL 个用户中有一个同时属于两个部门，
+         并按 leader_chain_length 组成 leader 链（链上除链首外的用户，其 leader 都是前一个用户）
+
+    所有数据都是根据序号直接计算得到的（不依赖随机数），因此多次生成的结果完全一致，且支持按任意区间获取
+    """
+
+    def __init__(
+        self,
+        user_count: int,
+        dept_depth: int,
+        dept_breadth: int,
+        leader_chain_length: int = DEFAULT_LEADER_CHAIN_LENGTH,
+    ):
+        if user_count < 0 or dept_depth < 1 or dept_breadth < 1 or leader_chain_length < 1:
+            raise ValueError("invalid synthetic org parameters")
+
+        self.user_count = user_count
+        self.dept_depth = dept_depth
+        self.dept_breadth = dept_breadth
+        self.leader_chain_length = leader_chain_length
+        self.dept_count = sum(dept_breadth**level for level in range(dept_depth))
+
+    def get_department(self, idx: int) -> Dict[str, Any]:
+        """获取通用 HTTP 数据源 API 格式的部门数据"""
+        parent_idx = self.get_parent_dept_idx(idx)
+        return {
+            "id": self.gen_dept_code(idx),
+            "name": f"部门-{idx}",
+            "parent": None if parent_idx is None else self.gen_dept_code(parent_idx),
+        }
+
+    def get_user(self, idx: int) -> Dict[str, Any]:
+        """获取通用 HTTP 数据源 API 格式的用户数据"""
+        leader_idx = self.get_leader_idx(idx)
+        return {
+            "id": self.gen_user_code(idx),
+            "username": self.gen_username(idx),
+            "full_name": f"用户-{idx}",
+            "email": f"{self.gen_username(idx)}@bench.example.com",
+            "phone": self.gen_phone(idx),
+            "phone_country_code": "86",
+            "extras": {},
+            "leaders": [] if leader_idx is None else [self.gen_user_code(leader_idx)],
+            "departments": [self.gen_dept_code(d) for d in self.get_user_dept_idxes(idx)],
+        }
+
+    def iter_departments(self) -> Iterator[Dict[str, Any]]:
+        for idx in range(self.dept_count):
+            yield self.get_department(idx)
+
+    def iter_users(self) -> Iterator[Dict[str, Any]]:
+        for idx in range(self.user_count):
+            yield self.get_user(idx)
+
+    def get_parent_dept_idx(self, idx: int) -> int | None:
+        return None if idx == 0 else (idx - 1) // self.dept_breadth
+
+    def get_user_dept_idxes(self, idx: int) -> List[int]:
+        dept_idxes = [idx % self.dept_count]
+        if idx % MULTI_DEPT_USER_INTERVAL == 0 and (extra := (idx * 7 + 1) % self.dept_count) != dept_idxes[0]:
+            dept_idxes.append(extra)
+        return dept_idxes
+
+    def get_leader_idx(self, idx: int) -> int | None:
+        return None if idx % self.leader_chain_length == 0 else idx - 1
+
+    @staticmethod
+    def gen_dept_code(idx: int) -> str:
+        return f"dept-{idx}"
+
+    @staticmethod
+    def gen_user_code(idx: int) -> str:
+        return f"user-{idx}"
+
+    @staticmethod
+    def gen_username(idx: int) -> str:
+        return f"bench_user_{idx}"
+
+    @staticmethod
+    def gen_phone(idx: int) -> str:
+        return f"13{idx % 10**9:09d}"
+
+    @staticmethod
+    def gen_dept_uuid(idx: int) -> str:
+        """LDAP 部门唯一标识（entryUUID）"""
+        return str(uuid.UUID(int=(1 << 96) | idx))
+
+    @staticmethod
+    def gen_user_uuid(idx: int) -> str:
+        """LDAP 用户唯一标识（entryUUID）"""
+        return str(uuid.UUID(int=(2 << 96) | idx))
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from django.db import connection
+
+from bkuser.apps.sync.bench.data_models import PhaseMetrics
+from bkuser.apps.sync.metrics import get_current_rss
+
+# SQL 语句类型与写入行数指标的映射
+SQL_ROWS_COUNTER_MAP = {
+    "INSERT": "rows_inserted",
+    "UPDATE": "rows_updated",
+    "DELETE": "rows_deleted",
+}
+
+
+class RunningPhase:
+    """正在执行的阶段"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.peak_rss = get_current_rss()
+
+    def update_peak_rss(self, rss: int):
+        self.peak_rss = max(self.peak_rss, rss)
+
+
+class PhaseProfiler:
+    """分阶段的性能采集器，采集各个阶段的耗时，常驻内存峰值，SQL 查询数量，写入行数
+
+    使用方式：
+        with PhaseProfiler() as profiler:
+            with profiler.phase("data_source"):
+                with profiler.phase("users"):  # 嵌套阶段名称为 data_source.users
+                    ...
+
+        profiler.phases  # 按阶段完成顺序排列的性能指标
+    """
+
+    # 常驻内存采样间隔（秒）
+    rss_sample_interval = 0.05
+
+    def __init__(self):
+        self.phases: List[PhaseMetrics] = []
+        # 当前正在执行的阶段，按嵌套层级排列
+        self._running_phases: List[RunningPhase] = []
+        self._counters: Counter[str] = Counter()
+        # 最近一次执行的写入语句（指标名称，游标），其影响行数待统计
+        self._pending_write: Tuple[str, Any] | None = None
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_rss, daemon=True)
+        self._exit_stack = ExitStack()
+
+    def __enter__(self) -> "PhaseProfiler":
+        self._exit_stack.enter_context(connection.execute_wrapper(self._count_queries))
+        self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._count_pending_write_rows()
+        self._stopped.set()
+        self._sampler.join()
+        self._exit_stack.close()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if self._running_phases:
+            name = f"{self._running_phases[-1].name}.{name}"
+
+        running_phase = RunningPhase(name)
+        self._running_phases.append(running_phase)
+
+        counters = self._counters.copy()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start
+            self._count_pending_write_rows()
+            self._running_phases.remove(running_phase)
+            running_phase.update_peak_rss(get_current_rss())
+
+            delta = self._counters - counters
+            self.phases.append(
+                PhaseMetrics(
+                    name=running_phase.name,
+                    wall_time=round(wall_time, 3),
+                    peak_rss_mb=round(running_phase.peak_rss / 1024 / 1024, 1),
+                    queries=delta["queries"],
+                    rows_inserted=delta["rows_inserted"],
+                    rows_updated=delta["rows_updated"],
+                    rows_deleted=delta["rows_deleted"],
+                )
+            )
+
+    def _count_queries(self, execute: Callable, sql: str, params: Any, many: bool, context: Dict[str, Any]) -> Any:
+        self._count_pending_write_rows()
+        result = execute(sql, params, many, context)
+
+        self._counters["queries"] += 1
+        if counter_key := SQL_ROWS_COUNTER_MAP.get(sql.lstrip()[:6].upper()):
+            self._pending_write = (counter_key, context["cursor"])
+
+        return result
+
+    def _count_pending_write_rows(self):
+        """统计写入语句的影响行数
+
+        注：带 RETURNING 的批量插入（如 SQLite，PostgreSQL），需要在结果被读取后，游标的 rowcount 才是准确的，
+        因此延迟到下一条语句执行前 / 阶段结束时才统计
+        """
+        if not self._pending_write:
+            return
+
+        counter_key, cursor = self._pending_write
+        self._pending_write = None
+        if cursor.rowcount > 0:
+            self._counters[counter_key] += cursor.rowcount
+
+    def _sample_rss(self):
+        """定时采样常驻内存，更新正在执行的各个阶段的内存峰值"""
+        while not self._stopped.wait(self.rss_sample_interval):
+            rss = get_current_rss()
+            for running_phase in list(self._running_phases):
+                running_phase.update_peak_rss(rss)
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import copy
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Tuple
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from ldap3 import MOCK_SYNC, OFFLINE_SLAPD_2_4, Connection, Server
+
+from bkuser.apps.sync.bench.orgs import SyntheticOrg
+from bkuser.plugins.ldap.client import LDAPClient
+from bkuser.plugins.ldap.models import ServerConfig
+
+
+class GeneralHTTPStubServer:
+    """通用 HTTP 数据源 API 的进程内桩服务，按照 API 协议分页返回合成的部门 / 用户数据
+
+    使用方式：
+        with GeneralHTTPStubServer(org) as server:
+            server.base_url  # http://127.0.0.1:{随机端口}
+    """
+
+    user_api_path = "/api/v1/users"
+    department_api_path = "/api/v1/departments"
+
+    host = "127.0.0.1"
+
+    def __init__(self, org: SyntheticOrg):
+        self.org = org
+        # 端口由系统随机分配
+        self._server = ThreadingHTTPServer((self.host, 0), self._gen_handler_cls())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "GeneralHTTPStubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self._server.server_port}"
+
+    def _gen_handler_cls(self) -> type[BaseHTTPRequestHandler]:
+        resources: Dict[str, Tuple[int, Callable[[int], Dict[str, Any]]]] = {
+            self.user_api_path: (self.org.user_count, self.org.get_user),
+            self.department_api_path: (self.org.dept_count, self.org.get_department),
+        }
+
+        class Handler(BaseHTTPRequestHandler):
+            # 使用 HTTP/1.1 以支持连接复用，与真实的 API 服务保持一致
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):  # noqa: N802
+                url = urlparse(self.path)
+                if url.path not in resources:
+                    self._send_json(404, {"message": "not found"})
+                    return
+
+                params = parse_qs(url.query)
+                page = int(params.get("page", ["1"])[0])
+                page_size = int(params.get("page_size", ["100"])[0])
+
+                total, get_item = resources[url.path]
+                start, end = (page - 1) * page_size, min(page * page_size, total)
+                self._send_json(200, {"count": total, "results": [get_item(idx) for idx in range(start, end)]})
+
+            def _send_json(self, status: int, data: Dict[str, Any]):
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any):
+                """基准测试过程中不输出访问日志"""
+
+        return Handler
+
+
+class LDAPStandIn:
+    """LDAP 服务的进程内替身（基于 ldap3 的 MOCK_SYNC 策略）
+
+    启用期间，LDAP 数据源插件建立的连接都会被替换为替身连接（共享同一份目录数据），支持分页搜索
+    部门为 organizationalUnit，用户为 inetOrgPerson（位于主部门下，leader 记录在 manager 属性中），
+    用户的 username，full_name，email，phone 属性由替身的 schema 额外定义
+    """
+
+    server_url = "ldap://127.0.0.1:389"
+    base_dn = "dc=bench,dc=example,dc=com"
+    bind_dn = "cn=admin,dc=bench,dc=example,dc=com"
+    bind_password = "bench-password"
+
+    user_object_class = "inetOrgPerson"
+    dept_object_class = "organizationalUnit"
+    leader_field = "manager"
+    user_builtin_attributes = ["username", "full_name", "email", "phone"]
+
+    def __init__(self, org: SyntheticOrg):
+        self.org = org
+        self.server = Server("bench-ldap-stand-in", get_info=OFFLINE_SLAPD_2_4)
+        self._extend_schema()
+        self._patcher = mock.patch.object(LDAPClient, "_gen_conn", new=self._gen_conn)
+
+    def __enter__(self) -> "LDAPStandIn":
+        self._populate()
+        self._patcher.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._patcher.stop()
+
+    def _gen_conn(self, server_config: ServerConfig) -> Connection:
+        return Connection(
+            server=self.server,
+            user=server_config.bind_dn,
+            password=server_config.bind_password,
+            client_strategy=MOCK_SYNC,
+            read_only=True,
+            raise_exceptions=True,
+        )
+
+    def _extend_schema(self):
+        """在 schema 中添加与内置字段同名的单值属性，使得用户数据无需配置字段映射（同通用 HTTP 数据源）"""
+        attribute_types = self.server.schema.attribute_types
+        for name in self.user_builtin_attributes:
+            attr_type = copy.copy(attribute_types["description"])
+            attr_type.oid, attr_type.name, attr_type.single_value = None, [name], True
+            attribute_types[name] = attr_type
+
+    def _populate(self):
+        """将合成的组织架构数据写入到替身的目录中"""
+        conn = Connection(self.server, client_strategy=MOCK_SYNC)
+        conn.strategy.add_entry(self.bind_dn, {"objectClass": ["person"], "userPassword": self.bind_password})
+
+        dept_dns: List[str] = []
+        for idx in range(self.org.dept_count):
+            parent_idx = self.org.get_parent_dept_idx(idx)
+            parent_dn = self.base_dn if parent_idx is None else dept_dns[parent_idx]
+            dept_code = self.org.gen_dept_code(idx)
+            dept_dns.append(f"ou={dept_code},{parent_dn}")
+            conn.strategy.add_entry(
+                dept_dns[idx],
+                {
+                    "objectClass": [self.dept_object_class],
+                    "ou": dept_code,
+                    "entryUUID": self.org.gen_dept_uuid(idx),
+                },
+                validate=False,
+            )
+
+        def gen_user_dn(idx: int) -> str:
+            dept_idx = self.org.get_user_dept_idxes(idx)[0]
+            return f"cn={self.org.gen_username(idx)},{dept_dns[dept_idx]}"
+
+        for idx in range(self.org.user_count):
+            user = self.org.get_user(idx)
+            attrs = {
+                "objectClass": [self.user_object_class],
+                "username": user["username"],
+                "full_name": user["full_name"],
+                "email": user["email"],
+                "phone": user["phone"],
+                "entryUUID": self.org.gen_user_uuid(idx),
+            }
+            if (leader_idx := self.org.get_leader_idx(idx)) is not None:
+                attrs[self.leader_field] = gen_user_dn(leader_idx)
+
+            conn.strategy.add_entry(gen_user_dn(idx), attrs, validate=False)
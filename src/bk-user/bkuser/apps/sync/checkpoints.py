@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import logging
+from typing import Any, Dict
+
+from bkuser.apps.sync.constants import SyncTaskStatus
+from bkuser.apps.sync.models import DataSourceSyncTask
+
+logger = logging.getLogger(__name__)
+
+
+class DataSourceSyncCheckpoint:
+    """数据源同步检查点（分块提交模式下使用）
+
+    分块提交时，每个分块在独立的事务中写入，并在同一事务中更新检查点（记录在 DataSourceSyncTask.extras 中），
+    若同步失败，则后续的同步任务（或被重新投递的同一任务）可以从检查点恢复，而无需重新对比已提交的分块。
+
+    注：分块提交的同步任务在完成前，数据源中只有部分变更已生效（不一致状态），此时不应同步到租户
+    """
+
+    def __init__(self, task: DataSourceSyncTask):
+        self.task = task
+        # 检查点数据：{同步对象类型: 进度状态}
+        self.states: Dict[str, Dict[str, Any]] = self.task.extras.get("checkpoint") or {}
+        if self.states:
+            # 同一任务被重新投递（如 worker 异常退出后重新执行），从任务自身的检查点恢复
+            self.task.extras["resumed_from"] = self.task.id
+        elif states := self._load_resumable_states():
+            # 从上个任务的检查点恢复，需要立即转存到当前任务，避免当前任务失败后检查点丢失
+            self.states = states
+            self._persist()
+
+    @property
+    def resumed(self) -> bool:
+        """是否从检查点恢复，恢复的任务只记录了检查点之后的变更（变更记录不完整）"""
+        return bool(self.states)
+
+    def get(self, key: str) -> Dict[str, Any]:
+        """获取某类同步对象的进度状态"""
+        return self.states.get(key, {})
+
+    def save(self, key: str, state: Dict[str, Any]):
+        """保存某类同步对象的进度状态，需要与分块数据在同一个事务中调用，以保证两者一致"""
+        self.states[key] = state
+        self._persist()
+
+    def complete(self):
+        """同步完成，清理检查点，标记数据源数据已处于一致状态"""
+        self.task.extras.pop("checkpoint", None)
+        self.task.extras["consistent"] = True
+        self.task.save(update_fields=["extras", "updated_at"])
+
+    def _persist(self):
+        self.task.extras["checkpoint"] = self.states
+        # 检查点存在，说明已有部分变更生效，在同步完成前，数据源数据都处于不一致状态
+        self.task.extras["consistent"] = False
+        self.task.save(update_fields=["extras", "updated_at"])
+
+    def _load_resumable_states(self) -> Dict[str, Dict[str, Any]]:
+        """若上一个同步任务以相同的同步模式分块提交，但是没有完成，则从其检查点恢复"""
+        last_task = (
+            DataSourceSyncTask.objects.filter(data_source_id=self.task.data_source_id, id__lt=self.task.id)
+            .exclude_dry_run()
+            .order_by("-id")
+            .first()
+        )
+        if not (last_task and last_task.status == SyncTaskStatus.FAILED and last_task.extras.get("checkpoint")):
+            return {}
+
+        # 同步模式不一致时，检查点的进度没有参考价值
+        if any(last_task.extras.get(k) != self.task.extras.get(k) for k in ["incremental", "overwrite"]):
+            return {}
+
+        logger.info("data source sync task %s resume from task %s checkpoint", self.task.id, last_task.id)
+        self.task.extras["resumed_from"] = last_task.id
+        return last_task.extras["checkpoint"]
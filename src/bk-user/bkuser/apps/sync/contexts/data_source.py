@@ -19,7 +19,7 @@
 # ruff: noqa: G003, G004
 import logging
 import traceback
-from typing import List
+from typing import Callable, List, Optional
 
 from celery.exceptions import SoftTimeLimitExceeded
 from django.conf import settings
@@ -30,7 +30,13 @@ from bkuser.apps.sync.constants import DataSourceSyncObjectType, SyncOperation,
 from bkuser.apps.sync.exceptions import DataSourceSyncInterrupted
 from bkuser.apps.sync.locks import DataSourceSyncTaskLock
 from bkuser.apps.sync.loggers import TaskLogger
-from bkuser.apps.sync.models import DataSourceDepartmentChangeLog, DataSourceSyncTask, DataSourceUserChangeLog
+from bkuser.apps.sync.metrics import SyncTaskMetrics
+from bkuser.apps.sync.models import (
+    DataSourceDepartmentChangeLog,
+    DataSourceSyncTask,
+    DataSourceSyncTaskLogChunk,
+    DataSourceUserChangeLog,
+)
 from bkuser.apps.sync.recorders import ChangeLogRecorder
 
 logger = logging.getLogger(__name__)
@@ -40,14 +46,19 @@ class DataSourceSyncTaskContext:
     """同步任务上下文管理器"""
 
     batch_size = 250
+    # 日志块大小（字符数）
+    log_chunk_size = 256 * 1024
+    log_chunk_batch_size = 8
 
-    def __init__(self, task: DataSourceSyncTask):
+    def __init__(self, task: DataSourceSyncTask, echo: Optional[Callable[[str], None]] = None):
         self.task = task
-        self.logger = TaskLogger()
-        self.recorder = ChangeLogRecorder()
+        self.logger = TaskLogger(echo=echo)
+        # 变更日志在同步过程中分批落库，避免在内存中暂存全部变更对象
+        self.recorder = ChangeLogRecorder(flusher=self._store_records)
+        self.metrics = SyncTaskMetrics(task, task_type="data_source", plugin_id=task.data_source.plugin_id)
         self.synced_obj_types: set[DataSourceSyncObjectType] = set()
 
-        timeout = task.extras.get("timeout", settings.DATA_SOURCE_SYNC_DEFAULT_TIMEOUT)
+        timeout = task.extras.get("sync_timeout", settings.DATA_SOURCE_SYNC_DEFAULT_TIMEOUT)
         self.lock = DataSourceSyncTaskLock(task.data_source_id, timeout=timeout)
 
     def __enter__(self):
@@ -84,9 +95,15 @@ class DataSourceSyncTaskContext:
         if exc_type is SoftTimeLimitExceeded:
             self.logger.error(f"sync task timeout, max duration is {self.task.extras.get('sync_timeout')}s")
 
+        # 分块提交模式下，已提交的分块不会被回滚，后续的同步任务会从检查点恢复
+        rollback_tips = (
+            "Data modifications in committed chunks are kept, next sync task will resume from the checkpoint."
+            if self.task.extras.get("checkpoint")
+            else "Data modifications in this sync step will be rollback."
+        )
         # 同步过程中出现异常，需要记录日志，并抛出 DataSourceSyncError
         self.logger.error(
-            "data source sync task failed! Data modifications in this sync step will be rollback.\n\n"
+            f"data source sync task failed! {rollback_tips}\n\n"
             + f"Exception: {''.join(traceback.format_exception(exc_type, exc_val, exc_tb))}"
         )
         self._update_task(SyncTaskStatus.FAILED)
@@ -105,38 +122,30 @@ class DataSourceSyncTaskContext:
 
         self.task.save(update_fields=update_fields)
 
-    def _store_records_into_db(self):
-        """将变更记录存入数据库"""
-        # 用户变更记录
-        if created_users := self.recorder.get(SyncOperation.CREATE, DataSourceSyncObjectType.USER):
-            DataSourceUserChangeLog.objects.bulk_create(
-                self._build_user_change_logs(SyncOperation.CREATE, created_users), batch_size=self.batch_size
-            )
-
-        if deleted_users := self.recorder.get(SyncOperation.DELETE, DataSourceSyncObjectType.USER):
-            DataSourceUserChangeLog.objects.bulk_create(
-                self._build_user_change_logs(SyncOperation.DELETE, deleted_users), batch_size=self.batch_size
-            )
+        # 到达稳定状态，记录各阶段耗时，变更行数等指标
+        if status in [SyncTaskStatus.SUCCESS, SyncTaskStatus.FAILED]:
+            for (operation, obj_type), cnt in self.recorder.counts.items():
+                self.metrics.set_rows(obj_type.value, operation.value, cnt)
+            self.metrics.save()
 
-        if updated_users := self.recorder.get(SyncOperation.UPDATE, DataSourceSyncObjectType.USER):
+    def _store_records_into_db(self):
+        """将（尚未落库的）变更记录存入数据库"""
+        self.recorder.flush()
+
+    def _store_records(
+        self,
+        operation: SyncOperation,
+        type: DataSourceSyncObjectType,
+        items: List,
+    ):
+        """将一批变更记录存入数据库"""
+        if type == DataSourceSyncObjectType.USER:
             DataSourceUserChangeLog.objects.bulk_create(
-                self._build_user_change_logs(SyncOperation.UPDATE, updated_users), batch_size=self.batch_size
-            )
-
-        # 部门变更记录
-        if created_depts := self.recorder.get(SyncOperation.CREATE, DataSourceSyncObjectType.DEPARTMENT):
-            DataSourceDepartmentChangeLog.objects.bulk_create(
-                self._build_dept_change_logs(SyncOperation.CREATE, created_depts), batch_size=self.batch_size
+                self._build_user_change_logs(operation, items), batch_size=self.batch_size
             )
-
-        if deleted_depts := self.recorder.get(SyncOperation.DELETE, DataSourceSyncObjectType.DEPARTMENT):
-            DataSourceDepartmentChangeLog.objects.bulk_create(
-                self._build_dept_change_logs(SyncOperation.DELETE, deleted_depts), batch_size=self.batch_size
-            )
-
-        if updated_depts := self.recorder.get(SyncOperation.UPDATE, DataSourceSyncObjectType.DEPARTMENT):
+        elif type == DataSourceSyncObjectType.DEPARTMENT:
             DataSourceDepartmentChangeLog.objects.bulk_create(
-                self._build_dept_change_logs(SyncOperation.UPDATE, updated_depts), batch_size=self.batch_size
+                self._build_dept_change_logs(operation, items), batch_size=self.batch_size
             )
 
     def _build_user_change_logs(
@@ -181,7 +190,19 @@ class DataSourceSyncTaskContext:
         ]
 
     def _store_logs_into_db(self):
-        """将步骤日志存入数据库"""
-        sync_task_logs = self.logger.logs.strip()
-        self.task.logs = sync_task_logs
-        self.task.save(update_fields=["logs", "updated_at"])
+        """将步骤日志分块存入数据库"""
+        # 同一任务可能被重复执行（如任务重试），需要先清理旧的日志块
+        DataSourceSyncTaskLogChunk.objects.filter(task=self.task).delete()
+
+        chunks: List[DataSourceSyncTaskLogChunk] = []
+        for seq, content in enumerate(self.logger.iter_chunks(self.log_chunk_size)):
+            chunks.append(DataSourceSyncTaskLogChunk(task=self.task, seq=seq, content=content))
+            # 避免在内存中同时保留过多的日志块
+            if len(chunks) >= self.log_chunk_batch_size:
+                DataSourceSyncTaskLogChunk.objects.bulk_create(chunks)
+                chunks = []
+
+        if chunks:
+            DataSourceSyncTaskLogChunk.objects.bulk_create(chunks)
+
+        self.logger.close()
@@ -28,7 +28,13 @@ from bkuser.apps.sync.constants import SyncOperation, SyncTaskStatus, TenantSync
 from bkuser.apps.sync.exceptions import TenantSyncInterrupted
 from bkuser.apps.sync.locks import TenantSyncTaskLock
 from bkuser.apps.sync.loggers import TaskLogger
-from bkuser.apps.sync.models import TenantDepartmentChangeLog, TenantSyncTask, TenantUserChangeLog
+from bkuser.apps.sync.metrics import SyncTaskMetrics
+from bkuser.apps.sync.models import (
+    TenantDepartmentChangeLog,
+    TenantSyncTask,
+    TenantSyncTaskLogChunk,
+    TenantUserChangeLog,
+)
 from bkuser.apps.sync.recorders import ChangeLogRecorder
 from bkuser.apps.tenant.models import TenantDepartment, TenantUser
 
@@ -39,11 +45,16 @@ class TenantSyncTaskContext:
     """同步任务上下文管理器"""
 
     batch_size = 250
+    # 日志块大小（字符数）
+    log_chunk_size = 256 * 1024
+    log_chunk_batch_size = 8
 
     def __init__(self, task: TenantSyncTask):
         self.task = task
         self.logger = TaskLogger()
-        self.recorder = ChangeLogRecorder()
+        # 变更日志在同步过程中分批落库，避免在内存中暂存全部变更对象
+        self.recorder = ChangeLogRecorder(flusher=self._store_records)
+        self.metrics = SyncTaskMetrics(task, task_type="tenant", plugin_id=task.data_source.plugin_id)
         self.lock = TenantSyncTaskLock(task.tenant_id, task.data_source_id)
 
     def __enter__(self):
@@ -101,40 +112,42 @@ class TenantSyncTaskContext:
             self.task.has_warning = self.logger.has_warning
             self.task.summary = {
                 "user": {
-                    "create": len(self.recorder.get(SyncOperation.CREATE, TenantSyncObjectType.USER)),
-                    "delete": len(self.recorder.get(SyncOperation.DELETE, TenantSyncObjectType.USER)),
+                    "create": self.recorder.count(SyncOperation.CREATE, TenantSyncObjectType.USER),
+                    "delete": self.recorder.count(SyncOperation.DELETE, TenantSyncObjectType.USER),
                 },
                 "department": {
-                    "create": len(self.recorder.get(SyncOperation.CREATE, TenantSyncObjectType.DEPARTMENT)),
-                    "delete": len(self.recorder.get(SyncOperation.DELETE, TenantSyncObjectType.DEPARTMENT)),
+                    "create": self.recorder.count(SyncOperation.CREATE, TenantSyncObjectType.DEPARTMENT),
+                    "delete": self.recorder.count(SyncOperation.DELETE, TenantSyncObjectType.DEPARTMENT),
                 },
             }
             update_fields += ["duration", "has_warning", "summary"]
 
         self.task.save(update_fields=update_fields)
 
-    def _store_records_into_db(self):
-        """将变更记录存入数据库"""
-        # 用户变更记录
-        if created_users := self.recorder.get(SyncOperation.CREATE, TenantSyncObjectType.USER):
-            TenantUserChangeLog.objects.bulk_create(
-                self._build_user_change_logs(SyncOperation.CREATE, created_users), batch_size=self.batch_size
-            )
+        # 到达稳定状态，记录各阶段耗时，变更行数等指标
+        if status in [SyncTaskStatus.SUCCESS, SyncTaskStatus.FAILED]:
+            for (operation, obj_type), cnt in self.recorder.counts.items():
+                self.metrics.set_rows(obj_type.value, operation.value, cnt)
+            self.metrics.save()
 
-        if deleted_users := self.recorder.get(SyncOperation.DELETE, TenantSyncObjectType.USER):
+    def _store_records_into_db(self):
+        """将（尚未落库的）变更记录存入数据库"""
+        self.recorder.flush()
+
+    def _store_records(
+        self,
+        operation: SyncOperation,
+        type: TenantSyncObjectType,
+        items: List,
+    ):
+        """将一批变更记录存入数据库"""
+        if type == TenantSyncObjectType.USER:
             TenantUserChangeLog.objects.bulk_create(
-                self._build_user_change_logs(SyncOperation.DELETE, deleted_users), batch_size=self.batch_size
+                self._build_user_change_logs(operation, items), batch_size=self.batch_size
             )
-
-        # 部门变更记录
-        if created_depts := self.recorder.get(SyncOperation.CREATE, TenantSyncObjectType.DEPARTMENT):
-            TenantDepartmentChangeLog.objects.bulk_create(
-                self._build_dept_change_logs(SyncOperation.CREATE, created_depts), batch_size=self.batch_size
-            )
-
-        if deleted_depts := self.recorder.get(SyncOperation.DELETE, TenantSyncObjectType.DEPARTMENT):
+        elif type == TenantSyncObjectType.DEPARTMENT:
             TenantDepartmentChangeLog.objects.bulk_create(
-                self._build_dept_change_logs(SyncOperation.DELETE, deleted_depts), batch_size=self.batch_size
+                self._build_dept_change_logs(operation, items), batch_size=self.batch_size
             )
 
     def _build_user_change_logs(self, operation: SyncOperation, users: List[TenantUser]) -> List[TenantUserChangeLog]:
@@ -178,7 +191,19 @@ class TenantSyncTaskContext:
         ]
 
     def _store_logs_into_db(self):
-        """将步骤日志存入数据库"""
-        sync_task_logs = self.logger.logs.strip()
-        self.task.logs = sync_task_logs
-        self.task.save(update_fields=["logs", "updated_at"])
+        """将步骤日志分块存入数据库"""
+        # 同一任务可能被重复执行（如任务重试），需要先清理旧的日志块
+        TenantSyncTaskLogChunk.objects.filter(task=self.task).delete()
+
+        chunks: List[TenantSyncTaskLogChunk] = []
+        for seq, content in enumerate(self.logger.iter_chunks(self.log_chunk_size)):
+            chunks.append(TenantSyncTaskLogChunk(task=self.task, seq=seq, content=content))
+            # 避免在内存中同时保留过多的日志块
+            if len(chunks) >= self.log_chunk_batch_size:
+                TenantSyncTaskLogChunk.objects.bulk_create(chunks)
+                chunks = []
+
+        if chunks:
+            TenantSyncTaskLogChunk.objects.bulk_create(chunks)
+
+        self.logger.close()
@@ -17,8 +17,8 @@
 
 # ignore custom logger must use %s string format in this file
 # ruff: noqa: G003, G004
-import re
-from typing import Any, Dict, List
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import pydantic
 from django.conf import settings
@@ -36,6 +36,33 @@ from bkuser.plugins.models import RawDataSourceUser
 from bkuser.utils.pydantic import stringify_pydantic_error
 
 
+@dataclass(frozen=True)
+class _CompiledCustomField:
+    """预编译的自定义字段转换规则（每次同步只构建一次，避免逐用户重复计算）"""
+
+    name: str
+    source_field: str
+    data_type: str
+    required: bool
+    default: Any
+    # 枚举类型的可选项，以及可选项值（value）到 ID 的映射
+    opt_values: List[str]
+    opt_value_to_id_map: Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class _ConversionPlan:
+    """数据源用户转换计划：字段映射 & 自定义字段处理器在同步任务中只构建一次"""
+
+    username_source: str
+    full_name_source: str
+    email_source: Optional[str]
+    phone_source: Optional[str]
+    phone_country_code_source: Optional[str]
+    # 自定义字段及其对应的值转换函数
+    custom_field_handlers: List[Tuple[_CompiledCustomField, Callable[[str, _CompiledCustomField, Any], Any]]]
+
+
 class DataSourceUserConverter:
     """数据源用户转换器"""
 
@@ -45,38 +72,39 @@ class DataSourceUserConverter:
         self.transformer = UsernameTransformer.load(data_source.id)
         self.custom_fields = TenantUserCustomField.objects.filter(tenant_id=self.data_source.owner_tenant_id)
         self.field_mapping = self._get_field_mapping()
+        # 转换计划在首次转换时构建，此后整个同步任务复用
+        self._plan: Optional[_ConversionPlan] = None
 
     def convert(self, user: RawDataSourceUser) -> DataSourceUser:
-        # TODO (su) 支持复杂字段映射类型，如表达式，目前都当作直接映射处理（目前只支持直接映射）
-        mapping = {m.target_field: m.source_field for m in self.field_mapping}
+        plan = self._plan or self._compile()
         props = user.properties
 
-        username = props.get(mapping["username"])
+        username = props.get(plan.username_source)
         # 1. 用户名是必须提供的，而且需要满足正则校验规则
         if not username:
             raise ValueError("username is required")
 
         username = self.transformer.to_stored(username)
-        if not re.fullmatch(DATA_SOURCE_USERNAME_REGEX, username):
+        if not DATA_SOURCE_USERNAME_REGEX.fullmatch(username):
             raise ValueError(f"username [{username}] not match pattern {DATA_SOURCE_USERNAME_REGEX.pattern}")
 
         # 2. 姓名也是必须提供的
-        full_name = props.get(mapping["full_name"])
+        full_name = props.get(plan.full_name_source)
         if not full_name:
             raise ValueError(f"username {username}, full_name is required")
 
-        email = props.get(mapping.get("email")) or ""  # type: ignore
+        email = props.get(plan.email_source) or ""  # type: ignore
         # 3. 如果提供了邮箱，则必须满足正则校验规则
-        if email and not re.fullmatch(EMAIL_REGEX, email):
+        if email and not EMAIL_REGEX.fullmatch(email):
             raise ValueError(
                 f"username {username}, email [{email}] provided but not match pattern {EMAIL_REGEX.pattern}"
             )
 
-        phone = props.get(mapping.get("phone")) or ""  # type: ignore
+        phone = props.get(plan.phone_source) or ""  # type: ignore
         # 4. 如果提供了手机号，则需要通过 phonenumbers 的检查，确保手机号码合法
         if phone:
             country_code = (
-                props.get(mapping.get("phone_country_code"))  # type: ignore
+                props.get(plan.phone_country_code_source)  # type: ignore
                 or settings.DEFAULT_PHONE_COUNTRY_CODE
             )
             validate_phone_with_country_code(phone, country_code)
@@ -91,9 +119,47 @@ class DataSourceUserConverter:
             email=email,
             phone=phone,
             phone_country_code=country_code,
-            extras=self._build_extras(username, props, mapping),
+            extras=self._build_extras(username, props, plan),
         )
 
+    def _compile(self) -> _ConversionPlan:
+        """根据字段映射 & 租户用户自定义字段，构建转换计划"""
+        # TODO (su) 支持复杂字段映射类型，如表达式，目前都当作直接映射处理（目前只支持直接映射）
+        mapping = {m.target_field: m.source_field for m in self.field_mapping}
+
+        handlers: Dict[str, Callable[[str, _CompiledCustomField, Any], Any]] = {
+            UserFieldDataType.NUMBER: self._convert_number,
+            UserFieldDataType.ENUM: self._convert_enum,
+            UserFieldDataType.MULTI_ENUM: self._convert_multi_enum,
+        }
+        custom_field_handlers = []
+        for f in self.custom_fields:
+            # 并不是所有的自定义字段，都已经被配置到字段映射中，这里应该以字段映射为准
+            if f.name not in mapping:
+                continue
+
+            field = _CompiledCustomField(
+                name=f.name,
+                source_field=mapping[f.name],
+                data_type=f.data_type,
+                required=f.required,
+                default=f.default,
+                # 提前预取枚举类型的选择项，便于后续校验和取 value 对应的 id
+                opt_values=[opt["value"] for opt in f.options],
+                opt_value_to_id_map={opt["value"]: opt["id"] for opt in f.options},
+            )
+            custom_field_handlers.append((field, handlers.get(f.data_type, self._convert_raw)))
+
+        self._plan = _ConversionPlan(
+            username_source=mapping["username"],
+            full_name_source=mapping["full_name"],
+            email_source=mapping.get("email"),
+            phone_source=mapping.get("phone"),
+            phone_country_code_source=mapping.get("phone_country_code"),
+            custom_field_handlers=custom_field_handlers,
+        )
+        return self._plan
+
     def _get_field_mapping(self) -> List[DataSourceUserFieldMapping]:
         """获取字段映射配置"""
         if self.data_source.is_local:
@@ -138,56 +204,54 @@ class DataSourceUserConverter:
             for f in fields
         ]
 
-    def _build_extras(  # noqa: C901
-        self, username: str, props: Dict[str, str], mapping: Dict[str, str]
-    ) -> Dict[str, Any]:
+    def _build_extras(self, username: str, props: Dict[str, str], plan: _ConversionPlan) -> Dict[str, Any]:
         extras = {}
-        for f in self.custom_fields:
-            # 并不是所有的自定义字段，都已经被配置到字段映射中，这里应该以字段映射为准
-            if f.name not in mapping:
-                continue
-
+        for f, handler in plan.custom_field_handlers:
+            value = props.get(f.source_field)
             # 如果没有提供该字段，则使用默认值
-            if not props.get(mapping[f.name]):
+            if not value:
                 # 只有字符串类型需要进行必填校验，其他类型一定有默认值
                 if f.data_type == UserFieldDataType.STRING and f.required and not f.default:
                     raise ValueError(f"username: {username}, field {f.name} is required")
                 extras[f.name] = f.default
                 continue
 
-            # 提前预取枚举类型的选择项，便于后续校验和取 value 对应的 id
-            opt_values = [opt["value"] for opt in f.options]
-            opt_value_to_id_map = {opt["value"]: opt["id"] for opt in f.options}
-
-            value = props[mapping[f.name]]
-            # 数字类型，转换成整型不丢精度就转，不行就浮点数
-            if f.data_type == UserFieldDataType.NUMBER:
-                try:
-                    value = float(value)  # type: ignore
-                    value = int(value) if int(value) == value else value  # type: ignore
-                except ValueError:
-                    raise ValueError(
-                        f"username: {username}, number field {f.name} value `{value}` cannot convert to number"
-                    )
-            # 枚举类型，值（value）必须是字符串，且是可选项中的一个
-            elif f.data_type == UserFieldDataType.ENUM:
-                if value not in opt_values:
-                    raise ValueError(
-                        f"username: {username}, enum field {f.name} value `{value}` not in options {opt_values}"
-                    )
-                value = opt_value_to_id_map[value]
-
-            # 多选枚举类型，值必须是字符串列表，且是可选项的子集
-            elif f.data_type == UserFieldDataType.MULTI_ENUM:
-                # 兼容 xlsx 导入，统一所有插件输出的多选枚举，都是通过 "," 分隔的字符串表示列表
-                value = [v.strip() for v in value.split(",") if v.strip()]  # type: ignore
-
-                if set(value) - set(opt_values):
-                    raise ValueError(
-                        f"username: {username}, multi enum field {f.name} value `{value}` not subset of {opt_values}"
-                    )
-                value = [opt_value_to_id_map[v] for v in value]  # type: ignore
-
-            extras[f.name] = value
+            extras[f.name] = handler(username, f, value)
 
         return extras
+
+    @staticmethod
+    def _convert_raw(username: str, f: _CompiledCustomField, value: Any) -> Any:
+        return value
+
+    @staticmethod
+    def _convert_number(username: str, f: _CompiledCustomField, value: Any) -> Any:
+        """数字类型，转换成整型不丢精度就转，不行就浮点数"""
+        try:
+            number = float(value)
+        except ValueError:
+            raise ValueError(f"username: {username}, number field {f.name} value `{value}` cannot convert to number")
+
+        return int(number) if int(number) == number else number
+
+    @staticmethod
+    def _convert_enum(username: str, f: _CompiledCustomField, value: Any) -> Any:
+        """枚举类型，值（value）必须是字符串，且是可选项中的一个"""
+        if value not in f.opt_value_to_id_map:
+            raise ValueError(
+                f"username: {username}, enum field {f.name} value `{value}` not in options {f.opt_values}"
+            )
+
+        return f.opt_value_to_id_map[value]
+
+    @staticmethod
+    def _convert_multi_enum(username: str, f: _CompiledCustomField, value: Any) -> List[Any]:
+        """多选枚举类型，值必须是字符串列表，且是可选项的子集"""
+        # 兼容 xlsx 导入，统一所有插件输出的多选枚举，都是通过 "," 分隔的字符串表示列表
+        values = [v.strip() for v in value.split(",") if v.strip()]
+
+        if any(v not in f.opt_value_to_id_map for v in values):
+            raise ValueError(
+                f"username: {username}, multi enum field {f.name} value `{values}` not subset of {f.opt_values}"
+            )
+        return [f.opt_value_to_id_map[v] for v in values]
@@ -15,6 +15,8 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+from typing import List, NamedTuple, Set
+
 from django.conf import settings
 from pydantic import BaseModel
 
@@ -30,6 +32,10 @@ class DataSourceSyncOptions(BaseModel):
     overwrite: bool = False
     # 是否使用增量同步
     incremental: bool = False
+    # 是否分块提交（每个分块在独立的事务中提交，失败后下次同步可从检查点恢复）
+    chunked_commit: bool = False
+    # 是否仅预览（只对比数据，将差异摘要记录到同步任务中，不写入任何数据，也不会触发租户同步）
+    dry_run: bool = False
     # 是否异步执行同步任务
     async_run: bool = True
     # 同步任务触发方式
@@ -41,6 +47,8 @@ class TenantSyncOptions(BaseModel):
 
     # 同步操作人，定时触发时为空
     operator: str = ""
+    # 是否使用增量同步（只根据数据源同步的变更集，创建 / 删除租户部门 & 用户），不满足条件时会转为全量同步
+    incremental: bool = True
     # 是否异步执行同步任务
     async_run: bool = True
     # 同步任务触发方式
@@ -52,3 +60,47 @@ class DataSourceSyncConfig(BaseModel):
 
     sync_period: DataSourceSyncPeriod = DataSourceSyncPeriod.PER_1_DAY
     sync_timeout: int = settings.DATA_SOURCE_SYNC_DEFAULT_TIMEOUT
+
+
+class DataSourceSyncChangeSet(BaseModel):
+    """数据源同步变更集（数据源部门 & 用户 ID），租户增量同步时只需要处理变更集中的数据
+
+    注：租户部门 / 用户只是关联数据源部门 / 用户，数据源部门 / 用户的更新不会影响租户数据，因此只需关注新增与删除
+    """
+
+    created_department_ids: Set[int] = set()
+    deleted_department_ids: Set[int] = set()
+    created_user_ids: Set[int] = set()
+    deleted_user_ids: Set[int] = set()
+
+    @property
+    def size(self) -> int:
+        return (
+            len(self.created_department_ids)
+            + len(self.deleted_department_ids)
+            + len(self.created_user_ids)
+            + len(self.deleted_user_ids)
+        )
+
+
+class RawDataSourceUserRelation(NamedTuple):
+    """原始数据源用户的关联信息
+
+    流式同步时不保存完整的原始用户数据，仅保留同步关联边所需的字段，以降低内存占用
+    """
+
+    # 用户唯一标识
+    code: str
+    # 直接上级信息（code）
+    leaders: List[str]
+    # 所属部门信息（code）
+    departments: List[str]
+
+
+class RawDataSourceDepartmentRelation(NamedTuple):
+    """原始数据源部门的关联信息（仅保留同步部门关系所需的字段）"""
+
+    # 部门唯一标识
+    code: str
+    # 上级部门（code）
+    parent: str | None
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from bkuser.apps.sync.constants import SyncOperation
+
+# 变更字段：{字段名: (变更前的值, 变更后的值)}
+ChangedFields = Dict[str, Tuple[Any, Any]]
+
+
+class SyncDiffCollector:
+    """同步差异收集器（预览模式下使用）
+
+    只统计各操作的变更数量 & 各字段的变更次数，并保留少量变更数据样例，
+    不会构建变更日志等模型，因此即使数据量很大，内存占用也是有限的
+    """
+
+    # 每种操作最多保留的变更数据样例数量
+    max_sample_size = 20
+
+    def __init__(self):
+        self.counts: Dict[SyncOperation, int] = defaultdict(int)
+        # 字段变更次数：{字段名: 次数}，自定义字段（extras）会细化到具体的字段
+        self.changed_field_counts: Dict[str, int] = defaultdict(int)
+        self.samples: Dict[SyncOperation, List[Dict[str, Any]]] = defaultdict(list)
+
+    def add(self, operation: SyncOperation, code: str, name: str, changed_fields: ChangedFields | None = None):
+        """添加一条变更数据"""
+        self.counts[operation] += 1
+        for field in changed_fields or {}:
+            self.changed_field_counts[field] += 1
+
+        if len(self.samples[operation]) >= self.max_sample_size:
+            return
+
+        sample: Dict[str, Any] = {"code": code, "name": name}
+        if changed_fields:
+            sample["changed_fields"] = {field: list(values) for field, values in changed_fields.items()}
+
+        self.samples[operation].append(sample)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """差异摘要，可直接存储到同步任务的扩展信息中"""
+        operations = [SyncOperation.CREATE, SyncOperation.UPDATE, SyncOperation.DELETE]
+        return {
+            "counts": {op.value: self.counts[op] for op in operations},
+            "changed_field_counts": dict(self.changed_field_counts),
+            "samples": {op.value: self.samples[op] for op in operations},
+        }
+
+
+def diff_model_fields(fields: List[str], current: Any, target: Any) -> ChangedFields:
+    """对比对象的指定字段，返回有变更的字段，其中自定义字段（extras）会按字段名细化对比"""
+    changed_fields: ChangedFields = {}
+    for field in fields:
+        current_value, target_value = getattr(current, field), getattr(target, field)
+        if current_value == target_value:
+            continue
+
+        if field == "extras":
+            for key in sorted(current_value.keys() | target_value.keys()):
+                if current_value.get(key) != target_value.get(key):
+                    changed_fields[f"extras.{key}"] = (current_value.get(key), target_value.get(key))
+        else:
+            changed_fields[field] = (current_value, target_value)
+
+    return changed_fields
@@ -15,10 +15,11 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-import io
 import logging
+import tempfile
+from collections import deque
 from functools import partialmethod
-from typing import Callable
+from typing import IO, Callable, Deque, Iterator, Optional
 
 from bkuser.apps.sync.constants import SyncLogLevel
 
@@ -26,24 +27,82 @@ logger = logging.getLogger(__name__)
 
 
 class TaskLogger:
-    """任务日志记录器"""
+    """任务日志记录器
+
+    日志先写入临时文件（超过 spool_size 后落盘，避免大量日志占用内存），任务结束时再按块读取并存入数据库；
+    日志总长度超过 max_size 后会被截断：保留开头 max_size 长度 & 末尾 tail_size 长度的日志（包含任务结果 / 异常信息）
+    """
+
+    # 内存中暂存的日志长度上限，超过后写入磁盘
+    spool_size = 1024 * 1024
+    # 完整保留的日志长度上限
+    max_size = 16 * 1024 * 1024
+    # 截断后，保留的末尾日志长度
+    tail_size = 256 * 1024
 
     has_warning: bool
-    _buffer: io.StringIO
+    _buffer: IO[str]
 
-    def __init__(self):
+    def __init__(self, echo: Optional[Callable[[str], None]] = None):
+        """
+        :param echo: 日志回显函数（如管理命令中将日志实时输出到终端），为空则不回显
+        """
         self.has_warning = False
-        self._buffer = io.StringIO()
+        self._echo = echo
+        # 临时文件在 close 时释放
+        self._buffer = tempfile.SpooledTemporaryFile(  # noqa: SIM115
+            max_size=self.spool_size, mode="w+", encoding="utf-8"
+        )
+        self._size = 0
+        # 超过长度上限后的末尾日志 & 被截断（丢弃）的日志条数
+        self._truncated_cnt = 0
+        self._tail: Deque[str] = deque()
+        self._tail_size = 0
 
     @property
-    def logs(self):
-        return self._buffer.getvalue()
+    def logs(self) -> str:
+        return "".join(self.iter_chunks(self.max_size))
+
+    def iter_chunks(self, chunk_size: int) -> Iterator[str]:
+        """按块读取日志，若日志被截断，则末尾日志会单独作为一块"""
+        self._buffer.seek(0)
+        while chunk := self._buffer.read(chunk_size):
+            yield chunk
+
+        # 恢复写入位置
+        self._buffer.seek(0, 2)
+
+        if self._tail:
+            truncated_tips = f"...... {self._truncated_cnt} logs truncated ......\n\n" if self._truncated_cnt else ""
+            yield truncated_tips + "".join(self._tail)
+
+    def close(self):
+        """释放日志临时文件"""
+        self._buffer.close()
+
+    def _log(self, level: SyncLogLevel, msg: str, *args):
+        # 与标准库 logging 一致，支持 %-style 参数
+        if args:
+            msg = msg % args
 
-    def _log(self, level: SyncLogLevel, msg: str):
         if level == SyncLogLevel.WARNING:
             self.has_warning = True
 
-        self._buffer.write(f"{level.value} {msg}\n\n")
+        if self._echo:
+            self._echo(f"{level.value} {msg}")
+
+        content = f"{level.value} {msg}\n\n"
+        if self._size + len(content) <= self.max_size:
+            self._buffer.write(content)
+            self._size += len(content)
+            return
+
+        # 超过日志长度上限，只保留末尾的日志
+        self._tail.append(content)
+        self._tail_size += len(content)
+        while self._tail_size > self.tail_size and len(self._tail) > 1:
+            self._tail_size -= len(self._tail.popleft())
+            self._truncated_cnt += 1
 
     # TODO (su) 支持 debug 级别的日志？但只能通过 shell 组装的 task 才能触发？
     info: Callable = partialmethod(_log, SyncLogLevel.INFO)  # type: ignore
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from bkuser.apps.sync.bench import SyncBenchmark, SyntheticOrg
+from bkuser.apps.sync.bench.constants import (
+    BENCH_SCALE_USER_COUNT_MAP,
+    ORG_SHAPE_DEPT_TREE_MAP,
+    BenchScale,
+    BenchSource,
+    OrgShape,
+)
+from bkuser.apps.tenant.models import Tenant
+from bkuser.biz.data_source import DataSourceHandler
+from bkuser.plugins.general.constants import PageSizeEnum
+
+
+class Command(BaseCommand):
+    """
+    数据同步基准测试：由进程内的通用 HTTP API 桩服务 / LDAP 替身提供合成的组织架构数据，
+    按轮次端到端执行数据源同步 & 租户同步（首轮为全新导入，后续轮次为无变更的重复同步），
+    输出各阶段的耗时，常驻内存峰值，SQL 查询数量，写入行数（JSON 格式，可用于版本间的性能对比）
+
+    $ python manage.py bench_sync --source general --scale 100k --shape balanced --tenant default
+
+    - 以 LDAP 数据源，并发搜索，三轮同步，结果输出到文件
+    $ python manage.py bench_sync --source ldap --scale 10k --shape deep --tenant default \
+        --rounds 3 --max-concurrency 3 --output bench_ldap_10k_deep.json
+
+    注意：基准测试会在指定租户下创建临时数据源并写入大量数据（默认结束后删除），请勿在生产环境中执行
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source", type=str, choices=BenchSource.get_values(), default=BenchSource.GENERAL, help="数据源类型"
+        )
+        parser.add_argument(
+            "--scale", type=str, choices=BenchScale.get_values(), default=BenchScale.SMALL, help="数据规模"
+        )
+        parser.add_argument(
+            "--shape", type=str, choices=OrgShape.get_values(), default=OrgShape.BALANCED, help="组织架构形态"
+        )
+        parser.add_argument("--tenant", type=str, required=True, help="临时数据源的归属租户 ID")
+        parser.add_argument("--rounds", type=int, default=2, help="同步轮数")
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            choices=PageSizeEnum.get_values(),
+            default=PageSizeEnum.SIZE_1000,
+            help="数据源分页拉取数量",
+        )
+        parser.add_argument("--max-concurrency", type=int, default=1, help="数据源拉取的最大并发数")
+        parser.add_argument("--output", type=str, default="", help="结果输出文件路径，默认输出到标准输出")
+        parser.add_argument("--keep-data", action="store_true", help="结束后保留临时数据源及其数据")
+
+    def handle(self, *args, **kwargs):
+        tenant = Tenant.objects.filter(id=kwargs["tenant"]).first()
+        if not tenant:
+            raise CommandError(f"tenant {kwargs['tenant']} not found")
+
+        if kwargs["rounds"] < 1:
+            raise CommandError("rounds must be greater than 0")
+
+        dept_depth, dept_breadth = ORG_SHAPE_DEPT_TREE_MAP[OrgShape(kwargs["shape"])]
+        org = SyntheticOrg(
+            user_count=BENCH_SCALE_USER_COUNT_MAP[BenchScale(kwargs["scale"])],
+            dept_depth=dept_depth,
+            dept_breadth=dept_breadth,
+        )
+        benchmark = SyncBenchmark(
+            tenant=tenant,
+            source=BenchSource(kwargs["source"]),
+            org=org,
+            rounds=kwargs["rounds"],
+            page_size=kwargs["page_size"],
+            max_concurrency=kwargs["max_concurrency"],
+        )
+
+        self.stdout.write(
+            f"start sync benchmark, source: {kwargs['source']}, users: {org.user_count}, depts: {org.dept_count}"
+        )
+        try:
+            result = benchmark.run()
+        finally:
+            if benchmark.data_source and not kwargs["keep_data"]:
+                with transaction.atomic():
+                    DataSourceHandler.delete_data_source_and_related_resources(benchmark.data_source)
+                self.stdout.write(f"benchmark data source {benchmark.data_source.id} deleted")
+
+        for phase in result.phases:
+            self.stdout.write(
+                f"{phase.name:<45} {phase.wall_time:>9.3f}s {phase.peak_rss_mb:>9.1f}MB "
+                + f"queries: {phase.queries:<8} inserted: {phase.rows_inserted:<8} "
+                + f"updated: {phase.rows_updated:<8} deleted: {phase.rows_deleted}"
+            )
+
+        output = result.model_dump_json(indent=2)
+        if not kwargs["output"]:
+            self.stdout.write(output)
+            return
+
+        with open(kwargs["output"], "w") as f:
+            f.write(output)
+        self.stdout.write(f"benchmark result saved to {kwargs['output']}")
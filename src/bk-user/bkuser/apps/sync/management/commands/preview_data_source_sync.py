@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import json
+
+from django.core.management.base import BaseCommand
+
+from bkuser.apps.data_source.models import DataSource
+from bkuser.apps.sync.constants import SyncTaskStatus, SyncTaskTrigger
+from bkuser.apps.sync.data_models import DataSourceSyncOptions
+from bkuser.apps.sync.managers import DataSourceSyncManager
+
+
+class Command(BaseCommand):
+    """
+    预览数据源同步（dry-run），输出将被创建 / 更新 / 删除的部门 & 用户数量，变更的字段，以及部分变更数据样例
+
+    $ python manage.py preview_data_source_sync --data-source 1
+
+    注意：预览不会写入任何数据，但会拉取数据源的全量（或增量）数据，耗时与实际同步的拉取阶段相当
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--data-source", dest="data_source_id", type=int, required=True, help="数据源 ID")
+        parser.add_argument("--incremental", action="store_true", default=False, help="是否以增量模式预览")
+
+    def handle(self, data_source_id: int, incremental: bool, *args, **options):
+        data_source = DataSource.objects.filter(id=data_source_id).first()
+        if not data_source:
+            raise RuntimeError(f"data source {data_source_id} not found!")
+
+        if data_source.is_local:
+            raise RuntimeError("local data source is not supported, please preview by importing workbook")
+
+        sync_options = DataSourceSyncOptions(
+            overwrite=True,
+            incremental=incremental,
+            dry_run=True,
+            async_run=False,
+            trigger=SyncTaskTrigger.MANUAL,
+        )
+        task = DataSourceSyncManager(data_source, sync_options).execute()
+        task.refresh_from_db()
+
+        if task.status != SyncTaskStatus.SUCCESS:
+            logs = "".join(task.get_logs(page) for page in range(1, task.log_page_count + 1))
+            self.stderr.write(f"data source sync preview failed, task: {task.id}\n{logs}")
+            return
+
+        self.stdout.write(json.dumps(task.extras["dry_run_diff"], ensure_ascii=False, indent=2))
@@ -27,6 +27,7 @@ from bkuser.apps.sync.models import DataSourceSyncTask, TenantSyncTask
 from bkuser.apps.sync.runners import DataSourceSyncTaskRunner, TenantSyncTaskRunner
 from bkuser.apps.sync.tasks import sync_data_source, sync_tenant
 from bkuser.apps.sync.workbook_temp_store import WorkbookTempStore
+from bkuser.plugins.local.constants import LocalDataSourceImportFileFormat
 
 
 class DataSourceSyncManager:
@@ -41,26 +42,19 @@ class DataSourceSyncManager:
         """同步数据源数据到数据库中，注意该方法不可用于 DB 事务中，可能导致异步任务获取 Task 失败"""
         plugin_init_extra_kwargs = plugin_init_extra_kwargs or {}
 
-        task = DataSourceSyncTask.objects.create(
-            data_source=self.data_source,
-            status=SyncTaskStatus.PENDING.value,
-            trigger=self.sync_options.trigger,
-            operator=self.sync_options.operator,
-            start_at=timezone.now(),
-            extras={
-                "incremental": self.sync_options.incremental,
-                "overwrite": self.sync_options.overwrite,
-                "async_run": self.sync_options.async_run,
-                "sync_timeout": self.sync_timeout,
-            },
-        )
+        task = self.create_task()
 
         if self.sync_options.async_run:
-            # 若数据源是本地数据源，则将 Workbook 文件存储到临时存储中
+            # 若数据源是本地数据源，则将 Workbook / 原始文件内容存储到临时存储中
             if self.data_source.is_local:
                 storage = WorkbookTempStore()
-                temporary_storage_id = storage.save(plugin_init_extra_kwargs["workbook"])
-                plugin_init_extra_kwargs = {"temporary_storage_id": temporary_storage_id}
+                file_format = plugin_init_extra_kwargs.get("file_format", LocalDataSourceImportFileFormat.XLSX)
+                if file_format == LocalDataSourceImportFileFormat.XLSX:
+                    temporary_storage_id = storage.save(plugin_init_extra_kwargs["workbook"])
+                else:
+                    temporary_storage_id = storage.save_raw(plugin_init_extra_kwargs["raw_data"])
+
+                plugin_init_extra_kwargs = {"temporary_storage_id": temporary_storage_id, "file_format": file_format}
 
             self._ensure_only_basic_type_in_kwargs(plugin_init_extra_kwargs)
             sync_data_source.apply_async(args=[task.id, plugin_init_extra_kwargs], soft_time_limit=self.sync_timeout)
@@ -70,6 +64,24 @@ class DataSourceSyncManager:
 
         return task
 
+    def create_task(self) -> DataSourceSyncTask:
+        """创建待执行的数据源同步任务（如管理命令中需要直接使用执行器执行同步时使用）"""
+        return DataSourceSyncTask.objects.create(
+            data_source=self.data_source,
+            status=SyncTaskStatus.PENDING.value,
+            trigger=self.sync_options.trigger,
+            operator=self.sync_options.operator,
+            start_at=timezone.now(),
+            extras={
+                "incremental": self.sync_options.incremental,
+                "overwrite": self.sync_options.overwrite,
+                "chunked_commit": self.sync_options.chunked_commit,
+                "dry_run": self.sync_options.dry_run,
+                "async_run": self.sync_options.async_run,
+                "sync_timeout": self.sync_timeout,
+            },
+        )
+
     @staticmethod
     def _ensure_only_basic_type_in_kwargs(kwargs: Dict[str, Any]):
         """确保 插件初始化额外参数 中只有基础类型"""
@@ -98,7 +110,9 @@ class TenantSyncManager:
 
         # Q: 为什么不是使用传入 data_source_sync_task id 信息而是直接获取最新一个？
         # A: 在创建租户同步任务时，才拿取最新的数据源同步任务，可以避免因延时获取的不是最新的
-        data_source_sync_task = DataSourceSyncTask.objects.filter(data_source=self.data_source).order_by("-id").first()
+        data_source_sync_task = (
+            DataSourceSyncTask.objects.filter(data_source=self.data_source).exclude_dry_run().order_by("-id").first()
+        )
         data_source_sync_task_id = data_source_sync_task.id if data_source_sync_task else 0
 
         task = TenantSyncTask.objects.create(
@@ -111,6 +125,7 @@ class TenantSyncManager:
             operator=self.sync_options.operator,
             start_at=timezone.now(),
             extras={
+                "incremental": self.sync_options.incremental,
                 "async_run": self.sync_options.async_run,
                 "sync_timeout": self.sync_timeout,
             },
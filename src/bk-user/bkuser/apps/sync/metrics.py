@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import resource
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Set, TypeVar
+
+from prometheus_client import Histogram
+
+from bkuser.apps.sync.models import DataSourceSyncTask, TenantSyncTask
+
+T = TypeVar("T")
+
+# 注：同步任务在 celery worker 中执行，指标需要通过 worker 的指标暴露服务获取（配置 CELERY_WORKER_METRICS_PORT）
+SYNC_TASK_DURATION = Histogram(
+    "bkuser_sync_task_duration_seconds",
+    "Duration of data source / tenant sync task",
+    ["task_type", "plugin_id", "status"],
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, float("inf")),
+)
+SYNC_PHASE_DURATION = Histogram(
+    "bkuser_sync_phase_duration_seconds",
+    "Duration of each phase in data source / tenant sync task",
+    ["task_type", "plugin_id", "phase"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, float("inf")),
+)
+SYNC_ROWS = Histogram(
+    "bkuser_sync_rows",
+    "Rows affected by data source / tenant sync task",
+    ["task_type", "plugin_id", "object_type", "operation"],
+    buckets=(0, 10, 100, 1000, 10000, 100000, 1000000, float("inf")),
+)
+SYNC_PEAK_RSS = Histogram(
+    "bkuser_sync_peak_rss_bytes",
+    "Peak resident set size of process during data source / tenant sync task",
+    ["task_type", "plugin_id"],
+    buckets=tuple(mb * 1024 * 1024 for mb in (128, 256, 512, 1024, 2048, 4096, 8192)) + (float("inf"),),
+)
+
+
+def get_current_rss() -> int:
+    """获取当前进程的常驻内存（字节），非 Linux 平台无法读取 /proc，则退化为进程的常驻内存峰值"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # 注：Linux 下 ru_maxrss 的单位为 KB
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def reset_peak_rss():
+    """重置当前进程的常驻内存峰值（Linux 4.0+ 支持），使之后读取的峰值只统计重置之后的内存占用
+
+    注：celery worker 子进程会复用执行多个任务，若不重置，读取到的是进程生命周期内的峰值；
+    无法重置（非 Linux 平台或无权限）时，读取到的峰值会偏大，但不会遗漏阶段之间的瞬时峰值
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def get_peak_rss() -> int:
+    """获取当前进程的常驻内存峰值（字节），由内核记录，包含阶段执行过程中的瞬时峰值"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    # 非 Linux 平台无法读取 /proc，使用 ru_maxrss（不可重置，为进程生命周期内的峰值）
+    # 注：Linux 下 ru_maxrss 的单位为 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class SyncTaskMetrics:
+    """同步任务指标采集器：各阶段耗时，变更行数，进程常驻内存峰值
+
+    阶段可以嵌套（嵌套阶段名称以 . 分隔，如 users.convert），同名阶段多次执行（如按分块执行）时耗时累加；
+    指标会存储在任务的 extras["metrics"] 中，并上报到 Prometheus
+    """
+
+    def __init__(self, task: DataSourceSyncTask | TenantSyncTask, task_type: str, plugin_id: str):
+        self.task = task
+        self.task_type = task_type
+        self.plugin_id = plugin_id
+        # {phase: duration}
+        self.phases: Dict[str, float] = defaultdict(float)
+        # {object_type: {operation: count}}
+        self.rows: Dict[str, Dict[str, int]] = defaultdict(dict)
+        reset_peak_rss()
+        self.peak_rss = get_peak_rss()
+        # 当前正在执行的阶段，按嵌套层级排列
+        self._running_phases: List[str] = []
+        # 已上报的阶段（阶段指标只上报一次）
+        self._observed_phases: Set[str] = set()
+        self._task_observed = False
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if self._running_phases:
+            name = f"{self._running_phases[-1]}.{name}"
+
+        self._running_phases.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - start
+            self._running_phases.pop()
+            self.peak_rss = max(self.peak_rss, get_peak_rss())
+
+    def timed_iter(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """对迭代器获取元素的耗时进行计时（如从数据源插件拉取数据），计入当前阶段下的 name 子阶段"""
+        if self._running_phases:
+            name = f"{self._running_phases[-1]}.{name}"
+
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.phases[name] += time.perf_counter() - start
+
+            yield item
+
+    def set_rows(self, object_type: str, operation: str, count: int):
+        self.rows[object_type][operation] = count
+
+    def to_dict(self) -> Dict:
+        return {
+            "phases": {name: round(duration, 3) for name, duration in self.phases.items()},
+            "rows": self.rows,
+            "peak_rss_mb": round(self.peak_rss / 1024 / 1024, 1),
+        }
+
+    def save(self):
+        """将指标存入任务的 extras 中，并上报尚未上报的指标到 Prometheus"""
+        self.task.extras["metrics"] = self.to_dict()
+        self.task.save(update_fields=["extras", "updated_at"])
+
+        for name, duration in self.phases.items():
+            if name in self._observed_phases:
+                continue
+
+            SYNC_PHASE_DURATION.labels(self.task_type, self.plugin_id, name).observe(duration)
+            self._observed_phases.add(name)
+
+        # 任务级别的指标（总耗时，变更行数，内存峰值）只在任务结束时上报一次
+        if self._task_observed:
+            return
+
+        labels = (self.task_type, self.plugin_id)
+        SYNC_TASK_DURATION.labels(*labels, self.task.status).observe(self.task.duration.total_seconds())
+        for object_type, operation_counts in self.rows.items():
+            for operation, count in operation_counts.items():
+                SYNC_ROWS.labels(*labels, object_type, operation).observe(count)
+
+        SYNC_PEAK_RSS.labels(*labels).observe(self.peak_rss)
+        self._task_observed = True
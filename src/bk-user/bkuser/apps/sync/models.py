@@ -15,6 +15,7 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 from datetime import timedelta
+from typing import Any
 
 from django.db import models
 from django.utils.translation import gettext_lazy as _
@@ -26,7 +27,36 @@ from bkuser.common.models import TimestampedModel
 from bkuser.utils.uuid import generate_uuid
 
 
-class DataSourceSyncTask(TimestampedModel):
+class DataSourceSyncTaskQuerySet(models.QuerySet):
+    def exclude_dry_run(self) -> "DataSourceSyncTaskQuerySet":
+        """排除预览（dry-run）任务，预览任务不会修改数据源数据，也没有变更记录"""
+        # 注：历史任务的 extras 中没有 dry_run 字段，直接 exclude(extras__dry_run=True) 会因为 NULL 比较而将其一并排除
+        return self.filter(models.Q(extras__dry_run=False) | ~models.Q(extras__has_key="dry_run"))
+
+
+class SyncTaskLogMixin:
+    """同步任务日志
+
+    同步过程中的日志按块存储（log_chunks），logs 字段用于存储历史任务的日志，以及在同步过程之外补充的日志（如任务超时）
+    查询时每个日志块作为一页，logs 字段（若有）作为最后一页
+    """
+
+    logs: str
+    log_chunks: Any
+
+    @property
+    def log_page_count(self) -> int:
+        return self.log_chunks.count() + int(bool(self.logs))
+
+    def get_logs(self, page: int = 1) -> str:
+        """获取指定页（从 1 开始）的同步日志"""
+        if chunk := self.log_chunks.filter(seq=page - 1).first():
+            return chunk.content
+
+        return self.logs if page == self.log_chunks.count() + 1 else ""
+
+
+class DataSourceSyncTask(SyncTaskLogMixin, TimestampedModel):
     """数据源同步任务"""
 
     data_source = models.ForeignKey(DataSource, on_delete=models.DO_NOTHING, db_constraint=False)
@@ -39,6 +69,8 @@ class DataSourceSyncTask(TimestampedModel):
     logs = models.TextField("任务日志", default="")
     extras = models.JSONField("扩展信息", default=dict)
 
+    objects = DataSourceSyncTaskQuerySet.as_manager()
+
     class Meta:
         ordering = ["-id"]
 
@@ -56,6 +88,25 @@ class DataSourceSyncTask(TimestampedModel):
         # 同步模式
         return _("数据源导入成功") if self.status == SyncTaskStatus.SUCCESS else _("数据源导入失败")
 
+    @property
+    def is_consistent(self) -> bool:
+        """数据源数据是否处于一致状态（分块提交的同步任务在完成前，数据源中只有部分变更已生效）"""
+        return self.extras.get("consistent", True)
+
+
+class DataSourceSyncTaskLogChunk(TimestampedModel):
+    """数据源同步任务日志块"""
+
+    task = models.ForeignKey(
+        DataSourceSyncTask, on_delete=models.CASCADE, db_constraint=False, related_name="log_chunks"
+    )
+    seq = models.PositiveIntegerField("日志块序号")
+    content = models.TextField("日志内容")
+
+    class Meta:
+        ordering = ["seq"]
+        unique_together = [("task", "seq")]
+
 
 class DataSourceUserChangeLog(TimestampedModel):
     """数据源用户变更日志"""
@@ -88,7 +139,7 @@ class DataSourceDepartmentChangeLog(TimestampedModel):
     department_name = models.CharField("部门名称", max_length=255)
 
 
-class TenantSyncTask(TimestampedModel):
+class TenantSyncTask(SyncTaskLogMixin, TimestampedModel):
     """租户同步任务"""
 
     tenant = models.ForeignKey(Tenant, on_delete=models.DO_NOTHING, db_constraint=False)
@@ -111,6 +162,18 @@ class TenantSyncTask(TimestampedModel):
         ordering = ["-id"]
 
 
+class TenantSyncTaskLogChunk(TimestampedModel):
+    """租户同步任务日志块"""
+
+    task = models.ForeignKey(TenantSyncTask, on_delete=models.CASCADE, db_constraint=False, related_name="log_chunks")
+    seq = models.PositiveIntegerField("日志块序号")
+    content = models.TextField("日志内容")
+
+    class Meta:
+        ordering = ["seq"]
+        unique_together = [("task", "seq")]
+
+
 class TenantUserChangeLog(TimestampedModel):
     """租户用户变更日志"""
 
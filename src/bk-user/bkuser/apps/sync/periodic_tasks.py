@@ -18,6 +18,7 @@
 import logging
 from datetime import timedelta
 
+from django.conf import settings
 from django.db.models import F, Value
 from django.db.models.functions import Concat
 from django.utils import timezone
@@ -47,7 +48,10 @@ def build_and_run_data_source_sync_task(data_source_id: int):
         # 定时执行的任务，执行者为最后修改数据源配置的人
         operator=data_source.updater,
         overwrite=True,
-        incremental=False,
+        # 插件启用了增量拉取时，使用增量同步（基于上次同步成功的游标，只拉取变更过的数据）
+        incremental=data_source.get_plugin_cfg().delta_fetch_enabled,
+        # 大规模数据源可启用分块提交，避免长事务，且同步失败后可从检查点恢复
+        chunked_commit=settings.DATA_SOURCE_SYNC_CHUNKED_COMMIT,
         # 注：现在就在异步任务中，不需要 async_run=True
         async_run=False,
         trigger=SyncTaskTrigger.CRONTAB,
@@ -17,7 +17,7 @@
 
 import logging
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 from bkuser.apps.data_source.models import DataSourceDepartment, DataSourceUser
 from bkuser.apps.sync.constants import DataSourceSyncObjectType, SyncOperation, TenantSyncObjectType
@@ -29,13 +29,25 @@ logger = logging.getLogger(__name__)
 SyncOperationObjectType = Tuple[SyncOperation, DataSourceSyncObjectType | TenantSyncObjectType]
 
 
+# 变更日志落库函数，参数为：操作，对象类型，变更对象列表
+ChangeLogFlusher = Callable[..., None]
+
+
 class ChangeLogRecorder:
-    """变更日志记录器"""
+    """变更日志记录器
+
+    若提供了 flusher，则某类型某操作暂存的变更对象达到 flush_size 时，会分批落库并释放内存，
+    此时 get 只能获取到尚未落库的变更对象，变更总数需要通过 count 获取
+    """
 
     records: Dict[SyncOperationObjectType, List]
+    counts: Dict[SyncOperationObjectType, int]
 
-    def __init__(self):
+    def __init__(self, flusher: Optional[ChangeLogFlusher] = None, flush_size: int = 1000):
         self.records = defaultdict(list)
+        self.counts = defaultdict(int)
+        self.flusher = flusher
+        self.flush_size = flush_size
 
     def add(
         self,
@@ -44,10 +56,32 @@ class ChangeLogRecorder:
         items: List[DataSourceUser | DataSourceDepartment | TenantUser | TenantDepartment],
     ):
         """添加某类型某操作的变更日志"""
-        self.records[(operation, type)].extend(items)
+        key = (operation, type)
+        self.records[key].extend(items)
+        self.counts[key] += len(items)
+
+        if self.flusher and len(self.records[key]) >= self.flush_size:
+            self._flush(key)
 
     def get(
         self, operation: SyncOperation, type: DataSourceSyncObjectType | TenantSyncObjectType
     ) -> List[DataSourceUser | DataSourceDepartment | TenantUser | TenantDepartment]:
-        """获取某类型某操作的变更日志"""
+        """获取某类型某操作（尚未落库）的变更日志"""
         return self.records[(operation, type)]
+
+    def count(self, operation: SyncOperation, type: DataSourceSyncObjectType | TenantSyncObjectType) -> int:
+        """获取某类型某操作的变更日志总数（包含已落库的）"""
+        return self.counts[(operation, type)]
+
+    def flush(self):
+        """将暂存的变更日志全部落库"""
+        if not self.flusher:
+            return
+
+        for key in list(self.records.keys()):
+            self._flush(key)
+
+    def _flush(self, key: SyncOperationObjectType):
+        items = self.records.pop(key, [])
+        if items:
+            self.flusher(*key, items)  # type: ignore
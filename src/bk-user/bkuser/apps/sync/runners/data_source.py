@@ -18,12 +18,16 @@
 # ignore custom logger must use %s string format in this file
 # ruff: noqa: G004
 import logging
-from typing import Any, Dict
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterator, Optional, Set
 
+from bkuser.apps.data_source.cache import DataSourceOrgTreeSnapshotCache
 from bkuser.apps.data_source.models import DataSource, DataSourceUser
-from bkuser.apps.sync.constants import DataSourceSyncObjectType
+from bkuser.apps.sync.checkpoints import DataSourceSyncCheckpoint
+from bkuser.apps.sync.constants import DataSourceSyncObjectType, SyncOperation, SyncTaskStatus
 from bkuser.apps.sync.contexts import DataSourceSyncTaskContext
-from bkuser.apps.sync.models import DataSourceSyncTask
+from bkuser.apps.sync.differs import SyncDiffCollector
+from bkuser.apps.sync.models import DataSourceSyncTask, DataSourceUserChangeLog
 from bkuser.apps.sync.signals import post_sync_data_source
 from bkuser.apps.sync.syncers import (
     DataSourceDepartmentRelationSyncer,
@@ -36,6 +40,8 @@ from bkuser.apps.sync.validators import DataSourceUserExtrasUniqueValidator
 from bkuser.apps.tenant.constants import TenantStatus
 from bkuser.apps.tenant.models import Tenant
 from bkuser.plugins.base import get_plugin_cls
+from bkuser.plugins.models import RawDataSourceUser
+from bkuser.utils.iterx import prefetched
 
 logger = logging.getLogger(__name__)
 
@@ -43,21 +49,91 @@ logger = logging.getLogger(__name__)
 class DataSourceSyncTaskRunner:
     """数据源同步任务执行器"""
 
-    def __init__(self, task: DataSourceSyncTask, plugin_init_extra_kwargs: Dict[str, Any]):
+    # 部门与用户数据同时拉取时，最多预先拉取（缓存）的用户数量
+    user_prefetch_size = 10000
+
+    def __init__(
+        self,
+        task: DataSourceSyncTask,
+        plugin_init_extra_kwargs: Dict[str, Any],
+        echo: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        :param task: 数据源同步任务
+        :param plugin_init_extra_kwargs: 插件初始化额外参数
+        :param echo: 同步日志回显函数（如管理命令中用于实时输出同步进度）
+        """
         self.task = task
+        self.echo = echo
         self.data_source = DataSource.objects.get(id=self.task.data_source_id)
         self.plugin_init_extra_kwargs = plugin_init_extra_kwargs
+        self.overwrite = bool(self.task.extras.get("overwrite", False))
+        self.incremental = bool(self.task.extras.get("incremental", False))
+        self.chunked_commit = bool(self.task.extras.get("chunked_commit", False))
+        self.dry_run = bool(self.task.extras.get("dry_run", False))
 
     def run(self):
         if self._need_skip_sync():
             return
 
-        with DataSourceSyncTaskContext(self.task) as ctx:
-            self._initial_plugin(ctx, self.plugin_init_extra_kwargs)
-            self._sync_departments(ctx)
-            self._sync_users(ctx)
-            self._validate_unique_fields(ctx)
+        if self.dry_run:
+            self._preview()
+            return
+
+        with DataSourceSyncTaskContext(self.task, echo=self.echo) as ctx:
+            # 分块提交模式下，需要在获取同步锁后再加载检查点（避免与其他同步任务的检查点冲突）
+            self.checkpoint = DataSourceSyncCheckpoint(self.task) if self.chunked_commit else None
+            with ctx.metrics.phase("plugin_init"):
+                self._initial_plugin(ctx, self.plugin_init_extra_kwargs)
+            with self._prefetch_users() as raw_users:
+                self._sync_departments(ctx)
+                self._sync_users(ctx, raw_users)
+            self._store_delta_cursor(ctx)
+            with ctx.metrics.phase("validation"):
+                self._validate_unique_fields(ctx)
+
+        # 分块提交的变更全部完成，数据源数据恢复到一致状态
+        if self.checkpoint:
+            self.checkpoint.complete()
+
+        # 任务上下文退出后（任务状态 & 变更记录均已入库）才触发租户同步，租户同步可以据此获取本次同步的变更集
+        with ctx.metrics.phase("signal"):
             self._send_signal(ctx)
+        ctx.metrics.save()
+
+    def _preview(self):
+        """预览（dry-run）：拉取数据并与 DB 中的数据进行对比，只将差异摘要记录到任务中，不写入任何数据
+
+        预览只涉及部门 & 用户主体，关联关系（部门间关系，用户 Leader / 部门关系）等不会进行对比，
+        且不会保存增量拉取的游标，也不会触发租户同步
+        """
+        with DataSourceSyncTaskContext(self.task, echo=self.echo) as ctx:
+            ctx.logger.info("dry run mode, only diff summary will be stored, no data will be written")
+            self._initial_plugin(ctx, self.plugin_init_extra_kwargs)
+
+            kwargs = {
+                "ctx": ctx,
+                "data_source": self.data_source,
+                "overwrite": self.overwrite,
+                "incremental": self.incremental,
+            }
+            dept_differ, user_differ = SyncDiffCollector(), SyncDiffCollector()
+            with self._prefetch_users() as raw_users:
+                DataSourceDepartmentSyncer(
+                    raw_departments=self.plugin.iter_departments(),
+                    get_deleted_codes=self._get_deleted_department_codes,
+                    differ=dept_differ,
+                    **kwargs,  # type: ignore
+                ).sync()
+                DataSourceUserSyncer(
+                    raw_users=raw_users,
+                    get_deleted_codes=self._get_deleted_user_codes,
+                    differ=user_differ,
+                    **kwargs,  # type: ignore
+                ).sync()
+
+            self.task.extras["dry_run_diff"] = {"department": dept_differ.to_dict(), "user": user_differ.to_dict()}
+            self.task.save(update_fields=["extras", "updated_at"])
 
     def _need_skip_sync(self) -> bool:
         """租户不是启用状态，需要跳过同步"""
@@ -78,38 +154,93 @@ class DataSourceSyncTaskRunner:
         PluginCls = get_plugin_cls(self.data_source.plugin_id)  # noqa: N806
         self.plugin = PluginCls(plugin_cfg, ctx.logger, **plugin_init_extra_kwargs)
 
+        # 增量同步时，若插件支持增量拉取，则从上次同步成功时保存的游标开始，只拉取变更过的数据
+        if self.incremental and (cursor := self._get_last_delta_cursor()):
+            ctx.logger.info(f"fetch delta data from data source plugin, cursor is {cursor}")
+            self.plugin.set_delta_cursor(cursor)
+
+        # 插件支持增量拉取，但本次拉取的是全量数据（如没有可用的游标，需要定期全量对账等），
+        # 则需要以全量模式进行同步，以删除数据源中已经不存在的部门 / 用户
+        delta_result = self.plugin.get_delta_result()
+        if self.incremental and self.overwrite and delta_result and not delta_result.is_delta:
+            ctx.logger.info("data source plugin will fetch all data, sync with full mode")
+            self.incremental = False
+
+    def _get_last_delta_cursor(self) -> Dict[str, str]:
+        """获取上次同步成功时保存的增量拉取游标"""
+        last_task = (
+            DataSourceSyncTask.objects.filter(data_source=self.data_source, status=SyncTaskStatus.SUCCESS)
+            .exclude_dry_run()
+            .exclude(id=self.task.id)
+            .order_by("-id")
+            .first()
+        )
+        return last_task.extras.get("delta_cursor", {}) if last_task else {}
+
+    def _store_delta_cursor(self, ctx: DataSourceSyncTaskContext):
+        """保存本次拉取后的游标，只有同步成功的任务的游标会在下次增量同步时被使用"""
+        delta_result = self.plugin.get_delta_result()
+        if not (delta_result and delta_result.cursor):
+            return
+
+        self.task.extras["delta_cursor"] = delta_result.cursor
+        self.task.save(update_fields=["extras", "updated_at"])
+        ctx.logger.info(f"delta cursor {delta_result.cursor} saved")
+
+    def _get_deleted_department_codes(self) -> Set[str]:
+        delta_result = self.plugin.get_delta_result()
+        return delta_result.deleted_department_codes if delta_result and delta_result.is_delta else set()
+
+    def _get_deleted_user_codes(self) -> Set[str]:
+        delta_result = self.plugin.get_delta_result()
+        return delta_result.deleted_user_codes if delta_result and delta_result.is_delta else set()
+
+    def _prefetch_users(self) -> ContextManager[Iterator[RawDataSourceUser]]:
+        """若插件支持同时拉取部门与用户数据，则在同步部门的同时，在后台预先拉取用户数据"""
+        raw_users = self.plugin.iter_users()
+        if not self.plugin.support_concurrent_fetch:
+            return nullcontext(raw_users)
+
+        return prefetched(raw_users, maxsize=self.user_prefetch_size)
+
     def _sync_departments(self, ctx: DataSourceSyncTaskContext):
         """同步部门信息"""
-        raw_departments = self.plugin.fetch_departments()
-        ctx.logger.info(f"receive {len(raw_departments)} departments from data source plugin")
-
         kwargs = {
             "ctx": ctx,
             "data_source": self.data_source,
-            "raw_departments": raw_departments,
-            "overwrite": bool(self.task.extras.get("overwrite", False)),
-            "incremental": bool(self.task.extras.get("incremental", False)),
+            "overwrite": self.overwrite,
+            "incremental": self.incremental,
         }
-        # 部门主体
-        DataSourceDepartmentSyncer(**kwargs).sync()  # type: ignore
+        # 部门主体（以迭代器的方式边拉取边同步，避免在内存中保存全量的部门数据）
+        dept_syncer = DataSourceDepartmentSyncer(
+            raw_departments=self.plugin.iter_departments(),
+            get_deleted_codes=self._get_deleted_department_codes,
+            **kwargs,  # type: ignore
+        )
+        with ctx.metrics.phase("departments"):
+            dept_syncer.sync()
         ctx.synced_obj_types.add(DataSourceSyncObjectType.DEPARTMENT)
-        # 部门间关系
-        DataSourceDepartmentRelationSyncer(**kwargs).sync()  # type: ignore
+        # 部门间关系（只需要部门的 code & parent 信息）
+        dept_relation_syncer = DataSourceDepartmentRelationSyncer(
+            raw_departments=dept_syncer.dept_relations,
+            **kwargs,  # type: ignore
+        )
+        with ctx.metrics.phase("department_relations"):
+            dept_relation_syncer.sync()
         ctx.synced_obj_types.add(DataSourceSyncObjectType.DEPARTMENT_RELATION)
 
+        # 部门 & 部门关系同步完成后，重新构建组织树快照，供 API 层查询部门层级信息
+        DataSourceOrgTreeSnapshotCache().refresh(self.data_source.id)
+
         ctx.logger.info("succeed to sync departments and their relations from data source plugin")
 
-    def _sync_users(self, ctx: DataSourceSyncTaskContext):
+    def _sync_users(self, ctx: DataSourceSyncTaskContext, raw_users: Iterator[RawDataSourceUser]):
         """同步用户信息"""
-        raw_users = self.plugin.fetch_users()
-        ctx.logger.info(f"receive {len(raw_users)} users from data source plugin")
-
         kwargs = {
             "ctx": ctx,
             "data_source": self.data_source,
-            "raw_users": raw_users,
-            "overwrite": bool(self.task.extras.get("overwrite", False)),
-            "incremental": bool(self.task.extras.get("incremental", False)),
+            "overwrite": self.overwrite,
+            "incremental": self.incremental,
         }
 
         # Q: 为什么不能在使用的地方现查？直接 DB 查询获取 “同步前存量” 的用户 ID 集合？
@@ -120,21 +251,45 @@ class DataSourceSyncTaskRunner:
         #
         # ref: https://github.com/TencentBlueKing/bk-user/pull/1904/files
         exists_user_ids = set(DataSourceUser.objects.filter(data_source=self.data_source).values_list("id", flat=True))
-        # 用户主体
-        DataSourceUserSyncer(**kwargs).sync()  # type: ignore
+        # 用户主体（以迭代器的方式边拉取边同步，避免在内存中保存全量的用户数据）
+        user_syncer = DataSourceUserSyncer(
+            raw_users=raw_users,
+            get_deleted_codes=self._get_deleted_user_codes,
+            checkpoint=self.checkpoint,
+            **kwargs,  # type: ignore
+        )
+        with ctx.metrics.phase("users"):
+            user_syncer.sync()
         ctx.synced_obj_types.add(DataSourceSyncObjectType.USER)
+
+        # 关联边同步只需要用户的 code，leaders，departments 信息
+        kwargs["raw_users"] = user_syncer.user_relations
         # 用户 Leader 关系
-        DataSourceUserLeaderRelationSyncer(exists_user_ids_before_sync=exists_user_ids, **kwargs).sync()  # type: ignore
+        with ctx.metrics.phase("user_leader_relations"):
+            DataSourceUserLeaderRelationSyncer(exists_user_ids_before_sync=exists_user_ids, **kwargs).sync()  # type: ignore
         ctx.synced_obj_types.add(DataSourceSyncObjectType.USER_LEADER_RELATION)
         # 用户部门关系
-        DataSourceUserDeptRelationSyncer(exists_user_ids_before_sync=exists_user_ids, **kwargs).sync()  # type: ignore
+        with ctx.metrics.phase("user_department_relations"):
+            DataSourceUserDeptRelationSyncer(exists_user_ids_before_sync=exists_user_ids, **kwargs).sync()  # type: ignore
         ctx.synced_obj_types.add(DataSourceSyncObjectType.USER_DEPARTMENT_RELATION)
 
         ctx.logger.info("succeed to sync users and their leader & dept relations from data source plugin")
 
     def _validate_unique_fields(self, ctx: DataSourceSyncTaskContext):
         """对有唯一性要求的自定义字段的校验"""
-        DataSourceUserExtrasUniqueValidator(self.data_source, ctx.logger).validate()
+        validator = DataSourceUserExtrasUniqueValidator(self.data_source, ctx.logger)
+        # 全量同步 / 从检查点恢复（变更记录不完整）时，需要校验全部用户；
+        # 增量同步只需校验本次新增 / 更新的用户，其字段值是否与其他用户冲突
+        if not self.incremental or (self.checkpoint and self.checkpoint.resumed):
+            validator.validate()
+            return
+
+        # 变更记录在同步过程中分批落库，需要先将剩余的变更记录落库，再通过 DB 查询本次同步涉及的用户
+        ctx.recorder.flush()
+        user_codes = DataSourceUserChangeLog.objects.filter(
+            task=self.task, operation__in=[SyncOperation.CREATE, SyncOperation.UPDATE]
+        ).values("user_code")
+        validator.validate(user_codes)
 
     def _send_signal(self, ctx: DataSourceSyncTaskContext):
         """若符合准出条件，则发送数据源同步完成信号，触发后续流程
@@ -159,17 +314,18 @@ class DataSourceSyncTaskRunner:
                -> 会同步到租户，但用户部门关联边是老数据
                具体影响：部分用户无法获取部门信息（部门被删除，导致有边无节点）
 
-         注意：其中场景 2 出现概率极低（原因是 mptt 树是直接重建的，除非 tree_id 分配到 int 上限导致失败，需运维介入）
+         注意：其中场景 2 出现概率极低（原因是部门关系的 mptt 字段均在内存中计算，只有发生变化的部门关系才会在
+         同一个事务中写入，除非新分配的 tree_id 到达 int 上限导致失败，需运维介入）
         """
-        ctx.logger.info(f"current synced object types is {[t.value for t in ctx.synced_obj_types]}")
-
         if (
             DataSourceSyncObjectType.DEPARTMENT not in ctx.synced_obj_types
             or DataSourceSyncObjectType.USER not in ctx.synced_obj_types
         ):
-            ctx.logger.error("departments or users haven't been synced, skip sync tenant...")
+            logger.error(
+                "data source %s departments or users haven't been synced, skip sync tenant...", self.data_source.id
+            )
             return
 
         # 若用户 & 部门主体完成同步，即可触发租户同步流程
         post_sync_data_source.send(sender=self.__class__, data_source=self.data_source)
-        ctx.logger.info("signal post_sync_data_source sent...")
+        logger.info("data source %s signal post_sync_data_source sent...", self.data_source.id)
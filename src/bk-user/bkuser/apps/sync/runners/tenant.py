@@ -15,14 +15,30 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+# ignore custom logger must use %s string format in this file
+# ruff: noqa: G004
+import datetime
 import logging
+from functools import cached_property
+from typing import Set
+
+from django.conf import settings
+from django.utils import timezone
 
 from bkuser.apps.data_source.models import DataSource
+from bkuser.apps.sync.constants import SyncOperation, SyncTaskStatus
 from bkuser.apps.sync.contexts import TenantSyncTaskContext
-from bkuser.apps.sync.models import TenantSyncTask
+from bkuser.apps.sync.data_models import DataSourceSyncChangeSet
+from bkuser.apps.sync.models import (
+    DataSourceDepartmentChangeLog,
+    DataSourceSyncTask,
+    DataSourceUserChangeLog,
+    TenantSyncTask,
+)
 from bkuser.apps.sync.signals import post_sync_tenant
 from bkuser.apps.sync.syncers import TenantDepartmentSyncer, TenantUserSyncer
 from bkuser.apps.tenant.constants import TenantStatus
+from bkuser.apps.tenant.data_version import TenantDataVersion
 from bkuser.apps.tenant.models import Tenant
 
 logger = logging.getLogger(__name__)
@@ -31,6 +47,9 @@ logger = logging.getLogger(__name__)
 class TenantSyncTaskRunner:
     """租户数据同步任务执行器"""
 
+    # 变更集超过该数量时转为全量同步（大批量变更时，全量对比的效率更高）
+    max_change_set_size = 10000
+
     def __init__(self, task: TenantSyncTask):
         self.task = task
         self.data_source = DataSource.objects.get(id=task.data_source_id)
@@ -41,17 +60,30 @@ class TenantSyncTaskRunner:
             return
 
         with TenantSyncTaskContext(self.task) as ctx:
-            self._sync_departments(ctx)
-            self._sync_users(ctx)
+            with ctx.metrics.phase("change_set"):
+                change_set = self._get_data_source_change_set(ctx)
+            with ctx.metrics.phase("departments"):
+                self._sync_departments(ctx, change_set)
+            with ctx.metrics.phase("users"):
+                self._sync_users(ctx, change_set)
+            self._store_sync_mode(change_set)
 
-        self._send_signal()
+        # 租户数据已变更，递增数据版本号，使开放 API 的缓存 & ETag 失效
+        TenantDataVersion.bump(self.tenant.id)
+
+        with ctx.metrics.phase("signal"):
+            self._send_signal()
+        ctx.metrics.save()
 
     def _need_skip_sync(self) -> bool:
-        """租户不是启用状态，需要跳过同步"""
+        """租户不是启用状态，或数据源数据不一致时，需要跳过同步"""
         if self.tenant.status != TenantStatus.ENABLED:
             logger.warning("tenant %s isn't enabled, skip tenant sync...", self.tenant.id)
             return True
 
+        if not self._is_data_source_consistent():
+            return True
+
         # 数据源所属租户与待同步租户相同，不需要再次检查
         if self.data_source.owner_tenant_id == self.tenant.id:
             return False
@@ -66,13 +98,122 @@ class TenantSyncTaskRunner:
 
         return False
 
-    def _sync_departments(self, ctx: TenantSyncTaskContext):
+    def _is_data_source_consistent(self) -> bool:
+        """数据源数据是否处于一致状态，分块提交的数据源同步任务未完成时，数据源中只有部分变更已生效，不应同步到租户"""
+        last_data_source_task = (
+            DataSourceSyncTask.objects.filter(data_source=self.data_source).exclude_dry_run().order_by("-id").first()
+        )
+        if last_data_source_task and not last_data_source_task.is_consistent:
+            logger.warning(
+                "data source %s sync task %s is partially applied, skip tenant sync...",
+                self.data_source.id,
+                last_data_source_task.id,
+            )
+            return False
+
+        return True
+
+    def _get_data_source_change_set(self, ctx: TenantSyncTaskContext) -> DataSourceSyncChangeSet | None:
+        """获取自上次租户同步成功以来，数据源同步的变更集，无法获取（需要全量同步）时返回 None
+
+        数据源同步任务会将变更记录（新增 / 更新 / 删除的部门 & 用户）入库，同一次数据源同步触发的多个租户同步
+        （数据源所属租户 & 协同租户）可以共享这份变更集，只处理变更的数据，而无需各自全量对比数据源与租户数据
+        """
+        if not self.task.extras.get("incremental", False):
+            return None
+
+        # 本地数据源支持直接在页面上新增 / 删除用户（不经过数据源同步，没有变更记录），因此总是全量同步
+        if self.data_source.is_local:
+            ctx.logger.info("local data source doesn't support incremental sync, sync with full mode")
+            return None
+
+        last_task = self._last_success_task
+        if not (last_task and last_task.data_source_sync_task_id):
+            ctx.logger.info("no previous successful tenant sync task found, sync with full mode")
+            return None
+
+        # 定期执行全量同步（对账），修正可能存在的数据差异（如变更记录缺失等）
+        full_reconciled_at = last_task.extras.get("full_reconciled_at")
+        interval = datetime.timedelta(seconds=settings.TENANT_SYNC_FULL_RECONCILE_INTERVAL)
+        if not full_reconciled_at or timezone.now() - datetime.datetime.fromisoformat(full_reconciled_at) >= interval:
+            ctx.logger.info(f"last full reconciliation at {full_reconciled_at} is expired, sync with full mode")
+            return None
+
+        # 上次租户同步之后的数据源同步任务都必须是成功的（失败的任务可能有部分数据变更，但是没有变更记录），
+        # 且不能是从检查点恢复的（恢复的任务只有检查点之后的变更记录）
+        data_source_tasks = (
+            DataSourceSyncTask.objects.filter(
+                data_source=self.data_source,
+                id__gt=last_task.data_source_sync_task_id,
+                id__lte=self.task.data_source_sync_task_id,
+            )
+            .exclude_dry_run()
+            .only("id", "status", "extras")
+        )
+        if last_task.data_source_sync_task_id > self.task.data_source_sync_task_id or any(
+            t.status != SyncTaskStatus.SUCCESS or t.extras.get("resumed_from") for t in data_source_tasks
+        ):
+            ctx.logger.info("change set of some data source sync tasks is unavailable, sync with full mode")
+            return None
+
+        task_ids = {t.id for t in data_source_tasks}
+        change_set = DataSourceSyncChangeSet(
+            created_department_ids=self._get_changed_department_ids(task_ids, SyncOperation.CREATE),
+            deleted_department_ids=self._get_changed_department_ids(task_ids, SyncOperation.DELETE),
+            created_user_ids=self._get_changed_user_ids(task_ids, SyncOperation.CREATE),
+            deleted_user_ids=self._get_changed_user_ids(task_ids, SyncOperation.DELETE),
+        )
+        if change_set.size > self.max_change_set_size:
+            ctx.logger.info(f"change set size {change_set.size} is too large, sync with full mode")
+            return None
+
+        ctx.logger.info(f"sync with incremental mode, change set size is {change_set.size}")
+        return change_set
+
+    @staticmethod
+    def _get_changed_department_ids(task_ids: Set[int], operation: SyncOperation) -> Set[int]:
+        dept_ids = DataSourceDepartmentChangeLog.objects.filter(task_id__in=task_ids, operation=operation).values_list(
+            "department_id", flat=True
+        )
+        return {int(dept_id) for dept_id in dept_ids}
+
+    @staticmethod
+    def _get_changed_user_ids(task_ids: Set[int], operation: SyncOperation) -> Set[int]:
+        user_ids = DataSourceUserChangeLog.objects.filter(task_id__in=task_ids, operation=operation).values_list(
+            "user_id", flat=True
+        )
+        return {int(user_id) for user_id in user_ids}
+
+    def _store_sync_mode(self, change_set: DataSourceSyncChangeSet | None):
+        """记录同步模式与最近一次全量同步的时间，后续的增量同步据此判断是否需要全量同步（对账）"""
+        self.task.extras["incremental"] = change_set is not None
+        if change_set is None:
+            self.task.extras["full_reconciled_at"] = timezone.now().isoformat()
+        else:
+            # 增量同步的前提是存在上次成功的同步任务，因此 _last_success_task 必定存在
+            self.task.extras["full_reconciled_at"] = self._last_success_task.extras["full_reconciled_at"]  # type: ignore
+
+        self.task.save(update_fields=["extras", "updated_at"])
+
+    @cached_property
+    def _last_success_task(self) -> TenantSyncTask | None:
+        """上次成功的租户同步任务"""
+        return (
+            TenantSyncTask.objects.filter(
+                tenant=self.tenant, data_source=self.data_source, status=SyncTaskStatus.SUCCESS
+            )
+            .exclude(id=self.task.id)
+            .order_by("-id")
+            .first()
+        )
+
+    def _sync_departments(self, ctx: TenantSyncTaskContext, change_set: DataSourceSyncChangeSet | None):
         """同步部门信息"""
-        TenantDepartmentSyncer(ctx, self.data_source, self.tenant).sync()
+        TenantDepartmentSyncer(ctx, self.data_source, self.tenant, change_set).sync()
 
-    def _sync_users(self, ctx: TenantSyncTaskContext):
+    def _sync_users(self, ctx: TenantSyncTaskContext, change_set: DataSourceSyncChangeSet | None):
         """同步用户信息"""
-        TenantUserSyncer(ctx, self.data_source, self.tenant).sync()
+        TenantUserSyncer(ctx, self.data_source, self.tenant, change_set).sync()
 
     def _send_signal(self):
         """发送租户同步完成信号，触发后续流程"""
@@ -47,6 +47,9 @@ def start_collaboration_tenant_sync(strategy: CollaborationStrategy):
         )
         return
 
+    # 协同策略变更（如重新启用）后，租户数据可能与数据源差异较大，需要全量同步
+    sync_opts = TenantSyncOptions(
+        operator=strategy.updater, incremental=False, async_run=True, trigger=SyncTaskTrigger.MANUAL
+    )
     for data_source in data_sources:
-        sync_opts = TenantSyncOptions(operator=strategy.updater, async_run=True, trigger=SyncTaskTrigger.MANUAL)
         TenantSyncManager(data_source, strategy.target_tenant_id, sync_opts).execute()
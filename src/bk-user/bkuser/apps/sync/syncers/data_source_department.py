@@ -17,38 +17,52 @@
 
 # ignore custom logger must use %s string format in this file
 # ruff: noqa: G004
-from typing import Dict, List, Set
+from typing import Callable, Dict, Iterable, List, Sequence, Set, Tuple
 
 from django.db import transaction
-from django.db.models import QuerySet
+from django.db.models import Count
 from django.utils import timezone
 
-from bkuser.apps.data_source.cache import DepartmentAncestorCache
 from bkuser.apps.data_source.models import (
     DataSource,
     DataSourceDepartment,
     DataSourceDepartmentRelation,
     DepartmentRelationMPTTTree,
+    gen_content_hash,
 )
 from bkuser.apps.sync.constants import DataSourceSyncObjectType, SyncOperation
 from bkuser.apps.sync.contexts import DataSourceSyncTaskContext
+from bkuser.apps.sync.data_models import RawDataSourceDepartmentRelation
+from bkuser.apps.sync.differs import SyncDiffCollector, diff_model_fields
 from bkuser.plugins.models import RawDataSourceDepartment
-from bkuser.utils.tree import bfs_traversal_tree, build_forest_with_parent_relations
+from bkuser.utils.iterx import chunked
+from bkuser.utils.tree import TreeNode, build_forest_with_parent_relations
 
 
 class DataSourceDepartmentSyncer:
-    """数据源部门同步器"""
+    """数据源部门同步器
+
+    原始部门数据以迭代器的方式提供，同步器会按 chunk_size 分块进行对比及写入
+    """
 
     # 单次批量创建 / 更新数量
     batch_size = 250
 
+    # 单次处理的原始部门数量（分块大小）
+    chunk_size = 1000
+
+    # 部门需要更新的字段
+    update_fields = ["name", "extras", "content_hash", "updated_at"]
+
     def __init__(
         self,
         ctx: DataSourceSyncTaskContext,
         data_source: DataSource,
-        raw_departments: List[RawDataSourceDepartment],
+        raw_departments: Iterable[RawDataSourceDepartment],
         overwrite: bool,
         incremental: bool,
+        get_deleted_codes: Callable[[], Set[str]] | None = None,
+        differ: SyncDiffCollector | None = None,
     ):
         # 增量模式下才可以选择覆不覆盖，全量模式下只有覆盖
         if not (incremental or overwrite):
@@ -59,6 +73,12 @@ class DataSourceDepartmentSyncer:
         self.raw_departments = raw_departments
         self.overwrite = overwrite
         self.incremental = incremental
+        # 增量模式下，获取数据源中已被删除的部门 code（墓碑），会在原始部门数据迭代完成后调用
+        self.get_deleted_codes = get_deleted_codes
+        # 差异收集器不为空时，使用预览模式：只对比数据并收集差异，不写入任何数据（也不添加变更记录）
+        self.differ = differ
+        # 同步过程中收集的部门关联信息（仅 code，parent），供后续的部门关系同步使用
+        self.dept_relations: List[RawDataSourceDepartmentRelation] = []
 
     def sync(self):
         self.ctx.logger.info("start sync departments...")
@@ -70,47 +90,102 @@ class DataSourceDepartmentSyncer:
         dept_codes = set(
             DataSourceDepartment.objects.filter(data_source=self.data_source).values_list("code", flat=True)
         )
-        raw_dept_codes = {dept.code for dept in self.raw_departments}
+        synced_dept_codes: Set[str] = set()
+        updated_cnt, created_cnt = 0, 0
 
-        waiting_create_dept_codes = raw_dept_codes - dept_codes
-        waiting_delete_dept_codes = dept_codes - raw_dept_codes if not self.incremental else set()
-        waiting_update_dept_codes = dept_codes & raw_dept_codes if self.overwrite else set()
+        with transaction.atomic():
+            for raw_departments in chunked(
+                self.ctx.metrics.timed_iter("fetch", self.raw_departments), self.chunk_size
+            ):
+                self.dept_relations.extend(RawDataSourceDepartmentRelation(d.code, d.parent) for d in raw_departments)
+
+                raw_dept_codes = {dept.code for dept in raw_departments}
+                synced_dept_codes |= raw_dept_codes
+
+                waiting_create_dept_codes = raw_dept_codes - dept_codes
+                waiting_update_dept_codes = dept_codes & raw_dept_codes if self.overwrite else set()
+
+                with self.ctx.metrics.phase("diff"):
+                    waiting_update_depts = self._get_waiting_update_departments(
+                        raw_departments, waiting_update_dept_codes
+                    )
+                with self.ctx.metrics.phase("convert"):
+                    waiting_create_depts = self._get_waiting_create_departments(
+                        raw_departments, waiting_create_dept_codes
+                    )
+
+                self._save_departments(waiting_update_depts, waiting_create_depts)
+                updated_cnt += len(waiting_update_depts)
+                created_cnt += len(waiting_create_depts)
+
+            # 全量模式下，插件没有提供的部门都需要被删除；增量模式下，只删除插件明确告知已被删除的部门
+            waiting_delete_dept_codes = self._get_waiting_delete_dept_codes(dept_codes, synced_dept_codes)
+            waiting_delete_depts = self._get_waiting_delete_departments(waiting_delete_dept_codes)
+            self._save_departments([], [], waiting_delete_depts)
 
-        waiting_delete_depts = self._get_waiting_delete_departments(waiting_delete_dept_codes)
-        waiting_update_depts = self._get_waiting_update_departments(self.raw_departments, waiting_update_dept_codes)
-        waiting_create_depts = self._get_waiting_create_departments(self.raw_departments, waiting_create_dept_codes)
+        # 数据源部门同步相关日志
+        self.ctx.logger.info(f"receive {len(self.dept_relations)} departments from data source plugin")
 
-        with transaction.atomic():
-            # Q: 为什么这里的顺序应该是 1. 删除 2. 更新 3. 创建
-            # A: 同步操作原则是数据库尽可能 “干净” 以避免冲突，因此删除是最优先的，可以让数据更少，
-            #  而更新放在第二步的原因是 “挪窝”，可以避免一些已有的数据和待创建的数据冲突导致同步失败
-            waiting_delete_depts.delete()
+        self.ctx.logger.info(f"delete {len(waiting_delete_depts)} departments")
+
+        self.ctx.logger.info(f"update {updated_cnt} departments")
+        self.ctx.logger.info(f"create {created_cnt} departments")
+
+    def _save_departments(
+        self,
+        waiting_update_depts: List[DataSourceDepartment],
+        waiting_create_depts: List[DataSourceDepartment],
+        waiting_delete_depts: List[DataSourceDepartment] | None = None,
+    ):
+        """写入部门变更并添加变更记录，预览模式下只收集差异（更新的差异在对比时收集）"""
+        waiting_delete_depts = waiting_delete_depts or []
+
+        if self.differ:
+            for d in waiting_create_depts:
+                self.differ.add(SyncOperation.CREATE, d.code, d.name)
+            for d in waiting_delete_depts:
+                self.differ.add(SyncOperation.DELETE, d.code, d.name)
+            return
+
+        with self.ctx.metrics.phase("write"):
+            DataSourceDepartment.objects.filter(id__in=[d.id for d in waiting_delete_depts]).delete()
             DataSourceDepartment.objects.bulk_update(
-                waiting_update_depts, fields=["name", "extras", "updated_at"], batch_size=self.batch_size
+                waiting_update_depts, fields=self.update_fields, batch_size=self.batch_size
             )
             DataSourceDepartment.objects.bulk_create(waiting_create_depts, batch_size=self.batch_size)
 
-        # 数据源部门同步相关日志
-        self.ctx.logger.info(f"delete {len(waiting_delete_depts)} departments")
-        self.ctx.recorder.add(SyncOperation.DELETE, DataSourceSyncObjectType.DEPARTMENT, waiting_delete_depts)
+            self.ctx.recorder.add(SyncOperation.DELETE, DataSourceSyncObjectType.DEPARTMENT, waiting_delete_depts)
+            self.ctx.recorder.add(SyncOperation.UPDATE, DataSourceSyncObjectType.DEPARTMENT, waiting_update_depts)
+            self.ctx.recorder.add(SyncOperation.CREATE, DataSourceSyncObjectType.DEPARTMENT, waiting_create_depts)
+
+    def _get_waiting_delete_dept_codes(self, exists_dept_codes: Set[str], synced_dept_codes: Set[str]) -> Set[str]:
+        if not self.incremental:
+            return exists_dept_codes - synced_dept_codes
+
+        if not self.get_deleted_codes:
+            return set()
 
-        self.ctx.logger.info(f"update {len(waiting_update_depts)} departments")
-        self.ctx.recorder.add(SyncOperation.UPDATE, DataSourceSyncObjectType.DEPARTMENT, waiting_update_depts)
+        return (self.get_deleted_codes() & exists_dept_codes) - synced_dept_codes
 
-        self.ctx.logger.info(f"create {len(waiting_create_depts)} departments")
-        self.ctx.recorder.add(SyncOperation.CREATE, DataSourceSyncObjectType.DEPARTMENT, waiting_create_depts)
+    def _get_waiting_delete_departments(self, dept_codes: Set[str]) -> List[DataSourceDepartment]:
+        if not dept_codes:
+            return []
 
-    def _get_waiting_delete_departments(self, dept_codes: Set[str]) -> QuerySet[DataSourceDepartment]:
-        return DataSourceDepartment.objects.filter(data_source=self.data_source, code__in=dept_codes)
+        return list(DataSourceDepartment.objects.filter(data_source=self.data_source, code__in=dept_codes))
 
     def _get_waiting_create_departments(
         self, raw_departments: List[RawDataSourceDepartment], waiting_create_dept_codes: Set[str]
     ) -> List[DataSourceDepartment]:
-        return [
+        waiting_create_departments = [
             DataSourceDepartment(data_source=self.data_source, code=dept.code, name=dept.name, extras=dept.extras)
             for dept in raw_departments
             if dept.code in waiting_create_dept_codes
         ]
+        # bulk_create 不会调用 save，需要手动计算内容指纹
+        for d in waiting_create_departments:
+            d.refresh_content_hash()
+
+        return waiting_create_departments
 
     def _get_waiting_update_departments(
         self, raw_departments: List[RawDataSourceDepartment], waiting_update_dept_codes: Set[str]
@@ -118,43 +193,64 @@ class DataSourceDepartmentSyncer:
         if not waiting_update_dept_codes:
             return []
 
-        dept_map = {
-            dept.code: DataSourceDepartment(
-                data_source=self.data_source, code=dept.code, name=dept.name, extras=dept.extras
-            )
-            for dept in raw_departments
-            if dept.code in waiting_update_dept_codes
-        }
+        dept_map = {dept.code: dept for dept in raw_departments if dept.code in waiting_update_dept_codes}
+
+        # 先只查询 code + 内容指纹，指纹一致的部门不需要加载完整数据进行对比
+        may_update_dept_codes = [
+            code
+            for code, content_hash in DataSourceDepartment.objects.filter(
+                data_source=self.data_source, code__in=waiting_update_dept_codes
+            ).values_list("code", "content_hash")
+            if content_hash != gen_content_hash(dept_map[code].name, dept_map[code].extras)
+        ]
+        if not may_update_dept_codes:
+            return []
 
         may_update_departments = DataSourceDepartment.objects.filter(
-            data_source=self.data_source, code__in=[u.code for u in raw_departments]
+            data_source=self.data_source, code__in=may_update_dept_codes
         )
-        waiting_update_departments = []
+        waiting_update_departments, outdated_hash_departments = [], []
         for d in may_update_departments:
             target_dept = dept_map[d.code]
-            # 前后数据都一致，没有更新的必要
-            if d.name == target_dept.name and d.extras == target_dept.extras:
+            changed_fields = diff_model_fields(["name", "extras"], d, target_dept)
+            # 前后数据都一致，没有更新的必要，只是指纹缺失（如存量数据）或过期，补充上即可
+            if not changed_fields:
+                d.refresh_content_hash()
+                outdated_hash_departments.append(d)
                 continue
 
+            if self.differ:
+                self.differ.add(SyncOperation.UPDATE, d.code, d.name, changed_fields)
+
             d.name = target_dept.name
             d.extras = target_dept.extras
+            d.refresh_content_hash()
             d.updated_at = timezone.now()
             waiting_update_departments.append(d)
 
+        # 预览模式下，不需要补充指纹
+        if not self.differ:
+            DataSourceDepartment.objects.bulk_update(
+                outdated_hash_departments, fields=["content_hash"], batch_size=self.batch_size
+            )
+
         return waiting_update_departments
 
 
 class DataSourceDepartmentRelationSyncer:
-    """数据源部门关系同步器"""
+    """数据源部门关系同步器，基于新旧部门关系的对比进行增量维护，而不是每次都删除重建"""
 
     # 单次批量创建 / 更新数量
     batch_size = 250
 
+    # 部门关系需要更新的字段
+    update_fields = ["parent", "tree_id", "lft", "rght", "level", "updated_at"]
+
     def __init__(
         self,
         ctx: DataSourceSyncTaskContext,
         data_source: DataSource,
-        raw_departments: List[RawDataSourceDepartment],
+        raw_departments: Sequence[RawDataSourceDepartment | RawDataSourceDepartmentRelation],
         overwrite: bool,
         incremental: bool,
     ):
@@ -174,87 +270,163 @@ class DataSourceDepartmentRelationSyncer:
         self.ctx.logger.info("department relations sync finished")
 
     def _sync_department_relations(self):
-        """数据源部门关系同步"""
-        # {dept_code: data_source_dept}
-        dept_code_map = {dept.code: dept for dept in DataSourceDepartment.objects.filter(data_source=self.data_source)}
+        """数据源部门关系同步
+
+        根据新的部门父子关系，在内存中计算出每个节点的 MPTT 字段（parent, tree_id, lft, rght, level），
+        再与 DB 中已有的部门关系进行对比，只对新增 / 变更 / 删除的部门关系进行写入，没有变化则不做任何操作
+        """
+        # {dept_code: data_source_dept_id}
+        dept_code_id_map = dict(
+            DataSourceDepartment.objects.filter(data_source=self.data_source).values_list("code", "id")
+        )
         # {dept_code: parent_dept_code}
         dept_parent_code_map = {dept.code: dept.parent for dept in self.raw_departments}
 
-        # 如果是增量同步模式，则需要将存量的部门关系捞出来，和新的合并下，再删除重建
-        # Q: 为什么不是增量模式时候，一通对比之后，直接往现有的 MPTT 森林里面塞节点？
-        # A: MPTT 树结构复杂，变更操作可能存在风险，且后台任务对性能要求不高，先用简单的删除重建方案
+        # 如果是增量同步模式，则需要将存量的部门关系捞出来，和新的合并下
         if self.incremental:
-            for relation in DataSourceDepartmentRelation.objects.filter(data_source=self.data_source):
+            for dept_code, parent_dept_code in DataSourceDepartmentRelation.objects.filter(
+                data_source=self.data_source
+            ).values_list("department__code", "parent__department__code"):
                 # 如果某个部门有新的父部门，则跳过
-                if relation.department.code in dept_parent_code_map:
+                if dept_code in dept_parent_code_map:
                     continue
 
-                dept_parent_code_map[relation.department.code] = (
-                    relation.parent.department.code if relation.parent else None
-                )
-
-        # {dept_code: data_source_dept_relation}
-        dept_code_rel_map: Dict[str, DataSourceDepartmentRelation] = {}
-        mptt_tree_ids: Set[int] = set()
-
-        parent_relations = list(dept_parent_code_map.items())
-        # 根据部门父子关系，构建森林
-        forest_roots = build_forest_with_parent_relations(parent_relations)
-        # 逐棵树进行便利，因为需要保证一棵树的节点拥有相同的 tree_id
-        for root in forest_roots:
-            tree_id = self._generate_tree_id(self.data_source)
-            mptt_tree_ids.add(tree_id)
-
-            # 通过 bfs 遍历的方式，确保父节点会先被创建
-            for node in bfs_traversal_tree(root):
-                parent_code = dept_parent_code_map.get(node.id)
-                if not parent_code:
-                    parent = None
-                else:
-                    parent = dept_code_rel_map.get(parent_code)
-
-                dept_code_rel_map[node.id] = DataSourceDepartmentRelation(
-                    data_source=self.data_source,
-                    department=dept_code_map[node.id],
-                    parent=parent,
-                    tree_id=tree_id,
-                    # NOTE：初始化时 lft, rght, level 均不能为空，
-                    # 因此先赋零值，后面 partial_rebuild 会修改
-                    lft=0,
-                    rght=0,
-                    level=0,
-                )
-
-        with DataSourceDepartmentRelation.objects.disable_mptt_updates(), transaction.atomic():
-            # 对于部门关系边，先先全部删除
-            DataSourceDepartmentRelation.objects.filter(data_source=self.data_source).delete()
-            # 最后再全部批量创建
-            DataSourceDepartmentRelation.objects.bulk_create(
-                list(dept_code_rel_map.values()), batch_size=self.batch_size
-            )
-            # 逐棵对当前数据源的树进行重建
-            for tree_id in mptt_tree_ids:
-                DataSourceDepartmentRelation.objects.partial_rebuild(tree_id)
-
-        self.ctx.logger.info(f"re-create {len(dept_code_rel_map)} department relations")
-        self.ctx.logger.info(f"data source has {len(mptt_tree_ids)} department tree(s) currently")
-
-        # 同步完成后，清理数据源内原有部门祖先 ID 缓存
-        self._clear_department_ancestor_cache()
-
-    def _clear_department_ancestor_cache(self):
-        """清理数据源内原有部门祖先 ID 缓存"""
-        # 获取该数据源的所有部门 ID
-        dept_ids = list(
-            DataSourceDepartmentRelation.objects.filter(data_source_id=self.data_source.id).values_list(
-                "department_id", flat=True
+                dept_parent_code_map[dept_code] = parent_dept_code
+
+        # {dept_id: data_source_dept_relation}
+        exists_rel_map = {
+            rel.department_id: rel for rel in DataSourceDepartmentRelation.objects.filter(data_source=self.data_source)
+        }
+
+        waiting_create_rels: List[DataSourceDepartmentRelation] = []
+        waiting_update_rels: List[DataSourceDepartmentRelation] = []
+        synced_dept_ids: Set[int] = set()
+
+        with self.ctx.metrics.phase("mptt_rebuild"):
+            # 根据部门父子关系，构建森林，逐棵树计算 MPTT 字段，一棵树的节点拥有相同的 tree_id
+            forest_roots = build_forest_with_parent_relations(list(dept_parent_code_map.items()))
+            reusable_tree_ids = self._get_reusable_tree_ids(exists_rel_map)
+            for root in forest_roots:
+                tree_id = self._get_tree_id(dept_code_id_map[root.id], exists_rel_map, reusable_tree_ids)
+
+                for dept_id, parent_id, lft, rght, level in self._calc_mptt_fields(root, dept_code_id_map):
+                    synced_dept_ids.add(dept_id)
+
+                    rel = exists_rel_map.get(dept_id)
+                    if rel is None:
+                        waiting_create_rels.append(
+                            DataSourceDepartmentRelation(
+                                data_source=self.data_source,
+                                department_id=dept_id,
+                                parent_id=parent_id,
+                                tree_id=tree_id,
+                                lft=lft,
+                                rght=rght,
+                                level=level,
+                            )
+                        )
+                        continue
+
+                    # 前后数据都一致，没有更新的必要
+                    if (rel.parent_id, rel.tree_id, rel.lft, rel.rght, rel.level) == (
+                        parent_id,
+                        tree_id,
+                        lft,
+                        rght,
+                        level,
+                    ):
+                        continue
+
+                    rel.parent_id = parent_id
+                    rel.tree_id, rel.lft, rel.rght, rel.level = tree_id, lft, rght, level
+                    waiting_update_rels.append(rel)
+
+        waiting_delete_dept_ids = set(exists_rel_map.keys()) - synced_dept_ids
+
+        if not (waiting_create_rels or waiting_update_rels or waiting_delete_dept_ids):
+            self.ctx.logger.info("department relations not changed, skip update")
+            return
+
+        # Q: 为什么写入的顺序是 1. 创建 2. 更新 3. 删除
+        # A: 部门关系的 parent 是外键（级联删除），需要先保证新的父节点存在，
+        #  且子节点都已经挂到新的父节点下，再删除旧的节点，避免误删子节点
+        with (
+            self.ctx.metrics.phase("write"),
+            DataSourceDepartmentRelation.objects.disable_mptt_updates(),
+            transaction.atomic(),
+        ):
+            DataSourceDepartmentRelation.objects.bulk_create(waiting_create_rels, batch_size=self.batch_size)
+            DataSourceDepartmentRelation.objects.bulk_update(
+                waiting_update_rels, fields=self.update_fields, batch_size=self.batch_size
             )
+            DataSourceDepartmentRelation.objects.filter(
+                data_source=self.data_source, department_id__in=waiting_delete_dept_ids
+            ).delete()
+
+        self.ctx.logger.info(f"delete {len(waiting_delete_dept_ids)} department relations")
+        self.ctx.logger.info(f"update {len(waiting_update_rels)} department relations")
+        self.ctx.logger.info(f"create {len(waiting_create_rels)} department relations")
+        self.ctx.logger.info(f"data source has {len(forest_roots)} department tree(s) currently")
+
+    @staticmethod
+    def _get_reusable_tree_ids(exists_rel_map: Dict[int, DataSourceDepartmentRelation]) -> Set[int]:
+        """获取可以沿用的 tree_id（只有一个根节点使用的 tree_id）"""
+        root_tree_ids = {rel.tree_id for rel in exists_rel_map.values() if rel.parent_id is None}
+        shared_tree_ids = (
+            DataSourceDepartmentRelation.objects.filter(parent__isnull=True, tree_id__in=root_tree_ids)
+            .order_by()
+            .values("tree_id")
+            .annotate(root_cnt=Count("pk"))
+            .filter(root_cnt__gt=1)
+            .values_list("tree_id", flat=True)
         )
+        return root_tree_ids - set(shared_tree_ids)
+
+    def _get_tree_id(
+        self,
+        root_dept_id: int,
+        exists_rel_map: Dict[int, DataSourceDepartmentRelation],
+        reusable_tree_ids: Set[int],
+    ) -> int:
+        """获取树的 tree_id，若根节点原来就是根节点，则沿用原来的 tree_id，否则分配新的 tree_id"""
+        rel = exists_rel_map.get(root_dept_id)
+        if rel is not None and rel.parent_id is None and rel.tree_id in reusable_tree_ids:
+            return rel.tree_id
+
+        return self._generate_tree_id(self.data_source)
+
+    @staticmethod
+    def _calc_mptt_fields(
+        root: TreeNode, dept_code_id_map: Dict[str, int]
+    ) -> List[Tuple[int, int | None, int, int, int]]:
+        """
+        计算树中每个节点的 MPTT 字段，与 MPTT partial_rebuild 的结果保持一致（兄弟节点按 ID 排序）
+
+        :return: [(dept_id, parent_dept_id, lft, rght, level), ...]，父节点一定在子节点之前
+        """
+        # {dept_id: [dept_id, parent_dept_id, lft, rght, level]}
+        fields_map: Dict[int, List] = {}
+        counter = 1
+        # 使用栈模拟深度优先遍历，避免树过深导致递归溢出，元组最后一位表示子节点是否已经遍历完成
+        stack: List[Tuple[TreeNode, int | None, int, bool]] = [(root, None, 0, False)]
+        while stack:
+            node, parent_id, level, children_visited = stack.pop()
+            dept_id = dept_code_id_map[node.id]
+            if children_visited:
+                fields_map[dept_id][3] = counter
+                counter += 1
+                continue
 
-        # 批量删除部门祖先 ID 缓存
-        DepartmentAncestorCache().batch_delete(dept_ids)
+            fields_map[dept_id] = [dept_id, parent_id, counter, 0, level]
+            counter += 1
+            stack.append((node, parent_id, level, True))
+            # 逆序入栈，确保 ID 小的兄弟节点先被遍历
+            stack.extend(
+                (child, dept_id, level + 1, False)
+                for child in sorted(node.children, key=lambda n: dept_code_id_map[n.id], reverse=True)
+            )
 
-        self.ctx.logger.info(f"cleared department ancestor ids cache for data source {self.data_source.id}")
+        return [tuple(fields) for fields in fields_map.values()]  # type: ignore
 
     @staticmethod
     def _generate_tree_id(data_source: DataSource) -> int:
@@ -263,4 +435,8 @@ class DataSourceDepartmentRelationSyncer:
 
         分配实现：利用 MySQL 自增 ID 分配 tree_id（不需要包含到事务中，虽然可能造成浪费）
         """
-        return DepartmentRelationMPTTTree.objects.create(data_source=data_source).id
+        while True:
+            tree_id = DepartmentRelationMPTTTree.objects.create(data_source=data_source).id
+            # 非同步创建的根部门（如页面上直接新建），其 tree_id 由 MPTT 分配，可能已被占用，需要跳过
+            if not DataSourceDepartmentRelation.objects.filter(tree_id=tree_id).exists():
+                return tree_id
@@ -17,10 +17,11 @@
 
 # ignore custom logger must use %s string format in this file
 # ruff: noqa: G003, G004
-from typing import Dict, List, Set, Tuple
+import hashlib
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, Iterable, List, Sequence, Set, Tuple
 
 from django.db import transaction
-from django.db.models import QuerySet
 from django.utils import timezone
 
 from bkuser.apps.data_source.constants import DataSourceTypeEnum
@@ -32,29 +33,61 @@ from bkuser.apps.data_source.models import (
     DataSourceUserLeaderRelation,
 )
 from bkuser.apps.data_source.transform import UsernameTransformer
+from bkuser.apps.sync.checkpoints import DataSourceSyncCheckpoint
 from bkuser.apps.sync.constants import DataSourceSyncObjectType, SyncOperation
 from bkuser.apps.sync.contexts import DataSourceSyncTaskContext
 from bkuser.apps.sync.converters import DataSourceUserConverter
+from bkuser.apps.sync.data_models import RawDataSourceUserRelation
+from bkuser.apps.sync.differs import SyncDiffCollector, diff_model_fields
 from bkuser.apps.tenant.utils import is_username_frozen
 from bkuser.plugins.models import RawDataSourceUser
+from bkuser.utils.iterx import chunked
 
 
 class DataSourceUserSyncer:
-    """数据源用户同步器，支持覆盖更新，日志记录等"""
+    """数据源用户同步器，支持覆盖更新，日志记录等
+
+    原始用户数据以迭代器的方式提供，同步器会按 chunk_size 分块进行转换，对比及写入，
+    因此内存峰值只与分块大小相关，而与数据源中的用户总量无关（仅保留 code 等少量信息）
+    """
 
     # 单次批量创建 / 更新数量
     batch_size = 250
 
+    # 单次处理的原始用户数量（分块大小）
+    chunk_size = 1000
+
     # 最多展示的冲突用户名数量
     conflict_display_limit = 10
 
+    # 检查点中记录用户同步进度的键
+    checkpoint_key = "user"
+
+    # 对比用户数据时需要对比的字段（用户名需要在可更新时才对比）
+    diff_fields = ["username", "full_name", "email", "phone", "phone_country_code", "extras"]
+
+    # 用户需要更新的字段
+    update_fields = [
+        "username",
+        "full_name",
+        "email",
+        "phone",
+        "phone_country_code",
+        "extras",
+        "content_hash",
+        "updated_at",
+    ]
+
     def __init__(
         self,
         ctx: DataSourceSyncTaskContext,
         data_source: DataSource,
-        raw_users: List[RawDataSourceUser],
+        raw_users: Iterable[RawDataSourceUser],
         overwrite: bool,
         incremental: bool,
+        get_deleted_codes: Callable[[], Set[str]] | None = None,
+        checkpoint: DataSourceSyncCheckpoint | None = None,
+        differ: SyncDiffCollector | None = None,
     ):
         # 增量模式下才可以选择覆不覆盖，全量模式下只有覆盖
         if not (incremental or overwrite):
@@ -65,25 +98,30 @@ class DataSourceUserSyncer:
         self.raw_users = raw_users
         self.overwrite = overwrite
         self.incremental = incremental
+        # 增量模式下，获取数据源中已被删除的用户 code（墓碑），会在原始用户数据迭代完成后调用
+        self.get_deleted_codes = get_deleted_codes
+        # 检查点不为空时，使用分块提交模式：每个分块在独立的事务中提交，并记录进度，失败后可从检查点恢复
+        self.checkpoint = checkpoint
+        # 差异收集器不为空时，使用预览模式：只对比数据并收集差异，不写入任何数据（也不添加变更记录）
+        self.differ = differ
         self.transformer = UsernameTransformer.load(data_source.id)
         self.converter = DataSourceUserConverter(data_source, ctx.logger)
         # 由于在部分老版本迁移过来的数据源中租户用户 ID 会由 username + 规则 拼接生成，
         # 该类数据源同步时候不可更新 username，而全新数据源对应租户 ID 都是 uuid 则不受影响
         self.enable_update_username = not is_username_frozen(data_source)
+        # 同步过程中收集的用户关联信息（仅 code，leaders，departments），供后续的关联边同步使用
+        self.user_relations: List[RawDataSourceUserRelation] = []
 
     def sync(self):
         self.ctx.logger.info("start sync users...")
-        self._filter_conflict_users()
         self._sync_users()
         self.ctx.logger.info("users sync finished")
 
-    def _filter_conflict_users(self):
-        if not self.raw_users:
-            return
+    def _filter_conflict_users(self, raw_users: List[RawDataSourceUser]) -> List[RawDataSourceUser]:
+        if not raw_users:
+            return raw_users
 
-        code_username_map = {
-            user.code: self.transformer.to_stored(user.properties["username"]) for user in self.raw_users
-        }
+        code_username_map = {user.code: self.transformer.to_stored(user.properties["username"]) for user in raw_users}
 
         # 查询同租户下其他数据源中已存在的冲突用户名
         conflict_usernames = set(
@@ -97,11 +135,11 @@ class DataSourceUserSyncer:
         )
 
         if not conflict_usernames:
-            return
+            return raw_users
 
         # 过滤冲突用户
         filtered_users, skipped_usernames = [], []
-        for user in self.raw_users:
+        for user in raw_users:
             if code_username_map[user.code] in conflict_usernames:
                 skipped_usernames.append(code_username_map[user.code])
             else:
@@ -113,60 +151,229 @@ class DataSourceUserSyncer:
             f"{'...' if len(skipped_usernames) > self.conflict_display_limit else ''}"
         )
 
-        self.raw_users = filtered_users
+        return filtered_users
 
     def _sync_users(self):
-        user_codes = set(DataSourceUser.objects.filter(data_source=self.data_source).values_list("code", flat=True))
-        raw_user_codes = {user.code for user in self.raw_users}
+        # 只保留 code 集合，用于判断用户是新增 / 更新还是删除
+        exists_user_codes = set(
+            DataSourceUser.objects.filter(data_source=self.data_source).values_list("code", flat=True)
+        )
+        synced_user_codes: Set[str] = set()
+
+        # 用户名被 “其他尚未同步的用户” 占用的待更新 / 创建用户，需要等到删除（挪窝）完成后再写入
+        deferred_update_users: List[DataSourceUser] = []
+        deferred_create_users: List[DataSourceUser] = []
+        received_cnt, updated_cnt, created_cnt = 0, 0, 0
+
+        # 从检查点恢复时，已提交分块中的存量用户无需再次对比（新增的 & 延迟写入的用户除外）
+        committed_chunk_digests, committed_deferred_codes = self._load_checkpoint()
+        # 已处理分块的指纹（分块内用户 code 集合的摘要），用于恢复时校验分块是否与已提交的分块一致
+        chunk_digests: List[str] = []
+
+        # 注：非分块提交模式下，原始用户数据也是在事务中流式拉取 & 分块处理的（不会一次性加载到内存中），
+        # 代价是拉取数据（如 HTTP / LDAP 分页请求）期间会持有事务，数据量大时建议启用分块提交模式
+        fetched_raw_users = self.ctx.metrics.timed_iter("fetch", self.raw_users)
+
+        with self._atomic_all():
+            for raw_users in chunked(fetched_raw_users, self.chunk_size):
+                received_cnt += len(raw_users)
+                chunk_digest = self._calc_chunk_digest(raw_users)
+                chunk_digests.append(chunk_digest)
+                # 关联边同步时需要的是插件提供的全部用户（包含冲突被跳过的），与全量加载时行为保持一致
+                self.user_relations.extend(
+                    RawDataSourceUserRelation(u.code, u.leaders, u.departments) for u in raw_users
+                )
 
-        waiting_create_user_codes = raw_user_codes - user_codes
-        waiting_delete_user_codes = user_codes - raw_user_codes if not self.incremental else set()
-        # 若是覆盖模式，则更新存在用户的数据，否则无需更新，但需日志里记录便于提示
-        waiting_update_user_codes = user_codes & raw_user_codes
-        if not self.overwrite:
-            # 提示未覆盖更新的用户
-            usernames = DataSourceUser.objects.filter(
-                data_source=self.data_source,
-                code__in=waiting_update_user_codes,
-            ).values_list("username", flat=True)
-            self.ctx.logger.info(
-                f"in non-overwrite mode, skip update {len(waiting_update_user_codes)} users: {', '.join(usernames)}"
-            )
-            # 不覆盖，则无需更新已存在用户
-            waiting_update_user_codes = set()
+                with self.ctx.metrics.phase("diff"):
+                    raw_users = self._filter_conflict_users(raw_users)  # noqa: PLW2901
+                raw_user_codes = {u.code for u in raw_users}
+                synced_user_codes |= raw_user_codes
+
+                # Q：为什么按分块指纹，而不是按已提交的数量跳过？
+                # A：数据源（如 HTTP / LDAP）不保证每次返回用户的顺序一致，顺序变化后，同一位置的分块
+                #  包含的用户可能并未提交过，按数量跳过会导致部分用户的变更被遗漏，
+                #  因此只有分块中的用户与已提交的分块完全一致时才跳过
+                if self._is_committed_chunk(len(chunk_digests) - 1, chunk_digest, committed_chunk_digests):
+                    raw_users = [  # noqa: PLW2901
+                        u for u in raw_users if u.code not in exists_user_codes or u.code in committed_deferred_codes
+                    ]
+
+                diff_user_codes = {u.code for u in raw_users}
+                waiting_create_user_codes = diff_user_codes - exists_user_codes
+                # 若是覆盖模式，则更新存在用户的数据，否则无需更新，但需日志里记录便于提示
+                waiting_update_user_codes = diff_user_codes & exists_user_codes
+                if not self.overwrite:
+                    self._log_skipped_update_users(waiting_update_user_codes)
+                    # 不覆盖，则无需更新已存在用户
+                    waiting_update_user_codes = set()
+
+                waiting_update_users = self._get_waiting_update_users(raw_users, waiting_update_user_codes)
+                waiting_create_users = self._get_waiting_create_users(raw_users, waiting_create_user_codes)
+
+                # 用户名被本分块之外的用户占用的，可能是因为占用者稍后会被删除 / 改名，因此延迟写入
+                occupied_usernames = self._get_occupied_usernames(
+                    [u.username for u in waiting_update_users + waiting_create_users], raw_user_codes
+                )
+                deferred_update_users.extend(u for u in waiting_update_users if u.username in occupied_usernames)
+                deferred_create_users.extend(u for u in waiting_create_users if u.username in occupied_usernames)
+                waiting_update_users = [u for u in waiting_update_users if u.username not in occupied_usernames]
+                waiting_create_users = [u for u in waiting_create_users if u.username not in occupied_usernames]
 
-        waiting_delete_users = self._get_waiting_delete_users(waiting_delete_user_codes)
-        waiting_update_users = self._get_waiting_update_users(self.raw_users, waiting_update_user_codes)
-        waiting_create_users = self._get_waiting_create_users(self.raw_users, waiting_create_user_codes)
+                with self._atomic_chunk():
+                    self._save_users(waiting_update_users, waiting_create_users)
+                    self._save_checkpoint(received_cnt, chunk_digests, deferred_update_users + deferred_create_users)
 
-        with transaction.atomic():
-            # Q: 为什么这里的顺序应该是 1. 删除 2. 更新 3. 创建
-            # A: 同步操作原则是数据库尽可能 “干净” 以避免冲突，因此删除是最优先的，可以让数据更少，
-            #  而更新放在第二步的原因是 “挪窝”，可以避免一些已有的数据和待创建的数据冲突导致同步失败
-            waiting_delete_users.delete()
+                updated_cnt += len(waiting_update_users)
+                created_cnt += len(waiting_create_users)
+                # 分块提交模式下，记录已提交的进度（数据量大时便于观察同步进度）
+                if self.checkpoint:
+                    self.ctx.logger.info(f"{received_cnt} users received, {created_cnt + updated_cnt} users committed")
+
+            # 全量模式下，插件没有提供的用户都需要被删除；增量模式下，只删除插件明确告知已被删除的用户
+            waiting_delete_user_codes = self._get_waiting_delete_user_codes(exists_user_codes, synced_user_codes)
+            waiting_delete_users = self._get_waiting_delete_users(waiting_delete_user_codes)
+
+            with self._atomic_chunk():
+                self._save_users(deferred_update_users, deferred_create_users, waiting_delete_users)
+                self._save_checkpoint(received_cnt, chunk_digests, [])
+
+        self.ctx.logger.info(f"receive {received_cnt} users from data source plugin")
+
+        self.ctx.logger.info(f"delete {len(waiting_delete_users)} users")
+
+        self.ctx.logger.info(f"update {updated_cnt + len(deferred_update_users)} users")
+        self.ctx.logger.info(f"create {created_cnt + len(deferred_create_users)} users")
+
+    def _save_users(
+        self,
+        waiting_update_users: List[DataSourceUser],
+        waiting_create_users: List[DataSourceUser],
+        waiting_delete_users: List[DataSourceUser] | None = None,
+    ):
+        """写入用户变更并添加变更记录，预览模式下只收集差异（更新的差异在对比时收集）"""
+        waiting_delete_users = waiting_delete_users or []
+
+        if self.differ:
+            for u in waiting_create_users:
+                self.differ.add(SyncOperation.CREATE, u.code, u.username)
+            for u in waiting_delete_users:
+                self.differ.add(SyncOperation.DELETE, u.code, u.username)
+            return
+
+        # Q: 为什么写入的顺序应该是 1. 删除 2. 更新 3. 创建
+        # A: 同步操作原则是数据库尽可能 “干净” 以避免冲突，因此删除是最优先的，可以让数据更少，
+        #  而更新放在第二步的原因是 “挪窝”，可以避免一些已有的数据和待创建的数据冲突导致同步失败
+        with self.ctx.metrics.phase("write"):
+            DataSourceUser.objects.filter(id__in=[u.id for u in waiting_delete_users]).delete()
             DataSourceUser.objects.bulk_update(
-                waiting_update_users,
-                fields=["username", "full_name", "email", "phone", "phone_country_code", "extras", "updated_at"],
-                batch_size=self.batch_size,
+                waiting_update_users, fields=self.update_fields, batch_size=self.batch_size
             )
             DataSourceUser.objects.bulk_create(waiting_create_users, batch_size=self.batch_size)
 
-        self.ctx.logger.info(f"delete {len(waiting_delete_users)} users")
-        self.ctx.recorder.add(SyncOperation.DELETE, DataSourceSyncObjectType.USER, waiting_delete_users)
+            self.ctx.recorder.add(SyncOperation.DELETE, DataSourceSyncObjectType.USER, waiting_delete_users)
+            self.ctx.recorder.add(SyncOperation.UPDATE, DataSourceSyncObjectType.USER, waiting_update_users)
+            self.ctx.recorder.add(SyncOperation.CREATE, DataSourceSyncObjectType.USER, waiting_create_users)
 
-        self.ctx.logger.info(f"update {len(waiting_update_users)} users")
-        self.ctx.recorder.add(SyncOperation.UPDATE, DataSourceSyncObjectType.USER, waiting_update_users)
+    def _atomic_all(self) -> ContextManager:
+        """非分块提交模式下，所有变更在同一个事务中提交"""
+        return nullcontext() if self.checkpoint else transaction.atomic()
 
-        self.ctx.logger.info(f"create {len(waiting_create_users)} users")
-        self.ctx.recorder.add(SyncOperation.CREATE, DataSourceSyncObjectType.USER, waiting_create_users)
+    def _atomic_chunk(self) -> ContextManager:
+        """分块提交模式下，每个分块的变更在独立的事务中提交"""
+        return transaction.atomic() if self.checkpoint else nullcontext()
 
-    def _get_waiting_delete_users(self, user_codes: Set[str]) -> QuerySet[DataSourceUser]:
-        return DataSourceUser.objects.filter(data_source=self.data_source, code__in=user_codes)
+    def _load_checkpoint(self) -> Tuple[List[str], Set[str]]:
+        """获取检查点中已提交分块的指纹，以及尚未写入的（延迟写入的）用户 code"""
+        state = self.checkpoint.get(self.checkpoint_key) if self.checkpoint else {}
+        if committed_cnt := state.get("received_cnt", 0):
+            self.ctx.logger.info(f"resume from checkpoint, {committed_cnt} users have been committed")
+
+        # 分块大小不一致时，分块指纹无法对比，所有分块都需要重新对比
+        chunk_digests = state.get("chunk_digests", []) if state.get("chunk_size") == self.chunk_size else []
+        return chunk_digests, set(state.get("deferred_codes", []))
+
+    def _save_checkpoint(self, received_cnt: int, chunk_digests: List[str], deferred_users: List[DataSourceUser]):
+        """记录已提交的原始用户数量 & 分块指纹，以及尚未写入的（延迟写入的）用户 code"""
+        if not self.checkpoint:
+            return
+
+        state = {
+            "received_cnt": received_cnt,
+            "chunk_size": self.chunk_size,
+            "chunk_digests": chunk_digests,
+            "deferred_codes": [u.code for u in deferred_users],
+        }
+        self.checkpoint.save(self.checkpoint_key, state)
+
+    @staticmethod
+    def _calc_chunk_digest(raw_users: Sequence[RawDataSourceUser]) -> str:
+        """计算分块指纹（与分块内用户的顺序无关）"""
+        return hashlib.md5("\n".join(sorted(u.code for u in raw_users)).encode()).hexdigest()
+
+    def _is_committed_chunk(self, chunk_idx: int, chunk_digest: str, committed_chunk_digests: List[str]) -> bool:
+        """分块是否与检查点中已提交的分块一致（包含的用户完全相同）"""
+        if chunk_idx >= len(committed_chunk_digests):
+            return False
+
+        if committed_chunk_digests[chunk_idx] != chunk_digest:
+            self.ctx.logger.warning(
+                f"users in chunk {chunk_idx} are different from the committed one in checkpoint "
+                "(data source may return users in different order), compare all users in the chunk"
+            )
+            return False
+
+        return True
+
+    def _log_skipped_update_users(self, user_codes: Set[str]):
+        """非覆盖模式下，提示未覆盖更新的用户"""
+        if not user_codes:
+            return
+
+        usernames = DataSourceUser.objects.filter(
+            data_source=self.data_source,
+            code__in=user_codes,
+        ).values_list("username", flat=True)
+        self.ctx.logger.info(f"in non-overwrite mode, skip update {len(user_codes)} users: {', '.join(usernames)}")
+
+    def _get_occupied_usernames(self, usernames: List[str], raw_user_codes: Set[str]) -> Set[str]:
+        """获取已被其他用户（不在当前分块中）占用的用户名"""
+        if not usernames:
+            return set()
+
+        with self.ctx.metrics.phase("diff"):
+            return set(
+                DataSourceUser.objects.filter(data_source=self.data_source, username__in=usernames)
+                .exclude(code__in=raw_user_codes)
+                .values_list("username", flat=True)
+            )
+
+    def _get_waiting_delete_user_codes(self, exists_user_codes: Set[str], synced_user_codes: Set[str]) -> Set[str]:
+        if not self.incremental:
+            return exists_user_codes - synced_user_codes
+
+        if not self.get_deleted_codes:
+            return set()
+
+        return (self.get_deleted_codes() & exists_user_codes) - synced_user_codes
+
+    def _get_waiting_delete_users(self, user_codes: Set[str]) -> List[DataSourceUser]:
+        if not user_codes:
+            return []
+
+        return list(DataSourceUser.objects.filter(data_source=self.data_source, code__in=user_codes))
 
     def _get_waiting_create_users(
         self, raw_users: List[RawDataSourceUser], waiting_create_user_codes: Set[str]
     ) -> List[DataSourceUser]:
-        return [self.converter.convert(u) for u in raw_users if u.code in waiting_create_user_codes]
+        with self.ctx.metrics.phase("convert"):
+            waiting_create_users = [
+                self.converter.convert(u) for u in raw_users if u.code in waiting_create_user_codes
+            ]
+            # bulk_create 不会调用 save，需要手动计算内容指纹
+            for u in waiting_create_users:
+                u.refresh_content_hash()
+
+        return waiting_create_users
 
     def _get_waiting_update_users(
         self, raw_users: List[RawDataSourceUser], waiting_update_user_codes: Set[str]
@@ -174,25 +381,42 @@ class DataSourceUserSyncer:
         if not waiting_update_user_codes:
             return []
 
-        user_map = {u.code: self.converter.convert(u) for u in raw_users}
+        with self.ctx.metrics.phase("convert"):
+            user_map = {u.code: self.converter.convert(u) for u in raw_users if u.code in waiting_update_user_codes}
+
+        with self.ctx.metrics.phase("diff"):
+            return self._diff_users(user_map)
+
+    def _diff_users(self, user_map: Dict[str, DataSourceUser]) -> List[DataSourceUser]:
+        """对比转换后的用户与 DB 中的用户，返回需要更新的用户"""
+        waiting_update_user_codes = user_map.keys()
+        # 先只查询 code + 内容指纹，指纹一致的用户不需要加载完整数据进行对比
+        may_update_user_codes = [
+            code
+            for code, content_hash in DataSourceUser.objects.filter(
+                data_source=self.data_source, code__in=waiting_update_user_codes
+            ).values_list("code", "content_hash")
+            if content_hash != user_map[code].refresh_content_hash()
+        ]
+        if not may_update_user_codes:
+            return []
 
-        may_update_users = DataSourceUser.objects.filter(
-            data_source=self.data_source, code__in=[u.code for u in raw_users]
-        )
-        waiting_update_users = []
+        may_update_users = DataSourceUser.objects.filter(data_source=self.data_source, code__in=may_update_user_codes)
+        diff_fields = self.diff_fields if self.enable_update_username else self.diff_fields[1:]
+        waiting_update_users, outdated_hash_users = [], []
         for u in may_update_users:
             # 先进行 diff，不是所有的用户都要被更新，只有有字段不一致的，才需要更新
             target_user = user_map[u.code]
-            if (
-                (u.username == target_user.username or not self.enable_update_username)
-                and u.full_name == target_user.full_name
-                and u.email == target_user.email
-                and u.phone == target_user.phone
-                and u.phone_country_code == target_user.phone_country_code
-                and u.extras == target_user.extras
-            ):
+            changed_fields = diff_model_fields(diff_fields, u, target_user)
+            if not changed_fields:
+                # 数据一致，只是指纹缺失（如存量数据）或过期，补充上即可
+                u.refresh_content_hash()
+                outdated_hash_users.append(u)
                 continue
 
+            if self.differ:
+                self.differ.add(SyncOperation.UPDATE, u.code, u.username, changed_fields)
+
             if self.enable_update_username:
                 u.username = target_user.username
 
@@ -201,10 +425,17 @@ class DataSourceUserSyncer:
             u.phone = target_user.phone
             u.phone_country_code = target_user.phone_country_code
             u.extras = target_user.extras
+            u.refresh_content_hash()
             u.updated_at = timezone.now()
             # 真正需要更新的用户，是有字段不一致的
             waiting_update_users.append(u)
 
+        # 预览模式下，不需要补充指纹
+        if not self.differ:
+            DataSourceUser.objects.bulk_update(
+                outdated_hash_users, fields=["content_hash"], batch_size=self.batch_size
+            )
+
         return waiting_update_users
 
 
@@ -218,7 +449,7 @@ class DataSourceUserLeaderRelationSyncer:
         self,
         ctx: DataSourceSyncTaskContext,
         data_source: DataSource,
-        raw_users: List[RawDataSourceUser],
+        raw_users: Sequence[RawDataSourceUser | RawDataSourceUserRelation],
         exists_user_ids_before_sync: Set[int],
         overwrite: bool,
         incremental: bool,
@@ -354,6 +585,14 @@ class DataSourceUserLeaderRelationSyncer:
             else:
                 waiting_delete_user_leader_id_tuples = set()
 
+            # 增量模式下，用户或 leader 已被删除（如插件告知的墓碑）的关系边，也需要被清理
+            exists_user_ids = set(user_code_id_map.values())
+            waiting_delete_user_leader_id_tuples |= {
+                (user_id, leader_id)
+                for user_id, leader_id in exists_user_leader_id_tuples
+                if user_id not in exists_user_ids or leader_id not in exists_user_ids
+            }
+
         return [exists_user_leader_relation_map[t] for t in waiting_delete_user_leader_id_tuples]
 
 
@@ -367,7 +606,7 @@ class DataSourceUserDeptRelationSyncer:
         self,
         ctx: DataSourceSyncTaskContext,
         data_source: DataSource,
-        raw_users: List[RawDataSourceUser],
+        raw_users: Sequence[RawDataSourceUser | RawDataSourceUserRelation],
         exists_user_ids_before_sync: Set[int],
         overwrite: bool,
         incremental: bool,
@@ -440,7 +679,11 @@ class DataSourceUserDeptRelationSyncer:
             user_dept_id_tuples, exists_user_dept_id_tuples
         )
         waiting_delete_user_dept_relation_ids = self._get_waiting_delete_user_dept_relation_ids(
-            user_code_id_map, exists_user_dept_relations_map, user_dept_id_tuples, exists_user_dept_id_tuples
+            user_code_id_map,
+            department_code_id_map,
+            exists_user_dept_relations_map,
+            user_dept_id_tuples,
+            exists_user_dept_id_tuples,
         )
 
         # 在事务中执行对关联边的变更
@@ -481,6 +724,7 @@ class DataSourceUserDeptRelationSyncer:
     def _get_waiting_delete_user_dept_relation_ids(
         self,
         user_code_id_map: Dict[str, int],
+        department_code_id_map: Dict[str, int],
         exists_user_dept_relations_map: Dict[Tuple[int, int], int],
         user_dept_id_tuples: Set[Tuple[int, int]],
         exists_user_dept_id_tuples: Set[Tuple[int, int]],
@@ -502,4 +746,12 @@ class DataSourceUserDeptRelationSyncer:
             else:
                 waiting_delete_user_dept_id_tuples = set()
 
+            # 增量模式下，用户或部门已被删除（如插件告知的墓碑）的关系边，也需要被清理
+            exists_user_ids, exists_dept_ids = set(user_code_id_map.values()), set(department_code_id_map.values())
+            waiting_delete_user_dept_id_tuples |= {
+                (user_id, dept_id)
+                for user_id, dept_id in exists_user_dept_id_tuples
+                if user_id not in exists_user_ids or dept_id not in exists_dept_ids
+            }
+
         return [exists_user_dept_relations_map[t] for t in waiting_delete_user_dept_id_tuples]
@@ -22,6 +22,7 @@ from django.db import transaction
 from bkuser.apps.data_source.models import DataSource, DataSourceDepartment
 from bkuser.apps.sync.constants import SyncOperation, TenantSyncObjectType
 from bkuser.apps.sync.contexts import TenantSyncTaskContext
+from bkuser.apps.sync.data_models import DataSourceSyncChangeSet
 from bkuser.apps.tenant.models import Tenant, TenantDepartment, TenantDepartmentIDRecord
 from bkuser.apps.tenant.utils import TenantDeptIDGenerator
 
@@ -31,16 +32,32 @@ class TenantDepartmentSyncer:
 
     batch_size = 250
 
-    def __init__(self, ctx: TenantSyncTaskContext, data_source: DataSource, tenant: Tenant):
+    def __init__(
+        self,
+        ctx: TenantSyncTaskContext,
+        data_source: DataSource,
+        tenant: Tenant,
+        change_set: DataSourceSyncChangeSet | None = None,
+    ):
         self.ctx = ctx
         self.data_source = data_source
         self.tenant = tenant
+        # 数据源同步的变更集，为 None 时全量对比数据源与租户部门
+        self.change_set = change_set
 
     def sync(self):
         """TODO (su) 协同支持指定数据范围后，需要考虑限制"""
         exists_tenant_departments = TenantDepartment.objects.filter(tenant=self.tenant, data_source=self.data_source)
         data_source_departments = DataSourceDepartment.objects.filter(data_source=self.data_source)
 
+        if self.change_set is not None:
+            # 增量模式下，只需要删除 / 创建变更集中的部门对应的租户部门
+            exists_tenant_departments = exists_tenant_departments.filter(
+                data_source_department_id__in=self.change_set.created_department_ids
+                | self.change_set.deleted_department_ids
+            )
+            data_source_departments = data_source_departments.filter(id__in=self.change_set.created_department_ids)
+
         # 删除掉租户中存在的，但是数据源中不存在的
         waiting_delete_tenant_departments = exists_tenant_departments.exclude(
             data_source_department__in=data_source_departments
@@ -50,9 +67,12 @@ class TenantDepartmentSyncer:
         waiting_sync_data_source_departments = data_source_departments.exclude(
             id__in=[u.data_source_department_id for u in exists_tenant_departments]
         )
+        # 一次性加载 ID 记录，批量复用历史租户部门 ID（避免逐个部门查询 DB）
+        generator = TenantDeptIDGenerator(self.tenant.id, self.data_source, prepare_batch=True)
+        tenant_dept_id_map = generator.gen_batch(waiting_sync_data_source_departments)
         waiting_create_tenant_departments = [
             TenantDepartment(
-                id=TenantDeptIDGenerator(self.tenant.id, self.data_source).gen(dept),
+                id=tenant_dept_id_map[dept.code],
                 tenant=self.tenant,
                 data_source_department=dept,
                 data_source=self.data_source,
@@ -61,7 +81,7 @@ class TenantDepartmentSyncer:
         ]
 
         # 统一在事务中对租户部门进行变更，先删除再增加
-        with transaction.atomic():
+        with self.ctx.metrics.phase("write"), transaction.atomic():
             waiting_delete_tenant_departments.delete()
             TenantDepartment.objects.bulk_create(waiting_create_tenant_departments, batch_size=self.batch_size)
 
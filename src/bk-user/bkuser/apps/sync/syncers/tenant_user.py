@@ -20,25 +20,39 @@
 import datetime
 
 from django.db import transaction
+from django.db.models import Exists, OuterRef, QuerySet
 from django.utils import timezone
 
 from bkuser.apps.data_source.models import DataSource, DataSourceUser
 from bkuser.apps.sync.constants import SyncOperation, TenantSyncObjectType
 from bkuser.apps.sync.contexts import TenantSyncTaskContext
+from bkuser.apps.sync.data_models import DataSourceSyncChangeSet
 from bkuser.apps.tenant.models import Tenant, TenantUser, TenantUserValidityPeriodConfig
 from bkuser.apps.tenant.utils import TenantUserIDGenerator
 from bkuser.common.constants import PERMANENT_TIME
+from bkuser.utils.django import iter_chunks_by_pk
 
 
 class TenantUserSyncer:
-    """租户部门同步器"""
+    """租户用户同步器"""
 
     batch_size = 250
 
-    def __init__(self, ctx: TenantSyncTaskContext, data_source: DataSource, tenant: Tenant):
+    # 单次处理的用户数量（分块大小）
+    chunk_size = 1000
+
+    def __init__(
+        self,
+        ctx: TenantSyncTaskContext,
+        data_source: DataSource,
+        tenant: Tenant,
+        change_set: DataSourceSyncChangeSet | None = None,
+    ):
         self.ctx = ctx
         self.data_source = data_source
         self.tenant = tenant
+        # 数据源同步的变更集，为 None 时全量对比数据源与租户用户
+        self.change_set = change_set
         self.user_account_expired_at = self._get_user_account_expired_at()
 
     def sync(self):
@@ -46,36 +60,67 @@ class TenantUserSyncer:
         exists_tenant_users = TenantUser.objects.filter(tenant=self.tenant, data_source=self.data_source)
         data_source_users = DataSourceUser.objects.filter(data_source=self.data_source)
 
-        # 删除掉租户中存在的，但是数据源中不存在的
-        waiting_delete_tenant_users = exists_tenant_users.exclude(data_source_user__in=data_source_users)
+        if self.change_set is not None:
+            # 增量模式下，只需要删除 / 创建变更集中的用户对应的租户用户
+            exists_tenant_users = exists_tenant_users.filter(
+                data_source_user_id__in=self.change_set.created_user_ids | self.change_set.deleted_user_ids
+            )
+            data_source_users = data_source_users.filter(id__in=self.change_set.created_user_ids)
 
+        # 租户中存在，但是数据源中不存在的，需要删除（DB 侧反连接，避免将全量 ID 拼接到 SQL 中）
+        waiting_delete_tenant_users = exists_tenant_users.filter(
+            ~Exists(data_source_users.filter(id=OuterRef("data_source_user_id")))
+        )
         # 数据源中存在，但是租户中不存在的，需要创建
-        waiting_sync_data_source_users = data_source_users.exclude(
-            id__in=[u.data_source_user_id for u in exists_tenant_users]
+        waiting_sync_data_source_users = data_source_users.filter(
+            ~Exists(TenantUser.objects.filter(tenant=self.tenant, data_source_user_id=OuterRef("id")))
         )
-        generator = TenantUserIDGenerator(self.tenant.id, self.data_source, prepare_batch=True)
-        waiting_create_tenant_users = [
-            TenantUser(
-                id=generator.gen(user),
-                tenant=self.tenant,
-                data_source_user=user,
-                data_source=self.data_source,
-                account_expired_at=self.user_account_expired_at,
-            )
-            for user in waiting_sync_data_source_users
-        ]
 
         # 统一在事务中对租户用户进行变更，先删除再增加
         with transaction.atomic():
-            waiting_delete_tenant_users.delete()
-            TenantUser.objects.bulk_create(waiting_create_tenant_users, batch_size=self.batch_size)
-
-        # 记录删除日志，变更记录
-        self.ctx.logger.info(f"delete {len(waiting_delete_tenant_users)} tenant users")
-        self.ctx.recorder.add(SyncOperation.DELETE, TenantSyncObjectType.USER, waiting_delete_tenant_users)
-        # 记录创建日志，变更记录
-        self.ctx.logger.info(f"create {len(waiting_create_tenant_users)} tenant users")
-        self.ctx.recorder.add(SyncOperation.CREATE, TenantSyncObjectType.USER, waiting_create_tenant_users)
+            deleted_cnt = self._delete_tenant_users(waiting_delete_tenant_users)
+            created_cnt = self._create_tenant_users(waiting_sync_data_source_users)
+
+        self.ctx.logger.info(f"delete {deleted_cnt} tenant users")
+        self.ctx.logger.info(f"create {created_cnt} tenant users")
+
+    def _delete_tenant_users(self, waiting_delete_tenant_users: QuerySet[TenantUser]) -> int:
+        """按主键分块（keyset 分页）删除租户用户，并记录变更"""
+        deleted_cnt = 0
+        for tenant_users in iter_chunks_by_pk(waiting_delete_tenant_users, self.chunk_size):
+            with self.ctx.metrics.phase("write"):
+                TenantUser.objects.filter(id__in=[u.id for u in tenant_users]).delete()
+                # 记录删除变更
+                self.ctx.recorder.add(SyncOperation.DELETE, TenantSyncObjectType.USER, tenant_users)
+            deleted_cnt += len(tenant_users)
+
+        return deleted_cnt
+
+    def _create_tenant_users(self, waiting_sync_data_source_users: QuerySet[DataSourceUser]) -> int:
+        """按主键分块（keyset 分页）创建租户用户，并记录变更"""
+        generator = TenantUserIDGenerator(self.tenant.id, self.data_source)
+
+        created_cnt = 0
+        for data_source_users in iter_chunks_by_pk(waiting_sync_data_source_users, self.chunk_size):
+            # 批量复用 / 生成租户用户 ID，新生成的 ID 记录会被批量写入 DB
+            tenant_user_id_map = generator.gen_batch(data_source_users)
+            waiting_create_tenant_users = [
+                TenantUser(
+                    id=tenant_user_id_map[user.code],
+                    tenant=self.tenant,
+                    data_source_user=user,
+                    data_source=self.data_source,
+                    account_expired_at=self.user_account_expired_at,
+                )
+                for user in data_source_users
+            ]
+            with self.ctx.metrics.phase("write"):
+                TenantUser.objects.bulk_create(waiting_create_tenant_users, batch_size=self.batch_size)
+                # 记录创建变更
+                self.ctx.recorder.add(SyncOperation.CREATE, TenantSyncObjectType.USER, waiting_create_tenant_users)
+            created_cnt += len(waiting_create_tenant_users)
+
+        return created_cnt
 
     def _get_user_account_expired_at(self) -> datetime.datetime:
         """若存在账号有效期配置且已启用，则累加到 timezone.now() 上，否则直接返回 PERMANENT_TIME"""
@@ -30,6 +30,7 @@ from bkuser.apps.sync.workbook_temp_store import WorkbookTempStore
 from bkuser.apps.tenant.models import TenantUser
 from bkuser.celery import app
 from bkuser.common.task import BaseTask
+from bkuser.plugins.local.constants import LocalDataSourceImportFileFormat
 
 logger = logging.getLogger(__name__)
 
@@ -43,16 +44,21 @@ def sync_data_source(task_id: int, plugin_init_extra_kwargs: Dict[str, Any]):
     if task.data_source.is_local and (temporary_storage_id := plugin_init_extra_kwargs.get("temporary_storage_id")):
         # 若已指定临时存储的数据唯一标识，则需要从临时存储中获取数据
         storage = WorkbookTempStore()
+        file_format = plugin_init_extra_kwargs.get("file_format", LocalDataSourceImportFileFormat.XLSX)
         try:
-            workbook = storage.pop(temporary_storage_id)
+            if file_format == LocalDataSourceImportFileFormat.XLSX:
+                plugin_init_extra_kwargs = {"workbook": storage.pop(temporary_storage_id)}
+            else:
+                plugin_init_extra_kwargs = {
+                    "raw_data": storage.pop_raw(temporary_storage_id),
+                    "file_format": file_format,
+                }
         except ValueError:
             task.status = SyncTaskStatus.FAILED
             task.logs = f"data source sync task {task_id} require raw data in temporary storage, but not found"
             task.save(update_fields=["status", "logs", "updated_at"])
             return
 
-        plugin_init_extra_kwargs = {"workbook": workbook}
-
     DataSourceSyncTaskRunner(task, plugin_init_extra_kwargs).run()
 
 
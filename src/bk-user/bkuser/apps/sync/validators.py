@@ -18,6 +18,10 @@
 # ignore custom logger must use %s string format in this file
 # ruff: noqa: G004
 from collections import defaultdict
+from typing import Any, Collection, List, Optional, Set
+
+from django.db.models import Count, QuerySet
+from django.db.models.fields.json import KT
 
 from bkuser.apps.data_source.models import DataSource, DataSourceUser
 from bkuser.apps.sync.loggers import TaskLogger
@@ -25,39 +29,87 @@ from bkuser.apps.tenant.models import TenantUserCustomField
 
 
 class DataSourceUserExtrasUniqueValidator:
-    """数据源用户额外字段唯一性校验"""
+    """数据源用户额外字段唯一性校验
+
+    校验在 DB 中进行（GROUP BY 提取出的 JSON 字段值 HAVING COUNT > 1），只有存在冲突的值才会被加载到内存中
+    """
+
+    # 按用户 code 查询本次同步涉及的字段值时，单次查询的数量
+    batch_size = 1000
 
     def __init__(self, data_source: DataSource, logger: TaskLogger):
         self.data_source = data_source
         self.logger = logger
         self.has_duplicate_unique_value = False
 
-    def validate(self):
+    def validate(self, user_codes: Optional[Collection[str] | QuerySet] = None):
+        """
+        :param user_codes: 本次同步涉及（新增 / 更新）的用户 code（或 code 的子查询），若提供则只校验这些用户的字段值
+                           是否与其他用户冲突，为 None 则校验数据源内的全部用户
+        """
         unique_custom_fields = TenantUserCustomField.objects.filter(
             tenant_id=self.data_source.owner_tenant_id, unique=True
         )
         if not unique_custom_fields.exists():
             self.logger.info(f"no unique custom fields found in tenant {self.data_source.owner_tenant_id}, skip...")
+            return
 
-        user_extras_map = dict(
-            DataSourceUser.objects.filter(data_source=self.data_source).values_list("username", "extras")
-        )
         for f in unique_custom_fields:
             self.logger.info(f"checking unique custom field {f.display_name}({f.name})...")
-            counter = defaultdict(list)
-            for username, extras in user_extras_map.items():
-                # 空值是可以被允许的（非必填字段）
-                if f.name in extras and extras[f.name] is not None:
-                    counter[extras[f.name]].append(username)
+            values = self._get_field_values(f.name)
 
-            for val, usernames in counter.items():
-                if len(usernames) == 1:
+            if user_codes is not None:
+                touched_values = self._get_touched_values(values, user_codes)
+                if not touched_values:
                     continue
 
-                self.has_duplicate_unique_value = True
+                values = values.filter(unique_value__in=touched_values)
+
+            duplicate_values = list(
+                values.values("unique_value")
+                .annotate(cnt=Count("id"))
+                .filter(cnt__gt=1)
+                .values_list("unique_value", flat=True)
+            )
+            if not duplicate_values:
+                continue
+
+            self.has_duplicate_unique_value = True
+
+            counter = defaultdict(list)
+            for val, username in values.filter(unique_value__in=duplicate_values).values_list(
+                "unique_value", "username"
+            ):
+                counter[val].append(username)
+
+            for val, usernames in counter.items():
                 self.logger.error(
                     f"custom field {f.display_name}({f.name}) has duplicate unique value {val}, usernames: {usernames}"
                 )
 
         if self.has_duplicate_unique_value:
             raise ValueError("duplicate unique values found")
+
+    def _get_field_values(self, field_name: str) -> QuerySet:
+        """数据源用户某个额外字段值（unique_value）的查询集，空值是可以被允许的（非必填字段），不参与校验"""
+        return (
+            DataSourceUser.objects.filter(data_source=self.data_source, extras__has_key=field_name)
+            .exclude(**{f"extras__{field_name}": None})
+            .annotate(unique_value=KT(f"extras__{field_name}"))
+            # 清除默认排序，避免排序字段被加入到 GROUP BY 中
+            .order_by()
+        )
+
+    def _get_touched_values(self, values: QuerySet, user_codes: Collection[str] | QuerySet) -> Set[Any]:
+        """获取本次同步涉及的用户的字段值"""
+        if isinstance(user_codes, QuerySet):
+            return set(values.filter(code__in=user_codes).values_list("unique_value", flat=True))
+
+        codes: List[str] = list(user_codes)
+        touched_values: Set[Any] = set()
+        for idx in range(0, len(codes), self.batch_size):
+            touched_values.update(
+                values.filter(code__in=codes[idx : idx + self.batch_size]).values_list("unique_value", flat=True)
+            )
+
+        return touched_values
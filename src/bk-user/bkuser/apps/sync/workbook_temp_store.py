@@ -17,6 +17,7 @@
 
 import base64
 import io
+import zlib
 
 from openpyxl import load_workbook
 from openpyxl.workbook import Workbook
@@ -71,4 +72,33 @@ class WorkbookTempStore:
         self.storage.delete(temporary_storage_id)
 
         data = base64.b64decode(encoded_data)
-        return load_workbook(filename=io.BytesIO(data))
+        # 临时存储中的 Workbook 仅用于导入解析，使用只读模式加载以降低内存占用 & 加载耗时
+        return load_workbook(filename=io.BytesIO(data), read_only=True)
+
+    def save_raw(self, data: bytes, timeout: int = TemporaryStorageDefaultTimeout) -> str:
+        """
+        将原始文件内容（如 CSV，JSON Lines 等文本格式）压缩后保存到临时存储中，并返回临时存储的数据唯一标识
+        :param data: 原始文件内容
+        :param timeout: 过期时间
+        :return: 临时数据唯一标识
+        """
+        temporary_storage_id = generate_uuid()
+        # 文本格式压缩率较高，且缓存后端可直接存储 bytes，无需 base64 编码
+        self.storage.set(temporary_storage_id, zlib.compress(data), timeout)
+
+        return temporary_storage_id
+
+    def pop_raw(self, temporary_storage_id: str) -> bytes:
+        """
+        从临时存储中获取原始文件内容，获取成功后即删除该临时存储中的临时数据
+        :param temporary_storage_id: 临时数据唯一标识
+        :return: 原始文件内容
+        """
+        compressed_data = self.storage.get(temporary_storage_id)
+        if not compressed_data:
+            raise ValueError(f"data(id={temporary_storage_id}) not found in temporary storage")
+
+        # 获取成功则删除，无需等待过期
+        self.storage.delete(temporary_storage_id)
+
+        return zlib.decompress(compressed_data)
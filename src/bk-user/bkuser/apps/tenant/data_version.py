@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from typing import Set
+
+from bkuser.apps.tenant.models import CollaborationStrategy
+from bkuser.common.cache import DataVersion
+
+
+class TenantDataVersion:
+    """租户数据版本号
+
+    租户下的用户，部门及其关系等数据（含协同过来的数据）发生变更时递增，
+    开放 API 可据此生成缓存 Key & ETag，在数据未变更时直接复用缓存 / 返回 304
+    """
+
+    @staticmethod
+    def get(tenant_id: str) -> int:
+        return DataVersion(f"tenant:{tenant_id}").get()
+
+    @staticmethod
+    def bump(tenant_id: str, with_collaboration: bool = False) -> None:
+        """
+        递增租户数据版本号
+
+        :param with_collaboration: 是否同时递增协同租户的数据版本号（本租户数据直接变更时，协同租户的数据也随之变更）
+        """
+        tenant_ids: Set[str] = {tenant_id}
+        if with_collaboration:
+            # 不区分协同策略状态：策略状态变更本身也会导致协同租户的数据变更
+            tenant_ids.update(
+                CollaborationStrategy.objects.filter(source_tenant_id=tenant_id).values_list(
+                    "target_tenant_id", flat=True
+                )
+            )
+
+        for tid in tenant_ids:
+            DataVersion(f"tenant:{tid}").bump()
@@ -17,30 +17,43 @@
 
 import logging
 
+from bkuser.apps.data_source.cache import DataSourceCache
 from bkuser.apps.data_source.constants import DataSourceTypeEnum
 from bkuser.apps.tenant.constants import DEFAULT_TENANT_USER_DISPLAY_NAME_EXPRESSION_CONFIG
 from bkuser.apps.tenant.models import DataSource, TenantUserDisplayNameExpressionConfig
-from bkuser.common.cache import cached
+from bkuser.common.cache import CacheEnum, cached
 
 logger = logging.getLogger(__name__)
 
 
-# 这里为了避免同一请求多次查询 DisplayName 自定义表达式配置，导致查询次数过多
-# 设置缓存过期时间（默认为 10 秒）
-@cached(timeout=10)
+# 展示名配置读多写少，且每次渲染展示名都需要读取，因此使用两级缓存（进程内缓存命中时无网络 IO），
+# 配置变更时会主动删除缓存（所有进程的本地缓存都会失效），参考 bkuser.apps.tenant.handlers
+@cached(cache_name=CacheEnum.TWO_TIER, timeout=60 * 60, single_flight=True)
+def _get_tenant_display_name_config(tenant_id: str) -> TenantUserDisplayNameExpressionConfig:
+    return TenantUserDisplayNameExpressionConfig.objects.get(tenant_id=tenant_id)
+
+
+def invalidate_display_name_config(tenant_id: str):
+    """删除指定租户的展示名配置缓存"""
+    _get_tenant_display_name_config.invalidate(tenant_id)
+
+
 def get_display_name_config(
     tenant_id: str, data_source_id: int | None = None
 ) -> TenantUserDisplayNameExpressionConfig:
     """获取指定租户的展示名配置"""
     if not data_source_id:
-        return TenantUserDisplayNameExpressionConfig.objects.get(tenant_id=tenant_id)
+        return _get_tenant_display_name_config(tenant_id)
+
+    owner_tenant_id = DataSourceCache.get_owner_tenant_id_map().get(data_source_id)
+    data_source_type = DataSourceCache.get_type_map().get(data_source_id)
+    # 数据源缓存中不存在（如刚创建的数据源，其他进程的本地缓存尚未失效），则直接查询 DB
+    if owner_tenant_id is None or data_source_type is None:
+        data_source = DataSource.objects.only("owner_tenant_id", "type").get(id=data_source_id)
+        owner_tenant_id, data_source_type = data_source.owner_tenant_id, data_source.type
 
-    data_source = DataSource.objects.only("owner_tenant_id", "type").get(id=data_source_id)
     # 如果为本租户实名用户，则直接使用本租户的 display_name 表达式配置
-    if data_source.owner_tenant_id == tenant_id and data_source.type == DataSourceTypeEnum.REAL:
-        return TenantUserDisplayNameExpressionConfig.objects.get(tenant_id=tenant_id)
+    if owner_tenant_id == tenant_id and data_source_type == DataSourceTypeEnum.REAL:
+        return _get_tenant_display_name_config(tenant_id)
     # 如果为协同租户用户或本租户虚拟用户，则使用默认的 display_name 表达式配置
     return TenantUserDisplayNameExpressionConfig(**DEFAULT_TENANT_USER_DISPLAY_NAME_EXPRESSION_CONFIG)
-
-
-# TODO: 后续支持 display_name 缓存
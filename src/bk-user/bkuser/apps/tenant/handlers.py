@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from bkuser.apps.data_source.signals import post_batch_update_data_source_user
+from bkuser.apps.tenant.data_version import TenantDataVersion
+from bkuser.apps.tenant.display_name_cache import invalidate_display_name_config
+from bkuser.apps.tenant.models import TenantUserDisplayNameExpressionConfig
+
+
+@receiver(post_save, sender=TenantUserDisplayNameExpressionConfig)
+@receiver(post_delete, sender=TenantUserDisplayNameExpressionConfig)
+def invalidate_tenant_display_name_config(sender, instance: TenantUserDisplayNameExpressionConfig, **kwargs):
+    """租户用户展示名配置变更后，删除配置缓存"""
+    # 事务提交前，其他请求仍可能读取到旧数据并写入缓存，因此在事务提交后需要再删除一次
+    invalidate_display_name_config(instance.tenant_id)
+    transaction.on_commit(lambda: invalidate_display_name_config(instance.tenant_id))
+
+
+@receiver(post_batch_update_data_source_user)
+def bump_tenant_data_version(sender, owner_tenant_id: str, **kwargs):
+    """数据源用户被批量更新（如后台任务迁移自定义字段数据）后，递增租户（及其协同租户）的数据版本号"""
+    TenantDataVersion.bump(owner_tenant_id, with_collaboration=True)
@@ -16,9 +16,11 @@
 # to the current version of the project delivered to anyone in the future.
 import logging
 
+from django.db import transaction
 from django.utils import timezone
 
 from bkuser.apps.tenant.constants import TenantUserStatus
+from bkuser.apps.tenant.data_version import TenantDataVersion
 from bkuser.apps.tenant.models import CollaborationStrategy, TenantUser
 from bkuser.celery import app
 from bkuser.common.task import BaseTask
@@ -72,3 +74,7 @@ def update_expired_tenant_user_status():
 
     TenantUser.objects.bulk_update(expired_users, fields=["status", "updated_at"], batch_size=500)
     logger.info("Updated %d expired users to EXPIRED status.", expired_count)
+
+    # 用户状态已变更，需要递增各租户（及其协同租户）的数据版本号，使开放 API 的缓存 & ETag 失效
+    for tenant_id in {user.tenant_id for user in expired_users}:
+        transaction.on_commit(lambda tid=tenant_id: TenantDataVersion.bump(tid, with_collaboration=True))
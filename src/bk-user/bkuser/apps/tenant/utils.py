@@ -16,11 +16,12 @@
 # to the current version of the project delivered to anyone in the future.
 
 import logging
-from typing import Dict, Tuple
+from typing import Dict, Iterable, List, Set, Tuple
 
 from bkuser.apps.data_source.models import DataSource, DataSourceDepartment, DataSourceUser
 from bkuser.apps.tenant.constants import TenantUserIdRuleEnum
 from bkuser.apps.tenant.models import TenantDepartmentIDRecord, TenantUserIDGenerateConfig, TenantUserIDRecord
+from bkuser.utils.iterx import chunked
 from bkuser.utils.nanoid import generate_nanoid
 from bkuser.utils.uuid import generate_uuid
 
@@ -39,6 +40,9 @@ def is_username_frozen(data_source: DataSource) -> bool:
 class TenantUserIDGenerator:
     """租户用户 ID 生成器"""
 
+    # 批量查询 / 写入 ID 记录时，单批次的数量
+    batch_size = 250
+
     def __init__(self, target_tenant_id: str, data_source: DataSource, prepare_batch: bool = False):
         """
         :param target_tenant_id: 目标租户 ID
@@ -53,7 +57,7 @@ class TenantUserIDGenerator:
 
         self.prepare_batch = prepare_batch
         # 租户用户 ID 映射表：{(tenant_id, data_source_id, code): tenant_user_id}
-        self.tenant_user_id_map: Dict[Tuple[str, int, int], str] = {}
+        self.tenant_user_id_map: Dict[Tuple[str, int, str], str] = {}
         if prepare_batch:
             self.tenant_user_id_map = {
                 (target_tenant_id, data_source.id, record.code): record.tenant_user_id
@@ -73,13 +77,91 @@ class TenantUserIDGenerator:
 
         return self._reuse_or_generate_id(user, self.cfg.rule)
 
+    def gen_batch(self, users: Iterable[DataSourceUser]) -> Dict[str, str]:
+        """批量生成租户用户 ID，返回 {数据源用户 code: 租户用户 ID}
+
+        与逐个调用 gen 的结果一致，区别在于：历史记录只会批量查询一次，
+        缺失的 ID 在内存中生成后，批量写入 DB（而非每个用户单独查询 & 写入）
+        """
+        users = list(users)
+        if self.cfg and self.cfg.rule in [TenantUserIdRuleEnum.USERNAME_WITH_DOMAIN, TenantUserIdRuleEnum.USERNAME]:
+            return {user.code: self.gen(user) for user in users}
+
+        rule = self._get_reusable_rule(self.cfg.rule if self.cfg else TenantUserIdRuleEnum.NANOID)
+
+        codes = {user.code for user in users}
+        if self.prepare_batch:
+            user_id_map = {
+                code: user_id
+                for code in codes
+                if (user_id := self.tenant_user_id_map.get((self.target_tenant_id, self.data_source.id, code)))
+            }
+        else:
+            user_id_map = self._query_recorded_ids(codes)
+
+        waiting_create_records = [
+            TenantUserIDRecord(
+                tenant_id=self.target_tenant_id,
+                data_source_id=self.data_source.id,
+                code=code,
+                tenant_user_id=self._generate_id(rule),
+            )
+            for code in codes
+            if code not in user_id_map
+        ]
+        if waiting_create_records:
+            # 并发场景下，记录可能已被其他进程写入，因此忽略冲突，并以 DB 中最终的记录为准
+            TenantUserIDRecord.objects.bulk_create(
+                waiting_create_records, batch_size=self.batch_size, ignore_conflicts=True
+            )
+            user_id_map.update(self._query_recorded_ids({r.code for r in waiting_create_records}))
+
+        # 记录已存在但租户用户 ID 为空（如历史脏数据）时，批量创建会因冲突被忽略，需要为其补充生成 ID
+        if empty_id_codes := codes - user_id_map.keys():
+            logger.warning(
+                "tenant user id records of data source %s (tenant %s) with empty id found, regenerate for codes: %s",
+                self.data_source.id,
+                self.target_tenant_id,
+                ", ".join(sorted(empty_id_codes)),
+            )
+            for code in empty_id_codes:
+                TenantUserIDRecord.objects.filter(
+                    tenant_id=self.target_tenant_id, data_source=self.data_source, code=code, tenant_user_id=""
+                ).update(tenant_user_id=self._generate_id(rule))
+
+            user_id_map.update(self._query_recorded_ids(empty_id_codes))
+
+        return {user.code: user_id_map[user.code] for user in users}
+
+    def _query_recorded_ids(self, codes: Set[str]) -> Dict[str, str]:
+        """分批查询 DB 中的租户用户 ID 记录，返回 {数据源用户 code: 租户用户 ID}"""
+        user_id_map: Dict[str, str] = {}
+        for batch_codes in chunked(codes, self.batch_size):
+            records = TenantUserIDRecord.objects.filter(
+                tenant_id=self.target_tenant_id, data_source=self.data_source, code__in=batch_codes
+            ).exclude(tenant_user_id="")
+            user_id_map.update((record.code, record.tenant_user_id) for record in records)
+
+        return user_id_map
+
+    @staticmethod
+    def _get_reusable_rule(rule: TenantUserIdRuleEnum) -> TenantUserIdRuleEnum:
+        """获取可复用（需要记录）的 ID 生成规则，不支持的规则会降级为 nanoid"""
+        if rule not in [TenantUserIdRuleEnum.NANOID, TenantUserIdRuleEnum.UUID4_HEX]:
+            logger.info("Unsupported rule %s, fallback to nanoid", rule)
+            return TenantUserIdRuleEnum.NANOID
+
+        return rule
+
+    @staticmethod
+    def _generate_id(rule: TenantUserIdRuleEnum) -> str:
+        return generate_uuid() if rule == TenantUserIdRuleEnum.UUID4_HEX else generate_nanoid()
+
     def _reuse_or_generate_id(
         self, user: DataSourceUser, rule: TenantUserIdRuleEnum = TenantUserIdRuleEnum.NANOID
     ) -> str:
         """复用或生成租户用户 ID"""
-        if rule not in [TenantUserIdRuleEnum.NANOID, TenantUserIdRuleEnum.UUID4_HEX]:
-            logger.info("Unsupported rule %s, fallback to nanoid", rule)
-            rule = TenantUserIdRuleEnum.NANOID
+        rule = self._get_reusable_rule(rule)
 
         if self.prepare_batch:
             # 有准备的，直接从映射表里面查询
@@ -93,12 +175,13 @@ class TenantUserIDGenerator:
             if record and record.tenant_user_id:
                 return record.tenant_user_id
 
-        generated_id = generate_uuid() if rule == TenantUserIdRuleEnum.UUID4_HEX else generate_nanoid()
-        TenantUserIDRecord.objects.create(
+        generated_id = self._generate_id(rule)
+        # 记录可能已存在但租户用户 ID 为空（如历史脏数据），此时需要更新而非创建
+        TenantUserIDRecord.objects.update_or_create(
             tenant_id=self.target_tenant_id,
             data_source_id=self.data_source.id,
             code=user.code,
-            tenant_user_id=generated_id,
+            defaults={"tenant_user_id": generated_id},
         )
         return generated_id
 
@@ -106,13 +189,16 @@ class TenantUserIDGenerator:
 class TenantDeptIDGenerator:
     """租户部门 ID 生成器"""
 
+    # 批量查询 ID 记录时，单批次的数量
+    batch_size = 250
+
     def __init__(self, target_tenant_id: str, data_source: DataSource, prepare_batch: bool = False):
         self.target_tenant_id = target_tenant_id
         self.data_source = data_source
 
         self.prepare_batch = prepare_batch
         # 租户部门 ID 映射表：{(tenant_id, data_source_id, code): tenant_dept_id}
-        self.tenant_dept_id_map: Dict[Tuple[str, int, int], int] = {}
+        self.tenant_dept_id_map: Dict[Tuple[str, int, str], int] = {}
         if prepare_batch:
             self.tenant_dept_id_map = {
                 (target_tenant_id, data_source.id, record.code): record.tenant_department_id
@@ -136,3 +222,24 @@ class TenantDeptIDGenerator:
                 return record.tenant_department_id
 
         return None
+
+    def gen_batch(self, depts: Iterable[DataSourceDepartment]) -> Dict[str, int | None]:
+        """批量生成租户部门 ID，返回 {数据源部门 code: 租户部门 ID}
+
+        没有历史记录的部门，ID 为 None，由 DB 生成自增 ID（创建后需调用方批量写入 ID 记录）
+        """
+        codes: List[str] = [dept.code for dept in depts]
+        if self.prepare_batch:
+            return {
+                code: self.tenant_dept_id_map.get((self.target_tenant_id, self.data_source.id, code)) or None
+                for code in codes
+            }
+
+        dept_id_map: Dict[str, int | None] = dict.fromkeys(codes)
+        for batch_codes in chunked(codes, self.batch_size):
+            records = TenantDepartmentIDRecord.objects.filter(
+                tenant_id=self.target_tenant_id, data_source=self.data_source, code__in=batch_codes
+            )
+            dept_id_map.update((r.code, r.tenant_department_id) for r in records if r.tenant_department_id)
+
+        return dept_id_map
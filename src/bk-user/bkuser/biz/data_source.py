@@ -15,6 +15,7 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+from bkuser.apps.data_source.cache import DataSourceOrgTreeSnapshotCache
 from bkuser.apps.data_source.models import (
     DataSource,
     DataSourceDepartment,
@@ -66,5 +67,7 @@ class DataSourceHandler:
         DepartmentRelationMPTTTree.objects.filter(data_source=data_source).delete()
         # 7. 删除数据源敏感信息
         DataSourceSensitiveInfo.objects.filter(data_source=data_source).delete()
-        # 8. 删除数据源
+        # 8. 删除数据源组织树快照（事务提交后生效）
+        DataSourceOrgTreeSnapshotCache().delete(data_source.id)
+        # 9. 删除数据源
         data_source.delete()
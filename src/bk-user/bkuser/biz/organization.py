@@ -17,12 +17,12 @@
 
 import datetime
 from collections import defaultdict
-from typing import Dict, List, Set
+from typing import Dict, List
 
 from django.db import transaction
 from django.utils import timezone
 
-from bkuser.apps.data_source.cache import DepartmentAncestorCache
+from bkuser.apps.data_source.cache import DataSourceOrgTreeSnapshotCache
 from bkuser.apps.data_source.models import (
     DataSourceDepartment,
     DataSourceDepartmentRelation,
@@ -235,14 +235,16 @@ class TenantOrgPathHandler:
 
         # 数据源用户 ID -> [数据源部门 ID1， 数据源部门 ID2]
         user_dept_id_map = defaultdict(list)
-        for relation in DataSourceDepartmentUserRelation.objects.filter(user_id__in=data_source_user_ids):
-            user_dept_id_map[relation.user_id].append(relation.department_id)
-
-        # 数据源部门 ID 集合
-        data_source_dept_ids: Set[int] = set().union(*user_dept_id_map.values())
+        # 数据源部门 ID -> 数据源 ID
+        dept_data_source_id_map: Dict[int, int] = {}
+        for user_id, dept_id, data_source_id in DataSourceDepartmentUserRelation.objects.filter(
+            user_id__in=data_source_user_ids
+        ).values_list("user_id", "department_id", "data_source_id"):
+            user_dept_id_map[user_id].append(dept_id)
+            dept_data_source_id_map[dept_id] = data_source_id
 
         # 数据源部门 ID -> 组织路径
-        org_path_map = TenantOrgPathHandler._query_org_path(list(data_source_dept_ids), include_self=True)
+        org_path_map = TenantOrgPathHandler._build_org_path_map(dept_data_source_id_map, include_self=True)
 
         # 数据源用户 ID -> 组织路径列表
         return {
@@ -253,21 +255,24 @@ class TenantOrgPathHandler:
     @staticmethod
     def _query_org_path(data_source_department_ids: List[int], include_self: bool) -> Dict[int, str]:
         """构建数据源部门 ID -> 组织路径映射"""
-        org_path_map = {}
+        dept_data_source_id_map = dict(
+            DataSourceDepartment.objects.filter(id__in=data_source_department_ids).values_list("id", "data_source_id")
+        )
+        return TenantOrgPathHandler._build_org_path_map(dept_data_source_id_map, include_self=include_self)
 
-        # 1. 从缓存获取祖先 ID 列表
-        ancestor_id_map = DepartmentAncestorCache().batch_get(data_source_department_ids)
+    @staticmethod
+    def _build_org_path_map(dept_data_source_id_map: Dict[int, int], include_self: bool) -> Dict[int, str]:
+        """根据数据源组织树快照，构建数据源部门 ID -> 组织路径映射
 
-        # 2. 批量查询部门名称
-        dept_ids = set(data_source_department_ids).union(*ancestor_id_map.values())
-        id_name_map = dict(DataSourceDepartment.objects.filter(id__in=dept_ids).values_list("id", "name"))
+        :param dept_data_source_id_map: 数据源部门 ID -> 数据源 ID
+        """
+        snapshots = DataSourceOrgTreeSnapshotCache().batch_get(dept_data_source_id_map.values())
 
-        # 3. 构建缓存部门的组织路径
-        for dept_id, ancestor_ids in ancestor_id_map.items():
-            dept_names = [id_name_map.get(ancestor_id, "") for ancestor_id in ancestor_ids]
-            if include_self:
-                dept_names.append(id_name_map.get(dept_id, ""))
-            org_path_map[dept_id] = "/".join(dept_names)
+        org_path_map = {}
+        for dept_id, data_source_id in dept_data_source_id_map.items():
+            snapshot = snapshots[data_source_id]
+            if dept_id in snapshot:
+                org_path_map[dept_id] = snapshot.get_org_path(dept_id, include_self=include_self)
 
         return org_path_map
 
@@ -299,9 +304,6 @@ class TenantOrgPathHandler:
         return org_path_map
 
     @staticmethod
-    def clear_department_descendants_ancestor_cache(data_source_department_id: int):
-        """清理指定数据源部门及其子孙部门的祖先 ID 缓存"""
-        relation = DataSourceDepartmentRelation.objects.get(department_id=data_source_department_id)
-
-        descendant_ids = list(relation.get_descendants(include_self=True).values_list("department_id", flat=True))
-        DepartmentAncestorCache().batch_delete(descendant_ids)
+    def invalidate_org_tree_snapshot(data_source_id: int):
+        """部门变更（新建，重命名，移动，删除）后，使数据源的组织树快照失效（下次读取时重新构建）"""
+        DataSourceOrgTreeSnapshotCache().invalidate(data_source_id)
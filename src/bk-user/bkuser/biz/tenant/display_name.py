@@ -17,8 +17,8 @@
 
 import logging
 import operator
-from functools import reduce
-from typing import Dict, List
+from functools import lru_cache, reduce
+from typing import Callable, Dict, List, Tuple
 
 from django.contrib.auth import get_user_model
 from django.db.models import Q
@@ -35,6 +35,73 @@ from bkuser.apps.tenant.models import (
 
 logger = logging.getLogger(__name__)
 
+# 字段取值函数：根据租户用户获取字段值
+FieldGetter = Callable[[TenantUser], str]
+
+
+class DisplayNameTemplate:
+    """展示名模板，由展示名表达式预编译而来
+
+    表达式会被拆分为 字面量 & 字段取值函数 两类片段，渲染时只需依次拼接，无需逐个用户解析表达式 & 正则替换
+    """
+
+    # 联系方式字段（租户用户可自定义，不一定继承数据源用户的数据）
+    contact_field_getters: Dict[str, FieldGetter] = {
+        "email": lambda u: u.email,
+        "phone": lambda u: u.phone_info[0],
+        "phone_country_code": lambda u: u.phone_info[1],
+    }
+
+    def __init__(self, expression: str, builtin_fields: List[str], custom_fields: List[str]):
+        self.parts: List[str | FieldGetter] = []
+
+        pos = 0
+        for match in DISPLAY_NAME_EXPRESSION_FIELD_PATTERN.finditer(expression):
+            if match.start() > pos:
+                self.parts.append(expression[pos : match.start()])
+
+            self.parts.append(self._build_field_getter(match.group(1), builtin_fields, custom_fields))
+            pos = match.end()
+
+        if pos < len(expression):
+            self.parts.append(expression[pos:])
+
+    def render(self, user: TenantUser) -> str:
+        return "".join(part if isinstance(part, str) else part(user) for part in self.parts)
+
+    def _build_field_getter(
+        self, field: str, builtin_fields: List[str], custom_fields: List[str]
+    ) -> str | FieldGetter:
+        # 自定义字段与内置字段同名时，以自定义字段为准
+        if field in custom_fields:
+            return lambda u: str(u.data_source_user.extras.get(field, "-"))
+
+        if field in builtin_fields:
+            # TODO: 内建字段后续可能也存在协同字段映射的情况，需要处理
+            if getter := self.contact_field_getters.get(field):
+                return lambda u: getter(u) or "-"
+
+            return operator.attrgetter(f"data_source_user.{field}")
+
+        # 表达式中存在，但不是有效的字段，使用 "-" 代替
+        return "-"
+
+
+@lru_cache(maxsize=1024)
+def _compile_display_name_template(
+    expression: str, builtin_fields: Tuple[str, ...], custom_fields: Tuple[str, ...]
+) -> DisplayNameTemplate:
+    return DisplayNameTemplate(expression, list(builtin_fields), list(custom_fields))
+
+
+def get_display_name_template(config: TenantUserDisplayNameExpressionConfig) -> DisplayNameTemplate:
+    """获取展示名配置对应的预编译模板
+
+    模板以 表达式 & 字段 作为缓存 Key（而非配置 ID），因此配置变更（版本号变化）后会自动使用新的模板，
+    预览时构建的临时配置也可复用
+    """
+    return _compile_display_name_template(config.expression, tuple(config.builtin_fields), tuple(config.custom_fields))
+
 
 class TenantUserDisplayNameHandler:
     @staticmethod
@@ -54,11 +121,6 @@ class TenantUserDisplayNameHandler:
         if not users:
             return {}
 
-        # TODO：后续加入缓存逻辑
-        # 1. 先获取 display_name 缓存
-        # 2. 对于缓存不存在的用户，则执行 batch_render_display_name 方法进行渲染
-        # 3. 将渲染后的结果保存到缓存中
-
         return TenantUserDisplayNameHandler.batch_render_display_name(users)
 
     @staticmethod
@@ -110,76 +172,36 @@ class TenantUserDisplayNameHandler:
     @staticmethod
     def render_display_name(user: TenantUser, config: TenantUserDisplayNameExpressionConfig) -> str:
         """渲染用户展示名"""
-
-        # 获取各类字段值
-        builtin_values = TenantUserDisplayNameHandler._get_builtin_field_values(user, config.builtin_fields)
-        custom_values = TenantUserDisplayNameHandler._get_custom_field_values(user, config.custom_fields)
-
-        field_value_map = {}
-        field_value_map.update(builtin_values)
-        field_value_map.update(custom_values)
-
-        # 使用正则表达式替换表达式中的字段为对应值
-        # match 是正则表达式从表达式（expression）中匹配到的对象，group(1) 是匹配到的第一个分组，即字段名
-        # 如果字段名在 field_value_map 中存在，则使用 field_value_map 中的值替换，否则使用 "-"
-        return DISPLAY_NAME_EXPRESSION_FIELD_PATTERN.sub(
-            lambda match: field_value_map.get(match.group(1), "-"), config.expression
-        )
+        return get_display_name_template(config).render(user)
 
     @staticmethod
     def batch_render_display_name(
         users: List[TenantUser],
+        user_configs: Dict[str, TenantUserDisplayNameExpressionConfig] | None = None,
     ) -> Dict[str, str]:
-        """批量渲染用户展示用名称"""
+        """批量渲染用户展示用名称
+
+        :param user_configs: 用户展示名配置 {user_id: config}，为空则根据用户所属租户 & 数据源获取
+        """
         if not users:
             return {}
 
-        user_display_name_map: Dict[str, str] = {}
-
-        # 遍历所有用户，渲染 display_name
-        for user in users:
-            field_value_map = {}
-            config = get_display_name_config(user.tenant_id, user.data_source_id)
-
-            builtin_values = TenantUserDisplayNameHandler._get_builtin_field_values(user, config.builtin_fields)
-            custom_values = TenantUserDisplayNameHandler._get_custom_field_values(user, config.custom_fields)
-
-            field_value_map.update(builtin_values)
-            field_value_map.update(custom_values)
-
-            # 使用表达式模板渲染展示名
-            user_display_name_map[user.id] = DISPLAY_NAME_EXPRESSION_FIELD_PATTERN.sub(
-                lambda match, field_value_map=field_value_map: field_value_map.get(match.group(1), "-"),  # type: ignore
-                config.expression,
-            )
-
-        return user_display_name_map
+        user_configs = user_configs or TenantUserDisplayNameHandler._get_user_display_name_configs(users)
+        return {user.id: get_display_name_template(user_configs[user.id]).render(user) for user in users}
 
     @staticmethod
-    def _get_builtin_field_values(user: TenantUser, builtin_fields: List[str]) -> Dict[str, str]:
-        """处理内置字段"""
-        # TODO: 内建字段后续可能也存在协同字段映射的情况，需要处理
-        # 联系方式字段映射
-        field_value_map = {}
-
-        # 联系信息字段映射
-        contact_info = {
-            "email": user.email,
-            "phone": user.phone_info[0],
-            "phone_country_code": user.phone_info[1],
-        }
+    def _get_user_display_name_configs(users: List[TenantUser]) -> Dict[str, TenantUserDisplayNameExpressionConfig]:
+        """获取用户的展示名配置，同一租户 & 数据源的用户只需获取一次"""
+        configs: Dict[Tuple[str, int], TenantUserDisplayNameExpressionConfig] = {}
+        user_configs: Dict[str, TenantUserDisplayNameExpressionConfig] = {}
+        for user in users:
+            config_key = (user.tenant_id, user.data_source_id)
+            if config_key not in configs:
+                configs[config_key] = get_display_name_config(user.tenant_id, user.data_source_id)
 
-        for field in builtin_fields:
-            if field in contact_info:
-                field_value_map[field] = contact_info[field] or "-"
-            else:
-                field_value_map[field] = getattr(user.data_source_user, field)
-        return field_value_map
+            user_configs[user.id] = configs[config_key]
 
-    @staticmethod
-    def _get_custom_field_values(user: TenantUser, custom_fields: List[str]) -> Dict[str, str]:
-        """处理自定义字段"""
-        return {field: str(user.data_source_user.extras.get(field, "-")) for field in custom_fields}
+        return user_configs
 
     @staticmethod
     def build_display_name_search_queries(tenant_id: str, keyword: str) -> Q:
@@ -21,6 +21,7 @@ from django.conf import settings
 from pydantic import BaseModel
 
 from bkuser.apps.data_source.cache import DataSourceCache
+from bkuser.apps.tenant.data_version import TenantDataVersion
 from bkuser.apps.tenant.models import TenantUser
 from bkuser.common.language import get_language_codes
 
@@ -85,3 +86,4 @@ class TenantUserHandler:
             return
         tenant_user.language = language
         tenant_user.save(update_fields=["language", "updated_at"])
+        TenantDataVersion.bump(tenant_user.tenant_id)
@@ -17,6 +17,7 @@
 import os
 
 from celery import Celery
+from celery.signals import worker_process_init
 from kombu import Exchange, Queue
 
 # Set the default Django settings module for the 'celery' program.
@@ -43,3 +44,12 @@ app.conf.task_queues = [
 app.conf.task_default_queue = "bkuser"
 
 app.conf.beat_scheduler = "django_celery_beat.schedulers:DatabaseScheduler"
+
+
+@worker_process_init.connect(weak=False)
+def worker_process_init_cache_invalidation_listener_setup(*args, **kwargs):
+    # 在 worker 子进程启动时就开始订阅两级缓存的失效消息，而不是在首次读取缓存时
+    # 注：本模块在 Django 初始化前加载，因此需要延迟导入
+    from bkuser.common.cache import start_cache_invalidation_listeners
+
+    start_cache_invalidation_listeners()
@@ -16,10 +16,28 @@
 # to the current version of the project delivered to anyone in the future.
 
 import functools
+import json
+import logging
+import os
+import pickle
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Tuple
 
 from blue_krill.data_types.enum import EnumField, StrStructuredEnum
+from django.conf import settings
 from django.core.cache import caches
-from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django_redis import get_redis_connection
+from django_redis.cache import RedisCache
+from prometheus_client import Counter
+from redis.exceptions import LockError
+from redis.lock import Lock
+
+logger = logging.getLogger(__name__)
 
 
 class CacheEnum(StrStructuredEnum):
@@ -27,6 +45,7 @@ class CacheEnum(StrStructuredEnum):
 
     DEFAULT = EnumField("default", label="内存缓存（默认）")
     REDIS = EnumField("redis", label="Redis 缓存")
+    TWO_TIER = EnumField("two_tier", label="两级缓存（内存 + Redis）")
 
 
 # 项目里不同场景的缓存实现都分散在各处，实现缓存中可能出现不同场景缓存 key 冲突问题，
@@ -50,8 +69,10 @@ class CacheKeyPrefixEnum(StrStructuredEnum):
     OPEN_WEB_API_THROTTLE = "owat"
     # 微信公众号二维码 临时存储
     MP_QRCODE = "mq"
-    # 部门祖先
-    DEPARTMENT_ANCESTOR = "da"
+    # 数据源组织树快照
+    ORG_TREE_SNAPSHOT = "ots"
+    # 数据版本号
+    DATA_VERSION = "dv"
 
 
 def _default_key_function(*args, **kwargs):
@@ -69,6 +90,149 @@ def _method_key_function(_, *args, **kwargs):
     return _default_key_function(*args, **kwargs)
 
 
+# 缓存命中情况指标，namespace 为被装饰的函数（模块名 + 函数名），result 为 hit / stale / miss
+CACHE_REQUESTS = Counter(
+    "bkuser_cache_requests_total",
+    "Requests of cached function, labeled by result (hit / stale / miss)",
+    ["namespace", "result"],
+)
+# 缓存重新计算（即真正执行被装饰的函数）次数
+CACHE_RECOMPUTES = Counter(
+    "bkuser_cache_recomputes_total",
+    "Recomputes of cached function",
+    ["namespace"],
+)
+
+# 单飞锁的超时时间（秒），需大于被装饰函数的执行耗时，避免锁提前过期导致重复计算
+SINGLE_FLIGHT_LOCK_TIMEOUT = 10
+# 未抢到单飞锁的调用方，轮询缓存结果的间隔（秒）
+SINGLE_FLIGHT_POLL_INTERVAL = 0.05
+
+_MISSING = object()
+
+# 内存缓存的短时锁，释放时（比较 & 删除）需要加进程内的锁，保证原子性
+_local_lock_release_lock = threading.Lock()
+
+
+class _SoftExpiringValue(NamedTuple):
+    """带软过期时间的缓存值"""
+
+    value: Any
+    soft_expired_at: float
+
+
+class _CacheLoader:
+    """
+    获取缓存，若缓存不存在 / 已软过期则重新计算
+
+    :param soft_timeout: 软过期时间（秒），超过软过期时间但未到达（硬）过期时间时，
+        只有一个调用方重新计算，其他调用方继续使用旧值（stale-while-revalidate）
+    :param single_flight: 缓存不存在时，是否只允许一个调用方重新计算，其他调用方等待其结果
+    """
+
+    def __init__(self, cache_name: str, namespace: str, timeout: Any, soft_timeout: int | None, single_flight: bool):
+        self.cache_name = cache_name
+        self.cache = caches[cache_name]
+        self.namespace = namespace
+        self.timeout = timeout
+        self.soft_timeout = soft_timeout
+        self.single_flight = single_flight
+
+    def load(self, key: str, compute: Callable[[], Any]) -> Any:
+        cached_value = self.cache.get(key, _MISSING)
+        if cached_value is _MISSING:
+            CACHE_REQUESTS.labels(self.namespace, "miss").inc()
+            return self._load_missing(key, compute)
+
+        if not isinstance(cached_value, _SoftExpiringValue):
+            CACHE_REQUESTS.labels(self.namespace, "hit").inc()
+            return cached_value
+
+        if cached_value.soft_expired_at > time.time():
+            CACHE_REQUESTS.labels(self.namespace, "hit").inc()
+            return cached_value.value
+
+        CACHE_REQUESTS.labels(self.namespace, "stale").inc()
+        # 已软过期：抢到锁的调用方负责刷新，其他调用方直接使用旧值
+        token = self._acquire_lock(key)
+        if token is None:
+            return cached_value.value
+
+        try:
+            return self._recompute(key, compute)
+        finally:
+            self._release_lock(key, token)
+
+    def _load_missing(self, key: str, compute: Callable[[], Any]) -> Any:
+        if not self.single_flight:
+            return self._recompute(key, compute)
+
+        token = self._acquire_lock(key)
+        if token is not None:
+            try:
+                return self._recompute(key, compute)
+            finally:
+                self._release_lock(key, token)
+
+        # 未抢到锁：等待持有锁的调用方完成计算，若等待超时（如持有方异常退出）则自行计算
+        deadline = time.monotonic() + SINGLE_FLIGHT_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+            cached_value = self.cache.get(key, _MISSING)
+            if cached_value is not _MISSING:
+                return cached_value.value if isinstance(cached_value, _SoftExpiringValue) else cached_value
+
+        return self._recompute(key, compute)
+
+    def _recompute(self, key: str, compute: Callable[[], Any]) -> Any:
+        CACHE_RECOMPUTES.labels(self.namespace).inc()
+        value = compute()
+        if self.soft_timeout is not None:
+            self.cache.set(key, _SoftExpiringValue(value, time.time() + self.soft_timeout), self.timeout)
+        else:
+            self.cache.set(key, value, self.timeout)
+        return value
+
+    def _acquire_lock(self, key: str) -> Any | None:
+        """非阻塞获取短时锁（与缓存同一后端），成功则返回锁对象（用于释放锁）"""
+        lock_key = f"{CacheKeyPrefixEnum.LOCK}:{key}"
+
+        redis_cache_name = self._get_lock_redis_cache_name()
+        if redis_cache_name is None:
+            # 内存缓存：锁仅在当前进程内生效，锁对象即为 token
+            token = uuid.uuid4().hex
+            return token if self.cache.add(lock_key, token, SINGLE_FLIGHT_LOCK_TIMEOUT) else None
+
+        # Redis（包括两级缓存）：直接使用 Redis 客户端的锁（SET NX + Lua 脚本原子释放），不经过两级缓存的失效广播
+        lock = get_redis_connection(redis_cache_name).lock(
+            str(caches[redis_cache_name].make_key(lock_key)), timeout=SINGLE_FLIGHT_LOCK_TIMEOUT, thread_local=False
+        )
+        return lock if lock.acquire(blocking=False) else None
+
+    def _release_lock(self, key: str, lock: Any):
+        # 仅释放自己持有的锁，避免锁超时后误删其他调用方的锁
+        if isinstance(lock, Lock):
+            try:
+                lock.release()
+            except LockError:
+                # 锁已超时（可能已被其他调用方持有），无需释放
+                logger.warning("single flight lock of %s expired before release", key)
+            return
+
+        lock_key = f"{CacheKeyPrefixEnum.LOCK}:{key}"
+        with _local_lock_release_lock:
+            if self.cache.get(lock_key) == lock:
+                self.cache.delete(lock_key)
+
+    def _get_lock_redis_cache_name(self) -> str | None:
+        """获取锁所使用的 Redis 缓存名称，非 Redis 缓存则返回 None"""
+        if isinstance(self.cache, TwoTierCache):
+            return self.cache._redis_cache_name
+        if isinstance(self.cache, RedisCache):
+            return self.cache_name
+        return None
+
+
 # cached 和 cachedmethod 其 key 的生成方法可以满足大部分情况下不冲突，但有以下几种情况可能会冲突
 # (1) 对于类的实例方法，由于缓存 key 只用到方法的自定义参数，
 #     若 key 的区分需要用到 self.{attr}，则需要重新自定义，否则相同方法参数时会冲突
@@ -77,7 +241,19 @@ def _method_key_function(_, *args, **kwargs):
 # (3) key 的字符串拼接，若参数里的值包含分隔符 "|"，有可能出现冲突
 # (4) 生成 key 时做了字符串转换，对于某些对象可能 str() 后相同，
 #     建议参数类型为：str/bool/int/tuple/List[base_type]/Dict[base_type]
-def cached(cache_name=CacheEnum.DEFAULT.value, key_function=_default_key_function, timeout=DEFAULT_TIMEOUT):
+#
+# 热点缓存过期时，并发请求会同时重新计算（缓存击穿），可通过以下参数避免：
+# (1) single_flight=True：缓存不存在时，通过短时锁（与缓存同一后端，Redis 即 SET NX）保证只有一个调用方计算，
+#     其他调用方等待其结果；注意：内存缓存（默认）的锁仅在当前进程内生效，与缓存数据的作用范围一致
+# (2) soft_timeout=N：缓存写入 N 秒后软过期，此后由一个调用方刷新，其他调用方继续使用旧值，
+#     直到（硬）过期时间 timeout 到达，因此 timeout 应大于 soft_timeout
+def cached(
+    cache_name=CacheEnum.DEFAULT.value,
+    key_function=_default_key_function,
+    timeout=DEFAULT_TIMEOUT,
+    soft_timeout=None,
+    single_flight=False,
+):
     """Decorator to wrap a function with a memorizing callable that saves results in a cache.
     cache param usage:
         from django.core.cache import caches
@@ -85,33 +261,53 @@ def cached(cache_name=CacheEnum.DEFAULT.value, key_function=_default_key_functio
     """
 
     def decorator(func):
+        namespace = f"{func.__module__}:{func.__name__}"
+
+        def make_key(*args, **kwargs):
+            return f"{CacheKeyPrefixEnum.AUTO}:{namespace}:{key_function(*args, **kwargs)}"
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            custom_key = key_function(*args, **kwargs)
-            namespace = f"{func.__module__}:{func.__name__}"
-            key = f"{CacheKeyPrefixEnum.AUTO}:{namespace}:{custom_key}"
+            loader = _CacheLoader(str(cache_name), namespace, timeout, soft_timeout, single_flight)
+            return loader.load(make_key(*args, **kwargs), lambda: func(*args, **kwargs))
 
-            return caches[str(cache_name)].get_or_set(key, lambda: func(*args, **kwargs), timeout)
+        def invalidate(*args, **kwargs):
+            """主动删除指定参数对应的缓存，用法：func.invalidate(*args, **kwargs)"""
+            caches[str(cache_name)].delete(make_key(*args, **kwargs))
 
+        wrapper.invalidate = invalidate  # type: ignore[attr-defined]
         return wrapper
 
     return decorator
 
 
-def cachedmethod(cache_name=CacheEnum.DEFAULT.value, key_function=_method_key_function, timeout=DEFAULT_TIMEOUT):
+def cachedmethod(
+    cache_name=CacheEnum.DEFAULT.value,
+    key_function=_method_key_function,
+    timeout=DEFAULT_TIMEOUT,
+    soft_timeout=None,
+    single_flight=False,
+):
     """Decorator to wrap a class or instance method with a memorizing
     callable that saves results in a cache.
     """
 
     def decorator(method):
+        namespace = f"{method.__module__}:{method.__qualname__}"
+
+        def make_key(self, *args, **kwargs):
+            return f"{CacheKeyPrefixEnum.AUTO}:{namespace}:{key_function(self, *args, **kwargs)}"
+
         @functools.wraps(method)
         def wrapper(self, *args, **kwargs):
-            custom_key = key_function(self, *args, **kwargs)
-            namespace = f"{method.__module__}:{method.__qualname__}"
-            key = f"{CacheKeyPrefixEnum.AUTO}:{namespace}:{custom_key}"
+            loader = _CacheLoader(str(cache_name), namespace, timeout, soft_timeout, single_flight)
+            return loader.load(make_key(self, *args, **kwargs), lambda: method(self, *args, **kwargs))
 
-            return caches[str(cache_name)].get_or_set(key, lambda: method(self, *args, **kwargs), timeout)
+        def invalidate(self, *args, **kwargs):
+            """主动删除指定参数对应的缓存，用法：Class.method.invalidate(self, *args, **kwargs)"""
+            caches[str(cache_name)].delete(make_key(self, *args, **kwargs))
 
+        wrapper.invalidate = invalidate  # type: ignore[attr-defined]
         return wrapper
 
     return decorator
@@ -169,9 +365,365 @@ class Cache:
         keys = [self._make_key(key) for key in keys]
         self.cache.delete_many(keys, version)
 
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._make_key(key)
+        return self.cache.add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        key = self._make_key(key)
+        return self.cache.incr(key, delta, version)
+
     def lock(self, key, version=None, timeout=None, sleep=0.1, blocking_timeout=None, client=None):
         if not self.lock_supported:
             raise NotImplementedError(f"{self.type} cache not support lock")
 
         key = self._make_key(key)
         return self.cache.lock(key, version, timeout, sleep, blocking_timeout, client)
+
+
+class DataVersion:
+    """
+    数据版本号，数据发生变更时递增，缓存 Key / ETag 中包含版本号后，数据变更时即可自动失效，无需依赖固定的过期时间
+
+    Q：为什么初始版本号使用当前时间戳（毫秒）而不是 0？
+    A：版本号存储在 Redis 中，若被淘汰后从 0 开始计数，可能与历史版本号重复，从而命中旧数据的缓存；
+    使用时间戳作为初始值，只要平均每毫秒的变更次数不超过 1 次，重建后的版本号就一定大于历史版本号
+    """
+
+    def __init__(self, scope: str):
+        self.scope = scope
+        self.cache = Cache(CacheEnum.REDIS, CacheKeyPrefixEnum.DATA_VERSION)
+
+    def get(self) -> int:
+        """获取当前数据版本号"""
+        version = self.cache.get(self.scope)
+        if version is not None:
+            return version
+
+        self._init()
+        return self.cache.get(self.scope)
+
+    def bump(self) -> int:
+        """递增数据版本号（原子操作），返回递增后的版本号"""
+        self._init()
+        return self.cache.incr(self.scope)
+
+    def make_key(self, key: str) -> str:
+        """生成包含数据版本号的缓存 Key"""
+        return f"{key}:v{self.get()}"
+
+    def _init(self):
+        # add 只在 Key 不存在时生效，不会覆盖已有的版本号；版本号永不过期
+        self.cache.add(self.scope, int(time.time() * 1000), timeout=None)
+
+
+class _LocalLRUCache:
+    """进程内 LRU 缓存（线程安全），存储 pickle 序列化后的数据，避免调用方修改缓存对象
+
+    每次删除 / 清空时递增失效代数（generation），回填缓存时可据此判断读取数据期间是否发生过失效
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # {key: (pickled_value, expired_at)}
+        self._data: OrderedDict[str, Tuple[bytes, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+
+            pickled, expired_at = item
+            if expired_at <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+
+            self._data.move_to_end(key)
+
+        return pickle.loads(pickled)
+
+    def set(self, key: str, value: Any, timeout: float, generation: int | None = None):
+        """写入缓存
+
+        :param generation: 读取数据前的失效代数，若期间发生过失效（代数变化），则不写入，避免回填已失效的数据
+        """
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+
+            self._data[key] = (pickled, time.monotonic() + timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete_many(self, keys: Iterable[str]):
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+
+# 进程内的一级缓存，{name: LocalLRUCache}，Django 会为每个线程创建独立的缓存后端实例，因此一级缓存需要进程内共享
+_local_caches: Dict[str, _LocalLRUCache] = {}
+
+
+class _InvalidationListener:
+    """
+    缓存失效消息订阅者，每个进程（每个频道）一个后台线程，收到其他进程的失效消息后，删除一级缓存中对应的 Key
+
+    注：订阅断开（如 Redis 重启）期间的失效消息会丢失，因此订阅断开后不再使用一级缓存（直接读写 Redis），
+    每次（重新）订阅成功后，清空所有一级缓存再恢复使用
+    """
+
+    # 订阅异常后重试的间隔（秒）
+    retry_interval = 1
+
+    def __init__(self, redis_cache_name: str, channel: str):
+        self.redis_cache_name = redis_cache_name
+        self.channel = channel
+        self.pid: int | None = None
+        # 是否已订阅成功，未订阅成功时，一级缓存不可用
+        self.subscribed = threading.Event()
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        """启动订阅线程（不等待订阅成功），订阅成功前一级缓存不可用，因此不会阻塞调用方"""
+        # gunicorn / celery 等会 fork 出子进程，子进程中需要重新启动订阅线程
+        if self.pid == os.getpid():
+            return
+
+        with self._lock:
+            if self.pid == os.getpid():
+                return
+
+            # 子进程继承了父进程的订阅状态，需要重置，待子进程的订阅线程订阅成功后再使用一级缓存
+            self.subscribed = threading.Event()
+            thread = threading.Thread(target=self._run, name="bkuser-cache-invalidation", daemon=True)
+            thread.start()
+            self.pid = os.getpid()
+
+    def _run(self):
+        while True:
+            try:
+                pubsub = get_redis_connection(self.redis_cache_name).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # fork 出的子进程，其一级缓存继承自父进程，可能已经过期；重新订阅时也可能遗漏了失效消息
+                _clear_local_caches()
+                self.subscribed.set()
+
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message["type"] == "message":
+                        self._handle(message["data"])
+            except Exception:
+                # 订阅断开期间会遗漏失效消息，需要停用一级缓存，直到重新订阅成功
+                self.subscribed.clear()
+                _clear_local_caches()
+                logger.exception("cache invalidation listener of channel %s error, retry later", self.channel)
+                time.sleep(self.retry_interval)
+
+    @staticmethod
+    def _handle(data: bytes):
+        msg = json.loads(data)
+        # 本进程发布的消息，一级缓存已经处理过，无需重复处理
+        if msg["origin"] == _get_process_origin():
+            return
+
+        for local_cache in list(_local_caches.values()):
+            if msg.get("clear"):
+                local_cache.clear()
+            else:
+                local_cache.delete_many(msg["keys"])
+
+
+# {(redis_cache_name, channel): listener}
+_invalidation_listeners: Dict[Tuple[str, str], _InvalidationListener] = {}
+_invalidation_listeners_lock = threading.Lock()
+
+
+def _get_process_origin() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _clear_local_caches():
+    for local_cache in list(_local_caches.values()):
+        local_cache.clear()
+
+
+def start_cache_invalidation_listeners():
+    """启动所有两级缓存的失效消息订阅线程，应在进程（如 web worker / celery worker 子进程）启动时调用，
+    避免在首次读取缓存时才开始订阅（订阅成功前，一级缓存不可用）
+    """
+    for name in settings.CACHES:
+        cache = caches[name]
+        if isinstance(cache, TwoTierCache):
+            cache._listener.ensure_started()
+
+
+class TwoTierCache(BaseCache):
+    """
+    两级缓存后端：进程内 LRU 缓存（一级）+ Redis 缓存（二级）
+
+    - 读：优先读取一级缓存（无网络 IO），未命中时读取 Redis，并回填一级缓存（过期时间不超过 Redis 中的剩余过期时间）
+    - 写 / 删除：先写 Redis，再通过 Redis Pub/Sub 广播失效消息，其他进程收到后立即删除各自的一级缓存
+    - 一级缓存的过期时间不超过 LOCAL_TIMEOUT，即使失效消息丢失，各进程间数据不一致的时间也是有限的
+    - 失效消息订阅未成功（如进程刚启动，Redis 连接断开）时，不使用一级缓存，直接读写 Redis
+    - clear 只清空（所有进程的）一级缓存，不会清空 Redis（Redis 中可能存在其他缓存的数据）
+
+    注：Key 前缀 / 版本等均使用二级缓存（REDIS_CACHE）的配置，本后端的 KEY_PREFIX / VERSION 配置不生效；
+    适用于数据量小，读多写少，且变更时会主动删除缓存的场景（如各类配置），数据变更不经过缓存（如直接修改 DB）时，
+    需要调用方主动删除缓存，否则只能等待缓存过期
+    """
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._redis_cache_name = options.get("REDIS_CACHE", CacheEnum.REDIS.value)
+        self._channel = options.get("CHANNEL", "bkuser:cache_invalidation")
+        self._local_timeout = options.get("LOCAL_TIMEOUT", 60)
+
+        if name not in _local_caches:
+            _local_caches[name] = _LocalLRUCache(options.get("LOCAL_MAX_ENTRIES", 1000))
+        self._local = _local_caches[name]
+
+        with _invalidation_listeners_lock:
+            listener_key = (self._redis_cache_name, self._channel)
+            if listener_key not in _invalidation_listeners:
+                _invalidation_listeners[listener_key] = _InvalidationListener(*listener_key)
+            self._listener = _invalidation_listeners[listener_key]
+        self._listener.ensure_started()
+
+    @property
+    def _redis(self):
+        return caches[self._redis_cache_name]
+
+    def _make_local_key(self, key, version=None) -> str:
+        return str(self._redis.make_key(key, version))
+
+    def _get_local_timeout(self, timeout) -> float:
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self._redis.default_timeout
+        if timeout is None:
+            return self._local_timeout
+        return min(self._local_timeout, timeout)
+
+    @property
+    def _local_enabled(self) -> bool:
+        self._listener.ensure_started()
+        return self._listener.subscribed.is_set()
+
+    def _publish(self, keys: List[str] | None = None, clear: bool = False):
+        msg = {"origin": _get_process_origin(), "keys": keys or [], "clear": clear}
+        get_redis_connection(self._redis_cache_name).publish(self._channel, json.dumps(msg))
+
+    def get(self, key, default=None, version=None):
+        if not self._local_enabled:
+            return self._redis.get(key, default, version)
+
+        local_key = self._make_local_key(key, version)
+        value = self._local.get(local_key)
+        if value is not _MISSING:
+            return value
+
+        # 读取 Redis 期间，其他进程可能已变更数据并广播失效消息（此时一级缓存中还没有该 Key），
+        # 若期间发生过失效，则不回填一级缓存，避免已失效的旧数据在一级缓存中存留到过期
+        generation = self._local.generation
+        value = self._redis.get(key, _MISSING, version)
+        if value is _MISSING:
+            return default
+
+        ttl = self._redis.ttl(key, version)
+        if ttl != 0:
+            self._local.set(local_key, value, self._get_local_timeout(ttl), generation)
+        return value
+
+    def get_many(self, keys, version=None):
+        if not self._local_enabled:
+            return self._redis.get_many(keys, version)
+
+        results, missing_keys = {}, []
+        for key in keys:
+            value = self._local.get(self._make_local_key(key, version))
+            if value is _MISSING:
+                missing_keys.append(key)
+            else:
+                results[key] = value
+
+        # 批量读取时不查询 Redis 中的剩余过期时间（避免多次网络 IO），一级缓存使用默认的过期时间
+        generation = self._local.generation
+        for key, value in self._redis.get_many(missing_keys, version).items():
+            self._local.set(
+                self._make_local_key(key, version), value, self._get_local_timeout(DEFAULT_TIMEOUT), generation
+            )
+            results[key] = value
+
+        return results
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._redis.set(key, value, timeout, version)
+
+        local_key = self._make_local_key(key, version)
+        expired = timeout is not None and timeout is not DEFAULT_TIMEOUT and timeout <= 0
+        if expired or not self._local_enabled:
+            self._local.delete_many([local_key])
+        else:
+            self._local.set(local_key, value, self._get_local_timeout(timeout))
+        self._publish([local_key])
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed_keys = self._redis.set_many(data, timeout, version)
+
+        local_keys = [self._make_local_key(key, version) for key in data]
+        self._local.delete_many(local_keys)
+        self._publish(local_keys)
+        return failed_keys
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # Key 不存在时才能写入成功，其他进程不会有有效的一级缓存，因此无需广播（单飞锁等场景会频繁调用）
+        added = self._redis.add(key, value, timeout, version)
+        if added:
+            self._local.delete_many([self._make_local_key(key, version)])
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._redis.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        deleted = self._redis.delete(key, version)
+
+        local_key = self._make_local_key(key, version)
+        self._local.delete_many([local_key])
+        self._publish([local_key])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        self._redis.delete_many(keys, version)
+
+        local_keys = [self._make_local_key(key, version) for key in keys]
+        self._local.delete_many(local_keys)
+        self._publish(local_keys)
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version) is not _MISSING
+
+    def incr(self, key, delta=1, version=None):
+        value = self._redis.incr(key, delta, version)
+
+        local_key = self._make_local_key(key, version)
+        self._local.delete_many([local_key])
+        self._publish([local_key])
+        return value
+
+    def clear(self):
+        """清空所有进程的一级缓存；注意：不会清空 Redis（与其他缓存共用），如有需要，应直接清空 Redis 缓存"""
+        self._local.clear()
+        self._publish(clear=True)
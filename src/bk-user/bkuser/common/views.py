@@ -15,17 +15,21 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import functools
+import hashlib
 import json
 import logging
 
 from blue_krill.web.drf_utils import stringify_validation_error
 from django.conf import settings
-from django.http.response import Http404, HttpResponseNotFound
+from django.http.response import Http404, HttpResponseNotFound, HttpResponseNotModified
 from django.template.exceptions import TemplateDoesNotExist
 from django.template.loader import get_template
+from django.utils.http import parse_etags, quote_etag
 from django.views.decorators.clickjacking import xframe_options_exempt
 from django.views.generic.base import TemplateView
 from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
 from rest_framework.exceptions import (
     AuthenticationFailed,
     MethodNotAllowed,
@@ -164,6 +168,31 @@ class ExcludePatchAPIViewMixin:
         return self.http_method_not_allowed(request, *args, **kwargs)  # type: ignore[attr-defined]
 
 
+def etag_by_data_version(view_method):
+    """
+    为 API 视图的 GET 方法提供基于数据版本号的条件请求（ETag / If-None-Match）支持
+
+    ETag 由数据版本号 + 请求路径（含查询参数）计算得到，数据未变更时，直接返回 304 而无需重新计算响应数据
+    Note: 被装饰的视图需要实现 get_data_version 方法，且返回值需包含数据范围（如租户 ID）
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        raw = f"{self.get_data_version()}|{request.get_full_path()}"
+        etag = quote_etag(hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest())
+
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return HttpResponseNotModified(headers={"ETag": etag})
+
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+
+        return response
+
+    return wrapper
+
+
 class VueTemplateView(TemplateView):
     template_name = "index.html"
 
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import logging
+import os
+
+from celery.signals import worker_process_shutdown, worker_ready
+from django.conf import settings
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess, start_http_server
+
+logger = logging.getLogger(__name__)
+
+
+def start_worker_metrics_server(port: int):
+    """在 celery worker 中启动指标暴露服务（同步任务等指标只在 worker 进程中采集，web 进程的 /metrics 无法获取）
+
+    worker 使用 prefork 模式（默认）时，任务在子进程中执行，需要启用 prometheus_client 的多进程模式，
+    即在 worker 启动前设置环境变量 PROMETHEUS_MULTIPROC_DIR（参考 bin/start_celery.sh），由主进程汇总各子进程的指标
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        logger.warning(
+            "PROMETHEUS_MULTIPROC_DIR is not set, only metrics observed in celery worker main process will be exported"
+        )
+        registry = REGISTRY
+
+    start_http_server(port, registry=registry)
+    logger.info("celery worker metrics server started on port %s", port)
+
+
+# 注：worker_ready 信号在 worker 主进程中发送，指标暴露服务只需在主进程中启动
+@worker_ready.connect(weak=False)
+def worker_ready_metrics_server_setup(*args, **kwargs):
+    start_worker_metrics_server(settings.CELERY_WORKER_METRICS_PORT)
+
+
+@worker_process_shutdown.connect(weak=False)
+def worker_process_shutdown_metrics_cleanup(pid: int | None = None, *args, **kwargs):
+    # 子进程退出后，清理其存活状态相关的指标（如 Gauge），否则会一直被汇总
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid or os.getpid())
@@ -16,12 +16,18 @@
 # to the current version of the project delivered to anyone in the future.
 import logging
 from abc import ABC, abstractmethod
-from typing import Dict, List, Protocol, Type
+from typing import Dict, Iterator, List, Protocol, Type
 
 from drf_yasg import openapi
 
 from bkuser.plugins.constants import CUSTOM_PLUGIN_ID_PREFIX, DataSourcePluginEnum
-from bkuser.plugins.models import BasePluginConfig, RawDataSourceDepartment, RawDataSourceUser, TestConnectionResult
+from bkuser.plugins.models import (
+    BasePluginConfig,
+    DeltaFetchResult,
+    RawDataSourceDepartment,
+    RawDataSourceUser,
+    TestConnectionResult,
+)
 from bkuser.utils.pydantic import gen_openapi_schema
 
 logger = logging.getLogger(__name__)
@@ -46,6 +52,42 @@ class BaseDataSourcePlugin(ABC):
         """获取用户信息"""
         ...
 
+    def iter_departments(self) -> Iterator[RawDataSourceDepartment]:
+        """以迭代器的方式获取部门信息
+
+        默认直接使用 fetch_departments 的结果，若插件支持流式获取（如分页拉取），
+        推荐重写该方法以边获取边返回，避免同步时需要在内存中保存全量的部门数据
+        """
+        yield from self.fetch_departments()
+
+    def iter_users(self) -> Iterator[RawDataSourceUser]:
+        """以迭代器的方式获取用户信息
+
+        默认直接使用 fetch_users 的结果，若插件支持流式获取（如分页拉取），
+        推荐重写该方法以边获取边返回，避免同步时需要在内存中保存全量的用户数据
+        """
+        yield from self.fetch_users()
+
+    @property
+    def support_concurrent_fetch(self) -> bool:
+        """部门与用户数据是否可以同时拉取
+
+        若插件的 iter_departments 与 iter_users 可以在不同线程中同时执行（如不共享连接），可重写该属性，
+        同步时会在同步部门数据的同时，在后台预先拉取用户数据
+        """
+        return False
+
+    def set_delta_cursor(self, cursor: Dict[str, str]) -> None:
+        """设置增量拉取的起始游标（即上次同步成功后保存的游标），默认不支持增量拉取，忽略即可"""
+        return
+
+    def get_delta_result(self) -> DeltaFetchResult | None:
+        """获取增量拉取结果（新的游标，被删除的部门 / 用户等），需在部门 / 用户数据迭代完成后调用
+
+        返回 None 表示插件不支持增量拉取
+        """
+        return None
+
     @abstractmethod
     def test_connection(self) -> TestConnectionResult:
         """连通性测试（非本地数据源需提供）"""
@@ -24,6 +24,12 @@ BASE_URL_REGEX = r"^https?://[a-zA-Z0-9-\.]+(:\d+)?$"
 # API 路径正则
 API_URL_PATH_REGEX = r"^\/[\w-]+(\/[\w-]+)*\/?$"
 
+# 查询参数名正则
+QUERY_PARAM_KEY_REGEX = r"^[\w-]+$"
+
+# 默认的增量拉取游标参数名
+DEFAULT_CURSOR_PARAM = "cursor"
+
 # 最小请求超时时间
 MIN_REQ_TIMEOUT = 5
 # 最大请求超时时间
@@ -38,6 +44,13 @@ MAX_RETRIES = 3
 # 默认重试次数
 DEFAULT_RETRIES = 1
 
+# 最小并发请求数（即串行拉取）
+MIN_CONCURRENCY = 1
+# 最大并发请求数
+MAX_CONCURRENCY = 16
+# 默认并发请求数
+DEFAULT_CONCURRENCY = 1
+
 # 默认页码
 DEFAULT_PAGE = 1
 # 获取首条数据用的每页数量
@@ -18,16 +18,21 @@
 import base64
 import json
 import logging
-from typing import Any, Dict, List
+import math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, Generator, Iterable, List
 
 import requests
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
-from requests.adapters import HTTPAdapter, Retry
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter, Retry
 from requests.exceptions import JSONDecodeError
 from rest_framework import status
 
 from bkuser.plugins.general.constants import (
+    DEFAULT_CONCURRENCY,
     DEFAULT_PAGE,
     MAX_TOTAL_COUNT,
     PAGE_SIZE_FOR_FETCH_FIRST,
@@ -87,7 +92,13 @@ def get_reason_from_status_code(status_code: int) -> str:
 
 
 def fetch_all_data(
-    url: str, headers: Dict[str, str], params: Dict[str, Any], page_size: PageSizeEnum, timeout: int, retries: int
+    url: str,
+    headers: Dict[str, str],
+    params: Dict[str, Any],
+    page_size: PageSizeEnum,
+    timeout: int,
+    retries: int,
+    max_concurrency: int = DEFAULT_CONCURRENCY,
 ) -> List[Dict[str, Any]]:
     """
     根据指定配置，请求数据源 API 以获取用户 / 部门数据
@@ -97,70 +108,165 @@ def fetch_all_data(
     :param params: 查询参数，即 url 中 ?scope=company 部分
     :param timeout: 单次请求超时时间
     :param retries: 请求失败重试次数
+    :param max_concurrency: 最大并发请求数
     :returns: API 返回结果，应符合通用 HTTP 数据源 API 协议
     """
+    return list(iter_all_data(url, headers, params, page_size, timeout, retries, max_concurrency))
+
+
+def iter_all_data(
+    url: str,
+    headers: Dict[str, str],
+    params: Dict[str, Any],
+    page_size: PageSizeEnum,
+    timeout: int,
+    retries: int,
+    max_concurrency: int = DEFAULT_CONCURRENCY,
+    on_page: Callable[[Dict[str, Any]], None] | None = None,
+) -> Generator[Dict[str, Any], None, None]:
+    """
+    根据指定配置，逐页请求数据源 API，每获取到一页数据即逐条返回，不会在内存中保存全量数据
+
+    :param url: 数据源 URL，如 https://bk.example.com/apis/v1/users
+    :param headers: 请求头，包含认证信息等
+    :param params: 查询参数，即 url 中 ?scope=company 部分
+    :param timeout: 单次请求超时时间
+    :param retries: 请求失败重试次数
+    :param max_concurrency: 最大并发请求数，大于 1 时会在获取到第一页数据（即得知总数量）后，
+        并发请求剩余的分页，返回的数据顺序与串行拉取时保持一致
+    :param on_page: 分页响应回调（按分页顺序调用），参数为该页的完整响应数据，可用于获取协议中的扩展字段
+    :returns: API 返回结果（单条数据）生成器，应符合通用 HTTP 数据源 API 协议
+    """
     # 做强制类型转换，避免在序列化等场景中无法自动转换成 int
     page_size = int(page_size)  # type: ignore
-
-    with requests.Session() as session:
-        adapter = HTTPAdapter(
-            max_retries=Retry(
-                total=retries,
-                backoff_factor=1,
-                status_forcelist=[429, 500, 502, 503, 504],
+    max_page = MAX_TOTAL_COUNT // page_size
+
+    def _handle_page(resp_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if on_page:
+            on_page(resp_data)
+
+        return resp_data.get("results", [])
+
+    with _new_session(retries, max_concurrency) as session:
+        resp_data = _fetch_page(session, url, headers, params, DEFAULT_PAGE, page_size, timeout)
+        total_cnt = resp_data.get("count", 0)
+        yield from _handle_page(resp_data)
+
+        if max_concurrency <= 1:
+            cur_page = DEFAULT_PAGE
+            while cur_page * page_size < total_cnt:
+                # 理论拉取数量超过最大上限，强制退出
+                if cur_page >= max_page:
+                    logger.warning("request data source api %s, exceed max page %d, force break...", url, max_page)
+                    break
+
+                cur_page += 1
+                resp_data = _fetch_page(session, url, headers, params, cur_page, page_size, timeout)
+                total_cnt = resp_data.get("count", 0)
+                yield from _handle_page(resp_data)
+
+            return
+
+        # 并发模式下，根据第一页返回的总数量，计算出需要拉取的分页
+        last_page = math.ceil(total_cnt / page_size)
+        if last_page > max_page:
+            logger.warning(
+                "request data source api %s, exceed max page %d, only fetch %d pages", url, max_page, max_page
             )
+            last_page = max_page
+
+        for resp_data in _iter_pages_concurrently(
+            session, url, headers, params, range(DEFAULT_PAGE + 1, last_page + 1), page_size, timeout, max_concurrency
+        ):
+            yield from _handle_page(resp_data)
+
+
+def _new_session(retries: int, max_concurrency: int) -> requests.Session:
+    """创建带重试机制的会话，连接池大小需要满足并发请求数量"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        max_retries=Retry(
+            total=retries,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+        ),
+        pool_maxsize=max(max_concurrency, DEFAULT_POOLSIZE),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _iter_pages_concurrently(
+    session: requests.Session,
+    url: str,
+    headers: Dict[str, str],
+    params: Dict[str, Any],
+    pages: Iterable[int],
+    page_size: int,
+    timeout: int,
+    max_concurrency: int,
+) -> Generator[Dict[str, Any], None, None]:
+    """使用线程池并发请求指定的分页，按分页顺序逐页返回响应数据"""
+    page_iter = iter(pages)
+    executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="general-plugin-fetcher")
+    try:
+        # 同时处于请求中 / 尚未被消费的分页数量不超过 max_concurrency，避免占用过多内存
+        futures = deque(
+            executor.submit(_fetch_page, session, url, headers, params, page, page_size, timeout)
+            for page in islice(page_iter, max_concurrency)
         )
-        session.mount("https://", adapter)
-        session.mount("http://", adapter)
-
-        cur_page, max_page = DEFAULT_PAGE, MAX_TOTAL_COUNT / page_size
-        total_cnt, items = 0, []
-        while True:
-            params.update({"page": cur_page, "page_size": page_size})
-            resp = session.get(url, headers=headers, params=params, timeout=timeout)
-            if not resp.ok:
-                raise RequestApiError(
-                    _("请求数据源 API {} 参数 {} 异常，状态码：{}，可能原因是：{}，响应内容：{}").format(
-                        url,
-                        stringify_params(params),
-                        resp.status_code,
-                        get_reason_from_status_code(resp.status_code),
-                        resp.content,
-                    )  # noqa: E501
-                )
-
-            try:
-                resp_data = resp.json()
-            except JSONDecodeError as e:  # noqa: PERF203
-                raise RespDataFormatError(
-                    _("数据源 API {} 参数 {} 返回非 Json 格式，响应内容 {}").format(
-                        url, stringify_params(params), resp.content
-                    )  # noqa: E501
-                ) from e
-
-            total_cnt = resp_data.get("count", 0)
-            cur_req_results = resp_data.get("results", [])
-            items.extend(cur_req_results)
-
-            logger.info(
-                "request data source api %s, params %s, get %d items, total count is %d",
+        while futures:
+            resp_data = futures.popleft().result()
+            if (page := next(page_iter, None)) is not None:
+                futures.append(executor.submit(_fetch_page, session, url, headers, params, page, page_size, timeout))
+
+            yield resp_data
+    finally:
+        # 出现异常或者提前终止时，尚未开始的请求无需再执行
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _fetch_page(
+    session: requests.Session,
+    url: str,
+    headers: Dict[str, str],
+    params: Dict[str, Any],
+    page: int,
+    page_size: int,
+    timeout: int,
+) -> Dict[str, Any]:
+    """请求数据源 API 的指定分页，返回该页的完整响应数据"""
+    params = {**params, "page": page, "page_size": page_size}
+    resp = session.get(url, headers=headers, params=params, timeout=timeout)
+    if not resp.ok:
+        raise RequestApiError(
+            _("请求数据源 API {} 参数 {} 异常，状态码：{}，可能原因是：{}，响应内容：{}").format(
                 url,
-                params,
-                len(cur_req_results),
-                total_cnt,
-            )
-
-            if cur_page * page_size >= total_cnt:
-                break
-
-            # 理论拉取数量超过最大上限，强制退出
-            if cur_page >= max_page:
-                logger.warning("request data source api %s, exceed max page %d, force break...", url, max_page)
-                break
+                stringify_params(params),
+                resp.status_code,
+                get_reason_from_status_code(resp.status_code),
+                resp.content,
+            )  # noqa: E501
+        )
 
-            cur_page += 1
+    try:
+        resp_data = resp.json()
+    except JSONDecodeError as e:
+        raise RespDataFormatError(
+            _("数据源 API {} 参数 {} 返回非 Json 格式，响应内容 {}").format(
+                url, stringify_params(params), resp.content
+            )  # noqa: E501
+        ) from e
 
-    return items
+    logger.info(
+        "request data source api %s, params %s, get %d items, total count is %d",
+        url,
+        params,
+        len(resp_data.get("results", [])),
+        resp_data.get("count", 0),
+    )
+    return resp_data
 
 
 def fetch_first_item(url: str, headers: Dict[str, str], params: Dict[str, Any], timeout: int) -> Dict[str, Any] | None:
@@ -23,12 +23,17 @@ from pydantic import BaseModel, Field, model_validator
 from bkuser.plugins.general.constants import (
     API_URL_PATH_REGEX,
     BASE_URL_REGEX,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_CURSOR_PARAM,
     DEFAULT_REQ_TIMEOUT,
     DEFAULT_RETRIES,
+    MAX_CONCURRENCY,
     MAX_REQ_TIMEOUT,
     MAX_RETRIES,
+    MIN_CONCURRENCY,
     MIN_REQ_TIMEOUT,
     MIN_RETRIES,
+    QUERY_PARAM_KEY_REGEX,
     AuthMethod,
     PageSizeEnum,
 )
@@ -62,6 +67,12 @@ class ServerConfig(BaseModel):
     request_timeout: int = Field(ge=MIN_REQ_TIMEOUT, le=MAX_REQ_TIMEOUT, default=DEFAULT_REQ_TIMEOUT)
     # 请求失败重试次数
     retries: int = Field(ge=MIN_RETRIES, le=MAX_RETRIES, default=DEFAULT_RETRIES)
+    # 分页拉取的最大并发请求数，为 1 时逐页串行拉取
+    max_concurrency: int = Field(ge=MIN_CONCURRENCY, le=MAX_CONCURRENCY, default=DEFAULT_CONCURRENCY)
+    # 是否启用基于游标的增量拉取（需要 API 支持游标参数，并返回游标与被删除数据的 ID）
+    enable_delta_fetch: bool = False
+    # 增量拉取时，游标的查询参数名（如 cursor，updated_since 等）
+    cursor_param: str = Field(pattern=QUERY_PARAM_KEY_REGEX, default=DEFAULT_CURSOR_PARAM)
 
 
 class AuthConfig(BaseModel):
@@ -108,6 +119,10 @@ class GeneralDataSourcePluginConfig(BasePluginConfig):
             )
         return self.server_config.server_base_url
 
+    @property
+    def delta_fetch_enabled(self) -> bool:
+        return self.server_config.enable_delta_fetch
+
     @model_validator(mode="after")
     def validate_configs(self) -> "GeneralDataSourcePluginConfig":
         auth_method = self.auth_config.method
@@ -14,17 +14,27 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
+
+# ignore custom logger must use %s string format in this file
+# ruff: noqa: G004
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Set
 
 from django.utils.translation import gettext_lazy as _
 
 from bkuser.plugins.base import BaseDataSourcePlugin, PluginLogger
 from bkuser.plugins.constants import DataSourcePluginEnum
 from bkuser.plugins.general.exceptions import RequestApiError, RespDataFormatError
-from bkuser.plugins.general.http import fetch_all_data, fetch_first_item, gen_headers, gen_query_params
-from bkuser.plugins.general.models import GeneralDataSourcePluginConfig
+from bkuser.plugins.general.http import (
+    fetch_all_data,
+    fetch_first_item,
+    gen_headers,
+    gen_query_params,
+    iter_all_data,
+)
+from bkuser.plugins.general.models import GeneralDataSourcePluginConfig, QueryParam
 from bkuser.plugins.models import (
+    DeltaFetchResult,
     RawDataSourceDepartment,
     RawDataSourceUser,
     TestConnectionResult,
@@ -39,9 +49,21 @@ class GeneralDataSourcePlugin(BaseDataSourcePlugin):
     id = DataSourcePluginEnum.GENERAL
     config_class = GeneralDataSourcePluginConfig
 
+    # 增量拉取游标的 key（部门，用户各自维护游标）
+    dept_cursor_key = "departments"
+    user_cursor_key = "users"
+
     def __init__(self, plugin_config: GeneralDataSourcePluginConfig, logger: PluginLogger):
         self.plugin_config = plugin_config
         self.logger = logger
+        # 增量拉取的起始游标，为空则表示全量拉取
+        self.start_cursor: Dict[str, str] = {}
+        self.delta_result = DeltaFetchResult()
+
+    @property
+    def support_concurrent_fetch(self) -> bool:
+        """开启并发拉取时，部门与用户数据也可以同时拉取（每次拉取都使用独立的会话）"""
+        return self.plugin_config.server_config.max_concurrency > 1
 
     def fetch_departments(self) -> List[RawDataSourceDepartment]:
         """获取部门信息"""
@@ -53,6 +75,7 @@ class GeneralDataSourcePlugin(BaseDataSourcePlugin):
             cfg.page_size,
             cfg.request_timeout,
             cfg.retries,
+            cfg.max_concurrency,
         )
         return [self._gen_raw_dept(d) for d in depts]
 
@@ -66,9 +89,85 @@ class GeneralDataSourcePlugin(BaseDataSourcePlugin):
             cfg.page_size,
             cfg.request_timeout,
             cfg.retries,
+            cfg.max_concurrency,
         )
         return [self._gen_raw_user(u) for u in users]
 
+    def iter_departments(self) -> Iterator[RawDataSourceDepartment]:
+        """以迭代器的方式获取部门信息（逐页拉取）"""
+        cfg = self.plugin_config.server_config
+        for d in self._iter_data(
+            cfg.department_api_path,
+            cfg.department_api_query_params,
+            self.dept_cursor_key,
+            self.delta_result.deleted_department_codes,
+        ):
+            yield self._gen_raw_dept(d)
+
+    def iter_users(self) -> Iterator[RawDataSourceUser]:
+        """以迭代器的方式获取用户信息（逐页拉取）"""
+        cfg = self.plugin_config.server_config
+        for u in self._iter_data(
+            cfg.user_api_path,
+            cfg.user_api_query_params,
+            self.user_cursor_key,
+            self.delta_result.deleted_user_codes,
+        ):
+            yield self._gen_raw_user(u)
+
+    def set_delta_cursor(self, cursor: Dict[str, str]) -> None:
+        """设置增量拉取的起始游标"""
+        if not self.plugin_config.server_config.enable_delta_fetch:
+            return
+
+        # 部门与用户的游标需要同时存在，否则退化为全量拉取
+        if not (cursor.get(self.dept_cursor_key) and cursor.get(self.user_cursor_key)):
+            self.logger.warning(f"delta cursor {cursor} is incomplete, fallback to fetch all data")
+            return
+
+        self.start_cursor = cursor
+        self.delta_result.is_delta = True
+
+    def get_delta_result(self) -> DeltaFetchResult | None:
+        """获取增量拉取结果"""
+        if not self.plugin_config.server_config.enable_delta_fetch:
+            return None
+
+        return self.delta_result
+
+    def _iter_data(
+        self, api_path: str, query_params: List[QueryParam], cursor_key: str, deleted_codes: Set[str]
+    ) -> Iterator[Dict[str, Any]]:
+        """逐页拉取数据，若启用了增量拉取，则还需要带上游标，并收集新的游标与被删除的数据"""
+        cfg = self.plugin_config.server_config
+        params = gen_query_params(query_params)
+
+        on_page = None
+        if cfg.enable_delta_fetch:
+            if cursor := self.start_cursor.get(cursor_key):
+                params[cfg.cursor_param] = cursor
+
+            def on_page(resp_data: Dict[str, Any]):
+                self._collect_delta_info(resp_data, cursor_key, deleted_codes)
+
+        yield from iter_all_data(
+            self.plugin_config.server_base_url + api_path,
+            gen_headers(self.plugin_config.auth_config),
+            params,
+            cfg.page_size,
+            cfg.request_timeout,
+            cfg.retries,
+            cfg.max_concurrency,
+            on_page,
+        )
+
+    def _collect_delta_info(self, resp_data: Dict[str, Any], cursor_key: str, deleted_codes: Set[str]):
+        # 以第一页返回的游标为准，确保分页拉取期间发生的变更，在下次增量拉取时不会被遗漏
+        if cursor_key not in self.delta_result.cursor and resp_data.get("cursor"):
+            self.delta_result.cursor[cursor_key] = str(resp_data["cursor"])
+
+        deleted_codes.update(str(code) for code in resp_data.get("deleted") or [])
+
     def test_connection(self) -> TestConnectionResult:
         """连通性测试"""
         cfg = self.plugin_config.server_config
@@ -15,10 +15,12 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-from typing import List
+from typing import Any, Iterator, List
 
-from ldap3 import ALL_ATTRIBUTES, DEREF_NEVER, SAFE_SYNC, Connection, Server
-from ldap3.extend.standard.PagedSearch import paged_search_accumulator
+from ldap3 import ALL_ATTRIBUTES, BASE, DEREF_NEVER, SAFE_SYNC, SUBTREE, Connection, Server
+from ldap3.core.exceptions import LDAPNoSuchObjectResult
+from ldap3.extend.standard.PagedSearch import paged_search_generator
+from ldap3.utils.conv import escape_filter_chars
 
 from bkuser.plugins.ldap.exceptions import DataNotFoundError
 from bkuser.plugins.ldap.models import LDAPObject, ServerConfig
@@ -27,9 +29,11 @@ from bkuser.plugins.ldap.models import LDAPObject, ServerConfig
 class LDAPClient:
     """LDAP 客户端"""
 
-    def __init__(self, server_config: ServerConfig, uuid_attribute: str):
+    def __init__(self, server_config: ServerConfig, uuid_attribute: str, change_tracking_attribute: str = ""):
         self.server_config = server_config
         self.uuid_attribute = uuid_attribute
+        # 变更追踪属性（如 modifyTimestamp，uSNChanged），增量拉取时使用
+        self.change_tracking_attribute = change_tracking_attribute
 
     def __enter__(self):
         self._conn = self._gen_conn(self.server_config)
@@ -40,31 +44,70 @@ class LDAPClient:
         self._conn.unbind()
 
     def fetch_all_objects(self, search_base_dn: str, object_class: str) -> List[LDAPObject]:
-        return self._fetch_objects_with_page(search_base_dn, object_class, self.server_config.page_size)
+        return list(self.iter_objects(search_base_dn, object_class))
+
+    def iter_objects(self, search_base_dn: str, object_class: str, changed_since: str = "") -> Iterator[LDAPObject]:
+        """以迭代器的方式获取对象（逐页拉取），若指定了 changed_since，
+        则只获取变更追踪属性值不小于 changed_since 的对象（即上次同步后变更过的对象）
+        """
+        search_filter = self._gen_search_filter(object_class)
+        if changed_since:
+            if not self.change_tracking_attribute:
+                raise ValueError("change_tracking_attribute is required when fetch changed objects")
+
+            search_filter = "(&{}({}>={}))".format(
+                search_filter, self.change_tracking_attribute, escape_filter_chars(changed_since)
+            )
+
+        return self._iter_objects_with_page(search_base_dn, search_filter, self.server_config.page_size)
 
     def fetch_first_object(self, search_base_dn: str, object_class: str) -> LDAPObject:
-        results = self._fetch_objects_with_page(search_base_dn, object_class, 1)
-        if not results:
+        # 获取到第一个对象即可停止，无需继续翻页
+        results = self._iter_objects_with_page(search_base_dn, self._gen_search_filter(object_class), 1)
+        if not (obj := next(results, None)):
             raise DataNotFoundError(f"no object found in {search_base_dn} (objectclass={object_class})")
 
-        return results[0]
+        return obj
+
+    def fetch_object(self, dn: str, object_class: str) -> LDAPObject | None:
+        """根据 DN 获取指定的对象，若对象不存在，则返回 None"""
+        results = self._iter_objects_with_page(dn, self._gen_search_filter(object_class), 1, search_scope=BASE)
+        try:
+            return next(results, None)
+        except LDAPNoSuchObjectResult:
+            return None
 
-    def _fetch_objects_with_page(self, search_base_dn: str, object_class: str, page_size: int) -> List[LDAPObject]:
+    def fetch_root_dse_attribute(self, attribute: str) -> Any:
+        """获取 rootDSE 中的属性值（如 Active Directory 的 highestCommittedUSN，currentTime），不存在时返回 None"""
+        _, _, response, _ = self._conn.search(
+            search_base="", search_filter="(objectClass=*)", search_scope=BASE, attributes=[attribute]
+        )
+        for entry in response or []:
+            if value := entry.get("attributes", {}).get(attribute):
+                return value
+
+        return None
+
+    def _iter_objects_with_page(
+        self, search_base_dn: str, search_filter: str, page_size: int, search_scope: str = SUBTREE
+    ) -> Iterator[LDAPObject]:
         """
-        以分页方式获取对象列表
+        以分页方式获取对象，每获取到一页数据即返回，不会在内存中保存全量的查询结果
 
         :param search_base_dn: LDAP Base DN，如：ou=company,dc=bk,dc=example,dc=com
-        :param object_class: LDAP 对象类，如：inetOrgPerson
+        :param search_filter: 查询条件，如：(objectclass=inetOrgPerson)
         :param page_size: 分页大小
-        :return: 对象列表
+        :param search_scope: 查询范围，默认为整个子树
+        :return: 对象迭代器
         """
         if page_size <= 0:
             raise ValueError("page_size must be greater than 0")
 
-        results = paged_search_accumulator(
+        results = paged_search_generator(
             self._conn,
             search_base=search_base_dn,
-            search_filter=f"(objectclass={object_class})",
+            search_filter=search_filter,
+            search_scope=search_scope,
             dereference_aliases=DEREF_NEVER,
             get_operational_attributes=False,
             attributes=[
@@ -74,7 +117,8 @@ class LDAPClient:
             paged_size=page_size,
         )
         # 丢弃多余的信息，如 type，raw_dn，raw_attributes 等
-        return [LDAPObject(dn=r["dn"], attrs=r["attributes"]) for r in results]
+        for r in results:
+            yield LDAPObject(dn=r["dn"], attrs=r["attributes"])
 
     @property
     def required_operational_attributes(self) -> List[str]:
@@ -84,10 +128,18 @@ class LDAPClient:
         Operational Attributes 是由 LDAP 服务器管理的特殊属性，用于记录条目元数据或操作信息，
         如条目的唯一标识属性、创建者、创建时间等。
 
-        目前同步时只额外请求当前配置的唯一标识属性，避免拉取全部操作属性造成不必要的带宽和内存开销。
+        目前同步时只额外请求当前配置的唯一标识属性（以及增量拉取所需的变更追踪属性），
+        避免拉取全部操作属性造成不必要的带宽和内存开销。
         """
+        if self.change_tracking_attribute:
+            return [self.uuid_attribute, self.change_tracking_attribute]
+
         return [self.uuid_attribute]
 
+    @staticmethod
+    def _gen_search_filter(object_class: str) -> str:
+        return f"(objectclass={object_class})"
+
     @staticmethod
     def _gen_conn(server_config: ServerConfig) -> Connection:
         server = Server(
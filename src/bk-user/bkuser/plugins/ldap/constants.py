@@ -15,7 +15,8 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-from blue_krill.data_types.enum import EnumField, IntStructuredEnum
+from blue_krill.data_types.enum import EnumField, IntStructuredEnum, StrStructuredEnum
+from django.utils.translation import gettext_lazy as _
 
 # 服务 URL 正则
 SERVER_URL_REGEX = r"^ldaps?://[a-zA-Z0-9-/\.]+(:\d+)?$"
@@ -36,6 +37,27 @@ DEFAULT_REQ_TIMEOUT = 30
 # 至多指定 10 个搜索根目录（LDAP 树）
 MAX_SEARCH_BASE_DN_COUNT = 10
 
+# 最小并发查询数（即串行查询各个搜索根目录）
+MIN_CONCURRENCY = 1
+# 最大并发查询数（同时使用的 LDAP 连接数）
+MAX_CONCURRENCY = 5
+# 默认并发查询数
+DEFAULT_CONCURRENCY = 1
+
+# 增量同步时，最小全量对账间隔（小时）
+MIN_FULL_SYNC_INTERVAL_HOURS = 1
+# 增量同步时，最大全量对账间隔（小时）
+MAX_FULL_SYNC_INTERVAL_HOURS = 24 * 30
+# 增量同步时，默认全量对账间隔（小时）
+DEFAULT_FULL_SYNC_INTERVAL_HOURS = 24
+
+
+class ChangeTrackingAttribute(StrStructuredEnum):
+    """变更追踪属性（操作属性），增量同步时用于筛选出变更过的对象"""
+
+    MODIFY_TIMESTAMP = EnumField("modifyTimestamp", label=_("修改时间（OpenLDAP 等）"))
+    USN_CHANGED = EnumField("uSNChanged", label=_("更新序列号（Active Directory）"))
+
 
 class PageSizeEnum(IntStructuredEnum):
     """每页数量"""
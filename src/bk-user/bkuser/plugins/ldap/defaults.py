@@ -15,9 +15,10 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-from bkuser.plugins.ldap.constants import PageSizeEnum
+from bkuser.plugins.ldap.constants import ChangeTrackingAttribute, PageSizeEnum
 from bkuser.plugins.ldap.models import (
     DataConfig,
+    IncrementalSyncConfig,
     LDAPDataSourcePluginConfig,
     LeaderConfig,
     ServerConfig,
@@ -33,6 +34,7 @@ DEFAULT_PLUGIN_CONFIG = LDAPDataSourcePluginConfig(
         base_dn="dc=bk,dc=example,dc=com",
         page_size=PageSizeEnum.SIZE_100,
         request_timeout=30,
+        max_concurrency=1,
     ),
     data_config=DataConfig(
         user_object_class="inetOrgPerson",
@@ -51,4 +53,9 @@ DEFAULT_PLUGIN_CONFIG = LDAPDataSourcePluginConfig(
         enabled=True,
         leader_field="manager",
     ),
+    incremental_sync_config=IncrementalSyncConfig(
+        enabled=False,
+        change_tracking_attribute=ChangeTrackingAttribute.MODIFY_TIMESTAMP,
+        full_sync_interval_hours=24,
+    ),
 )
@@ -20,13 +20,20 @@ from django.utils.translation import gettext_lazy as _
 from pydantic import BaseModel, Field, model_validator
 
 from bkuser.plugins.ldap.constants import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_FULL_SYNC_INTERVAL_HOURS,
     DEFAULT_REQ_TIMEOUT,
     LDAP_BASE_DN_REGEX,
     LDAP_BIND_DN_REGEX,
+    MAX_CONCURRENCY,
+    MAX_FULL_SYNC_INTERVAL_HOURS,
     MAX_REQ_TIMEOUT,
     MAX_SEARCH_BASE_DN_COUNT,
+    MIN_CONCURRENCY,
+    MIN_FULL_SYNC_INTERVAL_HOURS,
     MIN_REQ_TIMEOUT,
     SERVER_URL_REGEX,
+    ChangeTrackingAttribute,
     PageSizeEnum,
 )
 from bkuser.plugins.ldap.utils import has_parent_child_dn_relation
@@ -48,6 +55,8 @@ class ServerConfig(BaseModel):
     page_size: PageSizeEnum = PageSizeEnum.SIZE_100
     # 单次请求超时时间
     request_timeout: int = Field(ge=MIN_REQ_TIMEOUT, le=MAX_REQ_TIMEOUT, default=DEFAULT_REQ_TIMEOUT)
+    # 并发查询数，配置了多个搜索根目录时，会使用多个连接同时查询
+    max_concurrency: int = Field(ge=MIN_CONCURRENCY, le=MAX_CONCURRENCY, default=DEFAULT_CONCURRENCY)
 
     @model_validator(mode="after")
     def validate_attrs(self) -> "ServerConfig":
@@ -163,6 +172,20 @@ class LeaderConfig(BaseModel):
         return self
 
 
+class IncrementalSyncConfig(BaseModel):
+    """增量同步配置"""
+
+    # 是否启用增量同步（定时同步时，只拉取上次同步后变更过的用户）
+    enabled: bool = False
+    # 变更追踪属性，OpenLDAP 使用 modifyTimestamp，Active Directory 使用 uSNChanged
+    # 注：uSNChanged 在每台域控上是独立计数的，服务地址需固定指向同一台域控
+    change_tracking_attribute: ChangeTrackingAttribute = ChangeTrackingAttribute.MODIFY_TIMESTAMP
+    # 全量对账间隔（小时），增量同步无法感知对象的删除，需要定期全量同步
+    full_sync_interval_hours: int = Field(
+        ge=MIN_FULL_SYNC_INTERVAL_HOURS, le=MAX_FULL_SYNC_INTERVAL_HOURS, default=DEFAULT_FULL_SYNC_INTERVAL_HOURS
+    )
+
+
 class LDAPDataSourcePluginConfig(BasePluginConfig):
     """LDAP 数据源插件配置"""
 
@@ -178,6 +201,12 @@ class LDAPDataSourcePluginConfig(BasePluginConfig):
     user_group_config: UserGroupConfig
     # Leader 配置
     leader_config: LeaderConfig
+    # 增量同步配置
+    incremental_sync_config: IncrementalSyncConfig = IncrementalSyncConfig()
+
+    @property
+    def delta_fetch_enabled(self) -> bool:
+        return self.incremental_sync_config.enabled
 
     @model_validator(mode="after")
     def validate_attrs(self) -> "LDAPDataSourcePluginConfig":
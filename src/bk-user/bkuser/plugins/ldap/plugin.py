@@ -17,19 +17,28 @@
 
 # ignore custom logger must use %s string format in this file
 # ruff: noqa: G004
+import datetime
 import logging
 from collections import defaultdict
-from typing import DefaultDict, Dict, List
+from typing import Any, DefaultDict, Dict, Iterator, List, Set
 
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from bkuser.plugins.base import BaseDataSourcePlugin, PluginLogger
 from bkuser.plugins.constants import DataSourcePluginEnum
 from bkuser.plugins.ldap import utils
 from bkuser.plugins.ldap.client import LDAPClient
+from bkuser.plugins.ldap.constants import ChangeTrackingAttribute
 from bkuser.plugins.ldap.exceptions import DataNotFoundError
 from bkuser.plugins.ldap.models import LDAPDataSourcePluginConfig, LDAPObject
-from bkuser.plugins.models import RawDataSourceDepartment, RawDataSourceUser, TestConnectionResult
+from bkuser.plugins.models import (
+    DeltaFetchResult,
+    RawDataSourceDepartment,
+    RawDataSourceUser,
+    TestConnectionResult,
+)
+from bkuser.utils.iterx import concurrent_chain
 
 logger = logging.getLogger(__name__)
 
@@ -40,36 +49,49 @@ class LDAPDataSourcePlugin(BaseDataSourcePlugin):
     id = DataSourcePluginEnum.LDAP
     config_class = LDAPDataSourcePluginConfig
 
+    # 并发查询多个搜索根目录时，单个搜索根目录最多预先拉取（缓存）的对象数量
+    concurrent_search_prefetch_size = 5000
+
+    # 增量拉取游标的 key：查询前服务器的变更追踪属性高水位，变更追踪属性，最近一次全量拉取的时间
+    user_cursor_key = "users"
+    attribute_cursor_key = "change_tracking_attribute"
+    full_synced_at_cursor_key = "full_synced_at"
+
+    # 服务器不提供当前时间时，使用本地时间作为 modifyTimestamp 的高水位，需要减去可容忍的时钟偏差
+    clock_skew_tolerance = datetime.timedelta(minutes=5)
+
     def __init__(self, plugin_config: LDAPDataSourcePluginConfig, logger: PluginLogger):
         self.plugin_config = plugin_config
         self.logger = logger
         # 缓存部门相关信息，解析用户时候需要使用，可避免重复拉取 & 计算
         self.dept_dn_code_map: Dict[str, str] = {}
         self.user_group_dns_map: DefaultDict[str, List[str]] = defaultdict(list)
+        # 增量拉取的起始游标，为空则表示全量拉取
+        self.start_cursor: Dict[str, str] = {}
+        self.delta_result = DeltaFetchResult()
 
     def fetch_departments(self) -> List[RawDataSourceDepartment]:
-        """获取部门信息"""
-        cfg = self.plugin_config.data_config
-        with LDAPClient(self.plugin_config.server_config, cfg.uuid_attribute) as ldap_client:
-            depts = [
-                dept
-                for dn in cfg.dept_search_base_dns
-                for dept in ldap_client.fetch_all_objects(dn, cfg.dept_object_class)
-            ]
-            self.logger.info(f"fetch {len(depts)} departments from ldap server")
+        """获取部门信息
 
-        raw_depts = [self._gen_raw_dept(d, cfg.uuid_attribute) for d in depts]
+        注：部门（含用户组）的数量通常远少于用户，且解析用户所属部门时需要全量的部门 DN 映射表，
+        因此即使是增量同步，部门也是全量拉取的（部门的删除会在定期的全量对账时处理）
+        """
+        cfg = self.plugin_config.data_config
+        raw_depts = [
+            self._gen_raw_dept(d, cfg.uuid_attribute)
+            for d in self._iter_objects(cfg.dept_search_base_dns, cfg.dept_object_class)
+        ]
+        self.logger.info(f"fetch {len(raw_depts)} departments from ldap server")
 
         # 启用用户组的情况
         if self.plugin_config.user_group_config.enabled:
             self.logger.info("user group enabled...")
 
-            with LDAPClient(self.plugin_config.server_config, cfg.uuid_attribute) as ldap_client:
-                base_dns = self.plugin_config.user_group_config.search_base_dns
-                obj_cls = self.plugin_config.user_group_config.object_class
-                groups = [g for dn in base_dns for g in ldap_client.fetch_all_objects(dn, obj_cls)]
+            base_dns = self.plugin_config.user_group_config.search_base_dns
+            obj_cls = self.plugin_config.user_group_config.object_class
+            groups = list(self._iter_objects(base_dns, obj_cls))
 
-                self.logger.info(f"fetch {len(groups)} groups from ldap server")
+            self.logger.info(f"fetch {len(groups)} groups from ldap server")
 
             # 提前存用户 - 用户组映射表，而不是后续依赖用户的 memberOf 属性
             # memberOf 属性需要特殊配置，ldap server 不一定会提供
@@ -107,14 +129,31 @@ class LDAPDataSourcePlugin(BaseDataSourcePlugin):
             self.logger.warning("dept cache not found, this will cause user not dept infos")
 
         cfg = self.plugin_config.data_config
-        with LDAPClient(self.plugin_config.server_config, cfg.uuid_attribute) as ldap_client:
-            users = [
-                u for dn in cfg.user_search_base_dns for u in ldap_client.fetch_all_objects(dn, cfg.user_object_class)
-            ]
-            self.logger.info(f"fetch {len(users)} users from ldap server")
+        tracking_attr = self._get_change_tracking_attribute()
+        # 增量拉取：只拉取变更追踪属性值不小于上次高水位的用户
+        changed_since = self.start_cursor.get(self.user_cursor_key, "")
+
+        # Q：为什么高水位要在查询前获取，而不是取拉取到的用户中变更追踪属性的最大值？
+        # A：分页查询期间，已返回的用户可能再次变更，而后续页中其他用户的变更追踪属性值可能更大，
+        #  以其作为高水位会导致前者的变更在下次增量拉取时被遗漏，而查询前的高水位必定不大于查询期间的任何变更
+        change_mark = self._fetch_current_change_mark() if tracking_attr else ""
+
+        # 生成的原始用户数据，不含部门，leader 信息（边拉取边转换，不保留 LDAP 原始数据）
+        raw_users: List[RawDataSourceUser] = []
+        for u in self._iter_objects(cfg.user_search_base_dns, cfg.user_object_class, changed_since):
+            # 变更追踪属性只用于增量拉取的查询条件，不作为用户属性
+            if tracking_attr:
+                u.attrs.pop(tracking_attr, None)
+
+            raw_users.append(self._gen_raw_user(u, cfg.uuid_attribute))
+
+        if changed_since:
+            self.logger.info(f"fetch {len(raw_users)} users changed since {changed_since} from ldap server")
+        else:
+            self.logger.info(f"fetch {len(raw_users)} users from ldap server")
 
-        # 生成的原始用户数据，不含部门，leader 信息
-        raw_users = [self._gen_raw_user(u, cfg.uuid_attribute) for u in users]
+        if tracking_attr:
+            self._update_delta_cursor(change_mark)
 
         # 检查是否有配置不当 / 数据源异常导致有 Code 重复的情况
         self._validate_duplicate_codes(raw_users)
@@ -127,6 +166,41 @@ class LDAPDataSourcePlugin(BaseDataSourcePlugin):
 
         return raw_users
 
+    def set_delta_cursor(self, cursor: Dict[str, str]) -> None:
+        """设置增量拉取的起始游标，若游标不可用或已到全量对账时间，则仍全量拉取"""
+        cfg = self.plugin_config.incremental_sync_config
+        if not cfg.enabled:
+            return
+
+        # 游标中的变更追踪属性需与当前配置一致（配置变更后，原有的游标不再可用）
+        if (
+            not cursor.get(self.user_cursor_key)
+            or cursor.get(self.attribute_cursor_key) != cfg.change_tracking_attribute
+        ):
+            self.logger.warning(f"delta cursor {cursor} is unavailable, fallback to fetch all data")
+            return
+
+        # 增量拉取无法感知对象的删除，因此需要定期全量拉取以对账
+        try:
+            full_synced_at = datetime.datetime.fromisoformat(cursor.get(self.full_synced_at_cursor_key, ""))
+        except ValueError:
+            self.logger.warning(f"delta cursor {cursor} without valid full synced time, fallback to fetch all data")
+            return
+
+        if timezone.now() - full_synced_at >= datetime.timedelta(hours=cfg.full_sync_interval_hours):
+            self.logger.info(f"last full sync at {full_synced_at}, fetch all data for reconciliation")
+            return
+
+        self.start_cursor = cursor
+        self.delta_result.is_delta = True
+
+    def get_delta_result(self) -> DeltaFetchResult | None:
+        """获取增量拉取结果"""
+        if not self.plugin_config.incremental_sync_config.enabled:
+            return None
+
+        return self.delta_result
+
     def test_connection(self) -> TestConnectionResult:
         """连通性测试"""
         cfg = self.plugin_config.data_config
@@ -195,6 +269,10 @@ class LDAPDataSourcePlugin(BaseDataSourcePlugin):
 
         # 用户 DN -> Code 映射表
         user_dn_code_map = {u.properties["dn"]: u.code for u in raw_users}
+        # 增量拉取时，变更过的用户的 leader 未必也变更过（不在本次拉取的用户中），需要根据 DN 单独查询
+        if self.delta_result.is_delta:
+            leader_dns = {dn for u in raw_users for dn in u.properties.get(leader_field, "").split(" ") if dn}
+            user_dn_code_map.update(self._fetch_user_dn_code_map(leader_dns - user_dn_code_map.keys()))
 
         for u in raw_users:
             user_dn = u.properties["dn"]
@@ -204,6 +282,101 @@ class LDAPDataSourcePlugin(BaseDataSourcePlugin):
                 else:
                     self.logger.warning(f"user `{user_dn}` leader dn `{leader_dn}` code not found, skip...")
 
+    def _fetch_user_dn_code_map(self, dns: Set[str]) -> Dict[str, str]:
+        """根据 DN 查询用户（需在用户 Base DN 下），获取 DN -> Code 映射表"""
+        cfg = self.plugin_config.data_config
+        dns = {dn for dn in dns if any(dn.endswith(base_dn) for base_dn in cfg.user_search_base_dns)}
+        if not dns:
+            return {}
+
+        user_dn_code_map: Dict[str, str] = {}
+        with LDAPClient(self.plugin_config.server_config, cfg.uuid_attribute) as ldap_client:
+            for dn in dns:
+                if obj := ldap_client.fetch_object(dn, cfg.user_object_class):
+                    user_dn_code_map[dn] = obj.attrs[cfg.uuid_attribute]
+
+        self.logger.info(f"fetch {len(user_dn_code_map)} unchanged leaders from ldap server")
+        return user_dn_code_map
+
+    def _get_change_tracking_attribute(self) -> str:
+        """获取变更追踪属性，未启用增量同步时为空字符串"""
+        cfg = self.plugin_config.incremental_sync_config
+        return cfg.change_tracking_attribute if cfg.enabled else ""
+
+    def _iter_objects(self, base_dns: List[str], object_class: str, changed_since: str = "") -> Iterator[LDAPObject]:
+        """依次查询各个搜索根目录下的对象，若配置了并发数，则会使用多个连接同时查询多个搜索根目录"""
+        max_workers = min(self.plugin_config.server_config.max_concurrency, len(base_dns))
+        if max_workers <= 1:
+            return self._search_objects(base_dns, object_class, changed_since)
+
+        # 每个搜索根目录使用独立的连接（在后台线程中查询），返回的对象仍按搜索根目录的顺序排列
+        searches = [self._search_objects([dn], object_class, changed_since) for dn in base_dns]
+        return concurrent_chain(searches, max_workers, self.concurrent_search_prefetch_size)
+
+    def _search_objects(self, base_dns: List[str], object_class: str, changed_since: str) -> Iterator[LDAPObject]:
+        """使用同一个连接，依次查询各个搜索根目录下的对象"""
+        cfg = self.plugin_config.data_config
+        tracking_attr = self._get_change_tracking_attribute()
+        with LDAPClient(self.plugin_config.server_config, cfg.uuid_attribute, tracking_attr) as ldap_client:
+            for dn in base_dns:
+                yield from ldap_client.iter_objects(dn, object_class, changed_since)
+
+    def _fetch_current_change_mark(self) -> str:
+        """在查询用户前，获取 LDAP 服务器当前的变更追踪属性高水位，获取失败时返回空字符串"""
+        tracking_attr = self._get_change_tracking_attribute()
+        try:
+            with LDAPClient(self.plugin_config.server_config, self.plugin_config.data_config.uuid_attribute) as client:
+                # Active Directory 中，highestCommittedUSN 为服务器已提交的最大 USN
+                if tracking_attr == ChangeTrackingAttribute.USN_CHANGED:
+                    return self._gen_change_mark(client.fetch_root_dse_attribute("highestCommittedUSN"))
+
+                server_time = client.fetch_root_dse_attribute("currentTime")
+        except Exception:
+            logger.exception("failed to fetch current change mark from ldap server")
+            self.logger.warning("failed to fetch current change mark from ldap server, delta cursor will not advance")
+            return ""
+
+        # 部分服务器（如 OpenLDAP）不提供当前时间，使用本地时间（减去时钟偏差，宁可重复拉取也不能遗漏）
+        if server_time is None:
+            server_time = timezone.now() - self.clock_skew_tolerance
+
+        return self._gen_change_mark(server_time)
+
+    def _update_delta_cursor(self, change_mark: str):
+        """根据查询前获取的变更追踪属性高水位，更新游标；高水位获取失败时，沿用原有的游标"""
+        change_mark = change_mark or self.start_cursor.get(self.user_cursor_key, "")
+
+        cursor = {
+            self.attribute_cursor_key: self._get_change_tracking_attribute(),
+            # 增量拉取时，沿用上次全量拉取的时间，以便到期后进行全量对账
+            self.full_synced_at_cursor_key: (
+                self.start_cursor[self.full_synced_at_cursor_key]
+                if self.delta_result.is_delta
+                else timezone.now().isoformat()
+            ),
+        }
+        # Q：为什么查询条件是 >= 而非 >（会重复拉取到上次的最后一批用户）？
+        # A：LDAP 查询条件不支持 >，且 modifyTimestamp 精度为秒，同一秒内可能还有其他变更，重复拉取的数据并不会被更新
+        if change_mark:
+            cursor[self.user_cursor_key] = change_mark
+
+        self.delta_result.cursor = cursor
+
+    @staticmethod
+    def _gen_change_mark(value: Any) -> str:
+        """将变更追踪属性值转换成可用于查询条件的字符串"""
+        if isinstance(value, list):
+            value = value[0] if value else None
+
+        if value is None:
+            return ""
+
+        # modifyTimestamp 会被 ldap3 解析为 datetime，需转换回 GeneralizedTime 格式，如：20240101120000Z
+        if isinstance(value, datetime.datetime):
+            return value.astimezone(datetime.timezone.utc).strftime("%Y%m%d%H%M%SZ")
+
+        return str(value)
+
     @staticmethod
     def _gen_raw_dept(obj: LDAPObject, uuid_attribute: str) -> RawDataSourceDepartment:
         """生成部门信息"""
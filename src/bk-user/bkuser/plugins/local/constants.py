@@ -47,6 +47,14 @@ MAX_RESERVED_PREVIOUS_PASSWORD_COUNT = 5
 USERNAME_REGEX = re.compile(r"^[a-zA-Z0-9][a-zA-Z0-9._-]{0,30}[a-zA-Z0-9]$")
 
 
+class LocalDataSourceImportFileFormat(StrStructuredEnum):
+    """本地数据源导入文件格式"""
+
+    XLSX = EnumField("xlsx", label="Excel")
+    CSV = EnumField("csv", label="CSV")
+    JSONL = EnumField("jsonl", label="JSON Lines")
+
+
 class PasswordGenerateMethod(StrStructuredEnum):
     """密码生成方式"""
 
@@ -21,6 +21,10 @@ class LocalDataSourcePluginError(BaseDataSourcePluginError):
     """本地数据源插件基础异常"""
 
 
+class FileContentInvalid(LocalDataSourcePluginError):
+    """待导入文件内容格式不合法"""
+
+
 class UserSheetNotExists(LocalDataSourcePluginError):
     """待导入文件中不存在用户表"""
 
@@ -17,8 +17,12 @@
 
 # ignore custom logger must use %s string format in this file
 # ruff: noqa: G004
+import csv
+import io
+import itertools
+import json
 from collections import Counter
-from typing import List
+from typing import IO, Any, Dict, Iterator, List, Sequence, Set, Tuple
 
 import phonenumbers
 from django.conf import settings
@@ -31,6 +35,7 @@ from bkuser.plugins.local.exceptions import (
     CustomColumnNameInvalid,
     DuplicateColumnName,
     DuplicateUsername,
+    FileContentInvalid,
     InvalidLeader,
     InvalidOrganization,
     InvalidUsername,
@@ -42,19 +47,8 @@ from bkuser.plugins.local.utils import gen_dept_code
 from bkuser.plugins.models import RawDataSourceDepartment, RawDataSourceUser
 
 
-class LocalDataSourceDataParser:
-    """本地数据源数据解析器"""
-
-    # 用户表名称
-    user_sheet_name = "users"
-    # 第一行是填写必读，第二行才是列名（1-based）
-    col_name_row_idx = 2
-    # 第三行开始，才是用户数据（1-based)
-    user_data_min_row_idx = 3
-    # 用户名索引（0-based）
-    username_idx_in_row = 0
-    # 组织列索引（0-based）
-    organization_idx_in_row = 4
+class BaseLocalDataSourceDataParser:
+    """本地数据源数据解析器基类，子类需实现表头（列名）& 数据行的读取"""
 
     # 内建字段列名
     builtin_col_names = [
@@ -68,7 +62,7 @@ class LocalDataSourceDataParser:
     # 内建字段列长度
     builtin_col_length = len(builtin_col_names)
 
-    # NOTE 下列字段在加载到 workbook 后填充
+    # NOTE 下列字段在读取到表头后填充
     # 自定义字段列名
     custom_col_names: List[str] = []
     # 完整的字段列名 = 内建字段列名 + 自定义字段列名
@@ -86,18 +80,26 @@ class LocalDataSourceDataParser:
     ]
     # TODO: 后续支持根据字段设置的必填情况，调整必填字段
 
-    def __init__(self, logger: PluginLogger, workbook: Workbook):
+    # 每解析多少行数据，记录一次进度日志
+    progress_log_interval = 100000
+
+    def __init__(self, logger: PluginLogger):
         self.logger = logger
-        self.workbook = workbook
         self.departments: List[RawDataSourceDepartment] = []
         self.users: List[RawDataSourceUser] = []
         self.is_parsed = False
+        # 手机号解析缓存 {原始手机号: (手机号, 国际区号)}，同一表格中，国际区号 & 号码格式往往大量重复
+        self._phone_cache: Dict[str, Tuple[str, str]] = {}
 
     def parse(self):
-        """预解析部门 & 用户数据"""
-        self._validate_and_prepare()
-        self._parse_departments()
-        self._parse_users()
+        """预解析部门 & 用户数据
+
+        Q: 为什么是单次遍历？
+        A: 数据行以流式的方式读取（如只读模式加载的 Workbook，CSV 文件流等），多次遍历需要重新解压 & 解析文件，
+        且不会在内存中保留完整的原始数据，因此在一次遍历中同时完成数据校验，部门收集 & 用户构建
+        """
+        self._validate_columns(self._read_col_names())
+        self._parse_rows()
         self.is_parsed = True
 
     def get_departments(self) -> List[RawDataSourceDepartment]:
@@ -106,23 +108,16 @@ class LocalDataSourceDataParser:
     def get_users(self) -> List[RawDataSourceUser]:
         return self.users
 
-    def _validate_and_prepare(self):
-        """检查表格格式，确保后续可正常解析"""
-        self._validate_sheet()
-        self._validate_columns()
-        self._validate_users()
+    def _read_col_names(self) -> List[Any]:
+        """读取表头（列名）"""
+        raise NotImplementedError
 
-    def _validate_sheet(self):
-        # 确保用户表确实存在
-        if self.user_sheet_name not in self.workbook.sheetnames:
-            raise UserSheetNotExists(_("待导入文件中不存在用户表"))
-
-        self.sheet = self.workbook[self.user_sheet_name]
+    def _iter_rows(self) -> Iterator[Tuple[int, Sequence[Any]]]:
+        """读取数据行，返回 (行号, 有效列的值)，行号仅用于日志"""
+        raise NotImplementedError
 
-    def _validate_columns(self):
-        # 1. 检查表头是否正确
-        sheet_col_names = [cell.value for cell in self.sheet[self.col_name_row_idx]]
-        # 前 N 个是内建字段，必须存在
+    def _validate_columns(self, sheet_col_names: List[Any]):
+        # 1. 检查表头是否正确，前 N 个是内建字段，必须存在
         builtin_col_length = len(self.builtin_col_names)
         if sheet_col_names[:builtin_col_length] != self.builtin_col_names:
             raise SheetColumnsNotMatch(_("待导入文件中用户表格式异常"))
@@ -131,7 +126,7 @@ class LocalDataSourceDataParser:
         self.custom_col_names = sheet_col_names[builtin_col_length:]
         self.all_col_names = self.builtin_col_names + self.custom_col_names
         self.valid_col_length = len(self.all_col_names)
-        self.logger.info(f"all column names parsed from workbook: {self.all_col_names}")
+        self.logger.info(f"all column names parsed from file: {self.all_col_names}")
 
         # 2. 检查自定义字段是否符合格式，格式：display_name/field_name
         for col_name in self.custom_col_names:
@@ -144,44 +139,31 @@ class LocalDataSourceDataParser:
 
         # 获取所有的字段名
         self.all_field_names = [n.split("/")[-1] for n in self.all_col_names]
-        self.logger.info(f"all field names parsed from workbook: {self.all_field_names}")
+        self.logger.info(f"all field names parsed from file: {self.all_field_names}")
 
         # 3. 检查是否有重复列
         if duplicate_col_names := [n for n, cnt in Counter(sheet_col_names).items() if cnt > 1]:
             raise DuplicateColumnName(_("待导入文件中存在重复列名：{}").format(", ".join(duplicate_col_names)))
 
-    def _validate_users(self):
+    def _parse_rows(self):
+        """遍历用户表数据行，校验数据 & 收集组织路径 & 构建用户"""
         all_usernames = []
-        for idx, cell_values in enumerate(
-            self.sheet.iter_rows(min_row=self.user_data_min_row_idx, max_col=self.valid_col_length, values_only=True),
-            start=self.user_data_min_row_idx,
-        ):
+        organizations: Set[str] = set()
+        for idx, cell_values in self._iter_rows():
             if not any(cell_values):
-                self.logger.warning(f"empty row found at line {idx} in sheet, skip...")
+                self.logger.warning(f"empty row found at line {idx} in file, skip...")
                 continue
 
-            info = dict(zip(self.all_field_names, cell_values, strict=True))
-            # 1. 检查所有必填字段是否有值（注：自定义字段必填在后续的流程中检查）
-            for field_name in self.required_field_names:
-                if not info.get(field_name):
-                    raise RequiredFieldIsEmpty(_("待导入文件中必填字段 {} 存在空值").format(field_name))
-
-            username = info["username"]
-            # 2. 检查用户名是否合法
-            if not USERNAME_REGEX.fullmatch(username):
-                raise InvalidUsername(
-                    _(
-                        "用户名 {} 不符合命名规范：由 2-32 位字母、数字、下划线 (_)、点 (.)、连接符 (-) 字符组成，以字母或数字开头及结尾",  # noqa: E501
-                    ).format(username)
-                )
-
-            # 3. 检查用户不能是自己的 leader
-            if (leaders := info.get("leaders")) and username in [ld.strip() for ld in leaders.split(",")]:
-                raise InvalidLeader(_("待导入文件中用户 {} 不能是自己的直接上级").format(username))
+            properties = dict(zip(self.all_field_names, cell_values, strict=True))
+            self._validate_user(properties)
+            all_usernames.append(properties["username"].lower())
 
-            all_usernames.append(username.lower())
+            organizations.update(self._parse_organizations(properties["username"], properties["organizations"]))
+            self.users.append(self._build_user(properties))
+            if len(self.users) % self.progress_log_interval == 0:
+                self.logger.info(f"{len(self.users)} users parsed from file...")
 
-        # 4. 检查用户名是否有重复的（以大小写不敏感的方式检查）
+        # 检查用户名是否有重复的（以大小写不敏感的方式检查）
         if duplicate_usernames := [n for n, cnt in Counter(all_usernames).items() if cnt > 1]:
             raise DuplicateUsername(
                 _(
@@ -189,34 +171,52 @@ class LocalDataSourceDataParser:
                 ).format(", ".join(duplicate_usernames))
             )
 
-    def _parse_departments(self):
-        organizations = set()
-        for cell_values in self.sheet.iter_rows(
-            min_row=self.user_data_min_row_idx, max_col=self.valid_col_length, values_only=True
-        ):
-            if not any(cell_values):
-                continue
+        self._build_departments(organizations)
 
-            username, user_orgs = cell_values[self.username_idx_in_row], cell_values[self.organization_idx_in_row]
-            if not user_orgs:
-                self.logger.info(f"username {username} not provide organization, skip...")
-                continue
+    def _validate_user(self, info: Dict[str, Any]):
+        # 1. 检查所有必填字段是否有值（注：自定义字段必填在后续的流程中检查）
+        for field_name in self.required_field_names:
+            if not info.get(field_name):
+                raise RequiredFieldIsEmpty(_("待导入文件中必填字段 {} 存在空值").format(field_name))
 
-            for org in user_orgs.split(","):
-                cur_org = org.strip()
-                if not all(cur_org.split("/")):
-                    raise InvalidOrganization(
-                        _(
-                            "用户 {} 组织路径 {} 不合法：不得以 / 开头或结尾或存在连续的 / 字符",
-                        ).format(username, cur_org)
-                    )
-
-                organizations.add(cur_org)
-                # 所有的父部门都要被添加进来
-                while "/" in cur_org:
-                    cur_org, __, __ = cur_org.rpartition("/")
-                    organizations.add(cur_org.strip())
+        username = info["username"]
+        # 2. 检查用户名是否合法
+        if not USERNAME_REGEX.fullmatch(username):
+            raise InvalidUsername(
+                _(
+                    "用户名 {} 不符合命名规范：由 2-32 位字母、数字、下划线 (_)、点 (.)、连接符 (-) 字符组成，以字母或数字开头及结尾",  # noqa: E501
+                ).format(username)
+            )
+
+        # 3. 检查用户不能是自己的 leader
+        if (leaders := info.get("leaders")) and username in [ld.strip() for ld in leaders.split(",")]:
+            raise InvalidLeader(_("待导入文件中用户 {} 不能是自己的直接上级").format(username))
+
+    def _parse_organizations(self, username: str, user_orgs: str | None) -> Set[str]:
+        """解析用户的组织路径，返回组织路径及其所有的父路径"""
+        organizations: Set[str] = set()
+        if not user_orgs:
+            self.logger.info(f"username {username} not provide organization, skip...")
+            return organizations
+
+        for org in user_orgs.split(","):
+            cur_org = org.strip()
+            if not all(cur_org.split("/")):
+                raise InvalidOrganization(
+                    _(
+                        "用户 {} 组织路径 {} 不合法：不得以 / 开头或结尾或存在连续的 / 字符",
+                    ).format(username, cur_org)
+                )
+
+            organizations.add(cur_org)
+            # 所有的父部门都要被添加进来
+            while "/" in cur_org:
+                cur_org, __, __ = cur_org.rpartition("/")
+                organizations.add(cur_org.strip())
 
+        return organizations
+
+    def _build_departments(self, organizations: Set[str]):
         # 组织路径：本数据源部门 Code 映射表
         org_code_map = {org: gen_dept_code(org) for org in organizations}
         for org in organizations:
@@ -231,45 +231,160 @@ class LocalDataSourceDataParser:
                 )
             )
 
-    def _parse_users(self):
-        for cell_values in self.sheet.iter_rows(
-            min_row=self.user_data_min_row_idx, max_col=self.valid_col_length, values_only=True
-        ):
-            if not any(cell_values):
-                continue
+    def _build_user(self, properties: Dict[str, Any]) -> RawDataSourceUser:
+        departments, leaders = [], []
+        if organizations := properties.pop("organizations"):
+            departments = [gen_dept_code(org.strip()) for org in organizations.split(",") if org.strip()]
 
-            properties = dict(zip(self.all_field_names, cell_values, strict=True))
+        if leader_names := properties.pop("leaders"):
+            # xlsx 中填写的是 leader 的 username，但在本地数据源中，username 就是 code
+            leaders = [ld.strip() for ld in leader_names.split(",") if ld.strip()]
 
-            departments, leaders = [], []
-            if organizations := properties.pop("organizations"):
-                departments = [gen_dept_code(org.strip()) for org in organizations.split(",") if org.strip()]
-
-            if leader_names := properties.pop("leaders"):
-                # xlsx 中填写的是 leader 的 username，但在本地数据源中，username 就是 code
-                leaders = [ld.strip() for ld in leader_names.split(",") if ld.strip()]
-
-            phone_number = properties.pop("phone_number")
-            # 如果手机号为空，设置为空字符串
-            if not phone_number:
-                phone, country_code = "", ""
-            else:
-                phone_number = str(phone_number)
-                # 默认认为是不带国际代码的
-                phone, country_code = phone_number, settings.DEFAULT_PHONE_COUNTRY_CODE
-                if phone_number.startswith("+"):
-                    ret = phonenumbers.parse(phone_number)
-                    phone, country_code = str(ret.national_number), str(ret.country_code)
-
-            properties.update({"phone": phone, "phone_country_code": country_code})
-
-            # 格式化，将所有非 None 字段都转成 str 类型
-            properties = {k: str(v) for k, v in properties.items() if v is not None}
-            self.users.append(
-                RawDataSourceUser(
-                    # 本地数据源用户，code 就是 原始 username
-                    code=properties["username"],
-                    properties=properties,
-                    leaders=leaders,
-                    departments=departments,
-                )
+        phone, country_code = self._parse_phone_number(properties.pop("phone_number"))
+        properties.update({"phone": phone, "phone_country_code": country_code})
+
+        # 格式化，将所有非 None 字段都转成 str 类型
+        properties = {k: str(v) for k, v in properties.items() if v is not None}
+        # 本地数据源用户，code 就是 原始 username
+        return RawDataSourceUser(
+            code=properties["username"],
+            properties=properties,
+            leaders=leaders,
+            departments=departments,
+        )
+
+    def _parse_phone_number(self, phone_number: Any) -> Tuple[str, str]:
+        """解析手机号，返回 (手机号, 国际区号)"""
+        # 如果手机号为空，设置为空字符串
+        if not phone_number:
+            return "", ""
+
+        phone_number = str(phone_number)
+        if phone_number in self._phone_cache:
+            return self._phone_cache[phone_number]
+
+        # 默认认为是不带国际代码的
+        phone, country_code = phone_number, settings.DEFAULT_PHONE_COUNTRY_CODE
+        if phone_number.startswith("+"):
+            ret = phonenumbers.parse(phone_number)
+            phone, country_code = str(ret.national_number), str(ret.country_code)
+
+        self._phone_cache[phone_number] = (phone, country_code)
+        return phone, country_code
+
+
+class LocalDataSourceDataParser(BaseLocalDataSourceDataParser):
+    """本地数据源数据解析器（Excel）"""
+
+    # 用户表名称
+    user_sheet_name = "users"
+    # 第一行是填写必读，第二行才是列名（1-based）
+    col_name_row_idx = 2
+    # 第三行开始，才是用户数据（1-based)
+    user_data_min_row_idx = 3
+
+    def __init__(self, logger: PluginLogger, workbook: Workbook):
+        super().__init__(logger)
+        self.workbook = workbook
+
+    def _read_col_names(self) -> List[Any]:
+        self._validate_sheet()
+        # 只读模式的 Worksheet 不支持按行索引，因此通过 iter_rows 获取表头
+        return list(
+            next(
+                self.sheet.iter_rows(min_row=self.col_name_row_idx, max_row=self.col_name_row_idx, values_only=True),
+                (),
             )
+        )
+
+    def _iter_rows(self) -> Iterator[Tuple[int, Sequence[Any]]]:
+        yield from enumerate(
+            self.sheet.iter_rows(min_row=self.user_data_min_row_idx, max_col=self.valid_col_length, values_only=True),
+            start=self.user_data_min_row_idx,
+        )
+
+    def _validate_sheet(self):
+        # 确保用户表确实存在
+        if self.user_sheet_name not in self.workbook.sheetnames:
+            raise UserSheetNotExists(_("待导入文件中不存在用户表"))
+
+        self.sheet = self.workbook[self.user_sheet_name]
+
+
+class LocalDataSourceCSVDataParser(BaseLocalDataSourceDataParser):
+    """本地数据源数据解析器（CSV），文件需为 UTF-8 编码，首行为列名（与 Excel 模板列名一致），其余行为用户数据"""
+
+    def __init__(self, logger: PluginLogger, file: IO[bytes]):
+        super().__init__(logger)
+        # utf-8-sig 可兼容 Excel 等工具导出 CSV 时添加的 BOM 头
+        self.reader = csv.reader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+
+    def _read_col_names(self) -> List[Any]:
+        try:
+            return [col_name.strip() for col_name in next(self.reader, [])]
+        except (UnicodeDecodeError, csv.Error):
+            raise FileContentInvalid(_("文件格式异常"))
+
+    def _iter_rows(self) -> Iterator[Tuple[int, Sequence[Any]]]:
+        try:
+            # 第一行是列名，第二行开始才是用户数据（1-based）
+            for idx, row in enumerate(self.reader, start=2):
+                yield idx, _normalize_values(row, self.valid_col_length)
+        except (UnicodeDecodeError, csv.Error):
+            raise FileContentInvalid(_("文件格式异常"))
+
+
+class LocalDataSourceJSONLinesDataParser(BaseLocalDataSourceDataParser):
+    """
+    本地数据源数据解析器（JSON Lines），文件需为 UTF-8 编码，每行为一个用户，键为列名（与 Excel 模板列名一致），
+    值为空的列可以省略，但自定义字段列需要在首个用户记录中出现
+    """
+
+    def __init__(self, logger: PluginLogger, file: IO[bytes]):
+        super().__init__(logger)
+        self.lines = io.TextIOWrapper(file, encoding="utf-8-sig")
+        self.records = self._iter_records()
+        # 首个用户记录，需要用于获取列名，因此先行读取
+        self.first_record: Tuple[int, Dict[str, Any]] | None = None
+
+    def _iter_records(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        try:
+            for idx, line in enumerate(self.lines, start=1):
+                if not line.strip():
+                    continue
+
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise FileContentInvalid(_("文件格式异常"))
+
+                yield idx, record
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise FileContentInvalid(_("文件格式异常"))
+
+    def _read_col_names(self) -> List[Any]:
+        # 内建字段列允许缺省（值为空），自定义字段列以首个用户记录为准
+        self.first_record = next(self.records, None)
+        if not self.first_record:
+            return []
+
+        return self.builtin_col_names + [k for k in self.first_record[1] if k not in self.builtin_col_names]
+
+    def _iter_rows(self) -> Iterator[Tuple[int, Sequence[Any]]]:
+        records = itertools.chain([self.first_record], self.records) if self.first_record else self.records
+        for idx, record in records:
+            # 每个用户记录中的键都必须是有效的列名，不允许出现未知列
+            if not record.keys() <= set(self.all_col_names):
+                raise SheetColumnsNotMatch(_("待导入文件中用户表格式异常"))
+
+            values = [record.get(col_name) for col_name in self.all_col_names]
+            # 与表格一致，仅支持标量值（多个组织 / 上级通过 , 分隔）
+            if any(isinstance(v, (dict, list)) for v in values):
+                raise FileContentInvalid(_("文件格式异常"))
+
+            yield idx, _normalize_values(values, self.valid_col_length)
+
+
+def _normalize_values(values: Sequence[Any], length: int) -> Tuple[Any, ...]:
+    """将数据行规整为与 Excel 单元格值一致的格式：长度与有效列数一致，空字符串视为空值（None）"""
+    normalized = [None if v == "" else v for v in values[:length]]
+    return tuple(normalized + [None] * (length - len(normalized)))
@@ -14,15 +14,22 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
-from typing import List
+import io
+from typing import IO, List
 
 from django.utils.translation import gettext_lazy as _
 from openpyxl.workbook import Workbook
 
 from bkuser.plugins.base import BaseDataSourcePlugin, PluginLogger
 from bkuser.plugins.constants import DataSourcePluginEnum
+from bkuser.plugins.local.constants import LocalDataSourceImportFileFormat
 from bkuser.plugins.local.models import LocalDataSourcePluginConfig
-from bkuser.plugins.local.parser import LocalDataSourceDataParser
+from bkuser.plugins.local.parser import (
+    BaseLocalDataSourceDataParser,
+    LocalDataSourceCSVDataParser,
+    LocalDataSourceDataParser,
+    LocalDataSourceJSONLinesDataParser,
+)
 from bkuser.plugins.models import (
     RawDataSourceDepartment,
     RawDataSourceUser,
@@ -36,9 +43,44 @@ class LocalDataSourcePlugin(BaseDataSourcePlugin):
     id = DataSourcePluginEnum.LOCAL
     config_class = LocalDataSourcePluginConfig
 
-    def __init__(self, plugin_config: LocalDataSourcePluginConfig, logger: PluginLogger, workbook: Workbook):
+    def __init__(
+        self,
+        plugin_config: LocalDataSourcePluginConfig,
+        logger: PluginLogger,
+        workbook: Workbook | None = None,
+        raw_data: bytes | None = None,
+        file_format: str = LocalDataSourceImportFileFormat.XLSX,
+        file: IO[bytes] | None = None,
+    ):
+        """
+        :param workbook: 待导入的 Excel Workbook（file_format 为 xlsx 时必须提供）
+        :param raw_data: 待导入的原始文件内容（file_format 为 csv / jsonl 时，与 file 二选一）
+        :param file_format: 待导入文件格式
+        :param file: 待导入的原始文件（二进制流，如磁盘文件，可避免将文件内容全部读取到内存中）
+        """
         self.plugin_config = plugin_config
-        self.parser = LocalDataSourceDataParser(logger, workbook)
+        self.parser: BaseLocalDataSourceDataParser
+
+        if file_format == LocalDataSourceImportFileFormat.XLSX:
+            if workbook is None:
+                raise ValueError("workbook is required when import file format is xlsx")
+
+            self.parser = LocalDataSourceDataParser(logger, workbook)
+        elif file_format in [LocalDataSourceImportFileFormat.CSV, LocalDataSourceImportFileFormat.JSONL]:
+            if file is None:
+                if raw_data is None:
+                    raise ValueError(f"file or raw_data is required when import file format is {file_format}")
+
+                file = io.BytesIO(raw_data)
+
+            parser_cls = (
+                LocalDataSourceCSVDataParser
+                if file_format == LocalDataSourceImportFileFormat.CSV
+                else LocalDataSourceJSONLinesDataParser
+            )
+            self.parser = parser_cls(logger, file)
+        else:
+            raise ValueError(f"unsupported import file format: {file_format}")
 
     def fetch_departments(self) -> List[RawDataSourceDepartment]:
         """获取部门信息"""
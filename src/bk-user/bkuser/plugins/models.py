@@ -14,7 +14,7 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
-from typing import Any, ClassVar, Dict, List
+from typing import Any, ClassVar, Dict, List, Set
 
 from pydantic import BaseModel
 
@@ -36,6 +36,11 @@ class BasePluginConfig(BaseModel):
     # 字段路径中不支持列表下标，只能是字典 key
     sensitive_fields: ClassVar[List[str]] = []
 
+    @property
+    def delta_fetch_enabled(self) -> bool:
+        """是否启用了增量拉取（插件支持基于游标，只拉取变更过的数据）"""
+        return False
+
 
 class RawDataSourceUser(BaseModel):
     """原始数据源用户信息"""
@@ -64,6 +69,19 @@ class RawDataSourceDepartment(BaseModel):
     extras: Dict[str, Any] = {}
 
 
+class DeltaFetchResult(BaseModel):
+    """增量拉取结果"""
+
+    # 本次拉取后的游标，下次增量拉取时使用，如 {"departments": "xxx", "users": "yyy"}
+    cursor: Dict[str, str] = {}
+    # 本次拉取的是否为增量数据（变更过的数据），否则为全量数据
+    is_delta: bool = False
+    # 数据源中已被删除的部门 code（墓碑）
+    deleted_department_codes: Set[str] = set()
+    # 数据源中已被删除的用户 code（墓碑）
+    deleted_user_codes: Set[str] = set()
+
+
 class TestConnectionResult(BaseModel):
     """连通性测试结果，包含示例数据"""
 
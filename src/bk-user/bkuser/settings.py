@@ -103,6 +103,7 @@ MIDDLEWARE = [
     "bkuser.auth.middlewares.LoginMiddleware",
     "bkuser.apis.open_web.middlewares.TenantIDHeaderMiddleware",
     "bkuser.apis.open_web.middlewares.OpenWebApiAuditMiddleware",
+    "bkuser.apis.web.middlewares.TenantDataVersionMiddleware",
     "bkuser.common.middlewares.TimeZoneMiddleware",
     "django_prometheus.middleware.PrometheusAfterMiddleware",
 ]
@@ -390,6 +391,22 @@ CACHES: Dict[str, Any] = {
             },
         },
     },
+    # 两级缓存：进程内 LRU 缓存 + Redis 缓存，数据变更时通过 Redis Pub/Sub 通知各进程删除本地缓存
+    # 注：Key 前缀，版本，默认过期时间等均使用 REDIS_CACHE 对应缓存的配置
+    "two_tier": {
+        "BACKEND": "bkuser.common.cache.TwoTierCache",
+        "LOCATION": "two_tier",
+        "OPTIONS": {
+            # 二级缓存（Redis）使用的缓存配置
+            "REDIS_CACHE": "redis",
+            # 进程内缓存的 key 最多数量（超过时按 LRU 淘汰）
+            "LOCAL_MAX_ENTRIES": env.int("TWO_TIER_CACHE_LOCAL_MAX_ENTRIES", 1000),
+            # 进程内缓存的最长过期时间（秒），即使失效通知丢失，进程间数据不一致的时间也不会超过该值
+            "LOCAL_TIMEOUT": env.int("TWO_TIER_CACHE_LOCAL_TIMEOUT", 60),
+            # 缓存失效通知的 Pub/Sub 频道
+            "CHANNEL": "bkuser:cache_invalidation",
+        },
+    },
 }
 
 # 当 Redis Cache 使用 IGNORE_EXCEPTIONS 时，设置指定的 logger 输出异常
@@ -704,6 +721,13 @@ HEALTHZ_PROBES = env.list(
 # 调用 Metric API 需要的 Token
 METRIC_TOKEN = env.str("METRIC_TOKEN", "")
 
+# celery worker 指标暴露端口（同步任务等指标只在 worker 进程中采集，web 进程的 Metric API 无法获取），为 0 则不启用
+# 注：该端口没有鉴权，只应在集群内暴露；worker 为 prefork 模式时，还需要设置环境变量 PROMETHEUS_MULTIPROC_DIR
+CELERY_WORKER_METRICS_PORT = env.int("CELERY_WORKER_METRICS_PORT", 0)
+
+if CELERY_WORKER_METRICS_PORT:
+    INSTALLED_APPS += ("bkuser.monitoring.metrics",)
+
 # ------------------------------------------ Tracing 配置 ------------------------------------------
 
 # Sentry DSN 配置
@@ -855,8 +879,12 @@ EXPORT_ORG_TEMPLATE = MEDIA_ROOT / "excel/export_org_tmpl.xlsx"
 
 # 数据源同步默认超时时间（秒）
 DATA_SOURCE_SYNC_DEFAULT_TIMEOUT = env.int("DATA_SOURCE_SYNC_DEFAULT_TIMEOUT", 60 * 60)
+# 数据源定时同步是否分块提交（每个分块独立事务提交，同步失败后下次同步会从检查点恢复）
+DATA_SOURCE_SYNC_CHUNKED_COMMIT = env.bool("DATA_SOURCE_SYNC_CHUNKED_COMMIT", False)
 # 租户同步默认超时时间（秒）
 TENANT_SYNC_DEFAULT_TIMEOUT = env.int("TENANT_SYNC_DEFAULT_TIMEOUT", 15 * 60)
+# 租户全量同步（对账）间隔（秒），租户增量同步时，若距离上次全量同步超过该间隔，则会执行全量同步
+TENANT_SYNC_FULL_RECONCILE_INTERVAL = env.int("TENANT_SYNC_FULL_RECONCILE_INTERVAL", 24 * 60 * 60)
 
 # 限制组织架构页面用户/部门搜索 API 返回的最大条数
 # 由于需要计算组织路径导致性能不佳，建议不要太高，而是让用户细化搜索条件
@@ -870,7 +898,7 @@ BATCH_QUERY_USER_DISPLAY_INFO_BY_BK_USERNAME_LIMIT = env.int("BATCH_QUERY_USER_D
 # 限制人员选择器用户/部门搜索 API 返回的最大条数，避免性能问题
 SELECTOR_SEARCH_API_LIMIT = env.int("SELECTOR_SEARCH_API_LIMIT", 100)
 
-# Open API V2 ListUser 接口缓存过期时间，单位秒，默认 1 小时
+# Open API V2 ListUser 接口缓存过期时间，单位秒，默认 1 小时（缓存 Key 包含租户数据版本号，数据变更后缓存会自动失效）
 OPEN_API_V2_LIST_USER_CACHE_TIMEOUT = env.int("OPEN_API_V2_LIST_USER_CACHE_TIMEOUT", default=60 * 60)
 
 # 限制 OpenWeb API 调用频率，避免恶意请求问题
@@ -16,9 +16,10 @@
 # to the current version of the project delivered to anyone in the future.
 
 import json
-from typing import Any, Dict
+from typing import Any, Dict, Generator, List
 
 from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
 from django.forms import model_to_dict
 
 
@@ -29,3 +30,22 @@ def get_model_dict(obj) -> Dict[str, Any]:
     model_dict = model_to_dict(obj, fields=fields)
     # 使用 DjangoJSONEncoder 将字典转换为 JSON 字符串，然后再解析回字典
     return json.loads(json.dumps(model_dict, cls=DjangoJSONEncoder))
+
+
+def iter_chunks_by_pk(queryset: QuerySet, size: int) -> Generator[List[Any], None, None]:
+    """基于主键的 keyset 分页，分块获取查询集中的数据
+
+    相比 OFFSET 分页，每个分块的查询代价不随偏移量增长；且调用方在分块间删除 / 新增数据，不会导致后续分块遗漏数据
+    """
+    last_pk = None
+    while True:
+        qs = queryset.order_by("pk")
+        if last_pk is not None:
+            qs = qs.filter(pk__gt=last_pk)
+
+        objs = list(qs[:size])
+        if not objs:
+            return
+
+        yield objs
+        last_pk = objs[-1].pk
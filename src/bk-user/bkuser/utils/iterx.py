@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import threading
+from collections import deque
+from contextlib import contextmanager
+from itertools import chain, islice
+from queue import Full, Queue
+from typing import Any, Deque, Generator, Iterable, Iterator, List, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# 后台预取结束的标记
+_PREFETCH_END = object()
+
+
+def chunked(iterable: Iterable[T], size: int) -> Generator[List[T], None, None]:
+    """
+    将可迭代对象按指定大小切分成多个列表，最后一个列表的长度可能小于 size
+
+    >>> list(chunked([1, 2, 3, 4, 5], 2))
+    [[1, 2], [3, 4], [5]]
+
+    :param iterable: 可迭代对象（如列表，生成器等）
+    :param size: 单个分块的大小
+    :return: 分块列表生成器
+    """
+    if size <= 0:
+        raise ValueError("size must be greater than 0")
+
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class _Prefetcher:
+    """后台预取器：在后台线程中消费可迭代对象，并通过有界队列交给消费者"""
+
+    def __init__(self, iterable: Iterable[T], maxsize: int):
+        self.iterable = iterable
+        self.queue: Queue[Tuple[Any, BaseException | None]] = Queue(maxsize=maxsize)
+        self.stopped = threading.Event()
+        self.producer = threading.Thread(target=self._produce, name="iterx-prefetcher", daemon=True)
+
+    def start(self):
+        self.producer.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.producer.join()
+
+    def consume(self) -> Generator[Any, None, None]:
+        while True:
+            item, err = self.queue.get()
+            if item is _PREFETCH_END:
+                if err is not None:
+                    raise err
+
+                return
+
+            yield item
+
+    def _produce(self):
+        iterator = iter(self.iterable)
+        try:
+            for item in iterator:
+                if not self._put(item):
+                    return
+
+            self._put(_PREFETCH_END)
+        except Exception as e:
+            self._put(_PREFETCH_END, e)
+        finally:
+            if close := getattr(iterator, "close", None):
+                close()
+
+    def _put(self, item: Any, err: BaseException | None = None) -> bool:
+        # 队列满时需要定期检查是否已经停止，避免消费者提前退出导致线程一直阻塞
+        while not self.stopped.is_set():
+            try:
+                self.queue.put((item, err), timeout=0.1)
+            except Full:
+                continue
+
+            return True
+
+        return False
+
+
+@contextmanager
+def prefetched(iterable: Iterable[T], maxsize: int) -> Generator[Iterator[T], None, None]:
+    """
+    在后台线程中预先消费可迭代对象（最多缓存 maxsize 个元素），适用于 I/O 密集的数据获取与其他操作并行执行的场景，
+    后台线程中的异常会在消费到对应位置时重新抛出，退出上下文时后台线程会随之停止
+
+    >>> with prefetched(range(3), maxsize=2) as items:
+    ...     list(items)
+    [0, 1, 2]
+
+    :param iterable: 可迭代对象（注意：其迭代过程会在其他线程中执行）
+    :param maxsize: 最多缓存的元素数量
+    :return: 迭代器，按原有顺序返回元素
+    """
+    if maxsize <= 0:
+        raise ValueError("maxsize must be greater than 0")
+
+    prefetcher = _Prefetcher(iterable, maxsize)
+    prefetcher.start()
+    try:
+        yield prefetcher.consume()
+    finally:
+        prefetcher.stop()
+
+
+def concurrent_chain(iterables: Sequence[Iterable[T]], max_workers: int, maxsize: int) -> Generator[T, None, None]:
+    """
+    与 itertools.chain 一样，按顺序串联多个可迭代对象，不同的是：
+    至多 max_workers 个可迭代对象会在后台线程中被同时消费（每个最多预先缓存 maxsize 个元素），
+    适用于需要依次获取多份 I/O 密集数据（如多个 LDAP 搜索根目录）的场景
+
+    >>> list(concurrent_chain([range(2), range(3)], max_workers=2, maxsize=10))
+    [0, 1, 0, 1, 2]
+
+    :param iterables: 可迭代对象列表（注意：其迭代过程会在其他线程中执行，因此不可共享非线程安全的资源）
+    :param max_workers: 最多同时消费的可迭代对象数量
+    :param maxsize: 单个可迭代对象最多缓存的元素数量
+    :return: 生成器，按原有顺序返回元素
+    """
+    if max_workers <= 0 or maxsize <= 0:
+        raise ValueError("max_workers and maxsize must be greater than 0")
+
+    if max_workers == 1:
+        yield from chain.from_iterable(iterables)
+        return
+
+    pending = iter(iterables)
+    prefetchers: Deque[_Prefetcher] = deque()
+    try:
+        while True:
+            # 保持至多 max_workers 个可迭代对象在后台被消费
+            while len(prefetchers) < max_workers and (iterable := next(pending, None)) is not None:
+                prefetcher = _Prefetcher(iterable, maxsize)
+                prefetcher.start()
+                prefetchers.append(prefetcher)
+
+            if not prefetchers:
+                return
+
+            prefetcher = prefetchers.popleft()
+            try:
+                yield from prefetcher.consume()
+            finally:
+                prefetcher.stop()
+    finally:
+        for prefetcher in prefetchers:
+            prefetcher.stop()
@@ -19,9 +19,14 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from bkuser.common.cache import start_cache_invalidation_listeners
+
 # wsgi异常退出前打印异常信息
 faulthandler.enable()
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bkuser.settings")
 
 application = get_wsgi_application()
+
+# 在 web worker 进程启动时就开始订阅两级缓存的失效消息，而不是在首次读取缓存时
+start_cache_invalidation_listeners()
@@ -15,7 +15,8 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 import pytest
-from bkuser.apps.data_source.models import DataSourceUser
+from bkuser.apps.data_source.models import DataSourceDepartmentUserRelation, DataSourceUser
+from bkuser.apps.tenant.data_version import TenantDataVersion
 from bkuser.apps.tenant.models import TenantDepartment
 from django.urls import reverse
 from rest_framework import status
@@ -48,6 +49,40 @@ class TestListDeptProfileRelations:
         # 不分页模式下，没有 count, results 结构
         assert len(resp.data) == 26  # noqa: PLR2004
 
+    def test_no_page_with_data_version(self, api_client, default_tenant, local_data_source):
+        url = reverse("open_v2.list_department_profile_relations")
+        resp = api_client.get(url, data={"no_page": True})
+        assert len(resp.data) == 13  # noqa: PLR2004
+
+        DataSourceDepartmentUserRelation.objects.filter(id=resp.data[0]["id"]).delete()
+        # 数据版本号未变化，命中缓存
+        assert len(api_client.get(url, data={"no_page": True}).data) == 13  # noqa: PLR2004
+
+        # 数据版本号变化，缓存失效
+        TenantDataVersion.bump(default_tenant.id)
+        assert len(api_client.get(url, data={"no_page": True}).data) == 12  # noqa: PLR2004
+
+    def test_etag(self, api_client, default_tenant, local_data_source):
+        url = reverse("open_v2.list_department_profile_relations")
+        resp = api_client.get(url, data={"page": 1, "page_size": 10})
+        assert resp.status_code == status.HTTP_200_OK
+        etag = resp["ETag"]
+
+        # 数据未变更，返回 304
+        resp = api_client.get(url, data={"page": 1, "page_size": 10}, HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == status.HTTP_304_NOT_MODIFIED
+        assert resp["ETag"] == etag
+
+        # 查询参数不同，ETag 也不同
+        resp = api_client.get(url, data={"page": 2, "page_size": 10}, HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == status.HTTP_200_OK
+
+        # 数据变更后，ETag 失效
+        TenantDataVersion.bump(default_tenant.id)
+        resp = api_client.get(url, data={"page": 1, "page_size": 10}, HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp["ETag"] != etag
+
 
 class TestListProfileLeaderRelations:
     def test_standard(self, api_client, default_tenant, local_data_source):
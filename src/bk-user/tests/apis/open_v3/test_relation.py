@@ -15,8 +15,11 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 import pytest
+from bkuser.apps.tenant.data_version import TenantDataVersion
 from bkuser.apps.tenant.models import TenantDepartment, TenantUser
+from bkuser.apps.tenant.tasks import update_expired_tenant_user_status
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 
 pytestmark = pytest.mark.django_db
@@ -65,6 +68,31 @@ class TestTenantDepartmentRelationListApi:
         }
         assert {t["parent_id"] for t in resp.data["results"]} == {None, company.id, dept_a.id, center_aa.id}
 
+    def test_etag(self, api_client, random_tenant):
+        url = reverse("open_v3.tenant_department_relation.list")
+        etag = api_client.get(url)["ETag"]
+
+        resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == status.HTTP_304_NOT_MODIFIED
+
+        TenantDataVersion.bump(random_tenant.id)
+        resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp["ETag"] != etag
+
+    def test_etag_after_task_updated_data(self, api_client, random_tenant, django_capture_on_commit_callbacks):
+        url = reverse("open_v3.tenant_department_relation.list")
+        etag = api_client.get(url)["ETag"]
+
+        # 后台任务（非 Web API）批量更新租户数据后，ETag 也需要变化
+        TenantUser.objects.filter(tenant=random_tenant).update(account_expired_at=timezone.now())
+        with django_capture_on_commit_callbacks(execute=True):
+            update_expired_tenant_user_status()
+
+        resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp["ETag"] != etag
+
 
 @pytest.mark.usefixtures("_init_tenant_users_depts")
 class TestTenantUserLeaderRelationListApi:
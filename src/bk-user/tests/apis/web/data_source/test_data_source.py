@@ -550,7 +550,15 @@ class TestDataSourceSyncRecordApi:
     def test_retrieve(self, api_client, data_source_sync_tasks):
         success_task = data_source_sync_tasks[0]
         resp = api_client.get(reverse("data_source.sync_record.retrieve", kwargs={"id": success_task.id}))
-        assert set(resp.data.keys()) == {"id", "status", "has_warning", "start_at", "duration", "logs"}
+        assert set(resp.data.keys()) == {
+            "id",
+            "status",
+            "has_warning",
+            "start_at",
+            "duration",
+            "logs",
+            "log_page_count",
+        }
 
     def test_retrieve_other_tenant_data_source_sync_record(self, api_client, data_source_sync_tasks):
         other_tenant_task = data_source_sync_tasks[2]
@@ -578,3 +586,34 @@ class TestDataSourceImportApi:
             assert sync_task.status == SyncTaskStatus.SUCCESS
             assert DataSourceUser.objects.filter(data_source_id=data_source.id).exists()
             assert DataSourceDepartment.objects.filter(data_source_id=data_source.id).exists()
+
+    @pytest.mark.parametrize(
+        ("filename", "content_type"),
+        [("fake_users.csv", "text/csv"), ("fake_users.jsonl", "application/jsonl")],
+    )
+    def test_data_source_import_text_file_success(self, api_client, data_source, filename, content_type):
+        with override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True):
+            uploaded_file = SimpleUploadedFile(
+                name=filename,
+                content=(settings.BASE_DIR / "tests/assets" / filename).read_bytes(),
+                content_type=content_type,
+            )
+            resp = api_client.post(
+                reverse("data_source.import_from_excel", kwargs={"id": data_source.id}),
+                data={"overwrite": False, "incremental": True, "file": uploaded_file},
+                format="multipart",
+            )
+            sync_task = DataSourceSyncTask.objects.get(data_source=data_source)
+
+            assert resp.status_code == status.HTTP_200_OK
+            assert sync_task.status == SyncTaskStatus.SUCCESS
+            assert DataSourceUser.objects.filter(data_source_id=data_source.id).count() == 12  # noqa: PLR2004
+
+    def test_data_source_import_invalid_file_format(self, api_client, data_source):
+        uploaded_file = SimpleUploadedFile(name="fake_users.txt", content=b"zhangsan", content_type="text/plain")
+        resp = api_client.post(
+            reverse("data_source.import_from_excel", kwargs={"id": data_source.id}),
+            data={"overwrite": False, "incremental": True, "file": uploaded_file},
+            format="multipart",
+        )
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
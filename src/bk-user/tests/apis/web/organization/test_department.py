@@ -21,7 +21,9 @@ from bkuser.apps.data_source.models import (
     DataSourceDepartmentRelation,
     DataSourceDepartmentUserRelation,
 )
-from bkuser.apps.tenant.models import TenantDepartment, TenantDepartmentIDRecord
+from bkuser.apps.tenant.constants import CollaborationStrategyStatus
+from bkuser.apps.tenant.data_version import TenantDataVersion
+from bkuser.apps.tenant.models import CollaborationStrategy, TenantDepartment, TenantDepartmentIDRecord
 from bkuser.plugins.local.utils import gen_dept_code
 from django.urls import reverse
 from rest_framework import status
@@ -222,6 +224,32 @@ class TestTenantDepartmentUpdateApi:
         assert resp.status_code == status.HTTP_400_BAD_REQUEST
         assert "上级部门中存在同名部门" in resp.data["message"]
 
+    @pytest.mark.usefixtures("_init_tenant_users_depts")
+    def test_bump_data_version(self, api_client, random_tenant, collaboration_tenant):
+        CollaborationStrategy.objects.create(
+            name=generate_random_string(),
+            source_tenant=random_tenant,
+            target_tenant=collaboration_tenant,
+            source_status=CollaborationStrategyStatus.ENABLED,
+            target_status=CollaborationStrategyStatus.ENABLED,
+        )
+        dept_a = TenantDepartment.objects.get(data_source_department__name="部门A", tenant=random_tenant)
+        url = reverse("organization.tenant_department.update_destroy", kwargs={"id": dept_a.id})
+
+        version = TenantDataVersion.get(random_tenant.id)
+        collaboration_version = TenantDataVersion.get(collaboration_tenant.id)
+
+        # 更新失败，数据版本号不变
+        resp = api_client.put(url, data={"name": "部门B"})
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+        assert TenantDataVersion.get(random_tenant.id) == version
+
+        # 更新成功，本租户 & 协同租户的数据版本号都会递增
+        resp = api_client.put(url, data={"name": "部门AA"})
+        assert resp.status_code == status.HTTP_204_NO_CONTENT
+        assert TenantDataVersion.get(random_tenant.id) > version
+        assert TenantDataVersion.get(collaboration_tenant.id) > collaboration_version
+
 
 class TestTenantDepartmentDestroyApi:
     @pytest.mark.usefixtures("_init_tenant_users_depts")
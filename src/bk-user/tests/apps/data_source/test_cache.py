@@ -14,98 +14,123 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
-
 import pytest
-from bkuser.apps.data_source.cache import DepartmentAncestorCache
-from bkuser.apps.data_source.models import DataSourceDepartment
+from bkuser.apps.data_source.cache import (
+    DataSourceOrgTreeSnapshot,
+    DataSourceOrgTreeSnapshotCache,
+    _local_snapshots,
+)
+from bkuser.apps.data_source.models import DataSourceDepartment, DataSourceDepartmentRelation
 
 pytestmark = pytest.mark.django_db
 
 
+class TestDataSourceOrgTreeSnapshot:
+    """数据源组织树快照测试"""
+
+    @pytest.fixture
+    def snapshot(self) -> DataSourceOrgTreeSnapshot:
+        return DataSourceOrgTreeSnapshot([(1, None, "公司"), (2, 1, "部门A"), (3, 2, "中心AA"), (4, 1, "部门B")])
+
+    def test_parent_and_children(self, snapshot):
+        assert snapshot.get_parent(1) is None
+        assert snapshot.get_parent(3) == 2
+        assert snapshot.get_children(1) == [2, 4]
+        assert snapshot.get_children(3) == []
+
+    def test_ancestors(self, snapshot):
+        assert snapshot.get_ancestors(1) == []
+        assert snapshot.get_ancestors(3) == [1, 2]
+        assert snapshot.get_ancestors(3, include_self=True) == [1, 2, 3]
+
+    def test_org_path(self, snapshot):
+        assert snapshot.get_org_path(1) == "公司"
+        assert snapshot.get_org_path(1, include_self=False) == ""
+        assert snapshot.get_org_path(3) == "公司/部门A/中心AA"
+        assert snapshot.get_org_path(3, include_self=False) == "公司/部门A"
+
+    def test_not_exists_department(self, snapshot):
+        assert 5 not in snapshot
+        assert snapshot.get_ancestors(5) == []
+        assert snapshot.get_org_path(5) == ""
+
+
 @pytest.mark.usefixtures("_init_tenant_users_depts")
-class TestDepartmentAncestorCache:
-    """部门祖先缓存测试"""
+class TestDataSourceOrgTreeSnapshotCache:
+    """数据源组织树快照缓存测试"""
 
     def test_batch_get_with_empty_input(self):
-        """测试空输入场景"""
-        cache = DepartmentAncestorCache()
-        result = cache.batch_get([])
-        assert result == {}
-
-    def test_batch_get_root_department(self):
-        """测试获取根部门的祖先"""
-        cache = DepartmentAncestorCache()
-        company_dept = DataSourceDepartment.objects.get(code="company")
-        result = cache.batch_get([company_dept.id])
-
-        assert company_dept.id in result
-        assert result[company_dept.id] == []
-
-    def test_batch_get_with_multi_level_department(self):
-        """测试获取多层级部门的祖先"""
-        cache = DepartmentAncestorCache()
-        company = DataSourceDepartment.objects.get(code="company")
-        dept_a = DataSourceDepartment.objects.get(code="dept_a")
-        center_aa = DataSourceDepartment.objects.get(code="center_aa")
-        group_aaa = DataSourceDepartment.objects.get(code="group_aaa")
+        assert DataSourceOrgTreeSnapshotCache().batch_get([]) == {}
 
-        result = cache.batch_get([group_aaa.id])
-        assert group_aaa.id in result
+    def test_get(self, full_local_data_source):
+        snapshot = DataSourceOrgTreeSnapshotCache().get(full_local_data_source.id)
 
-        ancestors = result[group_aaa.id]
-        assert len(ancestors) == 3
-        assert company.id in ancestors
-        assert dept_a.id in ancestors
-        assert center_aa.id in ancestors
-
-    def test_batch_get_multiple_departments(self):
-        """测试批量获取多个部门的祖先"""
-        cache = DepartmentAncestorCache()
-        company_dept = DataSourceDepartment.objects.get(code="company")
+        company = DataSourceDepartment.objects.get(code="company")
         dept_a = DataSourceDepartment.objects.get(code="dept_a")
         center_aa = DataSourceDepartment.objects.get(code="center_aa")
         group_aaa = DataSourceDepartment.objects.get(code="group_aaa")
-        dept_ids = [company_dept.id, dept_a.id, center_aa.id, group_aaa.id]
 
-        result = cache.batch_get(dept_ids)
+        assert snapshot.get_ancestors(company.id) == []
+        assert snapshot.get_ancestors(group_aaa.id) == [company.id, dept_a.id, center_aa.id]
+        assert snapshot.get_org_path(group_aaa.id) == "公司/部门A/中心AA/小组AAA"
+        assert set(snapshot.get_children(dept_a.id)) == set(
+            DataSourceDepartmentRelation.objects.filter(parent_id=dept_a.id).values_list("department_id", flat=True)
+        )
 
-        assert len(result) == 4
-        assert company_dept.id in result
-        assert dept_a.id in result
-        assert center_aa.id in result
-        assert group_aaa.id in result
+    def test_get_with_cache_hit(self, full_local_data_source, django_assert_num_queries):
+        cache = DataSourceOrgTreeSnapshotCache()
+        snapshot = cache.get(full_local_data_source.id)
 
-        assert result[company_dept.id] == []
-        assert len(result[dept_a.id]) == 1
-        assert len(result[center_aa.id]) == 2
-        assert len(result[group_aaa.id]) == 3
+        # 版本号未变化，直接命中进程内缓存，无需查询 DB
+        with django_assert_num_queries(0):
+            assert cache.get(full_local_data_source.id).relations == snapshot.relations
 
-    def test_batch_get_with_cache_hit(self):
-        """测试缓存命中场景"""
-        cache = DepartmentAncestorCache()
+    def test_refresh(self, full_local_data_source):
+        cache = DataSourceOrgTreeSnapshotCache()
         dept_a = DataSourceDepartment.objects.get(code="dept_a")
+        assert cache.get(full_local_data_source.id).get_org_path(dept_a.id) == "公司/部门A"
 
-        # 第一次调用，从数据库查询并缓存
-        result1 = cache.batch_get([dept_a.id])
+        dept_a.name = "部门AAA"
+        dept_a.save()
+        # 未刷新快照前，依旧是旧数据
+        assert cache.get(full_local_data_source.id).get_org_path(dept_a.id) == "公司/部门A"
 
-        # 第二次调用，应该从缓存获取
-        result2 = cache.batch_get([dept_a.id])
+        cache.refresh(full_local_data_source.id)
+        assert cache.get(full_local_data_source.id).get_org_path(dept_a.id) == "公司/部门AAA"
 
-        # 两次结果应该一致
-        assert result1 == result2
-
-    def test_batch_delete(self):
-        """测试批量删除缓存"""
-        cache = DepartmentAncestorCache()
+    def test_invalidate(self, full_local_data_source, django_capture_on_commit_callbacks):
+        cache = DataSourceOrgTreeSnapshotCache()
         dept_a = DataSourceDepartment.objects.get(code="dept_a")
-        center_aa = DataSourceDepartment.objects.get(code="center_aa")
-
-        # 先缓存数据
-        cache.batch_get([dept_a.id, center_aa.id])
+        cache.get(full_local_data_source.id)
+
+        DataSourceDepartment.objects.filter(id=dept_a.id).update(name="部门AAA")
+        with django_capture_on_commit_callbacks(execute=True):
+            cache.invalidate(full_local_data_source.id)
+            # 事务提交前，版本号不变，依旧是旧数据
+            assert cache.get(full_local_data_source.id).get_org_path(dept_a.id) == "公司/部门A"
+
+        # 事务提交后，版本号变化，读取时重新构建快照
+        assert cache.get(full_local_data_source.id).get_org_path(dept_a.id) == "公司/部门AAA"
+
+    def test_keep_only_current_version(self, full_local_data_source, django_capture_on_commit_callbacks):
+        cache = DataSourceOrgTreeSnapshotCache()
+        _local_snapshots.clear()
+        for _ in range(3):
+            with django_capture_on_commit_callbacks(execute=True):
+                cache.invalidate(full_local_data_source.id)
+            cache.get(full_local_data_source.id)
+
+        # 进程内缓存每个数据源只保留当前版本的快照
+        assert list(_local_snapshots.keys()) == [full_local_data_source.id]
+
+    def test_delete(self, full_local_data_source, django_capture_on_commit_callbacks):
+        cache = DataSourceOrgTreeSnapshotCache()
+        dept_a = DataSourceDepartment.objects.get(code="dept_a")
+        cache.get(full_local_data_source.id)
 
-        # 删除缓存
-        cache.batch_delete([dept_a.id, center_aa.id])
+        DataSourceDepartment.objects.filter(id=dept_a.id).update(name="部门AAA")
+        with django_capture_on_commit_callbacks(execute=True):
+            cache.delete(full_local_data_source.id)
 
-        # 再次查询应该从数据库获取
-        result = cache.batch_get([dept_a.id, center_aa.id])
-        assert len(result) == 2
+        assert full_local_data_source.id not in _local_snapshots
+        assert cache.get(full_local_data_source.id).get_org_path(dept_a.id) == "公司/部门AAA"
@@ -14,12 +14,21 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
+from unittest import mock
+
 import pytest
-from bkuser.apps.data_source.models import DataSource, DataSourceSensitiveInfo
+from bkuser.apps.data_source.models import (
+    DataSource,
+    DataSourceDepartment,
+    DataSourceSensitiveInfo,
+    DataSourceUser,
+    gen_content_hash,
+)
 from bkuser.common.constants import SENSITIVE_MASK
 from bkuser.plugins.local.constants import PasswordGenerateMethod
 from bkuser.plugins.local.models import LocalDataSourcePluginConfig
 from bkuser.utils.dictx import get_items
+from django.core.exceptions import ImproperlyConfigured
 
 pytestmark = pytest.mark.django_db
 
@@ -96,3 +105,32 @@ def test_set_plugin_config_empty_value(local_ds_plugin_cfg, bare_local_data_sour
     bare_local_data_source.set_plugin_cfg(plugin_cfg)
     assert get_items(bare_local_data_source.plugin_config, "password_initial.fixed_password") is None
     assert get_items(bare_local_data_source.plugin_config, "login_limit.force_change_at_first_login") is False
+
+
+def test_save_refresh_content_hash(full_local_data_source):
+    user = DataSourceUser.objects.get(data_source=full_local_data_source, code="zhangsan")
+    content_hash = user.content_hash
+
+    user.extras = {**user.extras, "age": 18}
+    user.save(update_fields=["extras", "updated_at"])
+
+    user.refresh_from_db()
+    assert user.content_hash != content_hash
+    assert user.content_hash == user.calc_content_hash()
+
+
+def test_calc_content_hash_by_declared_fields(full_local_data_source):
+    user = DataSourceUser.objects.get(data_source=full_local_data_source, code="zhangsan")
+    # 指纹按声明的字段顺序计算，与存量数据的指纹保持一致
+    assert user.calc_content_hash() == gen_content_hash(
+        user.username, user.full_name, user.email, user.phone, user.phone_country_code, user.extras
+    )
+
+    dept = DataSourceDepartment.objects.filter(data_source=full_local_data_source).first()
+    assert dept.calc_content_hash() == gen_content_hash(dept.name, dept.extras)
+
+
+def test_calc_content_hash_without_declared_fields(full_local_data_source):
+    user = DataSourceUser.objects.get(data_source=full_local_data_source, code="zhangsan")
+    with mock.patch.object(DataSourceUser, "content_hash_fields", []), pytest.raises(ImproperlyConfigured):
+        user.calc_content_hash()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import pytest
+from bkuser.apps.data_source.models import DataSourceUser
+from bkuser.apps.data_source.tasks import migrate_user_extras_with_mapping, remove_dropped_field_in_user_extras
+from bkuser.apps.tenant.data_version import TenantDataVersion
+
+pytestmark = pytest.mark.django_db
+
+
+class TestUserExtrasTasks:
+    @pytest.fixture(autouse=True)
+    def _init_user_extras(self, full_local_data_source):
+        DataSourceUser.objects.filter(data_source=full_local_data_source).update(extras={"gender": "male"})
+
+    def test_migrate_user_extras_with_mapping(self, random_tenant, django_capture_on_commit_callbacks):
+        version = TenantDataVersion.get(random_tenant.id)
+        with django_capture_on_commit_callbacks(execute=True):
+            migrate_user_extras_with_mapping(random_tenant.id, "gender", {"male": "man"})
+
+        assert set(DataSourceUser.objects.values_list("extras__gender", flat=True)) == {"man"}
+        # 数据已变更，租户数据版本号需要递增（使开放 API 的缓存 & ETag 失效）
+        assert TenantDataVersion.get(random_tenant.id) > version
+
+    def test_remove_dropped_field_in_user_extras(self, random_tenant, django_capture_on_commit_callbacks):
+        version = TenantDataVersion.get(random_tenant.id)
+        with django_capture_on_commit_callbacks(execute=True):
+            remove_dropped_field_in_user_extras(random_tenant.id, "gender")
+
+        assert not DataSourceUser.objects.filter(extras__has_key="gender").exists()
+        assert TenantDataVersion.get(random_tenant.id) > version
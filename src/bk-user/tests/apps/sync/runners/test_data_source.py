@@ -24,8 +24,10 @@ from bkuser.apps.data_source.models import (
     DataSourceUserLeaderRelation,
 )
 from bkuser.apps.sync.constants import SyncTaskStatus
+from bkuser.apps.sync.models import DataSourceDepartmentChangeLog, DataSourceUserChangeLog
 from bkuser.apps.sync.runners import DataSourceSyncTaskRunner
 from bkuser.plugins.local.utils import gen_dept_code
+from prometheus_client import REGISTRY
 
 pytestmark = pytest.mark.django_db
 
@@ -88,6 +90,51 @@ class TestDataSourceSyncRunner:
         assert DataSourceUserLeaderRelation.objects.filter(data_source=bare_local_data_source).count() == 12
         assert DataSourceDepartmentUserRelation.objects.filter(data_source=bare_local_data_source).count() == 14
 
+    def test_initial_with_chunked_commit(self, bare_local_data_source, data_source_sync_task, user_workbook):
+        data_source_sync_task.extras = {"overwrite": True, "incremental": False, "chunked_commit": True}
+        data_source_sync_task.save()
+
+        DataSourceSyncTaskRunner(data_source_sync_task, {"workbook": user_workbook}).run()
+
+        data_source_sync_task.refresh_from_db()
+        assert data_source_sync_task.status == SyncTaskStatus.SUCCESS
+        # 同步完成后，检查点被清理，数据源恢复一致状态
+        assert data_source_sync_task.is_consistent
+        assert "checkpoint" not in data_source_sync_task.extras
+        assert DataSourceUser.objects.filter(data_source=bare_local_data_source).count() == 12
+
+    def test_metrics(self, bare_local_data_source, data_source_sync_task, user_workbook):
+        labels = {"task_type": "data_source", "plugin_id": bare_local_data_source.plugin_id, "phase": "users.convert"}
+        observed_cnt = REGISTRY.get_sample_value("bkuser_sync_phase_duration_seconds_count", labels) or 0
+
+        data_source_sync_task.extras = {"overwrite": True, "incremental": False}
+        data_source_sync_task.save()
+        DataSourceSyncTaskRunner(data_source_sync_task, {"workbook": user_workbook}).run()
+
+        data_source_sync_task.refresh_from_db()
+        metrics = data_source_sync_task.extras["metrics"]
+        assert {
+            "plugin_init",
+            "departments",
+            "departments.fetch",
+            "departments.write",
+            "department_relations.mptt_rebuild",
+            "users",
+            "users.fetch",
+            "users.convert",
+            "users.diff",
+            "users.write",
+            "user_leader_relations",
+            "user_department_relations",
+            "validation",
+            "signal",
+        } <= set(metrics["phases"].keys())
+        assert metrics["rows"]["user"]["create"] == 12
+        assert metrics["rows"]["department"]["create"] == 12
+        assert metrics["peak_rss_mb"] > 0
+        # 每个阶段的耗时只会上报一次
+        assert REGISTRY.get_sample_value("bkuser_sync_phase_duration_seconds_count", labels) == observed_cnt + 1
+
     @pytest.mark.parametrize(
         (
             "incremental",
@@ -144,3 +191,31 @@ class TestDataSourceSyncRunner:
             DataSourceDepartmentUserRelation.objects.filter(data_source=bare_local_data_source).count()
             == user_dept_rel_cnt
         )
+
+    @pytest.mark.usefixtures("_init_data_source_users_depts")
+    def test_dry_run(self, bare_local_data_source, data_source_sync_task, user_workbook):
+        data_source_sync_task.extras = {"overwrite": True, "incremental": False, "dry_run": True}
+        data_source_sync_task.save()
+
+        DataSourceSyncTaskRunner(data_source_sync_task, {"workbook": user_workbook}).run()
+
+        data_source_sync_task.refresh_from_db()
+        assert data_source_sync_task.status == SyncTaskStatus.SUCCESS
+
+        # 预览模式下，不会写入任何数据，也不会有变更记录
+        assert DataSourceDepartment.objects.filter(data_source=bare_local_data_source).count() == 3
+        assert DataSourceUser.objects.filter(data_source=bare_local_data_source).count() == 3
+        assert not DataSourceUserChangeLog.objects.filter(task=data_source_sync_task).exists()
+        assert not DataSourceDepartmentChangeLog.objects.filter(task=data_source_sync_task).exists()
+
+        # 差异摘要：部门 & 用户的变更数量，变更字段，以及变更数据样例
+        diff = data_source_sync_task.extras["dry_run_diff"]
+        assert diff["department"]["counts"] == {"create": 10, "update": 0, "delete": 1}
+        assert diff["department"]["samples"]["delete"] == [{"code": gen_dept_code("公司/部门X"), "name": "部门X"}]
+        assert diff["user"]["counts"] == {"create": 10, "update": 2, "delete": 1}
+        assert diff["user"]["changed_field_counts"] == {"email": 2, "phone": 2}
+        assert {
+            "code": "zhangsan",
+            "name": "zhangsan",
+            "changed_fields": {"email": ["", "zhangsan@m.com"], "phone": ["", "13512345671"]},
+        } in diff["user"]["samples"]["update"]
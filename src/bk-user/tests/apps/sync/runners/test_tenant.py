@@ -15,10 +15,21 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+from typing import Dict, Set
+
 import pytest
-from bkuser.apps.sync.constants import SyncTaskStatus
+from bkuser.apps.data_source.models import DataSource, DataSourceDepartment, DataSourceUser
+from bkuser.apps.sync.constants import SyncOperation, SyncTaskStatus, SyncTaskTrigger
+from bkuser.apps.sync.models import (
+    DataSourceDepartmentChangeLog,
+    DataSourceSyncTask,
+    DataSourceUserChangeLog,
+    TenantSyncTask,
+)
 from bkuser.apps.sync.runners import TenantSyncTaskRunner
-from bkuser.apps.tenant.models import TenantDepartment, TenantUser
+from bkuser.apps.tenant.models import Tenant, TenantDepartment, TenantUser
+from django.test import override_settings
+from django.utils import timezone
 
 pytestmark = pytest.mark.django_db
 
@@ -32,3 +43,158 @@ class TestTenantSyncRunner:
 
         assert TenantDepartment.objects.filter(data_source=full_local_data_source).count() == 9
         assert TenantUser.objects.filter(data_source=full_local_data_source).count() == 11
+
+    def test_skip_partially_applied_data_source(self, full_local_data_source, tenant_sync_task):
+        # 最近一次数据源同步任务分块提交，但尚未完成，数据源处于不一致状态
+        DataSourceSyncTask.objects.create(
+            data_source=full_local_data_source,
+            status=SyncTaskStatus.FAILED,
+            trigger=SyncTaskTrigger.CRONTAB,
+            start_at=timezone.now(),
+            extras={"chunked_commit": True, "checkpoint": {"user": {"received_cnt": 1000}}, "consistent": False},
+        )
+        TenantSyncTaskRunner(tenant_sync_task).run()
+
+        tenant_sync_task.refresh_from_db()
+        assert tenant_sync_task.status == SyncTaskStatus.PENDING
+        assert not TenantUser.objects.filter(data_source=full_local_data_source).exists()
+
+
+class TestTenantSyncRunnerIncremental:
+    """基于数据源同步变更集的租户增量同步"""
+
+    def test_incremental(self, full_general_data_source, random_tenant):
+        data_source, tenant = full_general_data_source, random_tenant
+
+        # 首次同步，没有上次成功的同步任务，需要全量同步
+        task = self._run_tenant_sync(tenant, data_source, self._create_data_source_sync_task(data_source))
+        assert task.extras["incremental"] is False
+        assert task.extras["full_reconciled_at"]
+        assert self._get_synced_user_ids(tenant, data_source) == self._get_data_source_user_ids(data_source)
+
+        # 数据源同步：删除用户 lushi & 部门 center_ba，新增用户 xiaoershi（有变更记录）
+        ds_task = self._create_data_source_sync_task(data_source)
+        deleted_user = DataSourceUser.objects.get(data_source=data_source, code="lushi")
+        self._add_user_change_log(ds_task, SyncOperation.DELETE, deleted_user)
+        deleted_user.delete()
+
+        deleted_dept = DataSourceDepartment.objects.get(data_source=data_source, code="center_ba")
+        DataSourceDepartmentChangeLog.objects.create(
+            task=ds_task,
+            data_source=data_source,
+            operation=SyncOperation.DELETE,
+            department_id=deleted_dept.id,
+            department_code=deleted_dept.code,
+            department_name=deleted_dept.name,
+        )
+        deleted_dept.delete()
+
+        created_user = self._create_data_source_user(data_source, "xiaoershi")
+        self._add_user_change_log(ds_task, SyncOperation.CREATE, created_user)
+        # 没有变更记录的用户，增量同步时不会被同步到租户
+        untracked_user = self._create_data_source_user(data_source, "xiaoersan")
+
+        task = self._run_tenant_sync(tenant, data_source, ds_task)
+        assert task.extras["incremental"] is True
+        synced_user_ids = self._get_synced_user_ids(tenant, data_source)
+        assert created_user.id in synced_user_ids
+        assert deleted_user.id not in synced_user_ids
+        assert untracked_user.id not in synced_user_ids
+        assert not TenantDepartment.objects.filter(tenant=tenant, data_source_department_id=deleted_dept.id).exists()
+
+        # 中间有失败的数据源同步任务（没有变更记录），需要全量同步
+        self._create_data_source_sync_task(data_source, SyncTaskStatus.FAILED)
+        task = self._run_tenant_sync(tenant, data_source, self._create_data_source_sync_task(data_source))
+        assert task.extras["incremental"] is False
+        assert self._get_synced_user_ids(tenant, data_source) == self._get_data_source_user_ids(data_source)
+
+    def test_incremental_with_expired_reconciliation(self, full_general_data_source, random_tenant):
+        data_source, tenant = full_general_data_source, random_tenant
+        self._run_tenant_sync(tenant, data_source, self._create_data_source_sync_task(data_source))
+
+        task = self._run_tenant_sync(tenant, data_source, self._create_data_source_sync_task(data_source))
+        assert task.extras["incremental"] is True
+
+        with override_settings(TENANT_SYNC_FULL_RECONCILE_INTERVAL=0):
+            task = self._run_tenant_sync(tenant, data_source, self._create_data_source_sync_task(data_source))
+
+        assert task.extras["incremental"] is False
+
+    def test_incremental_with_resumed_data_source_task(self, full_general_data_source, random_tenant):
+        data_source, tenant = full_general_data_source, random_tenant
+        self._run_tenant_sync(tenant, data_source, self._create_data_source_sync_task(data_source))
+
+        # 从检查点恢复的数据源同步任务，变更记录不完整，需要全量同步
+        ds_task = self._create_data_source_sync_task(data_source, extras={"resumed_from": 1, "consistent": True})
+        task = self._run_tenant_sync(tenant, data_source, ds_task)
+        assert task.extras["incremental"] is False
+
+    def test_incremental_disabled(self, full_general_data_source, random_tenant):
+        data_source, tenant = full_general_data_source, random_tenant
+        self._run_tenant_sync(tenant, data_source, self._create_data_source_sync_task(data_source))
+
+        ds_task = self._create_data_source_sync_task(data_source)
+        task = self._run_tenant_sync(tenant, data_source, ds_task, incremental=False)
+        assert task.extras["incremental"] is False
+
+    @staticmethod
+    def _create_data_source_sync_task(
+        data_source: DataSource, status: SyncTaskStatus = SyncTaskStatus.SUCCESS, extras: Dict | None = None
+    ) -> DataSourceSyncTask:
+        return DataSourceSyncTask.objects.create(
+            data_source=data_source,
+            status=status,
+            trigger=SyncTaskTrigger.CRONTAB,
+            start_at=timezone.now(),
+            extras=extras or {},
+        )
+
+    @staticmethod
+    def _run_tenant_sync(
+        tenant: Tenant, data_source: DataSource, ds_task: DataSourceSyncTask, incremental: bool = True
+    ) -> TenantSyncTask:
+        task = TenantSyncTask.objects.create(
+            tenant=tenant,
+            data_source=data_source,
+            data_source_owner_tenant_id=data_source.owner_tenant_id,
+            data_source_sync_task_id=ds_task.id,
+            status=SyncTaskStatus.PENDING,
+            trigger=SyncTaskTrigger.SIGNAL,
+            start_at=timezone.now(),
+            extras={"incremental": incremental, "async_run": False},
+        )
+        TenantSyncTaskRunner(task).run()
+
+        task.refresh_from_db()
+        assert task.status == SyncTaskStatus.SUCCESS
+        return task
+
+    @staticmethod
+    def _create_data_source_user(data_source: DataSource, code: str) -> DataSourceUser:
+        return DataSourceUser.objects.create(
+            data_source=data_source, code=code, username=code, full_name=code, email=f"{code}@m.com"
+        )
+
+    @staticmethod
+    def _add_user_change_log(ds_task: DataSourceSyncTask, operation: SyncOperation, user: DataSourceUser):
+        DataSourceUserChangeLog.objects.create(
+            task=ds_task,
+            data_source=ds_task.data_source,
+            operation=operation,
+            user_id=user.id,
+            user_code=user.code,
+            username=user.username,
+            full_name=user.full_name,
+        )
+
+    @staticmethod
+    def _get_synced_user_ids(tenant: Tenant, data_source: DataSource) -> Set[int]:
+        return set(
+            TenantUser.objects.filter(tenant=tenant, data_source=data_source).values_list(
+                "data_source_user_id", flat=True
+            )
+        )
+
+    @staticmethod
+    def _get_data_source_user_ids(data_source: DataSource) -> Set[int]:
+        return set(DataSourceUser.objects.filter(data_source=data_source).values_list("id", flat=True))
@@ -115,6 +115,47 @@ class TestSyncDataSourceDepartment:
         assert not DataSourceDepartment.objects.filter(data_source=full_local_data_source).exists()
         assert not DataSourceDepartmentRelation.objects.filter(data_source=full_local_data_source).exists()
 
+    def test_update_relations_consistent_with_mptt_rebuild(self, data_source_sync_task_ctx, full_local_data_source):
+        """增量维护的部门关系 MPTT 字段，需要与 MPTT 重建的结果一致"""
+        raw_departments = [
+            RawDataSourceDepartment(code="company", name="公司", parent=None),
+            RawDataSourceDepartment(code="dept_a", name="部门A", parent="company"),
+            # 部门 B 移动到部门 A 下，中心 AA 变成新的根部门
+            RawDataSourceDepartment(code="dept_b", name="部门B", parent="dept_a"),
+            RawDataSourceDepartment(code="center_aa", name="中心AA", parent=None),
+            RawDataSourceDepartment(code="center_ba", name="中心BA", parent="dept_b"),
+            RawDataSourceDepartment(code="group_aaa", name="小组AAA", parent="center_aa"),
+            RawDataSourceDepartment(code="center_x", name="中心X", parent="company"),
+        ]
+        self._sync_data_source_departments(
+            data_source_sync_task_ctx, full_local_data_source, raw_departments, overwrite=True, incremental=False
+        )
+        assert self._gen_parent_relations_from_db(
+            data_source=full_local_data_source
+        ) == self._gen_parent_relations_from_raw_departments(raw_departments)
+
+        relations = DataSourceDepartmentRelation.objects.filter(data_source=full_local_data_source)
+        mptt_fields = ["department_id", "tree_id", "lft", "rght", "level"]
+        synced_mptt_values = set(relations.values_list(*mptt_fields))
+        for tree_id in set(relations.values_list("tree_id", flat=True)):
+            DataSourceDepartmentRelation.objects.partial_rebuild(tree_id)
+
+        assert set(relations.values_list(*mptt_fields)) == synced_mptt_values
+
+    def test_sync_without_relation_changed(self, data_source_sync_task_ctx, full_local_data_source, raw_departments):
+        """部门关系没有变化，不需要做任何变更"""
+        self._sync_data_source_departments(
+            data_source_sync_task_ctx, full_local_data_source, raw_departments, overwrite=True, incremental=False
+        )
+        relations = DataSourceDepartmentRelation.objects.filter(data_source=full_local_data_source)
+        relation_values = set(relations.values_list("department_id", "tree_id", "lft", "rght", "updated_at"))
+
+        self._sync_data_source_departments(
+            data_source_sync_task_ctx, full_local_data_source, raw_departments, overwrite=True, incremental=False
+        )
+        assert set(relations.values_list("department_id", "tree_id", "lft", "rght", "updated_at")) == relation_values
+        assert "department relations not changed, skip update" in data_source_sync_task_ctx.logger.logs
+
     @staticmethod
     def _sync_data_source_departments(
         data_source_sync_task_ctx: DataSourceSyncTaskContext,
@@ -27,7 +27,10 @@ from bkuser.apps.data_source.models import (
     DataSourceUserLeaderRelation,
     DataSourceUsernameGenerateConfig,
 )
+from bkuser.apps.sync.checkpoints import DataSourceSyncCheckpoint
+from bkuser.apps.sync.constants import SyncTaskStatus, SyncTaskTrigger
 from bkuser.apps.sync.contexts import DataSourceSyncTaskContext
+from bkuser.apps.sync.models import DataSourceSyncTask
 from bkuser.apps.sync.syncers import (
     DataSourceDepartmentRelationSyncer,
     DataSourceDepartmentSyncer,
@@ -39,6 +42,7 @@ from bkuser.apps.tenant.constants import TenantUserIdRuleEnum
 from bkuser.apps.tenant.models import TenantUserIDGenerateConfig
 from bkuser.plugins.local.models import LocalDataSourcePluginConfig
 from bkuser.plugins.models import RawDataSourceDepartment, RawDataSourceUser
+from django.utils import timezone
 
 pytestmark = pytest.mark.django_db
 
@@ -432,6 +436,225 @@ class TestSyncDataSourceUser:
         assert data_source_sync_task_ctx.logger.has_warning is True
         assert "ds1_alice" in data_source_sync_task_ctx.logger.logs
 
+    def test_sync_with_iterator_in_chunks(
+        self, monkeypatch, data_source_sync_task_ctx, full_local_data_source, raw_users, random_raw_user
+    ):
+        """原始用户数据以迭代器的方式提供，分块进行同步"""
+        monkeypatch.setattr(DataSourceUserSyncer, "chunk_size", 3)
+        raw_users.append(random_raw_user)
+
+        syncer = DataSourceUserSyncer(
+            ctx=data_source_sync_task_ctx,
+            data_source=full_local_data_source,
+            raw_users=(u for u in raw_users),
+            overwrite=True,
+            incremental=False,
+        )
+        syncer.sync()
+
+        users = DataSourceUser.objects.filter(data_source=full_local_data_source)
+        assert set(users.values_list("code", flat=True)) == {u.code for u in raw_users}
+        # 收集到的关联信息与原始用户数据一致
+        assert [(r.code, r.leaders, r.departments) for r in syncer.user_relations] == [
+            (u.code, u.leaders, u.departments) for u in raw_users
+        ]
+        assert f"receive {len(raw_users)} users from data source plugin" in data_source_sync_task_ctx.logger.logs
+
+    def test_stream_raw_users(self, monkeypatch, data_source_sync_task_ctx, full_local_data_source, raw_users):
+        """非分块提交模式下，原始用户数据也需要流式分块处理，而不是全部拉取后再处理"""
+        monkeypatch.setattr(DataSourceUserSyncer, "chunk_size", 1)
+        DataSourceUser.objects.filter(data_source=full_local_data_source).delete()
+        exists_user_cnts = []
+
+        def iter_raw_users():
+            for u in raw_users:
+                exists_user_cnts.append(DataSourceUser.objects.filter(data_source=full_local_data_source).count())
+                yield u
+
+        DataSourceUserSyncer(
+            ctx=data_source_sync_task_ctx,
+            data_source=full_local_data_source,
+            raw_users=iter_raw_users(),
+            overwrite=True,
+            incremental=False,
+        ).sync()
+
+        # 拉取下一个用户时，之前分块中的用户已经写入（同一事务中）
+        assert exists_user_cnts == list(range(len(raw_users)))
+        assert DataSourceUser.objects.filter(data_source=full_local_data_source).count() == len(raw_users)
+
+    def test_sync_with_username_released_by_deleted_user(
+        self, monkeypatch, data_source_sync_task_ctx, full_local_data_source, raw_users
+    ):
+        """用户名被待删除的用户占用（同名不同 code），需要在删除后再创建"""
+        monkeypatch.setattr(DataSourceUserSyncer, "chunk_size", 1)
+        # zhangsan 的 code 变更，老的 zhangsan 会被删除，新的用户使用相同的用户名
+        raw_users[0].code = "zhangsan-new"
+        # 将新用户放到最前面，确保其在老用户被删除之前被处理
+        raw_users = [raw_users[0]] + [u for u in raw_users[1:] if "zhangsan" not in u.leaders]
+
+        self._sync_data_source_users(
+            data_source_sync_task_ctx, full_local_data_source, raw_users, overwrite=True, incremental=False
+        )
+
+        zhangsan = DataSourceUser.objects.get(data_source=full_local_data_source, username="zhangsan")
+        assert zhangsan.code == "zhangsan-new"
+        assert not DataSourceUser.objects.filter(data_source=full_local_data_source, code="zhangsan").exists()
+
+    def test_sync_skip_unchanged_users_by_content_hash(
+        self, data_source_sync_task_ctx, full_local_data_source, tenant_user_custom_fields, raw_users
+    ):
+        """内容指纹一致的用户，不会被更新"""
+        self._sync_data_source_users(
+            data_source_sync_task_ctx, full_local_data_source, raw_users, overwrite=True, incremental=False
+        )
+        users = DataSourceUser.objects.filter(data_source=full_local_data_source)
+        assert all(u.content_hash == u.calc_content_hash() for u in users)
+
+        # 模拟存量数据（指纹缺失），指纹不一致时需要退化为逐字段对比，数据一致则仅补充指纹
+        users.filter(code="zhangsan").update(content_hash="")
+        updated_at_map = dict(users.values_list("code", "updated_at"))
+
+        self._sync_data_source_users(
+            data_source_sync_task_ctx, full_local_data_source, raw_users, overwrite=True, incremental=False
+        )
+        assert dict(users.values_list("code", "updated_at")) == updated_at_map
+        assert users.get(code="zhangsan").content_hash == users.get(code="zhangsan").calc_content_hash()
+
+    def test_sync_with_chunked_commit_and_resume(
+        self, monkeypatch, data_source_sync_task_ctx, full_local_data_source, raw_users, random_raw_user
+    ):
+        """分块提交模式下，已提交的分块不会因同步失败而回滚，后续同步任务可以从检查点恢复"""
+        monkeypatch.setattr(DataSourceUserSyncer, "chunk_size", 3)
+        # 新增用户放在最前面，确保在失败前已被提交
+        raw_users.insert(0, random_raw_user)
+
+        def iter_raw_users_then_fail():
+            yield from raw_users[:7]
+            raise RuntimeError("failed to fetch users")
+
+        failed_task = self._create_sync_task(full_local_data_source)
+        with pytest.raises(RuntimeError):
+            DataSourceUserSyncer(
+                ctx=data_source_sync_task_ctx,
+                data_source=full_local_data_source,
+                raw_users=iter_raw_users_then_fail(),
+                overwrite=True,
+                incremental=False,
+                checkpoint=DataSourceSyncCheckpoint(failed_task),
+            ).sync()
+
+        # 前两个分块已经提交，检查点记录了进度，且数据源被标记为不一致
+        failed_task.refresh_from_db()
+        assert failed_task.extras["checkpoint"]["user"]["received_cnt"] == 6
+        assert not failed_task.is_consistent
+        assert DataSourceUser.objects.filter(data_source=full_local_data_source, code=random_raw_user.code).exists()
+
+        failed_task.status = SyncTaskStatus.FAILED
+        failed_task.save(update_fields=["status"])
+
+        # 后续的同步任务从检查点恢复，已提交分块中的存量用户不会再次对比
+        task = self._create_sync_task(full_local_data_source)
+        checkpoint = DataSourceSyncCheckpoint(task)
+        assert checkpoint.resumed
+        assert task.extras["resumed_from"] == failed_task.id
+
+        DataSourceUserSyncer(
+            ctx=data_source_sync_task_ctx,
+            data_source=full_local_data_source,
+            raw_users=(u for u in raw_users),
+            overwrite=True,
+            incremental=False,
+            checkpoint=checkpoint,
+        ).sync()
+        checkpoint.complete()
+
+        users = DataSourceUser.objects.filter(data_source=full_local_data_source)
+        assert set(users.values_list("code", flat=True)) == {u.code for u in raw_users}
+        assert "resume from checkpoint, 6 users have been committed" in data_source_sync_task_ctx.logger.logs
+
+        task.refresh_from_db()
+        assert task.is_consistent
+        assert "checkpoint" not in task.extras
+
+    def test_resume_with_users_in_different_order(
+        self, monkeypatch, data_source_sync_task_ctx, full_local_data_source, raw_users
+    ):
+        """从检查点恢复时，数据源返回用户的顺序发生变化，不能遗漏未提交用户的变更"""
+        monkeypatch.setattr(DataSourceUserSyncer, "chunk_size", 3)
+        for u in raw_users:
+            u.properties["full_name"] = f"{u.code}-new"
+
+        def iter_raw_users_then_fail():
+            yield from raw_users[:7]
+            raise RuntimeError("failed to fetch users")
+
+        failed_task = self._create_sync_task(full_local_data_source)
+        with pytest.raises(RuntimeError):
+            DataSourceUserSyncer(
+                ctx=data_source_sync_task_ctx,
+                data_source=full_local_data_source,
+                raw_users=iter_raw_users_then_fail(),
+                overwrite=True,
+                incremental=False,
+                checkpoint=DataSourceSyncCheckpoint(failed_task),
+            ).sync()
+
+        failed_task.status = SyncTaskStatus.FAILED
+        failed_task.save(update_fields=["status"])
+
+        # 恢复时，数据源以相反的顺序返回用户
+        task = self._create_sync_task(full_local_data_source)
+        DataSourceUserSyncer(
+            ctx=data_source_sync_task_ctx,
+            data_source=full_local_data_source,
+            raw_users=(u for u in reversed(raw_users)),
+            overwrite=True,
+            incremental=False,
+            checkpoint=DataSourceSyncCheckpoint(task),
+        ).sync()
+
+        users = DataSourceUser.objects.filter(data_source=full_local_data_source)
+        assert dict(users.values_list("code", "full_name")) == {u.code: f"{u.code}-new" for u in raw_users}
+        assert "compare all users in the chunk" in data_source_sync_task_ctx.logger.logs
+
+    def test_update_with_incremental_and_deleted_codes(
+        self, data_source_sync_task_ctx, full_local_data_source, random_raw_user
+    ):
+        """增量模式下，仅删除数据源标记为已删除（墓碑）的用户"""
+        user_codes = set(
+            DataSourceUser.objects.filter(data_source=full_local_data_source).values_list("code", flat=True)
+        )
+
+        DataSourceUserSyncer(
+            ctx=data_source_sync_task_ctx,
+            data_source=full_local_data_source,
+            raw_users=[random_raw_user],
+            overwrite=True,
+            incremental=True,
+            # 不存在的 code 以及本次同步中出现的 code 都不会被删除
+            get_deleted_codes=lambda: {"lisi", "not_exists", random_raw_user.code},
+        ).sync()
+
+        users = DataSourceUser.objects.filter(data_source=full_local_data_source)
+        assert set(users.values_list("code", flat=True)) == user_codes - {"lisi"} | {random_raw_user.code}
+        assert not DataSourceUserLeaderRelation.objects.filter(
+            data_source=full_local_data_source, leader__code="lisi"
+        ).exists()
+        assert not DataSourceDepartmentUserRelation.objects.filter(
+            data_source=full_local_data_source, user__code="lisi"
+        ).exists()
+
+    @staticmethod
+    def _create_sync_task(data_source: DataSource) -> DataSourceSyncTask:
+        return DataSourceSyncTask.objects.create(
+            data_source=data_source,
+            status=SyncTaskStatus.RUNNING,
+            trigger=SyncTaskTrigger.CRONTAB,
+            start_at=timezone.now(),
+            extras={"overwrite": True, "incremental": False, "chunked_commit": True},
+        )
+
     @staticmethod
     def _sync_data_source_departments(
         data_source_sync_task_ctx: DataSourceSyncTaskContext,
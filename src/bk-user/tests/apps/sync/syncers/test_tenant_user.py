@@ -19,6 +19,7 @@ from typing import Set
 
 import pytest
 from bkuser.apps.data_source.models import DataSource, DataSourceUser
+from bkuser.apps.sync.constants import SyncOperation, TenantSyncObjectType
 from bkuser.apps.sync.syncers import TenantUserSyncer
 from bkuser.apps.tenant.models import Tenant, TenantUser, TenantUserIDRecord
 
@@ -61,6 +62,28 @@ class TestTenantUserSyncer:
         # 租户用户 ID 复用
         assert TenantUserIDRecord.objects.filter(tenant=random_tenant, data_source=full_local_data_source).exists()
 
+    def test_sync_by_chunks(self, tenant_sync_task_ctx, full_local_data_source, random_tenant):
+        syncer = TenantUserSyncer(tenant_sync_task_ctx, full_local_data_source, random_tenant)
+        # 分块大小小于用户数量，需要分多个块处理
+        syncer.chunk_size = 3
+        syncer.sync()
+
+        ds_user_ids = self._gen_ds_user_ids_with_data_source(full_local_data_source)
+        assert ds_user_ids == self._gen_ds_user_ids_with_tenant(random_tenant, full_local_data_source)
+        created_users = tenant_sync_task_ctx.recorder.get(SyncOperation.CREATE, TenantSyncObjectType.USER)
+        assert {u.data_source_user_id for u in created_users} == ds_user_ids
+
+        # 数据源用户被删除，需要分块删除对应的租户用户
+        waiting_delete_ds_user_ids = set(sorted(ds_user_ids)[:5])
+        DataSourceUser.objects.filter(id__in=waiting_delete_ds_user_ids).delete()
+        syncer = TenantUserSyncer(tenant_sync_task_ctx, full_local_data_source, random_tenant)
+        syncer.chunk_size = 2
+        syncer.sync()
+
+        deleted_users = tenant_sync_task_ctx.recorder.get(SyncOperation.DELETE, TenantSyncObjectType.USER)
+        assert {u.data_source_user_id for u in deleted_users} == waiting_delete_ds_user_ids
+        assert not TenantUser.objects.filter(data_source_user_id__in=waiting_delete_ds_user_ids).exists()
+
     @staticmethod
     def _gen_ds_user_ids_with_tenant(tenant: Tenant, data_source: DataSource) -> Set[int]:
         return set(
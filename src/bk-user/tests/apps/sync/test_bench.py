@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import pytest
+from bkuser.apps.data_source.models import (
+    DataSourceDepartment,
+    DataSourceDepartmentRelation,
+    DataSourceUser,
+    DataSourceUserLeaderRelation,
+)
+from bkuser.apps.sync.bench import SyncBenchmark, SyntheticOrg
+from bkuser.apps.sync.bench.constants import BenchSource
+from bkuser.apps.tenant.models import TenantDepartment, TenantUser
+
+pytestmark = pytest.mark.django_db
+
+
+class TestSyntheticOrg:
+    def test_departments(self):
+        org = SyntheticOrg(user_count=0, dept_depth=3, dept_breadth=3)
+        depts = list(org.iter_departments())
+
+        assert org.dept_count == len(depts) == 1 + 3 + 9
+        assert depts[0] == {"id": "dept-0", "name": "部门-0", "parent": None}
+        assert [d["parent"] for d in depts[1:4]] == ["dept-0"] * 3
+        assert [d["parent"] for d in depts[4:7]] == ["dept-1"] * 3
+        assert depts[-1]["parent"] == "dept-3"
+
+    def test_users(self):
+        org = SyntheticOrg(user_count=25, dept_depth=2, dept_breadth=4, leader_chain_length=5)
+        users = list(org.iter_users())
+
+        assert len(users) == len({u["username"] for u in users}) == 25
+        assert users[0]["leaders"] == []
+        assert users[4]["leaders"] == ["user-3"]
+        assert users[5]["leaders"] == []
+        assert users[0]["departments"] == ["dept-0", "dept-1"]
+        assert users[7]["departments"] == ["dept-2"]
+        # 数据是确定性的，重复生成结果一致
+        assert users == list(org.iter_users())
+
+
+class TestSyncBenchmark:
+    @pytest.mark.parametrize("source", [BenchSource.GENERAL, BenchSource.LDAP])
+    def test_run(self, random_tenant, source):
+        org = SyntheticOrg(user_count=250, dept_depth=3, dept_breadth=3)
+        benchmark = SyncBenchmark(random_tenant, source, org, rounds=2, page_size=100, max_concurrency=2)
+        result = benchmark.run()
+
+        data_source = benchmark.data_source
+        assert DataSourceDepartment.objects.filter(data_source=data_source).count() == org.dept_count
+        assert DataSourceDepartmentRelation.objects.filter(data_source=data_source).count() == org.dept_count
+        assert DataSourceUser.objects.filter(data_source=data_source).count() == org.user_count
+        assert DataSourceUserLeaderRelation.objects.filter(data_source=data_source).count() == 225  # noqa: PLR2004
+        assert TenantDepartment.objects.filter(data_source=data_source).count() == org.dept_count
+        assert TenantUser.objects.filter(data_source=data_source).count() == org.user_count
+
+        phases = {p.name: p for p in result.phases}
+        assert set(phases) == {
+            f"round_{r}{suffix}"
+            for r in [1, 2]
+            for suffix in [
+                "",
+                ".data_source",
+                ".data_source.departments",
+                ".data_source.users",
+                ".data_source.validate_unique_fields",
+                ".tenant",
+                ".tenant.departments",
+                ".tenant.users",
+            ]
+        }
+        assert phases["round_1.data_source.users"].rows_inserted >= org.user_count
+        assert phases["round_1.tenant.users"].rows_inserted >= org.user_count
+        # 第二轮同步数据无变更，不会新增数据
+        assert phases["round_2.data_source.users"].rows_inserted == 0
+        assert phases["round_2.tenant.users"].rows_inserted == 0
+        assert all(p.wall_time >= 0 and p.peak_rss_mb > 0 for p in result.phases)
@@ -37,7 +37,7 @@ class TestDataSourceSyncTaskContext:
 
         assert data_source_sync_task.status == SyncTaskStatus.FAILED
 
-        logs = data_source_sync_task.logs
+        logs = data_source_sync_task.get_logs()
         assert "INFO data source sync task started" in logs
         assert "ERROR data source sync task failed! Data modifications in this sync step will be rollback." in logs
 
@@ -48,7 +48,7 @@ class TestDataSourceSyncTaskContext:
         assert data_source_sync_task.status == SyncTaskStatus.SUCCESS
         assert not data_source_sync_task.has_warning
 
-        logs = data_source_sync_task.logs
+        logs = data_source_sync_task.get_logs()
         assert "INFO data source sync task started" in logs
         assert "INFO this is info log" in logs
         assert "INFO data source sync task success!" in logs
@@ -60,7 +60,7 @@ class TestDataSourceSyncTaskContext:
 
         assert data_source_sync_task.status == SyncTaskStatus.SUCCESS
         assert data_source_sync_task.has_warning
-        assert "this is warning log" in data_source_sync_task.logs
+        assert "this is warning log" in data_source_sync_task.get_logs()
 
     def test_with_records(self, data_source_sync_task):
         ds = data_source_sync_task.data_source
@@ -106,6 +106,39 @@ class TestDataSourceSyncTaskContext:
         ) == {"lisi"}
         assert DataSourceDepartmentChangeLog.objects.filter(task=data_source_sync_task).count() == len(depts)
 
+    def test_with_records_flushed_in_batches(self, data_source_sync_task):
+        ds = data_source_sync_task.data_source
+        depts = [DataSourceDepartment(id=idx, data_source=ds, code=f"d{idx}", name=f"部门{idx}") for idx in range(5)]
+
+        with DataSourceSyncTaskContext(data_source_sync_task) as ctx:
+            ctx.recorder.flush_size = 2
+            ctx.recorder.add(operation=SyncOperation.DELETE, type=DataSourceSyncObjectType.DEPARTMENT, items=depts[:3])
+            # 达到阈值的变更记录在同步过程中落库，不在内存中暂存
+            assert DataSourceDepartmentChangeLog.objects.filter(task=data_source_sync_task).count() == 3  # noqa: PLR2004
+            assert not ctx.recorder.get(SyncOperation.DELETE, DataSourceSyncObjectType.DEPARTMENT)
+
+            ctx.recorder.add(
+                operation=SyncOperation.DELETE, type=DataSourceSyncObjectType.DEPARTMENT, items=depts[3:4]
+            )
+            assert ctx.recorder.count(SyncOperation.DELETE, DataSourceSyncObjectType.DEPARTMENT) == 4  # noqa: PLR2004
+
+        # 剩余的变更记录在任务结束时落库
+        assert DataSourceDepartmentChangeLog.objects.filter(task=data_source_sync_task).count() == 4  # noqa: PLR2004
+
+    def test_logs_stored_in_chunks(self, data_source_sync_task):
+        with DataSourceSyncTaskContext(data_source_sync_task) as ctx:
+            ctx.log_chunk_size = 100
+            for idx in range(10):
+                ctx.logger.info("this is info log %d", idx)
+
+        assert data_source_sync_task.logs == ""
+        assert data_source_sync_task.log_chunks.count() == data_source_sync_task.log_page_count > 1
+        logs = "".join(
+            data_source_sync_task.get_logs(page) for page in range(1, data_source_sync_task.log_page_count + 1)
+        )
+        assert all(f"INFO this is info log {idx}\n\n" in logs for idx in range(10))
+        assert data_source_sync_task.get_logs(data_source_sync_task.log_page_count + 1) == ""
+
 
 class TestTenantSyncTaskContext:
     def test_failed_task(self, tenant_sync_task):
@@ -114,7 +147,7 @@ class TestTenantSyncTaskContext:
 
         assert tenant_sync_task.status == SyncTaskStatus.FAILED
 
-        logs = tenant_sync_task.logs
+        logs = tenant_sync_task.get_logs()
         assert "tenant task config error!" in logs
         assert "ERROR tenant sync task failed! Data modifications in this sync step will be rollback." in logs
 
@@ -125,7 +158,7 @@ class TestTenantSyncTaskContext:
         assert tenant_sync_task.status == SyncTaskStatus.SUCCESS
         assert not tenant_sync_task.has_warning
 
-        logs = tenant_sync_task.logs
+        logs = tenant_sync_task.get_logs()
         assert "INFO tenant sync task started" in logs
         assert "INFO this is info log" in logs
         assert "INFO tenant sync task success!" in logs
@@ -136,14 +169,14 @@ class TestTenantSyncTaskContext:
 
         assert tenant_sync_task.status == SyncTaskStatus.SUCCESS
         assert tenant_sync_task.has_warning
-        assert "this is warning log" in tenant_sync_task.logs
+        assert "this is warning log" in tenant_sync_task.get_logs()
 
     def test_with_records(self, default_tenant, tenant_sync_task, full_local_data_source):
         with TenantSyncTaskContext(tenant_sync_task) as ctx:
             TenantDepartmentSyncer(ctx, full_local_data_source, default_tenant).sync()
             TenantUserSyncer(ctx, full_local_data_source, default_tenant).sync()
 
-        assert tenant_sync_task.logs != ""
+        assert tenant_sync_task.get_logs() != ""
         assert tenant_sync_task.status == SyncTaskStatus.SUCCESS
         assert TenantDepartmentChangeLog.objects.filter(task=tenant_sync_task).count() == 9  # noqa: PLR2004
         assert TenantUserChangeLog.objects.filter(task=tenant_sync_task).count() == 11  # noqa: PLR2004
@@ -254,3 +254,28 @@ class TestDataSourceUserConverter:
 
         with pytest.raises(ValueError, match="not subset of"):
             DataSourceUserConverter(bare_local_data_source, logger).convert(raw_zhangsan)
+
+    def test_convert_with_compiled_plan(
+        self, bare_local_data_source, tenant_user_custom_fields, logger, django_assert_num_queries
+    ):
+        converter = DataSourceUserConverter(bare_local_data_source, logger)
+        raw_users = [
+            RawDataSourceUser(
+                code=f"user-{idx}",
+                properties={"username": f"user-{idx}", "full_name": f"用户{idx}", "age": str(idx), "gender": "女"},
+                leaders=[],
+                departments=[],
+            )
+            for idx in range(3)
+        ]
+
+        assert converter.convert(raw_users[0]).extras["age"] == 0
+        plan = converter._plan
+
+        # 转换计划只构建一次，后续转换不会再查询自定义字段
+        with django_assert_num_queries(0):
+            users = [converter.convert(u) for u in raw_users[1:]]
+
+        assert converter._plan is plan
+        assert [u.extras["age"] for u in users] == [1, 2]
+        assert all(u.extras["gender"] == "female" for u in users)
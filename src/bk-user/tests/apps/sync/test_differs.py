@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from types import SimpleNamespace
+
+from bkuser.apps.sync.constants import SyncOperation
+from bkuser.apps.sync.differs import SyncDiffCollector, diff_model_fields
+
+
+class TestSyncDiffCollector:
+    def test_add(self):
+        differ = SyncDiffCollector()
+        differ.max_sample_size = 2
+        for idx in range(5):
+            differ.add(SyncOperation.CREATE, f"code_{idx}", f"user_{idx}")
+        differ.add(SyncOperation.UPDATE, "code_0", "user_0", {"email": ("a@m.com", "b@m.com")})
+
+        summary = differ.to_dict()
+        assert summary["counts"] == {"create": 5, "update": 1, "delete": 0}
+        assert summary["changed_field_counts"] == {"email": 1}
+        # 超过样例数量上限的变更数据只计数，不保留样例
+        assert summary["samples"]["create"] == [
+            {"code": "code_0", "name": "user_0"},
+            {"code": "code_1", "name": "user_1"},
+        ]
+        assert summary["samples"]["update"] == [
+            {"code": "code_0", "name": "user_0", "changed_fields": {"email": ["a@m.com", "b@m.com"]}}
+        ]
+
+
+def test_diff_model_fields():
+    current = SimpleNamespace(name="张三", email="a@m.com", extras={"age": 18, "gender": "male"})
+    target = SimpleNamespace(name="张三", email="b@m.com", extras={"age": 19, "region": "china"})
+
+    assert diff_model_fields(["name", "email", "extras"], current, target) == {
+        "email": ("a@m.com", "b@m.com"),
+        "extras.age": (18, 19),
+        "extras.gender": ("male", None),
+        "extras.region": (None, "china"),
+    }
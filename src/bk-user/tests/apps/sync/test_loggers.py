@@ -43,3 +43,26 @@ class TestTaskLogger:
 
         logger.warning("this is warning log")
         assert logger.has_warning
+
+    def test_truncate(self):
+        logger = TaskLogger()
+        logger.max_size = 50
+        logger.tail_size = 30
+        for idx in range(10):
+            logger.info("log %d", idx)
+
+        # 保留开头 & 末尾的日志，中间部分被截断
+        assert list(logger.iter_chunks(chunk_size=24)) == [
+            "INFO log 0\n\nINFO log 1\n\n",
+            "INFO log 2\n\nINFO log 3\n\n",
+            "...... 4 logs truncated ......\n\nINFO log 8\n\nINFO log 9\n\n",
+        ]
+
+    def test_echo(self):
+        echoed = []
+        logger = TaskLogger(echo=echoed.append)
+        logger.info("this is info log")
+        logger.warning("this is warning log")
+
+        assert echoed == ["INFO this is info log", "WARNING this is warning log"]
+        assert logger.logs == "INFO this is info log\n\nWARNING this is warning log\n\n"
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import pytest
+from bkuser.apps.sync.metrics import SyncTaskMetrics
+
+pytestmark = pytest.mark.django_db
+
+
+class TestSyncTaskMetrics:
+    def test_phases(self, data_source_sync_task):
+        metrics = SyncTaskMetrics(data_source_sync_task, task_type="data_source", plugin_id="local")
+        with metrics.phase("users"):
+            # 同名阶段多次执行时，耗时累加
+            for _ in metrics.timed_iter("fetch", range(3)):
+                with metrics.phase("convert"):
+                    pass
+
+        assert set(metrics.phases.keys()) == {"users", "users.fetch", "users.convert"}
+        assert metrics.phases["users"] >= metrics.phases["users.fetch"] + metrics.phases["users.convert"]
+
+    def test_save(self, data_source_sync_task):
+        metrics = SyncTaskMetrics(data_source_sync_task, task_type="data_source", plugin_id="local")
+        with metrics.phase("users"):
+            pass
+        metrics.set_rows("user", "create", 10)
+        metrics.save()
+
+        data_source_sync_task.refresh_from_db()
+        assert set(data_source_sync_task.extras["metrics"].keys()) == {"phases", "rows", "peak_rss_mb"}
+        assert data_source_sync_task.extras["metrics"]["rows"] == {"user": {"create": 10}}
+
+    def test_peak_rss_includes_transient_memory(self, data_source_sync_task):
+        metrics = SyncTaskMetrics(data_source_sync_task, task_type="data_source", plugin_id="local")
+        before = metrics.peak_rss
+        with metrics.phase("users"):
+            # 阶段内的瞬时内存占用，在阶段结束前已释放，也需要计入峰值
+            data = b"x" * (64 * 1024 * 1024)
+            del data
+
+        assert metrics.peak_rss - before >= 48 * 1024 * 1024
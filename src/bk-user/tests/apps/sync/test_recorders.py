@@ -36,3 +36,20 @@ class TestChangeLogRecorder:
 
         assert len(recorder.get(operation=SyncOperation.CREATE, type=DataSourceSyncObjectType.USER)) == len(users) * 2
         assert recorder.get(operation=SyncOperation.CREATE, type=DataSourceSyncObjectType.DEPARTMENT) == departments
+
+    def test_flush(self, full_general_data_source):
+        users = list(DataSourceUser.objects.filter(data_source=full_general_data_source))
+        flushed = []
+
+        recorder = ChangeLogRecorder(flusher=lambda op, type, items: flushed.append((op, type, items)), flush_size=5)
+        recorder.add(operation=SyncOperation.CREATE, type=DataSourceSyncObjectType.USER, items=users[:3])
+        assert not flushed
+
+        recorder.add(operation=SyncOperation.CREATE, type=DataSourceSyncObjectType.USER, items=users[3:6])
+        assert flushed == [(SyncOperation.CREATE, DataSourceSyncObjectType.USER, users[:6])]
+        assert recorder.get(operation=SyncOperation.CREATE, type=DataSourceSyncObjectType.USER) == []
+
+        recorder.add(operation=SyncOperation.DELETE, type=DataSourceSyncObjectType.USER, items=users[6:7])
+        recorder.flush()
+        assert flushed[-1] == (SyncOperation.DELETE, DataSourceSyncObjectType.USER, users[6:7])
+        assert recorder.count(operation=SyncOperation.CREATE, type=DataSourceSyncObjectType.USER) == 6  # noqa: PLR2004
@@ -16,9 +16,11 @@
 # to the current version of the project delivered to anyone in the future.
 
 import pytest
+from bkuser.apps.data_source.models import DataSourceUser
 from bkuser.apps.sync.constants import SyncTaskStatus
 from bkuser.apps.sync.tasks import sync_data_source
 from bkuser.apps.sync.workbook_temp_store import WorkbookTempStore
+from django.conf import settings
 
 pytestmark = pytest.mark.django_db
 
@@ -35,6 +37,18 @@ class TestSyncDataSource:
         data_source_sync_task.refresh_from_db()
         assert data_source_sync_task.status == SyncTaskStatus.SUCCESS
 
+    def test_success_with_raw_data(self, data_source_sync_task):
+        task_id = data_source_sync_task.id
+        storage = WorkbookTempStore()
+        temporary_storage_id = storage.save_raw((settings.BASE_DIR / "tests/assets/fake_users.csv").read_bytes())
+
+        plugin_init_extra_kwargs = {"temporary_storage_id": temporary_storage_id, "file_format": "csv"}
+        sync_data_source(task_id, plugin_init_extra_kwargs)
+
+        data_source_sync_task.refresh_from_db()
+        assert data_source_sync_task.status == SyncTaskStatus.SUCCESS
+        assert DataSourceUser.objects.filter(data_source=data_source_sync_task.data_source).count() == 12  # noqa: PLR2004
+
     def test_file_not_found(self, data_source_sync_task):
         task_id = data_source_sync_task.id
         temporary_storage_id = "non_existing_key"
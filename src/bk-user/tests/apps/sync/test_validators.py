@@ -82,3 +82,31 @@ class TestDataSourceUserExtrasUniqueValidator:
 
         with pytest.raises(ValueError, match="duplicate unique values found"):
             DataSourceUserExtrasUniqueValidator(random_ds, logger).validate()
+
+    def test_validate_with_duplicate_unique_null_value(
+        self, random_tenant, random_ds, user_lisi, user_wangwu, logger, tenant_user_custom_field
+    ):
+        # 空值（非必填字段）不参与唯一性校验
+        DataSourceUser.objects.filter(id__in=[user_lisi.id, user_wangwu.id]).update(extras={"age": None})
+        DataSourceUser.objects.create(data_source=random_ds, username="zhaoliu", full_name="赵六", extras={})
+
+        DataSourceUserExtrasUniqueValidator(random_ds, logger).validate()
+
+    def test_validate_with_user_codes(
+        self, random_tenant, random_ds, user_lisi, user_wangwu, logger, tenant_user_custom_field
+    ):
+        # 存量数据中已有冲突，但本次同步涉及的用户没有冲突
+        user_lisi.extras = {"age": 18}
+        user_lisi.save()
+        zhaoliu = DataSourceUser.objects.create(
+            data_source=random_ds, username="zhaoliu", full_name="赵六", extras={"age": 30}
+        )
+
+        validator = DataSourceUserExtrasUniqueValidator(random_ds, logger)
+        validator.validate(user_codes=[zhaoliu.code])
+        validator.validate(user_codes=[])
+        assert not validator.has_duplicate_unique_value
+
+        # 本次同步涉及的用户与存量用户冲突
+        with pytest.raises(ValueError, match="duplicate unique values found"):
+            validator.validate(user_codes=[zhaoliu.code, user_lisi.code])
@@ -131,6 +131,83 @@ class TestTenantUserIdGenerator:
         assert len(generator.tenant_user_id_map) == 0
         assert TenantUserIDRecord.objects.filter(data_source=full_local_data_source).count() == 2
 
+    @pytest.mark.parametrize("prepare_batch", [True, False])
+    def test_gen_batch_nanoid(self, random_tenant, full_local_data_source, zhangsan, lisi, prepare_batch):
+        nanoid = generate_nanoid()
+        TenantUserIDRecord.objects.create(
+            tenant_id=random_tenant.id, data_source=full_local_data_source, code=zhangsan.code, tenant_user_id=nanoid
+        )
+
+        generator = TenantUserIDGenerator(random_tenant.id, full_local_data_source, prepare_batch=prepare_batch)
+        user_id_map = generator.gen_batch([zhangsan, lisi])
+        assert user_id_map[zhangsan.code] == nanoid
+        assert len(user_id_map[lisi.code]) == 16
+        # 新生成的 ID 需要被批量记录，后续可复用
+        record = TenantUserIDRecord.objects.get(
+            tenant_id=random_tenant.id, data_source=full_local_data_source, code=lisi.code
+        )
+        assert record.tenant_user_id == user_id_map[lisi.code]
+        assert generator.gen_batch([zhangsan, lisi]) == user_id_map
+
+    def test_gen_batch_uuid(self, random_tenant, full_local_data_source, zhangsan, lisi, uuid_config):
+        user_id_map = TenantUserIDGenerator(random_tenant.id, full_local_data_source).gen_batch([zhangsan, lisi])
+        assert all(len(user_id) == 32 for user_id in user_id_map.values())
+        assert TenantUserIDRecord.objects.filter(data_source=full_local_data_source).count() == 2
+
+    def test_gen_batch_by_username(self, random_tenant, full_local_data_source, zhangsan, lisi):
+        TenantUserIDGenerateConfig.objects.create(
+            data_source=full_local_data_source, target_tenant=random_tenant, rule=TenantUserIdRuleEnum.USERNAME
+        )
+        user_id_map = TenantUserIDGenerator(random_tenant.id, full_local_data_source).gen_batch([zhangsan, lisi])
+        assert user_id_map == {zhangsan.code: "zhangsan", lisi.code: "lisi"}
+        assert not TenantUserIDRecord.objects.filter(data_source=full_local_data_source).exists()
+
+    def test_gen_batch_with_conflict_records(self, random_tenant, full_local_data_source, zhangsan, lisi):
+        generator = TenantUserIDGenerator(random_tenant.id, full_local_data_source, prepare_batch=True)
+        # 预加载后，其他进程写入了记录，应以 DB 中的记录为准
+        nanoid = generate_nanoid()
+        TenantUserIDRecord.objects.create(
+            tenant_id=random_tenant.id, data_source=full_local_data_source, code=zhangsan.code, tenant_user_id=nanoid
+        )
+
+        user_id_map = generator.gen_batch([zhangsan, lisi])
+        assert user_id_map[zhangsan.code] == nanoid
+        assert TenantUserIDRecord.objects.filter(data_source=full_local_data_source).count() == 2
+
+    @pytest.mark.parametrize("prepare_batch", [True, False])
+    def test_gen_batch_with_empty_id_records(
+        self, random_tenant, full_local_data_source, zhangsan, lisi, prepare_batch
+    ):
+        # 存量的脏数据：记录存在，但租户用户 ID 为空
+        TenantUserIDRecord.objects.create(
+            tenant_id=random_tenant.id, data_source=full_local_data_source, code=zhangsan.code, tenant_user_id=""
+        )
+
+        generator = TenantUserIDGenerator(random_tenant.id, full_local_data_source, prepare_batch=prepare_batch)
+        user_id_map = generator.gen_batch([zhangsan, lisi])
+        assert len(user_id_map[zhangsan.code]) == 16
+        assert len(user_id_map[lisi.code]) == 16
+        # 为空的记录会被补充生成的 ID，后续可复用
+        record = TenantUserIDRecord.objects.get(
+            tenant_id=random_tenant.id, data_source=full_local_data_source, code=zhangsan.code
+        )
+        assert record.tenant_user_id == user_id_map[zhangsan.code]
+        assert generator.gen_batch([zhangsan, lisi]) == user_id_map
+
+    @pytest.mark.parametrize("prepare_batch", [True, False])
+    def test_gen_with_empty_id_record(self, random_tenant, full_local_data_source, zhangsan, prepare_batch):
+        TenantUserIDRecord.objects.create(
+            tenant_id=random_tenant.id, data_source=full_local_data_source, code=zhangsan.code, tenant_user_id=""
+        )
+
+        generator = TenantUserIDGenerator(random_tenant.id, full_local_data_source, prepare_batch=prepare_batch)
+        user_id = generator.gen(zhangsan)
+        assert len(user_id) == 16
+        record = TenantUserIDRecord.objects.get(
+            tenant_id=random_tenant.id, data_source=full_local_data_source, code=zhangsan.code
+        )
+        assert record.tenant_user_id == user_id
+
 
 @pytest.fixture
 def company(full_local_data_source) -> DataSourceDepartment:
@@ -180,3 +257,15 @@ class TestTenantDeptIdGenerator:
         assert generator.gen(company) is None
         assert generator.gen(dept_a) is None
         assert len(generator.tenant_dept_id_map) == 0
+
+    @pytest.mark.parametrize("prepare_batch", [True, False])
+    def test_gen_batch(self, random_tenant, full_local_data_source, company, dept_a, prepare_batch):
+        TenantDepartmentIDRecord.objects.create(
+            tenant_id=random_tenant.id,
+            data_source=full_local_data_source,
+            code=company.code,
+            tenant_department_id=102,
+        )
+
+        generator = TenantDeptIDGenerator(random_tenant.id, full_local_data_source, prepare_batch=prepare_batch)
+        assert generator.gen_batch([company, dept_a]) == {company.code: 102, dept_a.code: None}
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import pytest
+from bkuser.apps.data_source.models import DataSourceUser
+from bkuser.apps.tenant.models import TenantUser, TenantUserDisplayNameExpressionConfig
+from bkuser.biz.tenant.display_name import DisplayNameTemplate, TenantUserDisplayNameHandler
+from django.core.cache import caches
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    """在每个测试前清除缓存，避免缓存的方法返回值影响测试结果"""
+    for cache_name in caches:
+        caches[cache_name].clear()
+    yield
+    for cache_name in caches:
+        caches[cache_name].clear()
+
+
+@pytest.mark.usefixtures("_init_tenant_users_depts")
+class TestDisplayNameTemplate:
+    def test_render(self, random_tenant):
+        user = TenantUser.objects.select_related("data_source_user").get(
+            tenant=random_tenant, data_source_user__username="zhangsan"
+        )
+        user.data_source_user.extras["nickname"] = "张三丰"
+
+        template = DisplayNameTemplate(
+            "{username}-{nickname}({full_name})[{not_exists}]",
+            builtin_fields=["username", "full_name"],
+            custom_fields=["nickname"],
+        )
+        assert template.render(user) == "zhangsan-张三丰(张三)[-]"
+
+    def test_render_without_fields(self, random_tenant):
+        user = TenantUser.objects.select_related("data_source_user").filter(tenant=random_tenant).first()
+        assert DisplayNameTemplate("fixed", builtin_fields=[], custom_fields=[]).render(user) == "fixed"
+
+
+@pytest.mark.usefixtures("_init_tenant_users_depts")
+class TestBatchGenerateTenantUserDisplayName:
+    def _generate(self, tenant_id: str):
+        users = list(TenantUser.objects.select_related("data_source_user").filter(tenant_id=tenant_id))
+        return TenantUserDisplayNameHandler.batch_generate_tenant_user_display_name(users)
+
+    def test_user_data_changed(self, random_tenant):
+        zhangsan = TenantUser.objects.get(tenant=random_tenant, data_source_user__username="zhangsan")
+        assert self._generate(random_tenant.id)[zhangsan.id] == "zhangsan(张三)"
+
+        # 展示名不做缓存，用户数据变更（包括不经过 save 的批量更新）后立即生效
+        DataSourceUser.objects.filter(id=zhangsan.data_source_user_id).update(full_name="张三三")
+        assert self._generate(random_tenant.id)[zhangsan.id] == "zhangsan(张三三)"
+
+    def test_config_version_changed(self, random_tenant):
+        zhangsan = TenantUser.objects.get(tenant=random_tenant, data_source_user__username="zhangsan")
+        assert self._generate(random_tenant.id)[zhangsan.id] == "zhangsan(张三)"
+
+        # 表达式变更（版本号递增），配置缓存会被主动删除
+        config = TenantUserDisplayNameExpressionConfig.objects.get(tenant=random_tenant)
+        config.expression = "{full_name}/{username}"
+        config.version += 1
+        config.save()
+
+        assert self._generate(random_tenant.id)[zhangsan.id] == "张三/zhangsan"
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import json
+import threading
+import time
+from unittest import mock
+
+import pytest
+from bkuser.common.cache import (
+    _MISSING,
+    CacheEnum,
+    TwoTierCache,
+    _CacheLoader,
+    _InvalidationListener,
+    _LocalLRUCache,
+    _SoftExpiringValue,
+    cached,
+    start_cache_invalidation_listeners,
+)
+from django.conf import settings
+from django.core.cache import caches
+from django_redis import get_redis_connection
+from prometheus_client import REGISTRY
+
+from tests.test_utils.helpers import generate_random_string
+
+
+def _get_metric(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestCached:
+    def test_hit_and_miss(self):
+        compute = mock.Mock(return_value=1)
+        func = cached(timeout=60)(lambda key: compute(key))
+        namespace = f"{func.__module__}:{func.__name__}"
+
+        key = generate_random_string()
+        assert func(key) == 1
+        assert func(key) == 1
+        assert compute.call_count == 1
+
+        assert _get_metric("bkuser_cache_requests_total", namespace=namespace, result="hit") >= 1
+        assert _get_metric("bkuser_cache_requests_total", namespace=namespace, result="miss") >= 1
+        assert _get_metric("bkuser_cache_recomputes_total", namespace=namespace) >= 1
+
+    def test_cache_none(self):
+        compute = mock.Mock(return_value=None)
+        func = cached(timeout=60)(lambda key: compute(key))
+
+        key = generate_random_string()
+        assert func(key) is None
+        assert func(key) is None
+        # None 值也会被缓存
+        assert compute.call_count == 1
+
+    def test_single_flight(self):
+        def _compute(key):
+            time.sleep(0.3)
+            return key
+
+        compute = mock.Mock(side_effect=_compute)
+        func = cached(timeout=60, single_flight=True)(lambda key: compute(key))
+
+        key = generate_random_string()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(func(key))) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # 并发请求只有一个调用方会重新计算，其他调用方等待其结果
+        assert results == [key] * 5
+        assert compute.call_count == 1
+
+    def test_stale_while_revalidate(self):
+        compute = mock.Mock(return_value="new")
+
+        def stale_func(key):
+            return compute(key)
+
+        func = cached(timeout=60, soft_timeout=30)(stale_func)
+        key = generate_random_string()
+        cache_key = f"auto:{func.__module__}:{func.__name__}:{key}"
+
+        # 未到达软过期时间，直接使用缓存
+        caches[CacheEnum.DEFAULT].set(cache_key, _SoftExpiringValue("old", time.time() + 10), 60)
+        assert func(key) == "old"
+        assert compute.call_count == 0
+
+        # 已软过期，且有其他调用方正在刷新（持有锁），继续使用旧值
+        caches[CacheEnum.DEFAULT].set(cache_key, _SoftExpiringValue("old", time.time() - 1), 60)
+        caches[CacheEnum.DEFAULT].set(f"lock:{cache_key}", "other", 10)
+        assert func(key) == "old"
+        assert compute.call_count == 0
+
+        # 已软过期，且没有其他调用方在刷新，则由当前调用方刷新
+        caches[CacheEnum.DEFAULT].delete(f"lock:{cache_key}")
+        assert func(key) == "new"
+        assert compute.call_count == 1
+        assert func(key) == "new"
+        assert compute.call_count == 1
+
+    @pytest.mark.parametrize("single_flight", [True, False])
+    def test_compute_error(self, single_flight):
+        compute = mock.Mock(side_effect=[ValueError("boom"), 1])
+        func = cached(timeout=60, single_flight=single_flight)(lambda key: compute(key))
+
+        key = generate_random_string()
+        with pytest.raises(ValueError, match="boom"):
+            func(key)
+
+        # 计算异常后锁会被释放，后续调用方可以正常计算
+        assert func(key) == 1
+
+
+class TestCacheLoaderLock:
+    @pytest.mark.parametrize("cache_name", [CacheEnum.DEFAULT, CacheEnum.REDIS, CacheEnum.TWO_TIER])
+    def test_release_only_own_lock(self, cache_name):
+        loader = _CacheLoader(cache_name, "test", 60, None, True)
+        key = generate_random_string()
+
+        lock = loader._acquire_lock(key)
+        assert lock is not None
+        assert loader._acquire_lock(key) is None
+        loader._release_lock(key, lock)
+
+        # 锁（超时后）被其他调用方持有，原持有方再次释放时，不会删除其他调用方的锁
+        other_lock = loader._acquire_lock(key)
+        assert other_lock is not None
+        loader._release_lock(key, lock)
+        assert loader._acquire_lock(key) is None
+
+        loader._release_lock(key, other_lock)
+        assert loader._acquire_lock(key) is not None
+
+    def test_two_tier_lock_without_publish(self):
+        loader = _CacheLoader(CacheEnum.TWO_TIER, "test", 60, None, True)
+        key = generate_random_string()
+
+        # 两级缓存的锁直接使用 Redis 客户端，获取 / 释放锁都不会广播失效消息
+        with mock.patch.object(TwoTierCache, "_publish") as publish:
+            loader._release_lock(key, loader._acquire_lock(key))
+
+        publish.assert_not_called()
+
+
+class TestLocalLRUCache:
+    def test_lru(self):
+        cache = _LocalLRUCache(max_entries=2)
+        cache.set("a", 1, timeout=60)
+        cache.set("b", 2, timeout=60)
+        assert cache.get("a") == 1
+        # 超过最大数量时，淘汰最近最少使用的 b
+        cache.set("c", 3, timeout=60)
+        assert cache.get("b") is _MISSING
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_expired(self):
+        cache = _LocalLRUCache(max_entries=2)
+        cache.set("a", 1, timeout=0)
+        assert cache.get("a") is _MISSING
+
+    def test_copy(self):
+        cache = _LocalLRUCache(max_entries=2)
+        cache.set("a", [1], timeout=60)
+        # 修改读取到的对象，不会影响缓存中的数据
+        cache.get("a").append(2)
+        assert cache.get("a") == [1]
+
+
+class TestTwoTierCache:
+    @pytest.fixture
+    def two_tier_cache(self):
+        cache = caches[CacheEnum.TWO_TIER]
+        # 订阅失效消息成功后，才会使用进程内缓存
+        assert cache._listener.subscribed.wait(3)
+        return cache
+
+    def test_get_from_local(self, two_tier_cache):
+        key = generate_random_string()
+        two_tier_cache.set(key, "value", 60)
+        assert caches[CacheEnum.REDIS].get(key) == "value"
+
+        # 直接删除 Redis 中的数据（不经过两级缓存），仍然可以从进程内缓存中读取到
+        caches[CacheEnum.REDIS].delete(key)
+        assert two_tier_cache.get(key) == "value"
+
+        # 通过两级缓存删除，则进程内缓存也会被删除
+        two_tier_cache.delete(key)
+        assert two_tier_cache.get(key) is None
+
+    def test_get_from_redis(self, two_tier_cache):
+        key = generate_random_string()
+        caches[CacheEnum.REDIS].set(key, "value", 60)
+        assert two_tier_cache.get(key) == "value"
+        assert two_tier_cache.get_many([key, "not_exists"]) == {key: "value"}
+
+        # Redis 中的数据已回填到进程内缓存
+        caches[CacheEnum.REDIS].delete(key)
+        assert two_tier_cache.get(key) == "value"
+
+    def test_invalidate_by_other_process(self, two_tier_cache):
+        key = generate_random_string()
+        two_tier_cache.set(key, "value", 60)
+        caches[CacheEnum.REDIS].delete(key)
+        assert two_tier_cache.get(key) == "value"
+
+        # 模拟其他进程删除缓存后广播的失效消息
+        msg = {"origin": "other", "keys": [caches[CacheEnum.REDIS].make_key(key)], "clear": False}
+        get_redis_connection(CacheEnum.REDIS).publish(
+            settings.CACHES["two_tier"]["OPTIONS"]["CHANNEL"], json.dumps(msg)
+        )
+
+        deadline = time.monotonic() + 3
+        while two_tier_cache.get(key) is not None and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        assert two_tier_cache.get(key) is None
+
+    def test_cached_invalidate(self):
+        compute = mock.Mock(side_effect=[1, 2])
+
+        @cached(cache_name=CacheEnum.TWO_TIER, timeout=60)
+        def func(key):
+            return compute(key)
+
+        key = generate_random_string()
+        assert func(key) == 1
+        assert func(key) == 1
+
+        func.invalidate(key)
+        assert func(key) == 2  # noqa: PLR2004
+
+    def test_bypass_local_when_not_subscribed(self, two_tier_cache):
+        key = generate_random_string()
+        two_tier_cache._listener.subscribed.clear()
+        try:
+            # 订阅未成功（如连接断开）时，可能遗漏失效消息，不使用进程内缓存，直接读写 Redis
+            two_tier_cache.set(key, "value", 60)
+            assert two_tier_cache.get(key) == "value"
+            caches[CacheEnum.REDIS].delete(key)
+            assert two_tier_cache.get(key) is None
+            assert two_tier_cache.get_many([key]) == {}
+        finally:
+            two_tier_cache._listener.subscribed.set()
+
+    def test_clear(self, two_tier_cache):
+        key = generate_random_string()
+        two_tier_cache.set(key, "value", 60)
+        caches[CacheEnum.REDIS].set(key, "new_value", 60)
+
+        # 只清空进程内缓存，不会清空 Redis
+        two_tier_cache.clear()
+        assert two_tier_cache.get(key) == "new_value"
+
+    def test_start_cache_invalidation_listeners(self):
+        with mock.patch.object(_InvalidationListener, "ensure_started") as ensure_started:
+            start_cache_invalidation_listeners()
+
+        ensure_started.assert_called_once()
+
+    @pytest.mark.parametrize("method", ["get", "get_many"])
+    def test_not_backfill_invalidated_value(self, two_tier_cache, method):
+        key = generate_random_string()
+        caches[CacheEnum.REDIS].set(key, "old", 60)
+        redis_cache = caches[CacheEnum.REDIS]
+        origin_read = getattr(type(redis_cache), method)
+
+        def read_then_invalidated(self, *args, **kwargs):
+            value = origin_read(self, *args, **kwargs)
+            # 读取 Redis 后、回填一级缓存前，其他进程变更了数据并广播失效消息
+            caches[CacheEnum.REDIS].set(key, "new", 60)
+            msg = {"origin": "other", "keys": [caches[CacheEnum.REDIS].make_key(key)], "clear": False}
+            _InvalidationListener._handle(json.dumps(msg).encode())
+            return value
+
+        with mock.patch.object(type(redis_cache), method, read_then_invalidated):
+            getattr(two_tier_cache, method)(key if method == "get" else [key])
+
+        # 已失效的旧数据不会被回填到一级缓存中
+        assert two_tier_cache.get(key) == "new"
@@ -23,6 +23,8 @@ from bkuser.apps.sync.handlers import (
 )
 from bkuser.apps.tenant.models import Tenant
 from bkuser.auth.models import User
+from bkuser.common.cache import CacheEnum
+from django.core.cache import caches
 from django.db.models.signals import post_save
 
 from tests.fixtures.data_source import (  # noqa: F401
@@ -48,6 +50,14 @@ post_save.disconnect(set_data_source_sync_periodic_task, sender=DataSource)
 post_save.disconnect(sync_identity_infos_and_notify_after_modify_data_source, sender=DataSource)
 
 
+@pytest.fixture(autouse=True)
+def _clear_redis_cache():
+    """Redis 缓存（如组织树快照）在测试用例间共享，而数据源 / 部门 ID 可能复用，需要在每个测试前清理"""
+    # 两级缓存清理时，只会清理进程内缓存，Redis 缓存需要单独清理
+    caches[CacheEnum.REDIS].clear()
+    caches[CacheEnum.TWO_TIER].clear()
+
+
 @pytest.fixture
 def default_tenant() -> Tenant:
     """初始化默认租户"""
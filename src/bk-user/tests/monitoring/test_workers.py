@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from unittest import mock
+
+from bkuser.monitoring.metrics.workers import start_worker_metrics_server
+from prometheus_client import REGISTRY, CollectorRegistry
+
+
+class TestStartWorkerMetricsServer:
+    def test_multiprocess(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+        with mock.patch("bkuser.monitoring.metrics.workers.start_http_server") as start_http_server:
+            start_worker_metrics_server(9100)
+
+        # 多进程模式下，使用独立的 registry 汇总各子进程写入 PROMETHEUS_MULTIPROC_DIR 的指标
+        registry = start_http_server.call_args.kwargs["registry"]
+        assert start_http_server.call_args.args == (9100,)
+        assert isinstance(registry, CollectorRegistry)
+        assert registry is not REGISTRY
+
+    def test_single_process(self, monkeypatch):
+        monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+        with mock.patch("bkuser.monitoring.metrics.workers.start_http_server") as start_http_server:
+            start_worker_metrics_server(9100)
+
+        assert start_http_server.call_args.kwargs["registry"] is REGISTRY
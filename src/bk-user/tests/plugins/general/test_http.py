@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from unittest import mock
+
+import pytest
+from bkuser.plugins.general.constants import PageSizeEnum
+from bkuser.plugins.general.exceptions import RequestApiError
+from bkuser.plugins.general.http import fetch_all_data
+
+TOTAL_COUNT = 1050
+
+
+def _mocked_session_get(session, url, headers, params, timeout):
+    page, page_size = params["page"], params["page_size"]
+    start, end = (page - 1) * page_size, min(page * page_size, TOTAL_COUNT)
+
+    resp = mock.Mock(ok=True)
+    resp.json.return_value = {"count": TOTAL_COUNT, "results": [{"id": str(i)} for i in range(start, end)]}
+    return resp
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 4])
+@mock.patch("requests.Session.get", new=_mocked_session_get)
+def test_fetch_all_data(max_concurrency):
+    items = fetch_all_data("http://bk.example.com/users", {}, {}, PageSizeEnum.SIZE_100, 10, 0, max_concurrency)
+    # 并发拉取时，返回的数据顺序与串行拉取时保持一致
+    assert [item["id"] for item in items] == [str(i) for i in range(TOTAL_COUNT)]
+
+
+@mock.patch("bkuser.plugins.general.http.MAX_TOTAL_COUNT", new=500)
+@mock.patch("requests.Session.get", new=_mocked_session_get)
+def test_fetch_all_data_exceed_max_count():
+    items = fetch_all_data("http://bk.example.com/users", {}, {}, PageSizeEnum.SIZE_100, 10, 0, 4)
+    assert len(items) == 500  # noqa: PLR2004
+
+
+def test_fetch_all_data_with_failed_page():
+    def _get(session, url, headers, params, timeout):
+        if params["page"] == 3:  # noqa: PLR2004
+            return mock.Mock(ok=False, status_code=500, content=b"error")
+
+        return _mocked_session_get(session, url, headers, params, timeout)
+
+    with mock.patch("requests.Session.get", new=_get), pytest.raises(RequestApiError):
+        fetch_all_data("http://bk.example.com/users", {}, {}, PageSizeEnum.SIZE_100, 10, 0, 4)
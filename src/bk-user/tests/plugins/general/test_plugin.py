@@ -119,6 +119,57 @@ class TestGeneralDataSourcePlugin:
         plugin = GeneralDataSourcePlugin(general_ds_cfg, logger)
         assert len(plugin.fetch_users()) == 3  # noqa: PLR2004
 
+    @mock.patch(
+        "bkuser.plugins.general.plugin.iter_all_data",
+        return_value=iter(
+            [
+                {"id": "company", "name": "总公司", "parent": None},
+                {"id": "dept_a", "name": "部门A", "parent": "company", "extras": {"region": "CN"}},
+            ]
+        ),
+    )
+    def test_iter_departments(self, general_ds_cfg, logger):
+        plugin = GeneralDataSourcePlugin(general_ds_cfg, logger)
+        assert [d.code for d in plugin.iter_departments()] == ["company", "dept_a"]
+
+    def test_iter_departments_with_delta_cursor(self, general_ds_cfg, logger):
+        general_ds_cfg.server_config.enable_delta_fetch = True
+        plugin = GeneralDataSourcePlugin(general_ds_cfg, logger)
+        plugin.set_delta_cursor({"departments": "100", "users": "200"})
+
+        req_params = []
+
+        def _mocked_iter_all_data(url, headers, params, *args):
+            req_params.append(params)
+            on_page = args[-1]
+            on_page({"count": 2, "cursor": "101", "deleted": ["dept_x"], "results": []})
+            yield {"id": "company", "name": "总公司", "parent": None}
+            on_page({"count": 2, "cursor": "102", "deleted": [1024], "results": []})
+            yield {"id": "dept_a", "name": "部门A", "parent": "company"}
+
+        with mock.patch("bkuser.plugins.general.plugin.iter_all_data", new=_mocked_iter_all_data):
+            assert [d.code for d in plugin.iter_departments()] == ["company", "dept_a"]
+
+        assert req_params[0]["cursor"] == "100"
+
+        result = plugin.get_delta_result()
+        assert result.is_delta
+        # 以第一页的游标为准
+        assert result.cursor == {"departments": "101"}
+        assert result.deleted_department_codes == {"dept_x", "1024"}
+        assert not result.deleted_user_codes
+
+    def test_set_incomplete_delta_cursor(self, general_ds_cfg, logger):
+        general_ds_cfg.server_config.enable_delta_fetch = True
+        plugin = GeneralDataSourcePlugin(general_ds_cfg, logger)
+        plugin.set_delta_cursor({"departments": "100"})
+        assert not plugin.get_delta_result().is_delta
+
+    def test_delta_fetch_disabled(self, general_ds_cfg, logger):
+        plugin = GeneralDataSourcePlugin(general_ds_cfg, logger)
+        plugin.set_delta_cursor({"departments": "100", "users": "200"})
+        assert plugin.get_delta_result() is None
+
     @mock.patch("bkuser.plugins.general.plugin.fetch_first_item", new=_mocked_fetch_first_item)
     def test_test_connection(self, general_ds_cfg, logger):
         result = GeneralDataSourcePlugin(general_ds_cfg, logger).test_connection()
@@ -15,7 +15,7 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-from typing import Dict, List
+from typing import Any, Dict, List
 from unittest import mock
 
 import pytest
@@ -260,7 +260,7 @@ inet_org_person_data = [
 ]
 
 
-def _mocked_paged_search_accumulator(*args, **kwargs) -> List[Dict]:
+def _mocked_paged_search_generator(*args, **kwargs) -> List[Dict]:
     """测试用函数，用于屏蔽 LDAP 服务"""
 
     search_base = kwargs["search_base"]
@@ -279,9 +279,16 @@ def _mocked_paged_search_accumulator(*args, **kwargs) -> List[Dict]:
 
 
 class MockedLDAPConnection:
+    # rootDSE 中的属性，如 highestCommittedUSN
+    root_dse: Dict[str, Any] = {}
+
     def __init__(self, *args, **kwargs):
         pass
 
+    def search(self, *args, **kwargs):
+        attrs = {attr: self.root_dse[attr] for attr in kwargs["attributes"] if attr in self.root_dse}
+        return True, {}, [{"dn": "", "attributes": attrs}], None
+
     def bind(self, *args, **kwargs):
         pass
 
@@ -293,8 +300,8 @@ class MockedLDAPConnection:
 def _mock_ldap_client():
     with (
         mock.patch(
-            "bkuser.plugins.ldap.client.paged_search_accumulator",
-            new=_mocked_paged_search_accumulator,
+            "bkuser.plugins.ldap.client.paged_search_generator",
+            new=_mocked_paged_search_generator,
         ),
         mock.patch(
             "bkuser.plugins.ldap.client.LDAPClient._gen_conn",
@@ -15,11 +15,17 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import datetime
+import re
 from copy import deepcopy
+from typing import Dict
 
 import pytest
+from bkuser.plugins.ldap.constants import ChangeTrackingAttribute
+from bkuser.plugins.ldap.models import IncrementalSyncConfig
 from bkuser.plugins.ldap.plugin import LDAPDataSourcePlugin
 from bkuser.plugins.models import RawDataSourceDepartment, RawDataSourceUser
+from django.utils import timezone
 
 from tests.plugins.ldap import conftest as ldap_conftest
 
@@ -134,6 +140,27 @@ class TestLDAPDataSourcePluginMultipleBaseDNs:
         assert len(users) == 5  # noqa: PLR2004
 
 
+class TestLDAPDataSourcePluginConcurrentSearch:
+    @pytest.mark.usefixtures("_mock_ldap_client")
+    def test_get_users(self, ldap_ds_cfg, logger):
+        ldap_ds_cfg.data_config.user_search_base_dns = [
+            "ou=center_ab,ou=dept_a,ou=company,dc=bk,dc=example,dc=com",
+            "ou=dept_b,ou=company,dc=bk,dc=example,dc=com",
+            "ou=center_aa,ou=dept_a,ou=company,dc=bk,dc=example,dc=com",
+        ]
+        ldap_ds_cfg.server_config.max_concurrency = 1
+        plugin = LDAPDataSourcePlugin(ldap_ds_cfg, logger)
+        plugin.fetch_departments()
+        expected_users = plugin.fetch_users()
+
+        # 并发查询多个搜索根目录，结果（包括顺序）与串行查询一致
+        ldap_ds_cfg.server_config.max_concurrency = 2
+        plugin = LDAPDataSourcePlugin(ldap_ds_cfg, logger)
+        plugin.fetch_departments()
+        assert plugin.fetch_users() == expected_users
+        assert len(expected_users) == 7  # noqa: PLR2004
+
+
 class TestLDAPDataSourcePluginUUIDAttribute:
     @staticmethod
     def _replace_entry_uuid_with_object_guid(records):
@@ -168,3 +195,154 @@ class TestLDAPDataSourcePluginUUIDAttribute:
 
         assert departments[0].code == "97aaa370-0e9d-103f-8e7f-fb1e46baa127"
         assert users[0].code == "97b9bdce-0e9d-103f-8e8c-fb1e46baa127"
+
+
+class TestLDAPDataSourcePluginIncrementalSync:
+    # 最后一个用户（liuqi）的 uSNChanged 最大
+    base_usn = 95
+
+    @pytest.fixture(autouse=True)
+    def _mock_usn_changed(self, monkeypatch, _mock_ldap_client):
+        data = deepcopy(ldap_conftest.inet_org_person_data)
+        for idx, item in enumerate(data):
+            item["attributes"]["uSNChanged"] = self.base_usn + idx
+
+        monkeypatch.setattr(ldap_conftest, "inet_org_person_data", data)
+
+        def _mocked_paged_search_generator(*args, **kwargs):
+            results = ldap_conftest._mocked_paged_search_generator(*args, **kwargs)
+            if match := re.search(r"\(uSNChanged>=(\d+)\)", kwargs["search_filter"]):
+                return [r for r in results if r["attributes"]["uSNChanged"] >= int(match.group(1))]
+
+            return results
+
+        monkeypatch.setattr("bkuser.plugins.ldap.client.paged_search_generator", _mocked_paged_search_generator)
+        # 查询前服务器已提交的最大 USN
+        monkeypatch.setattr(
+            ldap_conftest.MockedLDAPConnection, "root_dse", {"highestCommittedUSN": str(self.base_usn + 9)}
+        )
+
+    @pytest.fixture
+    def ldap_ds_cfg(self, ldap_ds_cfg):
+        ldap_ds_cfg.incremental_sync_config = IncrementalSyncConfig(
+            enabled=True, change_tracking_attribute=ChangeTrackingAttribute.USN_CHANGED
+        )
+        return ldap_ds_cfg
+
+    def _gen_cursor(self, usn: int, full_synced_at: datetime.datetime) -> Dict[str, str]:
+        return {
+            "users": str(usn),
+            "change_tracking_attribute": "uSNChanged",
+            "full_synced_at": full_synced_at.isoformat(),
+        }
+
+    def test_fetch_all_without_cursor(self, ldap_ds_cfg, logger):
+        plugin = LDAPDataSourcePlugin(ldap_ds_cfg, logger)
+        plugin.fetch_departments()
+        users = plugin.fetch_users()
+        assert len(users) == 10  # noqa: PLR2004
+        # 变更追踪属性不会作为用户属性
+        assert all("uSNChanged" not in u.properties for u in users)
+
+        result = plugin.get_delta_result()
+        assert not result.is_delta
+        # 高水位按数值大小比较（104 > 99）
+        assert result.cursor["users"] == str(self.base_usn + 9)
+        assert result.cursor["change_tracking_attribute"] == "uSNChanged"
+
+    def test_fetch_changed_users(self, ldap_ds_cfg, logger):
+        full_synced_at = timezone.now() - datetime.timedelta(hours=1)
+
+        plugin = LDAPDataSourcePlugin(ldap_ds_cfg, logger)
+        plugin.set_delta_cursor(self._gen_cursor(self.base_usn + 8, full_synced_at))
+        plugin.fetch_departments()
+        users = plugin.fetch_users()
+
+        # 只拉取了变更过的用户（zhangsan，liuqi）
+        assert [u.properties["uid"] for u in users] == ["zhangsan", "liuqi"]
+        # liuqi 的 leader（zhaoliu）没有变更过，需要单独查询
+        assert users[1].leaders == ["97b48c00-0e9d-103f-8e85-fb1e46baa127"]
+        assert users[1].departments
+
+        result = plugin.get_delta_result()
+        assert result.is_delta
+        assert result.cursor["users"] == str(self.base_usn + 9)
+        # 增量拉取时，沿用上次全量拉取的时间
+        assert result.cursor["full_synced_at"] == full_synced_at.isoformat()
+
+    def test_users_changed_during_paged_search(self, monkeypatch, ldap_ds_cfg, logger):
+        data = ldap_conftest.inet_org_person_data
+        first_user, last_user = data[0], data[-1]
+
+        def _changing_paged_search_generator(*args, **kwargs):
+            for r in ldap_conftest._mocked_paged_search_generator(*args, **kwargs):
+                yield r
+                # 第一个用户返回后再次变更，随后最后一个用户也发生变更（在后续页中返回，USN 更大）
+                if r is first_user:
+                    first_user["attributes"]["uSNChanged"] = self.base_usn + 10
+                    last_user["attributes"]["uSNChanged"] = self.base_usn + 11
+
+        monkeypatch.setattr("bkuser.plugins.ldap.client.paged_search_generator", _changing_paged_search_generator)
+
+        plugin = LDAPDataSourcePlugin(ldap_ds_cfg, logger)
+        plugin.fetch_departments()
+        plugin.fetch_users()
+
+        # 高水位为查询前的 USN，而不是拉取到的最大 USN（base_usn + 11），第一个用户的变更在下次增量拉取时不会被遗漏
+        cursor = plugin.get_delta_result().cursor
+        assert cursor["users"] == str(self.base_usn + 9)
+        changed_since = int(cursor["users"])
+        assert first_user["attributes"]["uSNChanged"] >= changed_since
+
+    def test_fetch_current_change_mark_failed(self, monkeypatch, ldap_ds_cfg, logger):
+        full_synced_at = timezone.now() - datetime.timedelta(hours=1)
+        monkeypatch.setattr(ldap_conftest.MockedLDAPConnection, "root_dse", {})
+
+        plugin = LDAPDataSourcePlugin(ldap_ds_cfg, logger)
+        plugin.set_delta_cursor(self._gen_cursor(self.base_usn + 8, full_synced_at))
+        plugin.fetch_departments()
+        plugin.fetch_users()
+
+        # 获取不到查询前的高水位时，沿用原有的游标
+        assert plugin.get_delta_result().cursor["users"] == str(self.base_usn + 8)
+
+    def test_modify_timestamp_without_server_time(self, ldap_ds_cfg, logger):
+        ldap_ds_cfg.incremental_sync_config.change_tracking_attribute = ChangeTrackingAttribute.MODIFY_TIMESTAMP
+        started_at = timezone.now()
+
+        plugin = LDAPDataSourcePlugin(ldap_ds_cfg, logger)
+        plugin.fetch_departments()
+        plugin.fetch_users()
+
+        # 服务器不提供当前时间时，使用查询前的本地时间（减去时钟偏差）作为高水位
+        def _to_mark(dt: datetime.datetime) -> str:
+            return (dt - plugin.clock_skew_tolerance).astimezone(datetime.timezone.utc).strftime("%Y%m%d%H%M%SZ")
+
+        assert _to_mark(started_at) <= plugin.get_delta_result().cursor["users"] <= _to_mark(timezone.now())
+
+    def test_fetch_all_for_reconciliation(self, ldap_ds_cfg, logger):
+        full_synced_at = timezone.now() - datetime.timedelta(hours=25)
+
+        plugin = LDAPDataSourcePlugin(ldap_ds_cfg, logger)
+        plugin.set_delta_cursor(self._gen_cursor(self.base_usn + 8, full_synced_at))
+        plugin.fetch_departments()
+        assert len(plugin.fetch_users()) == 10  # noqa: PLR2004
+
+        result = plugin.get_delta_result()
+        assert not result.is_delta
+        assert result.cursor["full_synced_at"] != full_synced_at.isoformat()
+
+    def test_set_cursor_with_other_attribute(self, ldap_ds_cfg, logger):
+        cursor = self._gen_cursor(self.base_usn, timezone.now())
+        cursor["change_tracking_attribute"] = "modifyTimestamp"
+
+        plugin = LDAPDataSourcePlugin(ldap_ds_cfg, logger)
+        plugin.set_delta_cursor(cursor)
+        assert not plugin.get_delta_result().is_delta
+
+    def test_incremental_sync_disabled(self, ldap_ds_cfg, logger):
+        ldap_ds_cfg.incremental_sync_config.enabled = False
+
+        plugin = LDAPDataSourcePlugin(ldap_ds_cfg, logger)
+        plugin.set_delta_cursor(self._gen_cursor(self.base_usn, timezone.now()))
+        assert plugin.get_delta_result() is None
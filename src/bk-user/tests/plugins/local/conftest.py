@@ -24,3 +24,18 @@ from openpyxl.workbook import Workbook
 @pytest.fixture
 def user_workbook() -> Workbook:
     return load_workbook(settings.BASE_DIR / "tests/assets/fake_users.xlsx")
+
+
+@pytest.fixture
+def read_only_user_workbook() -> Workbook:
+    return load_workbook(settings.BASE_DIR / "tests/assets/fake_users.xlsx", read_only=True)
+
+
+@pytest.fixture
+def user_csv_data() -> bytes:
+    return (settings.BASE_DIR / "tests/assets/fake_users.csv").read_bytes()
+
+
+@pytest.fixture
+def user_jsonl_data() -> bytes:
+    return (settings.BASE_DIR / "tests/assets/fake_users.jsonl").read_bytes()
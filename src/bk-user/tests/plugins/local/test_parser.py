@@ -15,13 +15,17 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import io
 from typing import List
+from unittest import mock
 
+import phonenumbers
 import pytest
 from bkuser.plugins.local.exceptions import (
     CustomColumnNameInvalid,
     DuplicateColumnName,
     DuplicateUsername,
+    FileContentInvalid,
     InvalidLeader,
     InvalidOrganization,
     InvalidUsername,
@@ -29,7 +33,11 @@ from bkuser.plugins.local.exceptions import (
     SheetColumnsNotMatch,
     UserSheetNotExists,
 )
-from bkuser.plugins.local.parser import LocalDataSourceDataParser
+from bkuser.plugins.local.parser import (
+    LocalDataSourceCSVDataParser,
+    LocalDataSourceDataParser,
+    LocalDataSourceJSONLinesDataParser,
+)
 from bkuser.plugins.local.utils import gen_dept_code
 from bkuser.plugins.models import RawDataSourceDepartment, RawDataSourceUser
 
@@ -340,3 +348,110 @@ class TestLocalDataSourceDataParser:
                 departments=[],
             ),
         ]
+
+    def test_parse_read_only_workbook(self, logger, user_workbook, read_only_user_workbook):
+        parser = LocalDataSourceDataParser(logger, user_workbook)
+        parser.parse()
+
+        read_only_parser = LocalDataSourceDataParser(logger, read_only_user_workbook)
+        read_only_parser.parse()
+
+        assert sorted(read_only_parser.get_departments(), key=lambda d: d.code) == sorted(
+            parser.get_departments(), key=lambda d: d.code
+        )
+        assert read_only_parser.get_users() == parser.get_users()
+
+    def test_parse_phone_number_with_cache(self, logger, user_workbook):
+        # 多个用户使用相同的手机号，只会解析一次
+        for row_idx in range(3, 8):
+            user_workbook["users"][f"D{row_idx}"].value = "+6313512345673"
+
+        parser = LocalDataSourceDataParser(logger, user_workbook)
+        with mock.patch("bkuser.plugins.local.parser.phonenumbers.parse", wraps=phonenumbers.parse) as parse:
+            parser.parse()
+
+        # 除去重复的手机号，还有 maiba，baishier，freedom 三个用户的手机号带国际区号
+        assert parse.call_count == 4  # noqa: PLR2004
+        assert {
+            (u.properties["phone"], u.properties["phone_country_code"])
+            for u in parser.get_users()
+            if u.code in ["zhangsan", "lisi", "wangwu", "zhaoliu", "liuqi"]
+        } == {("13512345673", "63")}
+
+
+class TestLocalDataSourceCSVDataParser:
+    def test_parse(self, logger, user_workbook, user_csv_data):
+        parser = LocalDataSourceDataParser(logger, user_workbook)
+        parser.parse()
+
+        csv_parser = LocalDataSourceCSVDataParser(logger, io.BytesIO(user_csv_data))
+        csv_parser.parse()
+
+        assert sorted(csv_parser.get_departments(), key=lambda d: d.code) == sorted(
+            parser.get_departments(), key=lambda d: d.code
+        )
+        assert csv_parser.get_users() == parser.get_users()
+
+    def test_parse_with_bom(self, logger, user_csv_data):
+        parser = LocalDataSourceCSVDataParser(logger, io.BytesIO(b"\xef\xbb\xbf" + user_csv_data))
+        parser.parse()
+        assert len(parser.get_users()) == 12  # noqa: PLR2004
+
+    def test_validate_case_columns_not_match(self, logger, user_csv_data):
+        data = user_csv_data.replace("姓名/full_name".encode(), "这不是姓名/not_full_name".encode())
+        with pytest.raises(SheetColumnsNotMatch):
+            LocalDataSourceCSVDataParser(logger, io.BytesIO(data)).parse()
+
+    def test_validate_case_required_field_is_empty(self, logger, user_csv_data):
+        data = user_csv_data.replace(b"zhangsan@m.com", b"")
+        with pytest.raises(RequiredFieldIsEmpty):
+            LocalDataSourceCSVDataParser(logger, io.BytesIO(data)).parse()
+
+    def test_validate_case_duplicate_username(self, logger, user_csv_data):
+        data = user_csv_data.replace(b"\nwangwu,", b"\nZhangSan,")
+        with pytest.raises(DuplicateUsername):
+            LocalDataSourceCSVDataParser(logger, io.BytesIO(data)).parse()
+
+    def test_validate_case_not_utf8(self, logger, user_csv_data):
+        data = user_csv_data.decode().encode("gbk")
+        with pytest.raises(FileContentInvalid):
+            LocalDataSourceCSVDataParser(logger, io.BytesIO(data)).parse()
+
+
+class TestLocalDataSourceJSONLinesDataParser:
+    def test_parse(self, logger, user_workbook, user_jsonl_data):
+        parser = LocalDataSourceDataParser(logger, user_workbook)
+        parser.parse()
+
+        jsonl_parser = LocalDataSourceJSONLinesDataParser(logger, io.BytesIO(user_jsonl_data))
+        jsonl_parser.parse()
+
+        assert sorted(jsonl_parser.get_departments(), key=lambda d: d.code) == sorted(
+            parser.get_departments(), key=lambda d: d.code
+        )
+        assert jsonl_parser.get_users() == parser.get_users()
+
+    def test_validate_case_unknown_column(self, logger, user_jsonl_data):
+        # 首个用户记录之后，出现未知的列名
+        lines = user_jsonl_data.splitlines()
+        lines[1] = lines[1].replace("籍贯/region".encode(), "籍贯/birthplace".encode())
+        data = b"\n".join(lines)
+        with pytest.raises(SheetColumnsNotMatch):
+            LocalDataSourceJSONLinesDataParser(logger, io.BytesIO(data)).parse()
+
+    def test_validate_case_invalid_username(self, logger, user_jsonl_data):
+        data = user_jsonl_data.replace(b'"wangwu"', '"王五"'.encode())
+        with pytest.raises(InvalidUsername):
+            LocalDataSourceJSONLinesDataParser(logger, io.BytesIO(data)).parse()
+
+    @pytest.mark.parametrize(
+        "line",
+        [
+            b"not a json",
+            b'["zhangsan", "\xe5\xbc\xa0\xe4\xb8\x89"]',
+            '{"用户名/username": ["zhangsan"]}'.encode(),
+        ],
+    )
+    def test_validate_case_invalid_content(self, logger, user_jsonl_data, line):
+        with pytest.raises(FileContentInvalid):
+            LocalDataSourceJSONLinesDataParser(logger, io.BytesIO(user_jsonl_data + line + b"\n")).parse()
@@ -16,6 +16,7 @@
 # to the current version of the project delivered to anyone in the future.
 
 import pytest
+from bkuser.plugins.local.constants import LocalDataSourceImportFileFormat
 from bkuser.plugins.local.models import LocalDataSourcePluginConfig
 from bkuser.plugins.local.plugin import LocalDataSourcePlugin
 
@@ -34,6 +35,19 @@ class TestLocalDataSourcePlugin:
         plugin = LocalDataSourcePlugin(local_ds_cfg, logger, user_workbook)
         assert len(plugin.fetch_users()) == 12  # noqa: PLR2004
 
+    @pytest.mark.parametrize(
+        ("file_format", "data_fixture"),
+        [
+            (LocalDataSourceImportFileFormat.CSV, "user_csv_data"),
+            (LocalDataSourceImportFileFormat.JSONL, "user_jsonl_data"),
+        ],
+    )
+    def test_get_users_with_raw_data(self, request, local_ds_cfg, logger, file_format, data_fixture):
+        raw_data = request.getfixturevalue(data_fixture)
+        plugin = LocalDataSourcePlugin(local_ds_cfg, logger, raw_data=raw_data, file_format=file_format)
+        assert len(plugin.fetch_departments()) == 12  # noqa: PLR2004
+        assert len(plugin.fetch_users()) == 12  # noqa: PLR2004
+
     def test_test_connection(self, local_ds_cfg, logger, user_workbook):
         with pytest.raises(NotImplementedError):
             LocalDataSourcePlugin(local_ds_cfg, logger, user_workbook).test_connection()
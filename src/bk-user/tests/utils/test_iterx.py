@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 Tencent. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import pytest
+from bkuser.utils.iterx import chunked, concurrent_chain, prefetched
+
+
+@pytest.mark.parametrize(
+    ("iterable", "size", "expected"),
+    [
+        ([], 2, []),
+        ([1, 2, 3], 5, [[1, 2, 3]]),
+        ([1, 2, 3, 4], 2, [[1, 2], [3, 4]]),
+        ([1, 2, 3, 4, 5], 2, [[1, 2], [3, 4], [5]]),
+        ((i for i in range(5)), 3, [[0, 1, 2], [3, 4]]),
+    ],
+)
+def test_chunked(iterable, size, expected):
+    assert list(chunked(iterable, size)) == expected
+
+
+def test_chunked_with_invalid_size():
+    with pytest.raises(ValueError, match="size must be greater than 0"):
+        list(chunked([1, 2, 3], 0))
+
+
+def test_prefetched():
+    with prefetched((i for i in range(100)), maxsize=3) as items:
+        assert list(items) == list(range(100))
+
+
+def test_prefetched_with_error():
+    def gen():
+        yield 1
+        raise RuntimeError("fetch failed")
+
+    with prefetched(gen(), maxsize=3) as items:
+        assert next(items) == 1
+        with pytest.raises(RuntimeError, match="fetch failed"):
+            next(items)
+
+
+def test_prefetched_exit_early():
+    closed = []
+
+    def gen():
+        try:
+            yield from range(100)
+        finally:
+            closed.append(True)
+
+    with prefetched(gen(), maxsize=1) as items:
+        assert next(items) == 0
+
+    # 提前退出后，后台线程停止且原迭代器被关闭
+    assert closed == [True]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2, 5])
+def test_concurrent_chain(max_workers):
+    iterables = [range(i * 10, i * 11) for i in range(4)]
+    assert list(concurrent_chain(iterables, max_workers=max_workers, maxsize=2)) == [10, 20, 21, 30, 31, 32]
+
+
+def test_concurrent_chain_with_error():
+    def gen():
+        yield 1
+        raise RuntimeError("fetch failed")
+
+    items = concurrent_chain([range(2), gen(), range(2)], max_workers=2, maxsize=1)
+    assert [next(items) for _ in range(3)] == [0, 1, 1]
+    with pytest.raises(RuntimeError, match="fetch failed"):
+        next(items)
+
+
+def test_concurrent_chain_exit_early():
+    closed = []
+
+    def gen():
+        try:
+            yield from range(100)
+        finally:
+            closed.append(True)
+
+    items = concurrent_chain([gen(), gen(), gen()], max_workers=2, maxsize=1)
+    assert next(items) == 0
+    items.close()
+
+    # 提前退出后，已经开始消费的可迭代对象都会被关闭
+    assert closed == [True, True]